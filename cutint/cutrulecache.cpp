@@ -0,0 +1,147 @@
+#include "cutrulecache.hpp"
+
+namespace xintegration
+{
+
+  bool CutRuleCache::ElementMatches(const ElementEntries & el, FlatVector<> lset_vals) const
+  {
+    if (el.lset_vals.size() != lset_vals.Size())
+      return false;
+    for (int i = 0; i < lset_vals.Size(); i++)
+      if (el.lset_vals[i] != lset_vals[i])
+        return false;
+    return true;
+  }
+
+  IntegrationRule * CutRuleCache::Lookup (ElementId ei, FlatVector<> lset_vals,
+                                          DOMAIN_TYPE dt, int intorder,
+                                          SWAP_DIMENSIONS_POLICY quad_dir_policy,
+                                          LocalHeap & lh) const
+  {
+    const int vb = ei.VB() == VOL ? 0 : 1;
+    const size_t elnr = ei.Nr();
+
+    std::shared_lock<std::shared_timed_mutex> guard(resize_mutex);
+    if (elnr >= elements[vb].size())
+    {
+      n_misses++;
+      return nullptr;
+    }
+
+    std::lock_guard<std::mutex> elguard(element_mutex[elnr % N_LOCKS]);
+    const ElementEntries & el = elements[vb][elnr];
+    if (!ElementMatches(el, lset_vals))
+    {
+      n_misses++;
+      return nullptr;
+    }
+
+    for (const Entry & entry : el.entries)
+      if ((entry.dt == dt) && (entry.intorder == intorder) && (entry.quad_dir_policy == quad_dir_policy))
+      {
+        auto ir = new (lh) IntegrationRule(entry.points.size(), lh);
+        for (int i = 0; i < ir->Size(); i++)
+          (*ir)[i] = IntegrationPoint(entry.points[i], entry.weights[i]);
+        n_hits++;
+        return ir;
+      }
+
+    n_misses++;
+    return nullptr;
+  }
+
+  void CutRuleCache::Store (ElementId ei, FlatVector<> lset_vals,
+                            DOMAIN_TYPE dt, int intorder,
+                            SWAP_DIMENSIONS_POLICY quad_dir_policy,
+                            const IntegrationRule & ir_untrafo)
+  {
+    const int vb = ei.VB() == VOL ? 0 : 1;
+    const size_t elnr = ei.Nr();
+
+    {
+      std::shared_lock<std::shared_timed_mutex> guard(resize_mutex);
+      if (elnr < elements[vb].size())
+      {
+        std::lock_guard<std::mutex> elguard(element_mutex[elnr % N_LOCKS]);
+        ElementEntries & el = elements[vb][elnr];
+        if (!ElementMatches(el, lset_vals))
+        {
+          if (el.entries.size() > 0)
+            n_invalidations++;
+          el.entries.clear();
+          el.lset_vals.assign(lset_vals.Data(), lset_vals.Data() + lset_vals.Size());
+        }
+
+        Entry entry;
+        entry.dt = dt;
+        entry.intorder = intorder;
+        entry.quad_dir_policy = quad_dir_policy;
+        entry.points.resize(ir_untrafo.Size());
+        entry.weights.resize(ir_untrafo.Size());
+        for (int i = 0; i < ir_untrafo.Size(); i++)
+        {
+          entry.points[i] = ir_untrafo[i].Point();
+          entry.weights[i] = ir_untrafo[i].Weight();
+        }
+        el.entries.push_back(std::move(entry));
+        return;
+      }
+    }
+
+    {
+      std::unique_lock<std::shared_timed_mutex> guard(resize_mutex);
+      if (elnr >= elements[vb].size())
+        elements[vb].resize(elnr+1);
+    }
+    Store(ei, lset_vals, dt, intorder, quad_dir_policy, ir_untrafo);
+  }
+
+  void CutRuleCache::Clear ()
+  {
+    std::unique_lock<std::shared_timed_mutex> guard(resize_mutex);
+    for (int vb : {0,1})
+      elements[vb].clear();
+  }
+
+  static std::mutex shared_caches_mutex;
+  static std::map<const CoefficientFunction*, std::weak_ptr<CutRuleCache>> shared_caches;
+
+  shared_ptr<CutRuleCache> GetSharedCutRuleCache (const CoefficientFunction * lset)
+  {
+    std::lock_guard<std::mutex> guard(shared_caches_mutex);
+    // remove caches that are not used anymore
+    for (auto it = shared_caches.begin(); it != shared_caches.end(); )
+      if (it->second.expired())
+        it = shared_caches.erase(it);
+      else
+        ++it;
+    auto cache = shared_caches[lset].lock();
+    if (!cache)
+    {
+      cache = make_shared<CutRuleCache>();
+      shared_caches[lset] = cache;
+    }
+    return cache;
+  }
+
+  Array<shared_ptr<CutRuleCache>> GetSharedCutRuleCaches ()
+  {
+    std::lock_guard<std::mutex> guard(shared_caches_mutex);
+    Array<shared_ptr<CutRuleCache>> caches;
+    for (auto & entry : shared_caches)
+      if (auto cache = entry.second.lock())
+        caches.Append(cache);
+    return caches;
+  }
+
+  size_t CutRuleCache::Size () const
+  {
+    std::shared_lock<std::shared_timed_mutex> guard(resize_mutex);
+    size_t cnt = 0;
+    for (int vb : {0,1})
+      for (const ElementEntries & el : elements[vb])
+        cnt += el.entries.size();
+    return cnt;
+  }
+
+}
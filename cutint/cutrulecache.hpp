@@ -0,0 +1,97 @@
+#pragma once
+#include "../utils/ngsxstd.hpp"
+#include <mutex>
+#include <shared_mutex>
+#include <atomic>
+#include <map>
+
+using namespace ngfem;
+using namespace ngcomp;
+
+namespace xintegration
+{
+
+  /// Storage of untransformed cut integration rules (straight cuts, single
+  /// level set) which lives outside of the LocalHeap. Entries are stored per
+  /// element and are keyed by domain type, integration order and the quad
+  /// direction policy. The level set values on the element are stored
+  /// together with the entries so that an element whose level set values
+  /// have changed (i.e. a new level set vector "version") invalidates all
+  /// entries of that element.
+  ///
+  /// The cache is shared (via shared_ptr) by all copies of a
+  /// LevelsetIntegrationDomain, i.e. all integrators that are based on the
+  /// same domain description share the same rules.
+  class CutRuleCache
+  {
+    struct Entry
+    {
+      DOMAIN_TYPE dt;
+      int intorder;
+      SWAP_DIMENSIONS_POLICY quad_dir_policy;
+      std::vector<Vec<3>> points;
+      std::vector<double> weights;
+    };
+
+    struct ElementEntries
+    {
+      std::vector<double> lset_vals;
+      std::vector<Entry> entries;
+    };
+
+    static constexpr int N_LOCKS = 64;
+
+    std::vector<ElementEntries> elements[2]; // VOL and BND elements
+    mutable std::shared_timed_mutex resize_mutex;
+    mutable std::mutex element_mutex[N_LOCKS];
+
+    mutable std::atomic<size_t> n_hits{0};
+    mutable std::atomic<size_t> n_misses{0};
+    mutable std::atomic<size_t> n_invalidations{0};
+
+    bool ElementMatches(const ElementEntries & el, FlatVector<> lset_vals) const;
+  public:
+    CutRuleCache () { ; }
+
+    /// Looks up an untransformed rule for element ei. If the level set values
+    /// on the element coincide with the stored values and an entry with the
+    /// same key exists, a copy of the rule (allocated on lh) is returned,
+    /// otherwise nullptr.
+    IntegrationRule * Lookup (ElementId ei, FlatVector<> lset_vals,
+                              DOMAIN_TYPE dt, int intorder,
+                              SWAP_DIMENSIONS_POLICY quad_dir_policy,
+                              LocalHeap & lh) const;
+
+    /// Stores an untransformed rule for element ei. If the level set values
+    /// on the element differ from the stored ones, all old entries of the
+    /// element are discarded.
+    void Store (ElementId ei, FlatVector<> lset_vals,
+                DOMAIN_TYPE dt, int intorder,
+                SWAP_DIMENSIONS_POLICY quad_dir_policy,
+                const IntegrationRule & ir_untrafo);
+
+    /// Removes all entries
+    void Clear ();
+
+    /// Number of stored rules
+    size_t Size () const;
+
+    size_t GetNHits () const { return n_hits; }
+    size_t GetNMisses () const { return n_misses; }
+    size_t GetNInvalidations () const { return n_invalidations; }
+    void ResetStatistics () const { n_hits = 0; n_misses = 0; n_invalidations = 0; }
+  };
+
+  /// Returns the cache which is shared by all level set domains based on the
+  /// level set function lset (a P1 GridFunction or a CoefficientFunction),
+  /// i.e. integrators on the same level set (but possibly different domain
+  /// types and orders) use one cache, so that the untransformed cut rule is
+  /// constructed only once per element and then reused by all integrators
+  /// that need the same rule. Only the rule on the reference element is
+  /// shared, the mapped rule is still computed by every integrator.
+  shared_ptr<CutRuleCache> GetSharedCutRuleCache (const CoefficientFunction * lset);
+
+  /// all shared caches that are currently in use
+  Array<shared_ptr<CutRuleCache>> GetSharedCutRuleCaches ();
+
+}
@@ -18,7 +18,7 @@ namespace xintegration
     subdivlvl(subdivlvl_in),
     quad_dir_policy(quad_dir_policy_in)
   {
-    ;
+    EncodeDomainTypeCodes();
   }
     
   LevelsetIntegrationDomain::LevelsetIntegrationDomain( const Array<shared_ptr<GridFunction>> & gfs_lset_in,
@@ -35,7 +35,7 @@ namespace xintegration
     subdivlvl(subdivlvl_in),
     quad_dir_policy(quad_dir_policy_in)
   {
-    ;
+    EncodeDomainTypeCodes();
   }
 
   LevelsetIntegrationDomain::LevelsetIntegrationDomain( const Array<shared_ptr<CoefficientFunction>> & cfs_lset_in,
@@ -52,7 +52,7 @@ namespace xintegration
     subdivlvl(subdivlvl_in),
     quad_dir_policy(quad_dir_policy_in)
   {
-    ;
+    EncodeDomainTypeCodes();
   }
     
   LevelsetIntegrationDomain::LevelsetIntegrationDomain( const shared_ptr<CoefficientFunction> & cf_lset_in,
@@ -73,6 +73,7 @@ namespace xintegration
     gfs_lset[0] = gf_lset_in;    
     cfs_lset[0] = cf_lset_in;    
     dts[0].SetSize(1); dts[0][0] = dt;    
+    EncodeDomainTypeCodes();
   }
   
   LevelsetIntegrationDomain::LevelsetIntegrationDomain( const shared_ptr<CoefficientFunction> & cf_lset_in,
@@ -95,6 +96,7 @@ namespace xintegration
     if (gfs_lset[0] == nullptr)
       gfs_lset.SetSize(0);
     dts[0].SetSize(1); dts[0][0] = dt;    
+    EncodeDomainTypeCodes();
   }
     
   LevelsetIntegrationDomain::LevelsetIntegrationDomain( const shared_ptr<GridFunction> & gf_lset_in,
@@ -113,6 +115,21 @@ namespace xintegration
   {
     gfs_lset[0] = gf_lset_in;    
     dts[0].SetSize(1); dts[0][0] = dt;    
+    EncodeDomainTypeCodes();
+  }
+
+  void LevelsetIntegrationDomain::EncodeDomainTypeCodes()
+  {
+    dt_codes.SetSize(0);
+    for (const Array<DOMAIN_TYPE> & dtt : dts)
+    {
+      if (dtt.Size() > MLSET_CODE_MAX_LEVELSETS)
+      {
+        dt_codes.SetSize(0);
+        return;
+      }
+      dt_codes.Append(EncodeDomainTypes(dtt));
+    }
   }
 
   ostream & operator<< (ostream & ost, const LevelsetIntegrationDomain & lsetintdom)
@@ -276,5 +293,16 @@ namespace xintegration
       return make_shared<LevelsetIntegrationDomain>(gf_lsets,dtas,order,time_order,subdivlvl,quad_dir_policy);
     }
   }
+
+  shared_ptr<LevelsetIntegrationDomain> PyObject2LevelsetIntegrationDomain(py::object lsetdom)
+  {
+    py::extract<shared_ptr<LevelsetIntegrationDomain>> lsetintdom(lsetdom);
+    if (lsetintdom.check())
+      return make_shared<LevelsetIntegrationDomain>(*lsetintdom());
+    else if (py::isinstance<py::dict>(lsetdom))
+      return PyDict2LevelsetIntegrationDomain(py::extract<py::dict>(lsetdom)());
+    else
+      throw Exception("levelset_domain is neither a LevelsetDomain nor a dictionary.");
+  }
   
 } // end of namespace
@@ -1,5 +1,6 @@
 #pragma once
 #include "../utils/ngsxstd.hpp"
+#include "cutrulecache.hpp"
 #include <python_ngstd.hpp>
 
 using namespace ngfem;
@@ -19,6 +20,11 @@ namespace xintegration
     int time_intorder = -1;
     int subdivlvl = 0;
     SWAP_DIMENSIONS_POLICY quad_dir_policy = FIND_OPTIMAL;
+    shared_ptr<CutRuleCache> cut_rule_cache = nullptr;
+    // domain type tuples encoded as bitmasks (empty if not possible)
+    Array<MLSET_CODE> dt_codes;
+
+    void EncodeDomainTypeCodes();
   public:
     LevelsetIntegrationDomain( const Array<shared_ptr<CoefficientFunction>> & cfs_lset_in,
                                const Array<shared_ptr<GridFunction>> & gfs_lset_in,
@@ -113,6 +119,13 @@ namespace xintegration
       return dts;
     }
 
+    /// the domain type tuples as bitmasks (cf. EncodeDomainTypes), empty if
+    /// there are too many level sets for the encoding
+    const Array<MLSET_CODE> & GetDomainTypeCodes () const
+    {
+      return dt_codes;
+    }
+
     int GetIntegrationOrder () const
     {
       return intorder;
@@ -142,6 +155,30 @@ namespace xintegration
     {
       return quad_dir_policy;
     }
+
+    /// cache for cut integration rules, shared between all copies of this domain
+    /// (nullptr if caching is not enabled)
+    shared_ptr<CutRuleCache> GetCutRuleCache () const
+    {
+      return cut_rule_cache;
+    }
+
+    /// For a single level set the cache is shared with all other domains on
+    /// the same level set function (cf. GetSharedCutRuleCache)
+    void EnableCutRuleCache (bool enable = true)
+    {
+      if (!enable)
+        cut_rule_cache = nullptr;
+      else if (cut_rule_cache == nullptr)
+      {
+        if (!IsMultiLevelsetDomain() && gfs_lset.Size() > 0 && gfs_lset[0] != nullptr)
+          cut_rule_cache = GetSharedCutRuleCache(gfs_lset[0].get());
+        else if (!IsMultiLevelsetDomain() && cfs_lset.Size() > 0 && cfs_lset[0] != nullptr)
+          cut_rule_cache = GetSharedCutRuleCache(cfs_lset[0].get());
+        else
+          cut_rule_cache = make_shared<CutRuleCache>();
+      }
+    }
     
   private:
   };
@@ -152,6 +189,10 @@ namespace xintegration
   
   shared_ptr<LevelsetIntegrationDomain> PyDict2LevelsetIntegrationDomain(py::dict dictionary);
 
+  /// accepts a (python) LevelsetDomain object or a levelset_domain dictionary.
+  /// A LevelsetDomain is copied (the copy shares the cut rule cache).
+  shared_ptr<LevelsetIntegrationDomain> PyObject2LevelsetIntegrationDomain(py::object lsetdom);
+
   
 }
 
@@ -48,18 +48,31 @@ namespace xintegration
       cout << "domain types current of element (corresp. to mlset): \n" << lset_dts << endl;
     }
     
-    for (const Array<DOMAIN_TYPE> & dts : lsetintdom.GetDomainTypes())
+    // with the bitmask encoding the compatibility checks are bitwise operations
+    const Array<MLSET_CODE> & dt_codes = lsetintdom.GetDomainTypeCodes();
+    const bool use_codes = dt_codes.Size() == lsetintdom.GetDomainTypes().Size();
+    const MLSET_CODE el_code = use_codes ? EncodeDomainTypes(lset_dts) : 0;
+    const bool el_is_cut = use_codes && MlsetCodeIsCut(el_code, M);
+
+    for (int k = 0; k < lsetintdom.GetDomainTypes().Size(); k++)
     {
+      const Array<DOMAIN_TYPE> & dts = lsetintdom.GetDomainTypes()[k];
       bool compatible = true;
       bool cut_element = false;
 
       const IntegrationRule* ir = nullptr;
-    
-      for (int i = 0; i < M; i++)
+
+      if (use_codes)
       {
-        if ((lset_dts[i] != IF) && (lset_dts[i] != dts[i])) compatible = false; //loop could break here now
-        else if (lset_dts[i] == IF) cut_element = true;
+        compatible = MlsetCodesCompatible(el_code, dt_codes[k], M);
+        cut_element = el_is_cut;
       }
+      else
+        for (int i = 0; i < M; i++)
+        {
+          if ((lset_dts[i] != IF) && (lset_dts[i] != dts[i])) compatible = false; //loop could break here now
+          else if (lset_dts[i] == IF) cut_element = true;
+        }
 
       if (debug_out)
       {
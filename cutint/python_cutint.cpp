@@ -1,4 +1,5 @@
 #include <python_ngstd.hpp>
+#include <pybind11/numpy.h>
 
 /// from ngsolve
 #include <solve.hpp>
@@ -16,52 +17,274 @@ typedef GridFunction GF;
 typedef shared_ptr<GF> PyGF;
   
 
+/// Translates the levelset_domain argument of IntegrateX into (possibly
+/// several) LevelsetIntegrationDomains. Several domains are described either
+/// by a list of LevelsetDomains/dictionaries or by a dictionary with a single
+/// level set and a list of domain types. Returns true in these cases.
+static bool PyObject2LevelsetIntegrationDomains(py::object lsetdom,
+                                                Array<shared_ptr<LevelsetIntegrationDomain>> & lsetintdoms)
+{
+  lsetintdoms.SetSize(0);
+  if (py::isinstance<py::list>(lsetdom))
+  {
+    for (auto dom : lsetdom)
+      lsetintdoms.Append(PyObject2LevelsetIntegrationDomain(py::reinterpret_borrow<py::object>(dom)));
+    return true;
+  }
+  if (py::isinstance<py::dict>(lsetdom))
+  {
+    py::dict dictionary = py::extract<py::dict>(lsetdom)();
+    if (dictionary.contains("levelset") && dictionary.contains("domain_type")
+        && !py::isinstance<py::tuple>(dictionary["levelset"])
+        && py::isinstance<py::list>(dictionary["domain_type"]))
+    {
+      for (auto dt : dictionary["domain_type"])
+      {
+        py::dict single_dictionary;
+        for (auto item : dictionary)
+          single_dictionary[item.first] = item.second;
+        single_dictionary["domain_type"] = dt;
+        lsetintdoms.Append(PyDict2LevelsetIntegrationDomain(single_dictionary));
+      }
+      return true;
+    }
+  }
+  lsetintdoms.Append(PyObject2LevelsetIntegrationDomain(lsetdom));
+  return false;
+}
+
 void ExportNgsx_cutint(py::module &m)
 {
+  py::class_<LevelsetIntegrationDomain, shared_ptr<LevelsetIntegrationDomain>>
+    (m, "LevelsetDomain",
+     docu_string(R"raw_string(
+Description of a level set domain (level set(s), domain type(s) and integration specifica) which
+can be used instead of the levelset_domain dictionary in SymbolicBFI, SymbolicLFI and Integrate.
+The description is parsed only once (when the LevelsetDomain is created) and all integrators and
+integrals that use the same LevelsetDomain share the cache of cut integration rules, i.e. cut rules
+are only reconstructed if the level set changes.
+
+Note that a LevelsetDomain stores the level set function that has been given. If a P1 GridFunction
+is used, changes of its values are taken into account. Otherwise (CoefficientFunction/subdivlvl>0)
+the level set is evaluated whenever a cut rule is required.
+)raw_string"))
+    .def(py::init([](py::object lset,
+                     py::object dt,
+                     int order,
+                     int time_order,
+                     int subdivlvl,
+                     SWAP_DIMENSIONS_POLICY quad_dir_policy)
+                  {
+                    py::dict dictionary;
+                    dictionary["levelset"] = lset;
+                    dictionary["domain_type"] = dt;
+                    dictionary["order"] = order;
+                    dictionary["time_order"] = time_order;
+                    dictionary["subdivlvl"] = subdivlvl;
+                    dictionary["quad_dir_policy"] = quad_dir_policy;
+                    auto lsetintdom = PyDict2LevelsetIntegrationDomain(dictionary);
+                    lsetintdom->EnableCutRuleCache();
+                    return lsetintdom;
+                  }),
+         py::arg("levelset"),
+         py::arg("domain_type"),
+         py::arg("order")=-1,
+         py::arg("time_order")=-1,
+         py::arg("subdivlvl")=0,
+         py::arg("quad_dir_policy")=FIND_OPTIMAL,
+         docu_string(R"raw_string(
+Parameters
+
+levelset : ngsolve.CoefficientFunction or tuple(ngsolve.GridFunction)
+  level set function(s), cf. "levelset" entry of the levelset_domain dictionary
+
+domain_type : {NEG,POS,IF} (ENUM), tuple(ENUM), list(tuple(ENUM)) or DomainTypeArray
+  domain type(s), cf. "domain_type" entry of the levelset_domain dictionary
+
+order : int
+  integration order (-1: the order is determined by the integrator or Integrate)
+
+time_order : int
+  integration order in time (-1: determined by the integrator or Integrate)
+
+subdivlvl : int
+  number of subdivision levels (only single level sets on simplices)
+
+quad_dir_policy : {FIRST, OPTIMAL, FALLBACK} (ENUM)
+  integration direction policy for iterated integrals approach
+)raw_string"))
+    .def(py::init([](py::dict dictionary)
+                  {
+                    auto lsetintdom = PyDict2LevelsetIntegrationDomain(dictionary);
+                    lsetintdom->EnableCutRuleCache();
+                    return lsetintdom;
+                  }),
+         py::arg("levelset_domain"),
+         "Create LevelsetDomain from a levelset_domain dictionary")
+    .def("Copy", [](shared_ptr<LevelsetIntegrationDomain> self)
+         {
+           return make_shared<LevelsetIntegrationDomain>(*self);
+         },
+         "Copy of the LevelsetDomain which shares the cache of cut integration rules")
+    .def_property("order",
+                  &LevelsetIntegrationDomain::GetIntegrationOrder,
+                  &LevelsetIntegrationDomain::SetIntegrationOrder,
+                  "integration order (-1: not specified)")
+    .def_property("time_order",
+                  &LevelsetIntegrationDomain::GetTimeIntegrationOrder,
+                  &LevelsetIntegrationDomain::SetTimeIntegrationOrder,
+                  "integration order in time (-1: not specified)")
+    .def_property_readonly("subdivlvl", &LevelsetIntegrationDomain::GetNSubdivisionLevels)
+    .def_property_readonly("quad_dir_policy", &LevelsetIntegrationDomain::GetSwapDimensionPolicy)
+    .def_property_readonly("levelset", [](shared_ptr<LevelsetIntegrationDomain> self) -> py::object
+         {
+           if (self->IsMultiLevelsetDomain())
+           {
+             py::tuple lsets(self->GetLevelsetGFs().Size());
+             for (int i = 0; i < self->GetLevelsetGFs().Size(); i++)
+               lsets[i] = py::cast(self->GetLevelsetGFs()[i]);
+             return lsets;
+           }
+           else if (self->GetLevelsetGF())
+             return py::cast(self->GetLevelsetGF());
+           else
+             return py::cast(self->GetLevelsetCF());
+         }, "level set function(s)")
+    .def_property_readonly("domain_type", [](shared_ptr<LevelsetIntegrationDomain> self) -> py::object
+         {
+           if (!self->IsMultiLevelsetDomain())
+             return py::cast(self->GetDomainType());
+           py::list dts;
+           for (auto & dt : self->GetDomainTypes())
+           {
+             py::tuple dtt(dt.Size());
+             for (int i = 0; i < dt.Size(); i++)
+               dtt[i] = py::cast(dt[i]);
+             dts.append(dtt);
+           }
+           return dts;
+         }, "domain type (single level set) or list of domain type tuples (multiple level sets)")
+    .def_property_readonly("multi_levelset", &LevelsetIntegrationDomain::IsMultiLevelsetDomain)
+    .def("__str__", [](shared_ptr<LevelsetIntegrationDomain> self)
+         {
+           stringstream str;
+           str << *self;
+           return str.str();
+         })
+    ;
+
     m.def("IntegrateX",
-        [](py::dict lsetdom,
+        [](py::object lsetdom,
            shared_ptr<MeshAccess> ma,
-           PyCF cf,
-           int heapsize)
+           py::object cf,
+           VorB vb,
+           bool element_wise,
+           bool region_wise,
+           int heapsize) -> py::object
         {
           static Timer t ("IntegrateX"); RegionTimer reg(t);
-          shared_ptr<LevelsetIntegrationDomain> lsetintdom = PyDict2LevelsetIntegrationDomain(lsetdom);
+          Array<shared_ptr<LevelsetIntegrationDomain>> lsetintdoms;
+          bool multiple_domains = PyObject2LevelsetIntegrationDomains(lsetdom, lsetintdoms);
+          // cut rules of previous integrals (and integrators) on the same level set are reused
+          for (auto lsetintdom : lsetintdoms)
+            lsetintdom->EnableCutRuleCache();
+
+          Array<PyCF> cfs;
+          bool multiple_cfs = py::isinstance<py::list>(cf) || py::isinstance<py::tuple>(cf);
+          if (multiple_cfs)
+            for (auto cfi : cf)
+              cfs.Append(py::extract<PyCF>(cfi)());
+          else
+            cfs.Append(py::extract<PyCF>(cf)());
+
+          const int ndom = lsetintdoms.Size();
+          const int ncf = cfs.Size();
           LocalHeap lh(heapsize, "lh-IntegrateX");
 
-          double sum = 0.0;
-          int DIM = ma->GetDimension();
+          if (element_wise && region_wise)
+            throw Exception("IntegrateX: element_wise and region_wise can not be combined");
+
+          // number of values per domain and integrand
+          int nvals = 1;
+          if (element_wise)
+            nvals = ma->GetNE(vb);
+          else if (region_wise)
+            nvals = ma->GetNRegions(vb);
+
+          // the values are written directly into the memory of the returned array
+          std::vector<size_t> shape;
+          if (multiple_domains) shape.push_back(ndom);
+          if (multiple_cfs) shape.push_back(ncf);
+          if (element_wise || region_wise) shape.push_back(nvals);
+          py::array_t<double> result(shape);
+          FlatVector<> values(ndom*ncf*nvals, result.mutable_data());
+          values = 0.0;
 
-          Array<int> dnums;
           ma->IterateElements
-            (VOL, lh, [&] (Ngs_Element el, LocalHeap & lh)
+            (vb, lh, [&] (Ngs_Element el, LocalHeap & lh)
              {
                auto & trafo = ma->GetTrafo (el, lh);
+               int k = 0;
+               if (element_wise)
+                 k = el.Nr();
+               else if (region_wise)
+                 k = el.GetIndex();
 
-               const IntegrationRule * ir;
-               Array<double> wei_arr;
-               tie (ir, wei_arr) = CreateCutIntegrationRule(*lsetintdom,trafo,lh);
+               // the mapped rule and the values of the integrands are shared by
+               // all domains with the same rule (e.g. uncut elements)
+               const IntegrationRule * ir_last = nullptr;
+               BaseMappedIntegrationRule * mir = nullptr;
+               FlatMatrix<> vals;
 
-               if (ir != nullptr)
+               for (int d = 0; d < ndom; d++)
                {
-                 BaseMappedIntegrationRule & mir = trafo(*ir, lh);
-                 FlatMatrix<> val(mir.Size(), 1, lh);
+                 const IntegrationRule * ir;
+                 Array<double> wei_arr;
+                 tie (ir, wei_arr) = CreateCutIntegrationRule(*lsetintdoms[d],trafo,lh);
+
+                 if (ir == nullptr)
+                   continue;
 
-                 cf -> Evaluate (mir, val);
+                 if (ir != ir_last)
+                 {
+                   mir = &trafo(*ir, lh);
+                   vals.AssignMemory(mir->Size(), ncf, lh);
+                   FlatMatrix<> val(mir->Size(), 1, lh);
+                   for (int j = 0; j < ncf; j++)
+                   {
+                     cfs[j] -> Evaluate (*mir, val);
+                     vals.Col(j) = val.Col(0);
+                   }
+                   ir_last = ir;
+                 }
 
-                 double lsum = 0.0;
-                 for (int i = 0; i < mir.Size(); i++)
-                     lsum += mir[i].GetMeasure()*wei_arr[i]*val(i,0);
-                 AtomicAdd(sum,lsum);
+                 for (int j = 0; j < ncf; j++)
+                 {
+                   double lsum = 0.0;
+                   for (int i = 0; i < mir->Size(); i++)
+                     lsum += (*mir)[i].GetMeasure()*wei_arr[i]*vals(i,j);
+                   if (element_wise)
+                     values[(d*ncf+j)*nvals+k] = lsum;
+                   else
+                     AtomicAdd(values[(d*ncf+j)*nvals+k],lsum);
+                 }
                }
              });
 
-          sum = ma->GetCommunicator().AllReduce(sum, MPI_SUM);
-          
-          return sum;
+          if (!element_wise)
+            for (int i = 0; i < values.Size(); i++)
+              values[i] = ma->GetCommunicator().AllReduce(values[i], MPI_SUM);
+
+          if (shape.size() == 0)
+            return py::cast(values[0]);
+          return result;
         },
         py::arg("levelset_domain"),
         py::arg("mesh"),
         py::arg("cf")=PyCF(make_shared<ConstantCoefficientFunction>(0.0)),
+        py::arg("VOL_or_BND")=VOL,
+        py::arg("element_wise")=false,
+        py::arg("region_wise")=false,
         py::arg("heapsize")=1000000,
         docu_string(R"raw_string(
 Integrate on a level set domains. The accuracy of the integration is 'order' w.r.t. a (multi-)linear
@@ -69,10 +292,15 @@ approximation of the level set function. At first, this implies that the accurac
 only be second order. However, if the isoparametric approach is used (cf. lsetcurving functionality)
 this will be improved.
 
+Several integrals can be computed in one sweep over the mesh: if a list of domains (or a list of
+domain types for a single level set) and/or a list of integrands is given, a NumPy array with the
+integrals (domains x integrands) is returned. Mapped integration rules and the evaluation of the
+integrands are shared between domains where possible.
+
 Parameters
 
-levelset_domain : dictionary which provides levelsets, domain_types and integration specifica:
-  important keys are "levelset", "domain_type", "order", the remainder are additional:
+levelset_domain : LevelsetDomain or dictionary (or a list thereof) which provides levelsets, domain_types and
+  integration specifica. Important keys are "levelset", "domain_type", "order", the remainder are additional:
 
     "levelset" : ngsolve.CoefficientFunction or a list thereof
       CoefficientFunction that describes the geometry. In the best case lset is a GridFunction of an
@@ -87,6 +315,7 @@ levelset_domain : dictionary which provides levelsets, domain_types and integrat
       * the level set function is negative (NEG)
       * the level set function is positive (POS)
       * the level set function is zero     (IF )
+      For a single level set a list of domain types results in one integral per domain type.
 
     "subdivlvl" : int
       On simplex meshes a subtriangulation is created on which the level set function lset is
@@ -103,8 +332,19 @@ levelset_domain : dictionary which provides levelsets, domain_types and integrat
 mesh : 
   Mesh to integrate on (on some part) 
 
-cf : ngsolve.CoefficientFunction
-  the integrand
+cf : ngsolve.CoefficientFunction or a list thereof
+  the (scalar) integrand(s)
+
+VOL_or_BND : {VOL,BND}
+  integrate over volume or boundary elements
+
+element_wise : bool
+  return the integrals on every (boundary) element (NumPy array with an additional last axis of
+  length ne),
+  e.g. for error indicators or cut ratios. Elements are treated in parallel.
+
+region_wise : bool
+  return the integrals on every region/material (additional last axis of length nregions)
 
 heapsize : int
   heapsize for local computations.
@@ -8,7 +8,8 @@ bool operator==(const Vec<3> a, const Vec<3> b){
 
 namespace xintegration
 {
-  DOMAIN_TYPE CheckIfStraightCut (FlatVector<> cf_lset_at_element, double epsilon) {
+  template <typename TVALS>
+  INLINE DOMAIN_TYPE T_CheckIfStraightCut (const TVALS & cf_lset_at_element, double epsilon) {
     bool haspos = false;
     bool hasneg = false;
 
@@ -23,22 +24,19 @@ namespace xintegration
     else return POS;
   }
 
-  DOMAIN_TYPE CheckIfStraightCut (vector<double> cf_lset_at_element, double epsilon) {
-    bool haspos = false;
-    bool hasneg = false;
+  DOMAIN_TYPE CheckIfStraightCut (FlatVector<> cf_lset_at_element, double epsilon) {
+    return T_CheckIfStraightCut(cf_lset_at_element, epsilon);
+  }
 
-    for (auto v : cf_lset_at_element) {
-        if (!haspos && (v > epsilon)) haspos = true;
-        if (!hasneg && (v < -epsilon)) hasneg = true;
-        if(haspos && hasneg) break;
-    }
+  DOMAIN_TYPE CheckIfStraightCut (const vector<double> & cf_lset_at_element, double epsilon) {
+    return T_CheckIfStraightCut(cf_lset_at_element, epsilon);
+  }
 
-    if ((hasneg && haspos)||(!hasneg && !haspos)) return IF;
-    else if (hasneg) return NEG;
-    else return POS;
+  DOMAIN_TYPE CheckIfStraightCut (const PolytopeLsetVals & cf_lset_at_element, double epsilon) {
+    return T_CheckIfStraightCut(cf_lset_at_element, epsilon);
   }
 
-  PolytopE SimpleX::CalcIFPolytopEUsingLset(vector<double> lset_on_points){
+  PolytopE SimpleX::CalcIFPolytopEUsingLset(const PolytopeLsetVals & lset_on_points) const {
       static Timer t ("SimpleX::CalcIFPolytopEUsingLset");
       // RegionTimer reg(t);
       // ThreadRegionTimer reg (t, TaskManager::GetThreadId());
@@ -49,7 +47,7 @@ namespace xintegration
       }
       if(D == 1) return SimpleX({Vec<3>(points[0] +(lset_on_points[0]/(lset_on_points[0]-lset_on_points[1]))*(points[1]-points[0]))});
       else {
-          Array<Vec<3>> cut_points;
+          PolytopePoints cut_points;
           for(int i = 0; i<points.Size(); i++) {
             for(int j= i+1; j<points.Size(); j++){
                 if((lset_on_points[i] >= 0) != (lset_on_points[j] >= 0)){
@@ -63,7 +61,7 @@ namespace xintegration
       }
   }
 
-  double SimpleX::GetVolume(){
+  double SimpleX::GetVolume() const {
       if(D == 0) return 1;
       else if(D == 1) return L2Norm( points[1] - points[0] );
       else if( D == 2) return L2Norm(Cross( Vec<3>(points[2] - points[0]), Vec<3>(points[1] - points[0]) ));
@@ -71,13 +69,13 @@ namespace xintegration
       else throw Exception("Calc the Volume of this type of Simplex not implemented!");
   }
 
-  double Quadrilateral::GetVolume(){
+  double Quadrilateral::GetVolume() const {
       if( D == 2) return L2Norm(Cross( Vec<3>(points[3] - points[0]), Vec<3>(points[1] - points[0])));
       else if( D == 3) return abs(Determinant<3>(points[4] - points[0], points[3] - points[0], points[1] - points[0]));
       else throw Exception("can only handle 2/3 D");
   }
 
-  void SimpleX::GetPlainIntegrationRule(IntegrationRule &intrule, int order) {
+  void SimpleX::GetPlainIntegrationRule(IntegrationRule &intrule, int order) const {
       static Timer t ("SimpleX::GetPlainIntegrationRule");
       // ThreadRegionTimer reg (t, TaskManager::GetThreadId());
       // RegionTimer reg(t);
@@ -99,7 +97,7 @@ namespace xintegration
       }
   }
 
-  void Quadrilateral::GetPlainIntegrationRule(IntegrationRule &intrule, int order) {
+  void Quadrilateral::GetPlainIntegrationRule(IntegrationRule &intrule, int order) const {
       static Timer t ("Quadrilateral::GetPlainIntegrationRule");
       //RegionTimer reg(t);
       // ThreadRegionTimer reg (t, TaskManager::GetThreadId());
@@ -132,7 +130,7 @@ namespace xintegration
       static Timer t ("LevelsetCutSimplex::Decompose");
       //RegionTimer reg(t);
       // ThreadRegionTimer reg (t, TaskManager::GetThreadId());
-      vector<double> lsetvals = lset.initial_coefs;
+      const PolytopeLsetVals & lsetvals = lset.initial_coefs;
       PolytopE s_cut = s.CalcIFPolytopEUsingLset(lsetvals);
 
       if(dt == IF) {
@@ -149,43 +147,43 @@ namespace xintegration
           }
       }
       else {
-          Array<int> relevant_base_simplex_vertices;
+          StackArray<int, 4> relevant_base_simplex_vertices;
           for(int i=0; i<s.D+1; i++)
               if( ((dt == POS) &&(lsetvals[i] >= 0)) || ((dt == NEG) &&(lsetvals[i] < 0)))
                   relevant_base_simplex_vertices.Append(i);
           if((relevant_base_simplex_vertices.Size() == 1)){ //Triangle is cut to a triangle || Tetraeder to a tetraeder
-              Array<Vec<3>> point_list(s_cut.points);
+              PolytopePoints point_list(s_cut.points);
               point_list.Append(s.points[relevant_base_simplex_vertices[0]]);
               SimplexDecomposition.Append(SimpleX(point_list));
           }
           else if((relevant_base_simplex_vertices.Size() == 2) && (s.D==2)){ //Triangle is cut to a quad
-              Array<Vec<3>> point_listA;
+              PolytopePoints point_listA;
               for(int i : relevant_base_simplex_vertices) point_listA.Append(s.points[i]);
               point_listA.Append(s_cut.points[1]);
-              Array<Vec<3>> point_listB(s_cut.points); point_listB.Append(s.points[relevant_base_simplex_vertices[0]]);
+              PolytopePoints point_listB(s_cut.points); point_listB.Append(s.points[relevant_base_simplex_vertices[0]]);
               SimplexDecomposition.Append(SimpleX(point_listA));
               SimplexDecomposition.Append(SimpleX(point_listB));
           }
           else if((relevant_base_simplex_vertices.Size() == 2) && (s.D==3)) { //Tetraeder is cut to several tetraeder
-              Array<Vec<3>> point_listA(s_cut.points); point_listA[0] = s.points[relevant_base_simplex_vertices[1]];
-              Array<Vec<3>> point_listB;
+              PolytopePoints point_listA(s_cut.points); point_listA[0] = s.points[relevant_base_simplex_vertices[1]];
+              PolytopePoints point_listB;
               for(int i : relevant_base_simplex_vertices) point_listB.Append(s.points[i]);
               point_listB.Append(s_cut.points[1]); point_listB.Append(s_cut.points[2]);
-              Array<Vec<3>> point_listC(s_cut.points); point_listC[3] = s.points[relevant_base_simplex_vertices[0]];
-              SimplexDecomposition.Append(point_listA);
-              SimplexDecomposition.Append(point_listB);
-              SimplexDecomposition.Append(point_listC);
+              PolytopePoints point_listC(s_cut.points); point_listC[3] = s.points[relevant_base_simplex_vertices[0]];
+              SimplexDecomposition.Append(SimpleX(point_listA));
+              SimplexDecomposition.Append(SimpleX(point_listB));
+              SimplexDecomposition.Append(SimpleX(point_listC));
           }
           else if((relevant_base_simplex_vertices.Size() == 3) && (s.D == 3)){
-              Array<Vec<3>> point_listA(s_cut.points); point_listA.Append(s.points[relevant_base_simplex_vertices[2]]);
-              Array<Vec<3>> point_listB;
+              PolytopePoints point_listA(s_cut.points); point_listA.Append(s.points[relevant_base_simplex_vertices[2]]);
+              PolytopePoints point_listB;
               for(int i : relevant_base_simplex_vertices) point_listB.Append(s.points[i]);
               point_listB.Append(s_cut.points[1]);
-              Array<Vec<3>> point_listC(s_cut.points); point_listC[2] = s.points[relevant_base_simplex_vertices[0]];
+              PolytopePoints point_listC(s_cut.points); point_listC[2] = s.points[relevant_base_simplex_vertices[0]];
               point_listC.Append(s.points[relevant_base_simplex_vertices[2]]);
-              SimplexDecomposition.Append(point_listA);
-              SimplexDecomposition.Append(point_listB);
-              SimplexDecomposition.Append(point_listC);
+              SimplexDecomposition.Append(SimpleX(point_listA));
+              SimplexDecomposition.Append(SimpleX(point_listB));
+              SimplexDecomposition.Append(SimpleX(point_listC));
           }
           else {
               cout << "@ lset vals: " << endl;
@@ -200,17 +198,20 @@ namespace xintegration
       // ThreadRegionTimer reg (t, TaskManager::GetThreadId());
       //RegionTimer reg(t);
       Decompose();
-      for(auto s : SimplexDecomposition) s.GetPlainIntegrationRule(intrule, order);
+      for(const auto& s : SimplexDecomposition) s.GetPlainIntegrationRule(intrule, order);
   }
 
-  bool LevelsetCutQuadrilateral::HasTopologyChangeAlongXi(){
-      vector<tuple<int,int>> EdgesOfDimXi;
-      if( q.D == 2) EdgesOfDimXi = {make_tuple(1,2),make_tuple(0,3)};
-      else if (q.D == 3) EdgesOfDimXi = {make_tuple(0,4),make_tuple(1,5),make_tuple(2,6),make_tuple(3,7)};
+  // edges of a quadrilateral (D=2) / hexahedron (D=3) along the xi direction
+  static StackArray<std::array<int,2>, 4> GetEdgesOfDimXi(int D){
+      if( D == 2) return {{1,2},{0,3}};
+      else if (D == 3) return {{0,4},{1,5},{2,6},{3,7}};
+      else throw Exception("Wrong dimensionality of q in LevelsetCutQuadrilateral");
+  }
 
+  bool LevelsetCutQuadrilateral::HasTopologyChangeAlongXi(){
       Vec<2> vals;
-      for (auto t : EdgesOfDimXi) {
-          vals[1] = lset(q.points[get<0>(t)]); vals[0] = lset(q.points[get<1>(t)]);
+      for (const auto & t : GetEdgesOfDimXi(q.D)) {
+          vals[1] = lset(q.points[t[0]]); vals[0] = lset(q.points[t[1]]);
           if(CheckIfStraightCut(vals) == IF) return true;
       }
       return false;
@@ -220,33 +221,29 @@ namespace xintegration
       static Timer t ("LevelsetCutQuadrilateral::Decompose");
       //RegionTimer reg(t);
       // ThreadRegionTimer reg (t, TaskManager::GetThreadId());
-      set<double> TopologyChangeXisS{0,1};
-      int xi = q.D ==2 ? 1 : 2;
-      vector<tuple<int,int>> EdgesOfDimXi;
-      if( q.D == 2) EdgesOfDimXi = {make_tuple(1,2),make_tuple(0,3)};
-      else if (q.D == 3) EdgesOfDimXi = {make_tuple(0,4),make_tuple(1,5),make_tuple(2,6),make_tuple(3,7)};
-      else throw Exception("Wrong dimensionality of q in LevelsetCutQuadrilateral::Decompose");
-      vector<double> vals(2);
-      for (auto t : EdgesOfDimXi) {
-          vals[1] = lset(q.points[get<0>(t)]); vals[0] = lset(q.points[get<1>(t)]);
-          SimpleX unit_line(ET_SEGM);
+      StackArray<double, 6> TopologyChangeXis{0,1};
+      PolytopeLsetVals vals(2);
+      SimpleX unit_line(ET_SEGM);
+      for (const auto & t : GetEdgesOfDimXi(q.D)) {
+          vals[1] = lset(q.points[t[0]]); vals[0] = lset(q.points[t[1]]);
           if(CheckIfStraightCut(vals) == IF) {
-              TopologyChangeXisS.insert((unit_line.CalcIFPolytopEUsingLset(vals)).points[0][0]);
+              TopologyChangeXis.Append((unit_line.CalcIFPolytopEUsingLset(vals)).points[0][0]);
           }
       }
-      vector<double> TopologyChangeXis(TopologyChangeXisS.begin(), TopologyChangeXisS.end());
+      // sorted and without duplicates
       sort(TopologyChangeXis.begin(), TopologyChangeXis.end());
+      TopologyChangeXis.SetSize(unique(TopologyChangeXis.begin(), TopologyChangeXis.end()) - TopologyChangeXis.begin());
 
-      for(int i=0; i<TopologyChangeXis.size() -1; i++){
+      for(int i=0; i<TopologyChangeXis.Size() -1; i++){
           double xi0 = TopologyChangeXis[i]; double xi1 = TopologyChangeXis[i+1];
           //if(xi1- xi0 < 1e-12) throw Exception("Orthogonal cut");
           if(q.D == 2){
               array<tuple<double, double>, 2> bnd_vals({make_tuple(q.points[0][0], q.points[2][0]), make_tuple(xi0,xi1)});
-              QuadrilateralDecomposition.Append(make_unique<LevelsetCutQuadrilateral>(lset, dt, Quadrilateral(bnd_vals),pol));
+              QuadrilateralDecomposition.Append(Quadrilateral(bnd_vals));
           }
           else if(q.D == 3){
               array<tuple<double, double>, 3> bnd_vals({make_tuple(q.points[0][0], q.points[2][0]), make_tuple(q.points[0][1], q.points[2][1]), make_tuple(xi0,xi1)});
-              QuadrilateralDecomposition.Append(make_unique<LevelsetCutQuadrilateral>(lset, dt, Quadrilateral(bnd_vals),pol));
+              QuadrilateralDecomposition.Append(Quadrilateral(bnd_vals));
           }
       }
   }
@@ -261,10 +258,11 @@ namespace xintegration
       else xi1 = q.points[4][2];
 
       const IntegrationRule & ir_ngs = SelectIntegrationRule(ET_SEGM, order);
-      for(auto p1: ir_ngs){
+      IntegrationRule new_intrule;
+      for(const auto& p1: ir_ngs){
           double xi_ast = xi0 + p1.Point()[0]*(xi1 - xi0);
-          IntegrationRule new_intrule;
-          vector<double> lsetproj( q.D == 2 ? 2 : 4);
+          new_intrule.SetSize(0);
+          PolytopeLsetVals lsetproj( q.D == 2 ? 2 : 4);
           if(q.D == 2) {
               lsetproj[1] = lset(Vec<3>(q.points[0][0],xi_ast,0)); lsetproj[0] = lset(Vec<3>(q.points[2][0], xi_ast,0));
               LevelsetCutSimplex Codim1ElemAtXast(LevelsetWrapper(lsetproj, ET_SEGM), dt, SimpleX(ET_SEGM));
@@ -302,7 +300,6 @@ namespace xintegration
   }
 
   void LevelsetCutQuadrilateral::GetIntegrationRuleOnXYPermutatedQuad(IntegrationRule &intrule, int order){
-      IntegrationRule intrule_rotated;
       LevelsetWrapper lset_rotated = lset;
       for(int i : {0,1}) for(int j: {0,1}) for(int k : {0,1}) lset_rotated.c[i][j][k] = lset.c[j][i][k];
       Quadrilateral q_rotated = q;
@@ -313,13 +310,17 @@ namespace xintegration
       Vec<3> tmp = q_rotated.points[1]; q_rotated.points[1] = q_rotated.points[3]; q_rotated.points[3] = tmp;
       if(q.D == 3){ tmp = q_rotated.points[5]; q_rotated.points[5] = q_rotated.points[7]; q_rotated.points[7] = tmp; }
       LevelsetCutQuadrilateral me_rotated(lset_rotated,dt, q_rotated, pol, false);
-      me_rotated.GetIntegrationRuleAlongXi(intrule_rotated, order);
-      for(const auto& ip: intrule_rotated) intrule.Append(IntegrationPoint(Vec<3>{ip.Point()[1], ip.Point()[0], ip.Point()[2]}, ip.Weight()));
+      // the rotated rule is appended to intrule and permuted back in place
+      const int first = intrule.Size();
+      me_rotated.GetIntegrationRuleAlongXi(intrule, order);
+      for(int i=first; i<intrule.Size(); i++) {
+          const auto ip = intrule[i];
+          intrule[i] = IntegrationPoint(Vec<3>{ip.Point()[1], ip.Point()[0], ip.Point()[2]}, ip.Weight());
+      }
   }
 
 
   void LevelsetCutQuadrilateral::GetIntegrationRuleOnXZPermutatedQuad(IntegrationRule &intrule, int order){
-      IntegrationRule intrule_rotated;
       LevelsetWrapper lset_rotated = lset;
       for(int i : {0,1}) for(int j: {0,1}) for(int k : {0,1}) lset_rotated.c[i][j][k] = lset.c[k][j][i];
       Quadrilateral q_rotated = q;
@@ -330,12 +331,16 @@ namespace xintegration
       Vec<3> tmp = q_rotated.points[1]; q_rotated.points[1] = q_rotated.points[4]; q_rotated.points[4] = tmp;
       if(q.D == 3) { tmp = q_rotated.points[2]; q_rotated.points[2] = q_rotated.points[7]; q_rotated.points[7] = tmp; }
       LevelsetCutQuadrilateral me_rotated(lset_rotated,dt, q_rotated, pol, false);
-      me_rotated.GetIntegrationRule(intrule_rotated, order);
-      for(const auto& ip: intrule_rotated) intrule.Append(IntegrationPoint(Vec<3>{ip.Point()[2], ip.Point()[1], ip.Point()[0]}, ip.Weight()));
+      // the rotated rule is appended to intrule and permuted back in place
+      const int first = intrule.Size();
+      me_rotated.GetIntegrationRule(intrule, order);
+      for(int i=first; i<intrule.Size(); i++) {
+          const auto ip = intrule[i];
+          intrule[i] = IntegrationPoint(Vec<3>{ip.Point()[2], ip.Point()[1], ip.Point()[0]}, ip.Weight());
+      }
   }
 
   void LevelsetCutQuadrilateral::GetIntegrationRuleOnYZPermutatedQuad(IntegrationRule &intrule, int order){
-      IntegrationRule intrule_rotated;
       LevelsetWrapper lset_rotated = lset;
       for(int i : {0,1}) for(int j: {0,1}) for(int k : {0,1}) lset_rotated.c[i][j][k] = lset.c[i][k][j];
       Quadrilateral q_rotated = q;
@@ -346,15 +351,20 @@ namespace xintegration
       Vec<3> tmp = q_rotated.points[3]; q_rotated.points[3] = q_rotated.points[4]; q_rotated.points[4] = tmp;
       if(q.D == 3) { tmp = q_rotated.points[2]; q_rotated.points[2] = q_rotated.points[5]; q_rotated.points[5] = tmp; }
       LevelsetCutQuadrilateral me_rotated(lset_rotated,dt, q_rotated, pol, false);
-      me_rotated.GetIntegrationRule(intrule_rotated, order);
-      for(const auto& ip: intrule_rotated) intrule.Append(IntegrationPoint(Vec<3>{ip.Point()[0], ip.Point()[2], ip.Point()[1]}, ip.Weight()));
+      // the rotated rule is appended to intrule and permuted back in place
+      const int first = intrule.Size();
+      me_rotated.GetIntegrationRule(intrule, order);
+      for(int i=first; i<intrule.Size(); i++) {
+          const auto ip = intrule[i];
+          intrule[i] = IntegrationPoint(Vec<3>{ip.Point()[0], ip.Point()[2], ip.Point()[1]}, ip.Weight());
+      }
   }
 
-  vector<double> LevelsetCutQuadrilateral::GetSufficientCritsQBound(){
+  Vec<3> LevelsetCutQuadrilateral::GetSufficientCritsQBound(){
       double Vsq = 0;
-      vector<Vec<3>> corners = {Vec<3>(0,0,0), Vec<3>(1,0,0), Vec<3>(0,1,0), Vec<3>(1,1,0)};
+      PolytopePoints corners = {Vec<3>(0,0,0), Vec<3>(1,0,0), Vec<3>(0,1,0), Vec<3>(1,1,0)};
       //auto corners = {Vec<3>(0,0,0), Vec<3>(1,0,0), Vec<3>(0,1,0), Vec<3>(1,1,0)};
-      vector<int> dim_idx_list = {0,1};
+      StackArray<int, 3> dim_idx_list = {0,1};
       if(q.D == 3) {
           corners = {Vec<3>(0,0,0), Vec<3>(1,0,0), Vec<3>(0,1,0), Vec<3>(1,1,0),
                      Vec<3>(0,0,1), Vec<3>(1,0,1), Vec<3>(0,1,1), Vec<3>(1,1,1)};
@@ -370,8 +380,8 @@ namespace xintegration
           Vsq += max;
       }
       double V = sqrt(Vsq);
-      vector<double> q_max_of_dim{0,0};
-      if(q.D == 3) q_max_of_dim.push_back(0);
+      // only the first q.D entries are relevant
+      Vec<3> q_max_of_dim(0.);
 
       for (const auto& p : corners){
           for (auto dim_idx : dim_idx_list) {
@@ -383,7 +393,7 @@ namespace xintegration
       return q_max_of_dim;
   }
 
-  vector<double> LevelsetCutQuadrilateral::GetExactCritsQBound2D(){
+  Vec<2> LevelsetCutQuadrilateral::GetExactCritsQBound2D(){
       bool allowance_array[] = {true, true};
       double h_root = -lset.c[1][0][0]/lset.c[1][1][0];
       if ((h_root > 0)&&(h_root < 1)) {
@@ -394,7 +404,7 @@ namespace xintegration
           allowance_array[0] = false;
       }
 
-      vector<double> q_max_of_dim{0,0};
+      Vec<2> q_max_of_dim(0.);
       for(const auto& p: {Vec<3>{0,0,0}, Vec<3>{1,0,0}, Vec<3>{1,1,0}, Vec<3>{0,1,0}}) {
           auto lset_grad = lset.GetGrad(p);
           double q_y = abs(lset_grad[1])/L2Norm(lset_grad);
@@ -432,7 +442,7 @@ namespace xintegration
       else if (q.D == 3){
           auto Suff_Bound = GetSufficientCritsQBound();
 
-          for(auto d : Suff_Bound) if ( isnan(d) ) throw Exception ("Sufficient Criterion calculated nan Bound!");
+          for(int d=0; d<3; d++) if ( isnan(Suff_Bound[d]) ) throw Exception ("Sufficient Criterion calculated nan Bound!");
           if(pol == FIRST_ALLOWED){
               if(Suff_Bound[2] < c) return ID;
               else if(Suff_Bound[1] < c) return Y_Z;
@@ -440,7 +450,7 @@ namespace xintegration
               else return NONE;
           }
           else if(pol == FIND_OPTIMAL){
-              int min_dim = distance ( Suff_Bound.begin(), min_element(Suff_Bound.begin(), Suff_Bound.end(), [] (double v1, double v2) {return v1 <= v2;} ));
+              int min_dim = distance ( &Suff_Bound[0], min_element(&Suff_Bound[0], &Suff_Bound[0]+3, [] (double v1, double v2) {return v1 <= v2;} ));
               if( (min_dim < 0) || (min_dim > 2) ) throw Exception("Finding optimal direction failed");
 
               if(Suff_Bound[min_dim] < c){
@@ -461,10 +471,10 @@ namespace xintegration
       if(dt_quad == IF){
           if(HasTopologyChangeAlongXi()) {
               Decompose();
-              for(auto& sub_q : QuadrilateralDecomposition){
-                  DOMAIN_TYPE dt_decomp_quad = CheckIfStraightCut(sub_q->q.GetLsetVals(lset), 1e-15);
-                  if (dt_decomp_quad == IF) sub_q->GetTensorProductAlongXiIntegrationRule(intrule, order);
-                  else if (dt_decomp_quad == dt) sub_q->q.GetPlainIntegrationRule(intrule, order);
+              for(const auto& sub_q : QuadrilateralDecomposition){
+                  DOMAIN_TYPE dt_decomp_quad = CheckIfStraightCut(sub_q.GetLsetVals(lset), 1e-15);
+                  if (dt_decomp_quad == IF) LevelsetCutQuadrilateral(lset, dt, sub_q, pol).GetTensorProductAlongXiIntegrationRule(intrule, order);
+                  else if (dt_decomp_quad == dt) sub_q.GetPlainIntegrationRule(intrule, order);
               }
           }
           else GetTensorProductAlongXiIntegrationRule(intrule, order);
@@ -473,12 +483,13 @@ namespace xintegration
   }
 
   void LevelsetCutQuadrilateral::GetFallbackIntegrationRule(IntegrationRule &intrule, int order){
-      vector<vector<int>> sub_simplices;
-      if(q.D == 2) sub_simplices = {{0,1,3}, {2,1,3}};
-      else if(q.D == 3) sub_simplices = {{3,0,1,5}, {3,1,2,5}, {3,5,2,6}, {4,5,0,3}, {4,7,5,3}, {7,6,5,3}};
-      for(auto pnts_idxs: sub_simplices){
-          Array<Vec<3>> pnt_list(pnts_idxs.size());
-          for(int i=0; i<pnts_idxs.size(); i++) pnt_list[i] = q.points[pnts_idxs[i]];
+      static const int sub_simplices_2D[2][3] = {{0,1,3}, {2,1,3}};
+      static const int sub_simplices_3D[6][4] = {{3,0,1,5}, {3,1,2,5}, {3,5,2,6}, {4,5,0,3}, {4,7,5,3}, {7,6,5,3}};
+      const int n_simplices = q.D == 2 ? 2 : 6;
+      for(int k=0; k<n_simplices; k++){
+          const int * pnts_idxs = q.D == 2 ? sub_simplices_2D[k] : sub_simplices_3D[k];
+          PolytopePoints pnt_list(q.D+1);
+          for(int i=0; i<q.D+1; i++) pnt_list[i] = q.points[pnts_idxs[i]];
           SimpleX simpl(pnt_list);
           LevelsetWrapper lset_simpl = lset; lset_simpl.update_initial_coefs(simpl.points);
           DOMAIN_TYPE dt_simpl = CheckIfStraightCut(lset_simpl.initial_coefs);
@@ -500,7 +511,19 @@ namespace xintegration
       else throw Exception ("Unknown Dimension Swap!");
   }
 
-  void LevelsetWrapper::GetCoeffsFromVals(ELEMENT_TYPE et, vector<double> vals){
+  LevelsetWrapper::LevelsetWrapper(FlatVector<> a_vals, ELEMENT_TYPE a_et){
+      PolytopeLsetVals vals(a_vals.Size());
+      for(int i=0; i<a_vals.Size(); i++) vals[i] = a_vals[i];
+      GetCoeffsFromVals(a_et, vals);
+  }
+
+  LevelsetWrapper::LevelsetWrapper(const vector<double> & a_vals, ELEMENT_TYPE a_et){
+      PolytopeLsetVals vals(a_vals.size());
+      for(int i=0; i<a_vals.size(); i++) vals[i] = a_vals[i];
+      GetCoeffsFromVals(a_et, vals);
+  }
+
+  void LevelsetWrapper::GetCoeffsFromVals(ELEMENT_TYPE et, const PolytopeLsetVals & vals){
       Vec<2, Vec<2, Vec<2, double>>> ci;
       for(int i : {0,1}) for(int j: {0,1}) for(int k : {0,1}) ci[i][j][k] = 0.; //TODO: Better Solution??
       if(et == ET_SEGM){
@@ -545,8 +568,8 @@ namespace xintegration
       return v;
   }
 
-  void LevelsetWrapper::update_initial_coefs(const Array<Vec<3>> &a_points){
-      initial_coefs.resize(a_points.Size());
+  void LevelsetWrapper::update_initial_coefs(const PolytopePoints &a_points){
+      initial_coefs.SetSize(a_points.Size());
       for(int i=0; i<a_points.Size(); i++){
           double d = operator ()(a_points[i]);
           //initial_coefs[i]= d;
@@ -585,7 +608,8 @@ namespace xintegration
                                                      SWAP_DIMENSIONS_POLICY quad_dir_policy,
                                                      LocalHeap & lh,
                                                      bool spacetime_mode,
-                                                     double tval)
+                                                     double tval,
+                                                     CutRuleCache * cache)
   {
     static Timer t ("NewStraightCutIntegrationRule");
     static Timer timercutgeom ("NewStraightCutIntegrationRule::CheckIfCutFast",2);
@@ -609,16 +633,30 @@ namespace xintegration
     auto element_domain = CheckIfStraightCut(cf_lset_at_element);
     timercutgeom.Stop();
 
+    if (element_domain != IF)
+    {
+      if (element_domain != dt) //no integration on this element
+        return nullptr;
+      return & (SelectIntegrationRule (trafo.GetElementType(), intorder));
+    }
+
+    // there is a cut on the current element
     timermakequadrule.Start();
-    IntegrationRule quad_untrafo;
-    vector<double> lset_vals(cf_lset_at_element.Size());
-    for(int i=0; i<lset_vals.size(); i++) lset_vals[i] = cf_lset_at_element[i];
-    LevelsetWrapper lset(lset_vals, et);
+    LevelsetWrapper lset(cf_lset_at_element, et);
 
-    if (element_domain == IF)
+    // the untransformed rule only depends on the level set values, so that it
+    // can be taken from the cache (if available)
+    IntegrationRule * ir_untrafo = nullptr;
+    if (cache)
+      ir_untrafo = cache->Lookup(trafo.GetElementId(), cf_lset_at_element, dt, intorder, quad_dir_policy, lh);
+
+    if (ir_untrafo == nullptr)
     {
       static Timer timer1("StraightCutElementGeometry::Load+Cut",2);
       timer1.Start();
+      // thread local buffer, so that its memory is reused for subsequent elements
+      static thread_local IntegrationRule quad_untrafo;
+      quad_untrafo.SetSize(0);
       if(!is_quad){
           LevelsetCutSimplex s(lset, dt, SimpleX(et));
           s.GetIntegrationRule(quad_untrafo, intorder);
@@ -628,37 +666,27 @@ namespace xintegration
           q.GetIntegrationRule(quad_untrafo, intorder);
       }
       timer1.Stop();
-    }
 
-    const IntegrationRule* ir = nullptr;
+      if (cache)
+        cache->Store(trafo.GetElementId(), cf_lset_at_element, dt, intorder, quad_dir_policy, quad_untrafo);
+
+      ir_untrafo = new (lh) IntegrationRule (quad_untrafo.Size(),lh);
+      for (int i = 0; i < ir_untrafo->Size(); ++i)
+        (*ir_untrafo)[i] = IntegrationPoint (quad_untrafo[i].Point(),quad_untrafo[i].Weight());
+    }
 
     timermakequadrule.Stop();
 
-    if (element_domain == IF) // there is a cut on the current element
+    if (dt == IF)
     {
-      if (dt == IF)
-      {
-        auto ir_interface  = new (lh) IntegrationRule(quad_untrafo.Size(),lh);
-        if (DIM == 1) TransformQuadUntrafoToIRInterface<1>(quad_untrafo, trafo, lset, ir_interface, spacetime_mode, tval);
-        else if (DIM == 2) TransformQuadUntrafoToIRInterface<2>(quad_untrafo, trafo, lset, ir_interface, spacetime_mode, tval);
-        else TransformQuadUntrafoToIRInterface<3>(quad_untrafo, trafo, lset, ir_interface, spacetime_mode, tval);
-        ir = ir_interface;
-      }
-      else {
-        auto ir_domain = new (lh) IntegrationRule (quad_untrafo.Size(),lh);
-        for (int i = 0; i < ir_domain->Size(); ++i)
-          (*ir_domain)[i] = IntegrationPoint (quad_untrafo[i].Point(),quad_untrafo[i].Weight());
-        ir = ir_domain;
-      }
+      auto ir_interface  = new (lh) IntegrationRule(ir_untrafo->Size(),lh);
+      if (DIM == 1) TransformQuadUntrafoToIRInterface<1>(*ir_untrafo, trafo, lset, ir_interface, spacetime_mode, tval);
+      else if (DIM == 2) TransformQuadUntrafoToIRInterface<2>(*ir_untrafo, trafo, lset, ir_interface, spacetime_mode, tval);
+      else TransformQuadUntrafoToIRInterface<3>(*ir_untrafo, trafo, lset, ir_interface, spacetime_mode, tval);
+      return ir_interface;
     }
     else
-    {
-      if (element_domain != dt) //no integration on this element
-        return nullptr;
-      ir = & (SelectIntegrationRule (trafo.GetElementType(), intorder));
-    }
-
-    return ir;
+      return ir_untrafo;
   }
 
   const IntegrationRule * StraightCutsIntegrationRule(const FlatMatrix<> & cf_lsets_at_element,
@@ -687,8 +715,8 @@ namespace xintegration
     //Let's see later how we actually will exploit those wrappers...
 
     auto getLseti_onrefgeom = [&cf_lsets_at_element, &et](int i) {
-        vector<double> lset_vals(cf_lsets_at_element.Height());
-        for(int ii=0; ii<lset_vals.size(); ii++)
+        PolytopeLsetVals lset_vals(cf_lsets_at_element.Height());
+        for(int ii=0; ii<lset_vals.Size(); ii++)
             lset_vals[ii] = cf_lsets_at_element(ii, i);
         LevelsetWrapper lset(lset_vals, et);
         return lset;
@@ -699,7 +727,9 @@ namespace xintegration
     // outer level
     LevelsetCutSimplex s(getLseti_onrefgeom(0), dts[0], SimpleX(et));
     s.Decompose();
-    Array<SimpleX> simplices_at_last_level(s.SimplexDecomposition);
+    Array<SimpleX> simplices_at_last_level;
+    for (const auto & sub_s : s.SimplexDecomposition)
+      simplices_at_last_level.Append(sub_s);
 
     for (int i = 1; i < M; i++) // all levelset decompositions after the first
     {
@@ -713,7 +743,8 @@ namespace xintegration
             LevelsetCutSimplex sub_s(lset_on_s, dts[i], s);
             sub_s.Decompose();
             // put sub_s.SimplexDecomposition members to simplices_at_current_level
-            simplices_at_current_level.Append(sub_s.SimplexDecomposition);
+            for (const auto & sub_sub_s : sub_s.SimplexDecomposition)
+              simplices_at_current_level.Append(sub_sub_s);
         }
         else if(dt_of_s == dts[i])
             simplices_at_current_level.Append(s);
@@ -820,10 +851,9 @@ namespace xintegration
       timercutgeom.Stop();
 
       timermakequadrule.Start();
-      IntegrationRule quad_untrafo;
-      vector<double> lset_vals(cf_lset_at_element.Size());
-      for(int i=0; i<lset_vals.size(); i++) lset_vals[i] = cf_lset_at_element[i];
-      LevelsetWrapper lset(lset_vals, et);
+      static thread_local IntegrationRule quad_untrafo;
+      quad_untrafo.SetSize(0);
+      LevelsetWrapper lset(cf_lset_at_element, et);
 
       if (element_domain == IF)
       {
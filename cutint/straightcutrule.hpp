@@ -1,6 +1,7 @@
 #pragma once
 #include "xintegration.hpp"
 #include <algorithm>
+#include <array>
 #include <memory>
 #include <numeric>
 
@@ -11,42 +12,98 @@ namespace xintegration
 {
   enum DIMENSION_SWAP {ID, X_Y, X_Z, Y_Z, NONE};
 
+  /// maximum number of vertices of the polytopes that appear in the
+  /// construction of the cut rules (SEGM: 2, TRIG: 3, TET: 4, QUAD: 4, HEX: 8)
+  constexpr int MAX_POLYTOPE_VERTICES = 8;
+
+  constexpr int MaxNVerticesOfPolytope(ELEMENT_TYPE et)
+  {
+    return et == ET_SEGM ? 2 : (et == ET_TRIG ? 3 : ((et == ET_TET || et == ET_QUAD) ? 4 : 8));
+  }
+
+  /// Array with a fixed capacity N which lives on the stack. It is used for
+  /// the points and level set values of the polytopes in the cut rule
+  /// construction so that these (small) objects can be created and copied
+  /// without any allocations on the global heap.
+  template <typename T, int N>
+  class StackArray
+  {
+    T data[N];
+    int n = 0;
+  public:
+    StackArray () { ; }
+    explicit StackArray (int asize) { SetSize(asize); }
+    StackArray (std::initializer_list<T> list)
+    {
+      for (const auto & v : list)
+        Append(v);
+    }
+
+    int Size () const { return n; }
+    int size () const { return n; }
+    void SetSize (int asize)
+    {
+      if (asize > N)
+        throw Exception("StackArray: capacity exceeded");
+      n = asize;
+    }
+    void Append (const T & v)
+    {
+      if (n >= N)
+        throw Exception("StackArray: capacity exceeded");
+      data[n++] = v;
+    }
+    T & operator[] (int i) { return data[i]; }
+    const T & operator[] (int i) const { return data[i]; }
+    T * begin () { return data; }
+    T * end () { return data+n; }
+    const T * begin () const { return data; }
+    const T * end () const { return data+n; }
+  };
+
+  typedef StackArray<Vec<3>, MAX_POLYTOPE_VERTICES> PolytopePoints;
+  typedef StackArray<double, MAX_POLYTOPE_VERTICES> PolytopeLsetVals;
+
   DOMAIN_TYPE CheckIfStraightCut(FlatVector<> cf_lset_at_element, double epsilon = 0);
-  DOMAIN_TYPE CheckIfStraightCut(vector<double> cf_lset_at_element, double epsilon = 0);
+  DOMAIN_TYPE CheckIfStraightCut(const vector<double> & cf_lset_at_element, double epsilon = 0);
+  DOMAIN_TYPE CheckIfStraightCut(const PolytopeLsetVals & cf_lset_at_element, double epsilon = 0);
 
   class LevelsetWrapper {
   public:
       Vec<2, Vec<2, Vec<2, double>>> c;
 
-      LevelsetWrapper(vector<double> a_vals, ELEMENT_TYPE a_et) { GetCoeffsFromVals(a_et, a_vals); }
+      LevelsetWrapper(const PolytopeLsetVals & a_vals, ELEMENT_TYPE a_et) { GetCoeffsFromVals(a_et, a_vals); }
+      LevelsetWrapper(FlatVector<> a_vals, ELEMENT_TYPE a_et);
+      LevelsetWrapper(const vector<double> & a_vals, ELEMENT_TYPE a_et);
 
       Vec<3> GetNormal(const Vec<3>& p) const;
       Vec<3> GetGrad(const Vec<3>& p) const;
       double operator() (const Vec<3> & p) const;
-      vector<double> initial_coefs;
-      void update_initial_coefs(const Array<Vec<3>>& a_points);
+      PolytopeLsetVals initial_coefs;
+      void update_initial_coefs(const PolytopePoints& a_points);
   private:
-      void GetCoeffsFromVals(ELEMENT_TYPE et, vector<double> vals);
+      void GetCoeffsFromVals(ELEMENT_TYPE et, const PolytopeLsetVals & vals);
   };
 
   class PolytopE { //The PolytopE which is given as the convex hull of the points
   public:
-      Array<Vec<3>> points; //the points
+      PolytopePoints points; //the points
       int D; //Dimension
 
-      PolytopE(const Array<Vec<3>>& a_points, int a_D) : points(a_points), D(a_D) {;}
+      PolytopE(const PolytopePoints& a_points, int a_D) : points(a_points), D(a_D) {;}
       PolytopE() { D = -1; } //TODO: Remove this constructor
 
-      vector<double> GetLsetVals(LevelsetWrapper lset){
-          vector<double> v;
-          for(const auto& p: points) v.push_back(lset(p));
+      PolytopeLsetVals GetLsetVals(const LevelsetWrapper & lset) const {
+          PolytopeLsetVals v;
+          for(const auto& p: points) v.Append(lset(p));
           return v;
       }
   };
 
   class SimpleX : public PolytopE { //A SimpleX is a PolytopE of dim D with D+1 vertices
   public:
-      SimpleX(const Array<Vec<3>>& a_points) : PolytopE(a_points, a_points.Size()-1) {;}
+      SimpleX(const PolytopePoints& a_points) : PolytopE(a_points, a_points.Size()-1) {;}
+      SimpleX(std::initializer_list<Vec<3>> a_points) : SimpleX(PolytopePoints(a_points)) {;}
       SimpleX() { D = -1; }
 
       SimpleX(const PolytopE& p) : PolytopE(p.points, p.D) {
@@ -60,14 +117,15 @@ namespace xintegration
           else throw Exception ("You tried to create an Simplex with wrong ET");
       }
 
-      PolytopE CalcIFPolytopEUsingLset(vector<double> lset_on_points);
+      PolytopE CalcIFPolytopEUsingLset(const PolytopeLsetVals & lset_on_points) const;
 
-      void GetPlainIntegrationRule(IntegrationRule &intrule, int order);
-      double GetVolume();
+      void GetPlainIntegrationRule(IntegrationRule &intrule, int order) const;
+      double GetVolume() const;
   };
 
   class Quadrilateral : public PolytopE { //A specific PolytopE: A quadliteral
   public:
+      Quadrilateral() { D = -1; }
       Quadrilateral(array<tuple<double, double>, 2> bnds) {
           D = 2; points.SetSize(4);
           points[0] = {get<0>(bnds[0]), get<0>(bnds[1]), 0};
@@ -92,8 +150,8 @@ namespace xintegration
           else throw Exception ("You tried to create an Quadrilateral with wrong ET");
       }
 
-      void GetPlainIntegrationRule(IntegrationRule &intrule, int order);
-      double GetVolume();
+      void GetPlainIntegrationRule(IntegrationRule &intrule, int order) const;
+      double GetVolume() const;
   };
 
   class LevelsetCutPolytopE {
@@ -102,7 +160,7 @@ namespace xintegration
       LevelsetWrapper lset;
       DOMAIN_TYPE dt;
 
-      LevelsetCutPolytopE(LevelsetWrapper a_lset, DOMAIN_TYPE a_dt): lset(a_lset), dt(a_dt) {;}
+      LevelsetCutPolytopE(const LevelsetWrapper & a_lset, DOMAIN_TYPE a_dt): lset(a_lset), dt(a_dt) {;}
   };
 
   class LevelsetCutSimplex : public LevelsetCutPolytopE {
@@ -110,10 +168,10 @@ namespace xintegration
       virtual void GetIntegrationRule(IntegrationRule &intrule, int order);
       SimpleX s;
 
-      LevelsetCutSimplex(LevelsetWrapper a_lset, DOMAIN_TYPE a_dt, SimpleX a_s) : LevelsetCutPolytopE(a_lset, a_dt), s(a_s) { ;}
+      LevelsetCutSimplex(const LevelsetWrapper & a_lset, DOMAIN_TYPE a_dt, const SimpleX & a_s) : LevelsetCutPolytopE(a_lset, a_dt), s(a_s) { ;}
   //private:
       void Decompose();
-      Array<SimpleX> SimplexDecomposition; //TODO: Cf. line 117
+      StackArray<SimpleX, 3> SimplexDecomposition; // a cut simplex is decomposed into at most 3 simplices
   };
 
   class LevelsetCutQuadrilateral : public LevelsetCutPolytopE {
@@ -127,7 +185,7 @@ namespace xintegration
 
       Quadrilateral q;
 
-      LevelsetCutQuadrilateral(LevelsetWrapper a_lset, DOMAIN_TYPE a_dt, Quadrilateral a_q, SWAP_DIMENSIONS_POLICY a_pol, bool a_consider_dim_swap = true) : LevelsetCutPolytopE(a_lset, a_dt), pol(a_pol), q(a_q), consider_dim_swap(a_consider_dim_swap) { ;}
+      LevelsetCutQuadrilateral(const LevelsetWrapper & a_lset, DOMAIN_TYPE a_dt, const Quadrilateral & a_q, SWAP_DIMENSIONS_POLICY a_pol, bool a_consider_dim_swap = true) : LevelsetCutPolytopE(a_lset, a_dt), pol(a_pol), q(a_q), consider_dim_swap(a_consider_dim_swap) { ;}
       void GetIntegrationRuleAlongXi(IntegrationRule &intrule, int order);
   private:
       void GetIntegrationRuleOnXYPermutatedQuad(IntegrationRule &intrule, int order);
@@ -135,12 +193,13 @@ namespace xintegration
       void GetIntegrationRuleOnYZPermutatedQuad(IntegrationRule &intrule, int order);
 
       void GetFallbackIntegrationRule(IntegrationRule &intrule, int order);
-      vector<double> GetSufficientCritsQBound ();
-      vector<double> GetExactCritsQBound2D ();
+      Vec<3> GetSufficientCritsQBound ();
+      Vec<2> GetExactCritsQBound2D ();
 
       bool HasTopologyChangeAlongXi();
       void Decompose();
-      Array<unique_ptr<LevelsetCutQuadrilateral>> QuadrilateralDecomposition;
+      // sub-quadrilaterals between the topology changes along xi (at most 4 cut edges)
+      StackArray<Quadrilateral, 5> QuadrilateralDecomposition;
   };
 
   template<unsigned int D>
@@ -153,7 +212,8 @@ namespace xintegration
                                                      SWAP_DIMENSIONS_POLICY quad_dir_policy,
                                                      LocalHeap & lh,
                                                      bool spacetime_mode = false,
-                                                     double tval = 0.);
+                                                     double tval = 0.,
+                                                     CutRuleCache * cache = nullptr);
 
   const IntegrationRule * StraightCutsIntegrationRule(const FlatMatrix<> & cf_lsets_at_element,
                                                      const ElementTransformation & trafo,
@@ -11,6 +11,22 @@ namespace xintegration
   using ngfem::INT;
 
 
+  static FlatVector<> EvaluateAtVertices(const CoefficientFunction & cf,
+                                         const ElementTransformation & trafo,
+                                         LocalHeap & lh)
+  {
+    auto et = trafo.GetElementType();
+    const int nv = ElementTopology::GetNVertices(et);
+    const POINT3D * verts = ElementTopology::GetVertices(et);
+    FlatVector<> vals(nv, lh);
+    for (int i = 0; i < nv; i++)
+    {
+      IntegrationPoint ip(verts[i][0], verts[i][1], verts[i][2]);
+      vals[i] = cf.Evaluate(trafo(ip, lh));
+    }
+    return vals;
+  }
+
   tuple<const IntegrationRule *, Array<double>> CreateCutIntegrationRule(const LevelsetIntegrationDomain & lsetintdom,
                                                                          const ElementTransformation & trafo,
                                                                          LocalHeap & lh)
@@ -54,7 +70,8 @@ namespace xintegration
             fe_time = dynamic_cast<ScalarFiniteElement<1>*>(st_FE->GetTimeFE());
           return SpaceTimeCutIntegrationRule(elvec, trafo, fe_time, dt, time_intorder, intorder, quad_dir_policy, lh);
         } else {
-          const IntegrationRule * ir = StraightCutIntegrationRule(elvec, trafo, dt, intorder, quad_dir_policy, lh);
+          const IntegrationRule * ir = StraightCutIntegrationRule(elvec, trafo, dt, intorder, quad_dir_policy, lh,
+                                                                  false, 0., lsetintdom.GetCutRuleCache().get());
           if(ir != nullptr) {
             Array<double> wei_arr (ir->Size());
             for(int i=0; i< ir->Size(); i++) wei_arr [i] = (*ir)[i].Weight();
@@ -66,7 +83,25 @@ namespace xintegration
       else if (cflset != nullptr)
       {
         if (time_intorder < 0) {
-          const IntegrationRule * ir = CutIntegrationRule(cflset, trafo, dt, intorder, subdivlvl, lh);
+          const IntegrationRule * ir = nullptr;
+          CutRuleCache * cache = lsetintdom.GetCutRuleCache().get();
+          // without subdivision the (untransformed) volume rules only depend on the
+          // level set values in the vertices so that these serve as the "version"
+          // of the cached rules (e.g. a changed time parameter in the level set
+          // invalidates the rules). Interface rules depend on the transformation.
+          if (cache && subdivlvl == 0 && dt != IF)
+          {
+            FlatVector<> lset_vals = EvaluateAtVertices(*cflset, trafo, lh);
+            ir = cache->Lookup(trafo.GetElementId(), lset_vals, dt, intorder, quad_dir_policy, lh);
+            if (ir == nullptr)
+            {
+              ir = CutIntegrationRule(cflset, trafo, dt, intorder, subdivlvl, lh);
+              if (ir != nullptr && ir != &SelectIntegrationRule(trafo.GetElementType(), intorder))
+                cache->Store(trafo.GetElementId(), lset_vals, dt, intorder, quad_dir_policy, *ir);
+            }
+          }
+          else
+            ir = CutIntegrationRule(cflset, trafo, dt, intorder, subdivlvl, lh);
           if(ir != nullptr) {
             Array<double> wei_arr (ir->Size());
             for(int i=0; i< ir->Size(); i++) wei_arr [i] = (*ir)[i].Weight();
@@ -81,6 +116,73 @@ namespace xintegration
     }
   }
 
+  ELEMENT_DOMAIN_RELATION ClassifyElementForLevelsetDomain(const LevelsetIntegrationDomain & lsetintdom,
+                                                           const ElementTransformation & trafo,
+                                                           LocalHeap & lh)
+  {
+    if (lsetintdom.GetTimeIntegrationOrder() >= 0)
+      return ELEMENT_CUT_OR_UNKNOWN;
+
+    const Array<shared_ptr<GridFunction>> & gflsets (lsetintdom.GetLevelsetGFs());
+    const int M = gflsets.Size();
+    if (M == 0 || M != lsetintdom.GetDomainTypes()[0].Size())
+      return ELEMENT_CUT_OR_UNKNOWN;
+    for (int i = 0; i < M; i++)
+      if (gflsets[i] == nullptr)
+        return ELEMENT_CUT_OR_UNKNOWN;
+
+    HeapReset hr(lh);
+    ArrayMem<DofId,10> dnums;
+    ArrayMem<DOMAIN_TYPE,10> lset_dts(M);
+    for (int i = 0; i < M; i++)
+    {
+      gflsets[i]->GetFESpace()->GetDofNrs(trafo.GetElementId(), dnums);
+      FlatVector<> elvec(dnums.Size(), lh);
+      gflsets[i]->GetVector().GetIndirect(dnums, elvec);
+      lset_dts[i] = CheckIfStraightCut(elvec);
+      if (lset_dts[i] == IF)
+        return ELEMENT_CUT_OR_UNKNOWN;
+    }
+
+    for (const Array<DOMAIN_TYPE> & dts : lsetintdom.GetDomainTypes())
+    {
+      bool inside = true;
+      for (int i = 0; i < M; i++)
+        if (dts[i] != lset_dts[i])
+          inside = false;
+      if (inside)
+        return ELEMENT_INSIDE_DOMAIN;
+    }
+    return ELEMENT_OUTSIDE_DOMAIN;
+  }
+
+  const SIMD_IntegrationRule * CreateSIMDCutIntegrationRule(const LevelsetIntegrationDomain & lsetintdom,
+                                                            const ElementTransformation & trafo,
+                                                            LocalHeap & lh)
+  {
+    if (lsetintdom.GetTimeIntegrationOrder() >= 0)
+      throw ExceptionNOSIMD("no SIMD cut integration rules for space-time integration");
+
+    const IntegrationRule * ir;
+    Array<double> wei_arr;
+    tie (ir, wei_arr) = CreateCutIntegrationRule(lsetintdom, trafo, lh);
+    if (ir == nullptr || ir->Size() == 0)
+      return nullptr;
+
+    constexpr int SW = SIMD<IntegrationPoint>::Size();
+    const int nip = ir->Size();
+    const int nip_padded = SW * ((nip + SW - 1) / SW);
+    IntegrationRule & ir_padded = *(new (lh) IntegrationRule(nip_padded, lh));
+    for (int i = 0; i < nip; i++)
+      ir_padded[i] = IntegrationPoint((*ir)[i].Point(), wei_arr[i]);
+    // padding with copies of the last point (so that all evaluations are
+    // well-defined) which have zero weight
+    for (int i = nip; i < nip_padded; i++)
+      ir_padded[i] = IntegrationPoint((*ir)[nip-1].Point(), 0.0);
+
+    return new (lh) SIMD_IntegrationRule(ir_padded, lh);
+  }
+
   // old style (before introduction of LevelsetIntegrationDomain):
   tuple<const IntegrationRule *, Array<double>> CreateCutIntegrationRule(shared_ptr<CoefficientFunction> cflset,
                                                    shared_ptr<GridFunction> gflset,
@@ -17,6 +17,27 @@ namespace xintegration
                                                                          const ElementTransformation & trafo,
                                                                          LocalHeap & lh);
 
+  /// SIMD version of CreateCutIntegrationRule (only for spatial integration
+  /// rules). The weights of the cut rule (second return value of
+  /// CreateCutIntegrationRule) are put into the integration points and the rule
+  /// is padded with zero weights to a multiple of the SIMD width. Returns
+  /// nullptr if there is no integration on the element.
+  const SIMD_IntegrationRule * CreateSIMDCutIntegrationRule(const LevelsetIntegrationDomain & lsetintdom,
+                                                            const ElementTransformation & trafo,
+                                                            LocalHeap & lh);
+
+  /// relation of an element to a LevelsetIntegrationDomain
+  enum ELEMENT_DOMAIN_RELATION { ELEMENT_OUTSIDE_DOMAIN = 0, ELEMENT_INSIDE_DOMAIN = 1, ELEMENT_CUT_OR_UNKNOWN = 2 };
+
+  /// Cheap classification of an element based on the nodal values of the level set
+  /// function(s) (no integration rule is constructed). Only works for (P1) level
+  /// sets given as GridFunctions and spatial integrals, otherwise (and for cut
+  /// elements) ELEMENT_CUT_OR_UNKNOWN is returned. On uncut elements the result
+  /// coincides with the one of CreateCutIntegrationRule (nullptr or full rule).
+  ELEMENT_DOMAIN_RELATION ClassifyElementForLevelsetDomain(const LevelsetIntegrationDomain & lsetintdom,
+                                                           const ElementTransformation & trafo,
+                                                           LocalHeap & lh);
+
   /// OLD STYLE (to be removed on the long run, hopefully)
   /// struct which defines the relation a < b for Point4DCL 
   tuple<const IntegrationRule *, Array<double> > CreateCutIntegrationRule(shared_ptr<CoefficientFunction> cflset,
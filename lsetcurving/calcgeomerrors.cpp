@@ -38,16 +38,33 @@ namespace ngcomp
   }
 
 
+  // elements where the P1 level set has values in (lower,upper) (in parallel)
+  static Array<int> ElementsInRelevantBand (shared_ptr<GridFunction> gf_lset_p1,
+                                            double lower_lset_bound, double upper_lset_bound,
+                                            LocalHeap & clh)
+  {
+    return BandElementList
+      (gf_lset_p1->GetMeshAccess()->GetNE(), clh,
+       [&] (int elnr, LocalHeap & lh)
+       {
+         ArrayMem<DofId,8> dofs;
+         gf_lset_p1->GetFESpace()->GetDofNrs(ElementId(VOL,elnr),dofs);
+         FlatVector<> lset_vals_p1(dofs.Size(),lh);
+         gf_lset_p1->GetVector().GetIndirect(dofs,lset_vals_p1);
+         return ElementInRelevantBand(lset_vals_p1, lower_lset_bound, upper_lset_bound);
+       });
+  }
+
   template<int D>
-  void CalcDistances (shared_ptr<CoefficientFunction> lset_ho, shared_ptr<GridFunction> gf_lset_p1, shared_ptr<GridFunction> deform, StatisticContainer & cont, LocalHeap & lh, double refine_threshold, bool abs_ref_threshold){
+  void CalcDistances (shared_ptr<CoefficientFunction> lset_ho, shared_ptr<GridFunction> gf_lset_p1, shared_ptr<GridFunction> deform, StatisticContainer & cont, LocalHeap & clh, double refine_threshold, bool abs_ref_threshold, int intorder, Array<double> * el_max_dist){
     static Timer time_fct ("CalcDistances");
     RegionTimer reg (time_fct);
 
     auto ma = deform->GetMeshAccess();
+    int ne=ma->GetNE();
 
     if (refine_threshold > 0)
     {
-      int ne = ma->GetNE();
       for (int i = 0; i < ne; i++)
         Ng_SetRefinementFlag (i+1, 0);
       if (D==3)
@@ -58,128 +75,126 @@ namespace ngcomp
       }
     }
 
-    int ne=ma->GetNE();
+    if (intorder < 0)
+      intorder = 2 * deform->GetFESpace()->GetOrder();
 
-    int order = deform->GetFESpace()->GetOrder();
+    if (el_max_dist)
+    {
+      el_max_dist->SetSize(ne);
+      *el_max_dist = 0.0;
+    }
+
+    // the deformation is applied pointwise (x = F(xhat) + deform(xhat)), the
+    // mesh itself is used without deformation
+    ma->SetDeformation(nullptr);
+
+    Array<int> cut_els = ElementsInRelevantBand(gf_lset_p1, 0.0, 0.0, clh);
+
+    // task-local reductions
+    Array<double> task_error_l1(NumElementListTasks());
+    Array<double> task_error_max(NumElementListTasks());
+    task_error_l1 = 0.0;
+    task_error_max = 0.0;
+    BitArray marked_els(ne);
+    marked_els.Clear();
+
+    IterateElementList
+      (cut_els, clh,
+       [&] (int elnr, LocalHeap & lh, int task_nr)
+       {
+         ElementId ei(VOL,elnr);
+         const ElementTransformation & eltrans = ma->GetTrafo (ei, lh);
+         IntegrationPoint ipzero(0.0,0.0,0.0);
+         MappedIntegrationPoint<D,D> mx0(ipzero,eltrans);
+
+         const IntegrationRule * ir = get<0> (CreateCutIntegrationRule(nullptr, gf_lset_p1, eltrans,
+                                                                       IF, intorder, -1, lh, 0) );
+         //We don't consider the second argument here since for timeorder=-1 CreateCutIntegrationRule
+         // is consistent with StraightcutRule and one can trust the weights
+         if (ir == nullptr)
+           return;
+         const IntegrationRule & fquad_if(*ir);
+         const int nip = fquad_if.Size();
+
+         const ScalarFiniteElement<D> & fel_deform
+           = dynamic_cast<const ScalarFiniteElement<D> &>(deform->GetFESpace()->GetFE(ei,lh));
+         Array<DofId> dnums;
+         deform->GetFESpace()->GetDofNrs(ei,dnums);
+         FlatMatrixFixWidth<D> deform_vals(dnums.Size(),lh);
+         FlatVector<> deform_vals_as_vec(D*dnums.Size(),&deform_vals(0,0));
+         deform->GetVector().GetIndirect(dnums,deform_vals_as_vec);
+
+         FlatMatrix<> shapes(fel_deform.GetNDof(),nip,lh);
+         fel_deform.CalcShape(fquad_if, shapes);
+         FlatMatrixFixWidth<D> dshape(fel_deform.GetNDof(),lh);
+
+         // x_hathat -> x (on the deformed element) -> y, such that the level
+         // set is approximately that of x_hathat and F(y) == x
+         IntegrationRule ir_y(nip,lh);
+         FlatVector<> weights(nip,lh);
+         for (int i = 0; i < nip; ++i)
+         {
+           const IntegrationPoint & ip(fquad_if[i]); // x_hathat
+           MappedIntegrationPoint<D,D> mip(ip, eltrans);
+           fel_deform.CalcDShape(ip, dshape);
+           Vec<D> x = mip.GetPoint() + Trans(deform_vals) * shapes.Col(i);
+           Mat<D> jac_curved = mip.GetJacobian() + Trans(deform_vals) * dshape;
+           weights(i) = ip.Weight() * abs(Det(jac_curved));
+
+           Vec<D> y = mx0.GetJacobianInverse() * (x - mx0.GetPoint());
+           ir_y[i] = IntegrationPoint(y);
+         }
+         MappedIntegrationRule<D,D> mir_y(ir_y, eltrans, lh);
+         FlatMatrix<> lset_vals(nip,1,lh);
+         lset_ho->Evaluate(mir_y, lset_vals);
+
+         bool mark_this_el = false;
+         double el_error_max = 0.0;
+         double el_error_l1 = 0.0;
+         for (int i = 0; i < nip; ++i)
+         {
+           const double lset_val = abs(lset_vals(i,0));
+           const double h = std::pow(mir_y[i].GetJacobiDet(),1.0/D);
+           el_error_max = max2(el_error_max, lset_val);
+           el_error_l1 += weights(i) * lset_val;
+
+           if (refine_threshold > 0)
+             if ( (abs_ref_threshold && (lset_val > refine_threshold))
+                  || (!abs_ref_threshold && (lset_val > refine_threshold * h)) )
+               mark_this_el = true;
+         }
+
+         task_error_l1[task_nr] += el_error_l1;
+         task_error_max[task_nr] = max2(task_error_max[task_nr], el_error_max);
+         if (el_max_dist)
+           (*el_max_dist)[elnr] = el_error_max;
+         if (mark_this_el)
+           marked_els.SetBitAtomic(elnr);
+       });
 
     double lset_error_l1 = 0.0;
     double lset_error_max = 0.0;
-    Vec<D> point_of_max_lset_error;
-    IntegrationPoint ip_of_max_lset_error;
-    // ofstream pointsout("pointsout");
-
-    ProgressOutput progress (ma, "calc distance on element", ma->GetNE());
-
-    int marked = 0;
-
-    // IterateElements
-    //   (*(gf_lset_p1->GetFESpace()), VOL, clh,  [&] (FESpace::Element el, LocalHeap & lh)
-    //    {
-    for (auto el : gf_lset_p1->GetFESpace()->Elements(VOL,lh))
+    for (int k : Range(task_error_l1))
     {
-      int elnr = el.Nr();
-      HeapReset hr(lh);
-      progress.Update ();
-
-      Ngs_Element ngel = ma->GetElement(el);
-      ELEMENT_TYPE eltype = ngel.GetType();
-      Array<int> dofs;
-      gf_lset_p1->GetFESpace()->GetDofNrs(el,dofs);
-      FlatVector<> lset_vals_p1(dofs.Size(),lh);
-      gf_lset_p1->GetVector().GetIndirect(dofs,lset_vals_p1);
-
-      ElementTransformation * eltrans_curved;
-      ElementTransformation * eltrans;
-
-// #pragma omp critical(deform)
-      {
-        ma->SetDeformation(deform);
-        eltrans_curved = &ma->GetTrafo (el, lh);
-      }
-// #pragma omp critical(deform)
-      {
-        ma->SetDeformation(nullptr);
-        eltrans = &ma->GetTrafo (el, lh);
-      }
-      IntegrationPoint ipzero(0.0,0.0,0.0);
-      MappedIntegrationPoint<D,D> mx0(ipzero,*eltrans);
-
-
-      if (ElementInRelevantBand(lset_vals_p1, 0.0, 0.0))
-      {
-        const IntegrationRule * ir = get<0> (CreateCutIntegrationRule(nullptr, gf_lset_p1, *eltrans,
-                                                              IF, 2*order, -1, lh, 0) );
-        //We don't consider the second argument here since for timeorder=-1 CreateCutIntegrationRule
-        // is consistent with StraightcutRule and one can trust the weights
-        const IntegrationRule & fquad_if(*ir);
-        
-        bool mark_this_el = false;
-
-        for (int i = 0; i < fquad_if.Size(); ++i)
-        {
-          IntegrationPoint & ip(fquad_if[i]); // x_hathat
-          MappedIntegrationPoint<D,D> mip(ip, *eltrans_curved); // x
-
-          Vec<D> y = mx0.GetJacobianInverse() * (mip.GetPoint() - mx0.GetPoint()); //point such that level set is approximately that of x_hathat
-          IntegrationPoint ipy(y);
-          MappedIntegrationPoint<D,D> mipy(ipy,*eltrans);
-          // now mip.GetPoint() == mipy.GetPoint()
-
-          // const double lset_val_transf_p1 = gf_lset_p1->Evaluate(mip);
-
-          const double lset_val = lset_ho->Evaluate(mipy);
-
-          // pointsout << mip.GetPoint()[0] << " " << mip.GetPoint()[1] << " " <<  abs(lset_val) << endl;
-          const double h = std::pow(mipy.GetJacobiDet(),1.0/D);
-// #pragma omp critical(max)
-          if (abs(lset_val) > lset_error_max)
-          {
-            lset_error_max = abs(lset_val);
-            point_of_max_lset_error = mip.GetPoint();
-            ip_of_max_lset_error = ip;
-          }
-
-
-          if (refine_threshold > 0)
-            if ( (abs_ref_threshold && (abs(lset_val) > refine_threshold))
-                 || (!abs_ref_threshold && (abs(lset_val) > refine_threshold * h)) )
-            {
-              mark_this_el = true;
-            }
-
-          const double weight = mip.GetWeight();
-
-// #pragma omp atomic
-          lset_error_l1 += weight * abs(lset_val);
-          // surface += weight;
-        }
-        // pointsout << endl;
-        // delete cquad;
-
-        if (mark_this_el)
-        {
-          Ng_SetRefinementFlag (elnr+1, 1);
-// #pragma omp atomic
-          marked++;
-        }
-      }
+      lset_error_l1 += task_error_l1[k];
+      lset_error_max = max2(lset_error_max, task_error_max[k]);
     }
-    // });
-
-    progress.Done();
 
     if (refine_threshold > 0)
-      cout << " marked " << marked << " elements for refinement " << endl;
+    {
+      for (int elnr : cut_els)
+        if (marked_els.Test(elnr))
+          Ng_SetRefinementFlag (elnr+1, 1);
+      cout << " marked " << marked_els.NumSet() << " elements for refinement " << endl;
+    }
 
     cont.ErrorL1Norm.Append(lset_error_l1);
     cont.ErrorMaxNorm.Append(lset_error_max);
-    // cout << " point_of_max_lset_error = " << point_of_max_lset_error << endl;
-    // cout << " ip_of_max_lset_error = " << ip_of_max_lset_error << endl;
   }
 
 
   template<int D>
-  void CalcDeformationError (shared_ptr<CoefficientFunction> lset_ho, shared_ptr<GridFunction> gf_lset_p1, shared_ptr<GridFunction> deform, shared_ptr<CoefficientFunction> qn, StatisticContainer & cont, LocalHeap & clh, double lower_lset_bound, double upper_lset_bound){
+  void CalcDeformationError (shared_ptr<CoefficientFunction> lset_ho, shared_ptr<GridFunction> gf_lset_p1, shared_ptr<GridFunction> deform, shared_ptr<CoefficientFunction> qn, StatisticContainer & cont, LocalHeap & clh, double lower_lset_bound, double upper_lset_bound, int intorder){
     static Timer time_fct ("CalcDeformationError");
     RegionTimer reg (time_fct);
 
@@ -187,43 +202,32 @@ namespace ngcomp
 
     int ne=ma->GetNE();
 
+    if (intorder < 0)
+      intorder = 2 * deform->GetFESpace()->GetOrder();
+
+    Array<int> band_els = ElementsInRelevantBand(gf_lset_p1, lower_lset_bound, upper_lset_bound, clh);
     BitArray el_curved(ne);
     el_curved.Clear();
-
-
-    int order = deform->GetFESpace()->GetOrder();
-
-    double deform_l2 = 0.0;
-    double domain_l2 = 0.0;
-    double deform_max = 0.0;
-    ProgressOutput progress (ma, "calc deformation on element", ma->GetNE());
-
-
-    IterateElements
-      (*(deform->GetFESpace()), VOL, clh,  [&] (FESpace::Element el, LocalHeap & lh)
-    {
-      int elnr = el.Nr();
-      HeapReset hr(lh);
-      progress.Update ();
-
-      Ngs_Element ngel = ma->GetElement(el);
-      ELEMENT_TYPE eltype = ngel.GetType();
-      Array<int> dofs;
-      gf_lset_p1->GetFESpace()->GetDofNrs(el,dofs);
-      FlatVector<> lset_vals_p1(dofs.Size(),lh);
-      gf_lset_p1->GetVector().GetIndirect(dofs,lset_vals_p1);
-
-      ElementTransformation & eltrans = ma->GetTrafo (ElementId(VOL,elnr), lh);
-
-      IntegrationPoint ipzero(0.0,0.0,0.0);
-      MappedIntegrationPoint<D,D> mx0(ipzero,eltrans);
-
-      if (ElementInRelevantBand(lset_vals_p1, lower_lset_bound, upper_lset_bound))
-      {
-        el_curved.SetBitAtomic(elnr);
+    for (int elnr : band_els)
+      el_curved.SetBit(elnr);
+
+    // task-local reductions
+    Array<double> task_deform_l2(NumElementListTasks());
+    Array<double> task_domain_l2(NumElementListTasks());
+    Array<double> task_deform_max(NumElementListTasks());
+    task_deform_l2 = 0.0;
+    task_domain_l2 = 0.0;
+    task_deform_max = 0.0;
+
+    IterateElementList
+      (band_els, clh,
+       [&] (int elnr, LocalHeap & lh, int task_nr)
+       {
+        ElementId el(VOL,elnr);
+        ElementTransformation & eltrans = ma->GetTrafo (el, lh);
 
         const ScalarFiniteElement<D> & scafe
-          = dynamic_cast<const ScalarFiniteElement<D> &>(el.GetFE());
+          = dynamic_cast<const ScalarFiniteElement<D> &>(deform->GetFESpace()->GetFE(el,lh));
         FlatVector<> shape(scafe.GetNDof(),lh);
         FlatMatrixFixWidth<D> elvec(scafe.GetNDof(),lh);
         FlatVector<> elvec_as_vec(D*scafe.GetNDof(),&elvec(0,0));
@@ -231,7 +235,7 @@ namespace ngcomp
         deform->GetFESpace()->GetDofNrs(el,dnums);
         deform->GetVector().GetIndirect(dnums,elvec_as_vec);
 
-        IntegrationRule ir = SelectIntegrationRule (eltrans.GetElementType(), 2*scafe.Order());
+        IntegrationRule ir = SelectIntegrationRule (eltrans.GetElementType(), intorder);
         for (int l = 0; l < ir.GetNIP(); l++)
         {
           MappedIntegrationPoint<D,D> mip(ir[l], eltrans);
@@ -277,22 +281,21 @@ namespace ngcomp
           deform_h -= deform;
 
           const double weight = mip.GetWeight();
-          const double weight_deform_sqr = weight * sqr(L2Norm(deform_h));
-#pragma omp atomic
-          deform_l2 += weight_deform_sqr;
-#pragma omp atomic
-          domain_l2 += weight;
-          const double new_max = L2Norm(deform_h);
-#pragma omp critical(max)
-          if (new_max > deform_max)
-            deform_max = new_max;
+          task_deform_l2[task_nr] += weight * sqr(L2Norm(deform_h));
+          task_domain_l2[task_nr] += weight;
+          task_deform_max[task_nr] = max2(task_deform_max[task_nr], L2Norm(deform_h));
         }
-      }
-
-
-    });
+       });
 
-    progress.Done ();
+    double deform_l2 = 0.0;
+    double domain_l2 = 0.0;
+    double deform_max = 0.0;
+    for (int k : Range(task_deform_l2))
+    {
+      deform_l2 += task_deform_l2[k];
+      domain_l2 += task_domain_l2[k];
+      deform_max = max2(deform_max, task_deform_max[k]);
+    }
 
     deform_l2 /= domain_l2;
 
@@ -302,33 +305,27 @@ namespace ngcomp
 
 
 
-    double deform_jump_integral = 0.0;
-    double facet_integral = 0.0;
-
+    // inner facets between two curved elements
     int nf=ma->GetNFacets();
-
-    int dim = ma->GetDimension();
-    BitArray fine_facet(nf);
-    fine_facet.Clear();
-    Array<int> elfacets;
-    for (int i = 0; i < ne; ++i)
+    Array<int> curved_facets;
+    for (int facnr = 0; facnr < nf; ++facnr)
     {
-      elfacets = ma->GetElFacets(ElementId(VOL,i));
-      for (int j=0; j<elfacets.Size(); j++)
-        fine_facet.SetBitAtomic(elfacets[j]);
+      ArrayMem<int,2> elnums;
+      ma->GetFacetElements(facnr,elnums);
+      if (elnums.Size() < 2) continue;
+      if (el_curved.Test(elnums[0]) && el_curved.Test(elnums[1]))
+        curved_facets.Append(facnr);
     }
 
+    Array<double> task_deform_jump_integral(NumElementListTasks());
+    Array<double> task_facet_integral(NumElementListTasks());
+    task_deform_jump_integral = 0.0;
+    task_facet_integral = 0.0;
 
-    ProgressOutput progress_f (ma, "calc jump of deformation on facet", nf);
-
-    LocalHeap & lh(clh);
-
-    for (int facnr = 0; facnr < nf; ++facnr)
-    {
-      progress_f.Update();
-      if (!fine_facet.Test(facnr)) continue;
-      HeapReset hr(lh);
-
+    IterateElementList
+      (curved_facets, clh,
+       [&] (int facnr, LocalHeap & lh, int task_nr)
+       {
       int el1 = -1;
       int el2 = -1;
       int facnr1 = -1;
@@ -337,12 +334,8 @@ namespace ngcomp
       Array<int> elnums, fnums;
       ma->GetFacetElements(facnr,elnums);
       el1 = elnums[0];
-
-      if(elnums.Size()<2) continue;
       el2 = elnums[1];
 
-      if(!el_curved.Test(el1) || !el_curved.Test(el2)) continue;
-
       fnums = ma->GetElFacets(ElementId(VOL,el1));
       for (int k=0; k<fnums.Size(); k++)
         if(facnr==fnums[k]) facnr1 = k;
@@ -376,7 +369,7 @@ namespace ngcomp
       ELEMENT_TYPE etfacet = ElementTopology::GetFacetType (eltype1, facnr1);
 
       const IntegrationRule & ir_facet =
-        SelectIntegrationRule (etfacet, 2*deform->GetFESpace()->GetOrder());
+        SelectIntegrationRule (etfacet, intorder);
 
 
       for (int l = 0; l < ir_facet.GetNIP(); l++)
@@ -438,26 +431,33 @@ namespace ngcomp
 
         }
         Vec<D> deform_jump = deform_at_point[1] - deform_at_point[0];
-        deform_jump_integral += weight * sqr(L2Norm(deform_jump));
-        facet_integral += weight;
+        task_deform_jump_integral[task_nr] += weight * sqr(L2Norm(deform_jump));
+        task_facet_integral[task_nr] += weight;
       }
+       });
+
+    double deform_jump_integral = 0.0;
+    double facet_integral = 0.0;
+    for (int k : Range(task_facet_integral))
+    {
+      deform_jump_integral += task_deform_jump_integral[k];
+      facet_integral += task_facet_integral[k];
     }
-    progress_f.Update ();
     cont.ErrorMisc.Append(sqrt(deform_jump_integral/facet_integral));
   }
 
   template void CalcDistances<2>(shared_ptr<CoefficientFunction> , shared_ptr<GridFunction> ,
                                  shared_ptr<GridFunction> , StatisticContainer & , LocalHeap & ,
-                                 double , bool );
+                                 double , bool , int , Array<double> * );
   template void CalcDistances<3>(shared_ptr<CoefficientFunction> , shared_ptr<GridFunction> ,
                                  shared_ptr<GridFunction> , StatisticContainer & , LocalHeap & ,
-                                 double , bool );
+                                 double , bool , int , Array<double> * );
   template void CalcDeformationError<2> (shared_ptr<CoefficientFunction> , shared_ptr<GridFunction> ,
                                          shared_ptr<GridFunction> , shared_ptr<CoefficientFunction> ,
-                                         StatisticContainer & , LocalHeap & , double , double );
+                                         StatisticContainer & , LocalHeap & , double , double , int );
   template void CalcDeformationError<3> (shared_ptr<CoefficientFunction> , shared_ptr<GridFunction> ,
                                          shared_ptr<GridFunction> , shared_ptr<CoefficientFunction> ,
-                                         StatisticContainer & , LocalHeap & , double , double );
+                                         StatisticContainer & , LocalHeap & , double , double , int );
   
 }
 
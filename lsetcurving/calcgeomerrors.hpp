@@ -24,11 +24,16 @@ namespace ngcomp
     Array<double> ErrorMisc;
   };
   
+  /// distances (level set values of lset_ho) on the deformed interface. The
+  /// points are those of the cut rule of order intorder (default: 2*order of
+  /// deform) on the cut elements. If el_max_dist is given, it is resized to
+  /// the number of elements and contains the maximum distance per element
+  /// (0 on uncut elements).
   template <int D>
-  void CalcDistances (shared_ptr<CoefficientFunction> gf_lset_ho, shared_ptr<GridFunction> gf_lset_p1, shared_ptr<GridFunction> deform, StatisticContainer & cont, LocalHeap & lh, double define_threshold = -1.0, bool abs_ref_threshold = false);
+  void CalcDistances (shared_ptr<CoefficientFunction> gf_lset_ho, shared_ptr<GridFunction> gf_lset_p1, shared_ptr<GridFunction> deform, StatisticContainer & cont, LocalHeap & lh, double define_threshold = -1.0, bool abs_ref_threshold = false, int intorder = -1, Array<double> * el_max_dist = nullptr);
 
   template<int D>
-  void CalcDeformationError (shared_ptr<CoefficientFunction> lset_ho, shared_ptr<GridFunction> gf_lset_p1, shared_ptr<GridFunction> deform, shared_ptr<CoefficientFunction> qn, StatisticContainer & cont, LocalHeap & lh, double, double);
+  void CalcDeformationError (shared_ptr<CoefficientFunction> lset_ho, shared_ptr<GridFunction> gf_lset_p1, shared_ptr<GridFunction> deform, shared_ptr<CoefficientFunction> qn, StatisticContainer & cont, LocalHeap & lh, double, double, int intorder = -1);
 
   
 }
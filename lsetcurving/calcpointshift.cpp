@@ -79,6 +79,52 @@ namespace ngfem
     }
   }
 
+  template<int D>
+  void LsetEvaluator<D>::Evaluate(const IntegrationRule & ir, FlatVector<> vals, LocalHeap & lh) const
+  {
+    if (scafe)
+      scafe->Evaluate(ir, scavalues, vals);
+    else
+    {
+      HeapReset hr (lh);
+      MappedIntegrationRule<D,D> mir(ir,*eltrans,lh);
+      FlatMatrix<> mvals(ir.Size(),1,&vals(0));
+      coef->Evaluate(mir,mvals);
+    }
+  }
+
+  template<int D>
+  void LsetEvaluator<D>::EvaluateGrad(const IntegrationRule & ir, FlatMatrixFixWidth<D> grads, LocalHeap & lh) const
+  {
+    if (scafe)
+      scafe->EvaluateGrad(ir, scavalues, grads);
+    else
+    {
+      // numerical differentiation w.r.t. reference coordinates (cf. CalcGradientOfCoeff)
+      HeapReset hr (lh);
+      const double eps = 1e-7;
+      IntegrationRule irl(ir.Size(),lh);
+      IntegrationRule irr(ir.Size(),lh);
+      FlatMatrix<> valsl(ir.Size(),1,lh);
+      FlatMatrix<> valsr(ir.Size(),1,lh);
+      for (int j = 0; j < D; j++)   // d / dxj
+      {
+        for (int i = 0; i < ir.Size(); i++)
+        {
+          irl[i] = ir[i];
+          irl[i](j) -= eps;
+          irr[i] = ir[i];
+          irr[i](j) += eps;
+        }
+        MappedIntegrationRule<D,D> mirl(irl,*eltrans,lh);
+        MappedIntegrationRule<D,D> mirr(irr,*eltrans,lh);
+        coef->Evaluate(mirl,valsl);
+        coef->Evaluate(mirr,valsr);
+        grads.Col(j) = (1.0/(2*eps)) * (valsr.Col(0) - valsl.Col(0));
+      }
+    }
+  }
+
 
   bool ElementInRelevantBand (shared_ptr<CoefficientFunction> lset_p1,
                               const ElementTransformation & eltrans,
@@ -141,70 +187,114 @@ namespace ngfem
 
   
   template<int D>
-  void SearchCorrespondingPoint (
-    const LsetEvaluator<D> & lseteval,                               //<- lset_ho
-    const Vec<D> & init_point, double goal_val,                      //<- init.point and goal val
-    const Mat<D> & trafo_of_normals, const Vec<D> & init_search_dir, //<- search direction
+  void SearchCorrespondingPoints (
+    const LsetEvaluator<D> & lseteval,                                          //<- lset_ho
+    FlatMatrixFixWidth<D> init_points, FlatVector<> goal_vals,                  //<- init.points and goal vals
+    FlatArray<Mat<D>> trafo_of_normals, FlatMatrixFixWidth<D> init_search_dirs, //<- search directions
     bool dynamic_search_dir,
-    Vec<D> & final_point, LocalHeap & lh,                            //<- result and localheap
-    double * n_totalits,
-    double * n_maxits)
+    FlatMatrixFixWidth<D> final_points, LocalHeap & lh,                         //<- result and localheap
+    SearchPointStatistics * stats)
   {
-    static Timer time_not_conv ("SearchCorrespondingPoint::not converged");
-    static Timer time_conv ("SearchCorrespondingPoint::converged");
-    static Timer time_its ("SearchCorrespondingPoint::iterations");
-    static Timer time_fct ("SearchCorrespondingPoint");
+    static Timer time_its ("SearchCorrespondingPoints::iterations");
+    static Timer time_fct ("SearchCorrespondingPoints");
     RegionTimer reg (time_fct);
-    
+
     HeapReset hr(lh);
-      
-    IntegrationPoint curr_ip;
-    for (int d = 0; d < D; ++d) curr_ip(d) = init_point(d);
 
-    Vec<D> search_dir = init_search_dir;
+    const int maxits = 20;
+    const int np = init_points.Height();
+    final_points = init_points;
+    FlatMatrixFixWidth<D> search_dirs(np,lh);
+    search_dirs = init_search_dirs;
+
+    // points that have not converged yet (compressed after every iteration)
+    FlatArray<int> active(np,lh);
+    for (int i = 0; i < np; ++i)
+      active[i] = i;
+    int nactive = np;
+
+    IntegrationRule ir(np,lh);
+    for (int i = 0; i < np; ++i)
+      ir[i] = IntegrationPoint(0.0,0.0,0.0,0.0);
+    FlatVector<> vals(np,lh);
+    FlatMatrixFixWidth<D> grads(np,lh);
+
     int it = 0;
-    for (it = 0; it < 20; ++it)
+    int max_conv_it = 0;
+    size_t nits = 0;
+    for (it = 0; (it < maxits) && (nactive > 0); ++it)
     {
       RegionTimer reg_its (time_its);
-      const double curr_val = lseteval.Evaluate(curr_ip,lh); // InnerProduct(shape, sca_values);
-      const Vec<D> curr_grad = lseteval.EvaluateGrad(curr_ip,lh); //Trans(dshape) * sca_values;
-      const double curr_defect = goal_val - curr_val;
-      if (abs(curr_defect) < 1e-14) // && it > 2)
-        break;
+      for (int k = 0; k < nactive; ++k)
+        for (int d = 0; d < D; ++d)
+          ir[k](d) = final_points(active[k],d);
+      IntegrationRule ir_active(nactive,&ir[0]);
+      FlatVector<> vals_active(nactive,&vals(0));
+      FlatMatrixFixWidth<D> grads_active(nactive,&grads(0,0));
+      lseteval.Evaluate(ir_active,vals_active,lh);
+      lseteval.EvaluateGrad(ir_active,grads_active,lh);
 
-      if (dynamic_search_dir)
+      int nstillactive = 0;
+      for (int k = 0; k < nactive; ++k)
       {
-        search_dir = trafo_of_normals * curr_grad;
-        // search_dir /= L2Norm(search_dir);
-      }
-        
-      const double dphidn = InnerProduct(curr_grad,search_dir);
+        const int i = active[k];
+        const double curr_defect = goal_vals(i) - vals_active(k);
+        if (abs(curr_defect) < 1e-14)
+        {
+          nits += it;
+          max_conv_it = it;
+          continue;
+        }
+
+        const Vec<D> curr_grad = grads_active.Row(k);
+        if (dynamic_search_dir)
+          search_dirs.Row(i) = trafo_of_normals[i] * curr_grad;
 
-      for (int d = 0; d < D; ++d)
-        curr_ip(d) += curr_defect / dphidn * search_dir(d);
+        const double dphidn = InnerProduct(curr_grad,search_dirs.Row(i));
+        final_points.Row(i) += curr_defect / dphidn * search_dirs.Row(i);
+        active[nstillactive++] = i;
+      }
+      nactive = nstillactive;
     }
 
-    if (n_totalits)
-#pragma omp critical (totalits)
-      *n_totalits += it;
-#pragma omp critical (maxits)
-    if (n_maxits)
-      *n_maxits = max2((double)it,*n_maxits);
+    // not converged: no shift
+    for (int k = 0; k < nactive; ++k)
+      final_points.Row(active[k]) = init_points.Row(active[k]);
+    if (nactive > 0)
+      std::cout << " SearchCorrespondingPoint:: " << nactive << " point(s) did not converge " << std::endl;
 
-    if (it == 20){
-      RegionTimer reg (time_not_conv);
-      
-      std::cout << " SearchCorrespondingPoint:: did not converge " << std::endl;
-      // getchar();
-      final_point = init_point;
-    }
-    else
+    if (stats)
     {
-      RegionTimer reg (time_conv);
-      for (int d = 0; d < D; ++d) final_point(d) = curr_ip(d);
+      stats->npoints += np;
+      stats->nits += nits + nactive * maxits;
+      stats->maxits = max2(stats->maxits, nactive > 0 ? maxits : max_conv_it);
+      stats->nnotconverged += nactive;
     }
   }
 
+  template<int D>
+  void SearchCorrespondingPoint (
+    const LsetEvaluator<D> & lseteval,                               //<- lset_ho
+    const Vec<D> & init_point, double goal_val,                      //<- init.point and goal val
+    const Mat<D> & trafo_of_normals, const Vec<D> & init_search_dir, //<- search direction
+    bool dynamic_search_dir,
+    Vec<D> & final_point, LocalHeap & lh,                            //<- result and localheap
+    SearchPointStatistics * stats)
+  {
+    Vec<D> init_point_ = init_point;
+    Vec<D> init_search_dir_ = init_search_dir;
+    double goal_val_ = goal_val;
+    Mat<D> trafo_of_normals_ = trafo_of_normals;
+    SearchCorrespondingPoints<D>(lseteval,
+                                 FlatMatrixFixWidth<D>(1,&init_point_(0)),
+                                 FlatVector<>(1,&goal_val_),
+                                 FlatArray<Mat<D>>(1,&trafo_of_normals_),
+                                 FlatMatrixFixWidth<D>(1,&init_search_dir_(0)),
+                                 dynamic_search_dir,
+                                 FlatMatrixFixWidth<D>(1,&final_point(0)),
+                                 lh, stats);
+  }
+
 
   template void CalcGradientOfCoeff<2>
   (shared_ptr<CoefficientFunction>, const MappedIntegrationPoint<2,2>&, Vec<2>&, LocalHeap&);
@@ -214,7 +304,9 @@ namespace ngfem
   template class LsetEvaluator<2>;
   template class LsetEvaluator<3>;
   
-  template void SearchCorrespondingPoint<2> (const LsetEvaluator<2> &, const Vec<2> &, double, const Mat<2> &, const Vec<2> &, bool, Vec<2> &, LocalHeap &, double *, double *);
-  template void SearchCorrespondingPoint<3> (const LsetEvaluator<3> &, const Vec<3> &, double, const Mat<3> &, const Vec<3> &, bool, Vec<3> &, LocalHeap &, double *, double *);
+  template void SearchCorrespondingPoint<2> (const LsetEvaluator<2> &, const Vec<2> &, double, const Mat<2> &, const Vec<2> &, bool, Vec<2> &, LocalHeap &, SearchPointStatistics *);
+  template void SearchCorrespondingPoint<3> (const LsetEvaluator<3> &, const Vec<3> &, double, const Mat<3> &, const Vec<3> &, bool, Vec<3> &, LocalHeap &, SearchPointStatistics *);
+  template void SearchCorrespondingPoints<2> (const LsetEvaluator<2> &, FlatMatrixFixWidth<2>, FlatVector<>, FlatArray<Mat<2>>, FlatMatrixFixWidth<2>, bool, FlatMatrixFixWidth<2>, LocalHeap &, SearchPointStatistics *);
+  template void SearchCorrespondingPoints<3> (const LsetEvaluator<3> &, FlatMatrixFixWidth<3>, FlatVector<>, FlatArray<Mat<3>>, FlatMatrixFixWidth<3>, bool, FlatMatrixFixWidth<3>, LocalHeap &, SearchPointStatistics *);
   
 }
@@ -30,11 +30,104 @@ namespace ngfem
 
     double Evaluate(const IntegrationPoint & ip, LocalHeap & lh) const;
     Vec<D> EvaluateGrad(const IntegrationPoint & ip, LocalHeap & lh) const;
+    /// values and (reference) gradients in all points of ir at once
+    void Evaluate(const IntegrationRule & ir, FlatVector<> vals, LocalHeap & lh) const;
+    void EvaluateGrad(const IntegrationRule & ir, FlatMatrixFixWidth<D> grads, LocalHeap & lh) const;
+  };
+
+  /// statistics of point searches, accumulated locally (per task) and
+  /// combined afterwards
+  struct SearchPointStatistics
+  {
+    size_t npoints = 0;
+    size_t nits = 0;
+    int maxits = 0;
+    size_t nnotconverged = 0;
+
+    void Add (const SearchPointStatistics & other)
+    {
+      npoints += other.npoints;
+      nits += other.nits;
+      maxits = max2(maxits, other.maxits);
+      nnotconverged += other.nnotconverged;
+    }
   };
 
 
 
 
+  /// number of tasks of IterateElementList
+  inline int NumElementListTasks ()
+  {
+    return task_manager ? task_manager->GetNumThreads() : 1;
+  }
+
+  /// calls func(elnr, lh, task_nr) for all elnr in els in parallel. task_nr is
+  /// in [0,NumElementListTasks()) and can be used for task-local reductions.
+  template <typename TFUNC>
+  void IterateElementList (FlatArray<int> els, LocalHeap & clh, TFUNC func)
+  {
+    if (task_manager)
+    {
+      SharedLoop sl (Range (els));
+      task_manager->CreateJob
+        ( [&] (const TaskInfo & ti) {
+          LocalHeap lh = clh.Split();
+          for (int i : sl)
+          {
+            HeapReset hr(lh);
+            func(els[i], lh, ti.task_nr);
+          }
+        }, NumElementListTasks());
+    }
+    else
+    {
+      for (int i : Range (els))
+      {
+        HeapReset hr(clh);
+        func(els[i], clh, 0);
+      }
+    }
+  }
+
+  /// list of the elements elnr in [0,ne) for which in_band(elnr, lh) is true,
+  /// in_band is evaluated in parallel
+  template <typename TFUNC>
+  Array<int> BandElementList (int ne, LocalHeap & clh, TFUNC in_band)
+  {
+    BitArray band(ne);
+    band.Clear();
+    if (task_manager)
+    {
+      SharedLoop sl (Range (ne));
+      task_manager->CreateJob
+        ( [&] (const TaskInfo & ti) {
+          LocalHeap lh = clh.Split();
+          for (int elnr : sl)
+          {
+            HeapReset hr(lh);
+            if (in_band(elnr, lh))
+              band.SetBitAtomic(elnr);
+          }
+        });
+    }
+    else
+    {
+      for (int elnr : Range (ne))
+      {
+        HeapReset hr(clh);
+        if (in_band(elnr, clh))
+          band.SetBitAtomic(elnr);
+      }
+    }
+
+    Array<int> band_els;
+    for (int elnr : Range(ne))
+      if (band.Test(elnr))
+        band_els.Append(elnr);
+    return band_els;
+  }
+
   bool ElementInRelevantBand (shared_ptr<CoefficientFunction> lset_p1,
                               const ElementTransformation & eltrans,
                               double lower_lset_bound, 
@@ -52,8 +145,21 @@ namespace ngfem
     const Mat<D> & trafo_of_normals, const Vec<D> & init_search_dir, //<- search direction
     bool dynamic_search_dir,
     Vec<D> & final_point, LocalHeap & lh,                            //<- result and localheap
-    double * n_totalits = nullptr,
-    double * n_maxits = nullptr
+    SearchPointStatistics * stats = nullptr
+    );
+
+  /// point search for all rows of init_points at once: every iteration
+  /// evaluates the level set (and gradient) for all points that have not
+  /// converged yet in one call. trafo_of_normals is only needed for
+  /// dynamic_search_dir.
+  template<int D>
+  void SearchCorrespondingPoints (
+    const LsetEvaluator<D> & lseteval,                                          //<- lset_ho
+    FlatMatrixFixWidth<D> init_points, FlatVector<> goal_vals,                  //<- init.points and goal vals
+    FlatArray<Mat<D>> trafo_of_normals, FlatMatrixFixWidth<D> init_search_dirs, //<- search directions
+    bool dynamic_search_dir,
+    FlatMatrixFixWidth<D> final_points, LocalHeap & lh,                         //<- result and localheap
+    SearchPointStatistics * stats = nullptr
     );
   
 }
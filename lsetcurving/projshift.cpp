@@ -1,23 +1,159 @@
 #include "projshift.hpp"
 #include "calcpointshift.hpp"
 #include "shiftintegrators.hpp"
+#include "../spacetime/SpaceTimeFESpace.hpp"
+#include "../xfem/cutinfo.hpp"
+#include <mutex>
+#include <algorithm>
 
 namespace ngcomp
 {
 
-  void ProjectShift (shared_ptr<GridFunction> lset_ho, shared_ptr<GridFunction> lset_p1,
-                     shared_ptr<GridFunction> deform, shared_ptr<CoefficientFunction> qn,
-                     shared_ptr<BitArray> ba,
-                     shared_ptr<CoefficientFunction> blending,
-                     double lower_lset_bound, double upper_lset_bound, double threshold,
-                     LocalHeap & clh)
+  /// Dofs of the band of the last ProjectShift into a deformation
+  /// GridFunction. Outside of these dofs the deformation is zero (as long as
+  /// it is not changed otherwise), so that the next ProjectShift only has to
+  /// reset the dofs of the old and the new band. The dof counter of the
+  /// averaging is kept as well, it is zero again after the averaging.
+  struct ProjectShiftBand
+  {
+    const BaseVector * vec = nullptr;
+    size_t ndof = 0;
+    size_t timestamp = 0;
+    Array<DofId> dofs;
+    shared_ptr<BaseVector> factor;
+  };
+
+  static shared_ptr<ProjectShiftBand> GetProjectShiftBand(shared_ptr<GridFunction> deform)
+  {
+    static mutex bands_mutex;
+    static map<const GridFunction*, tuple<weak_ptr<GridFunction>, shared_ptr<ProjectShiftBand>>> bands;
+
+    lock_guard<mutex> guard(bands_mutex);
+    auto it = bands.find(deform.get());
+    if (it != bands.end() && get<0>(it->second).lock() == deform)
+      return get<1>(it->second);
+
+    // remove bands of GridFunctions that do not exist anymore
+    for (auto it2 = bands.begin(); it2 != bands.end(); )
+      if (get<0>(it2->second).expired())
+        it2 = bands.erase(it2);
+      else
+        ++it2;
+
+    auto band = make_shared<ProjectShiftBand>();
+    bands[deform.get()] = make_tuple(weak_ptr<GridFunction>(deform), band);
+    return band;
+  }
+
+  static void SortUnique (Array<DofId> & dofs)
+  {
+    QuickSort(dofs);
+    int n = 0;
+    for (int i = 0; i < dofs.Size(); ++i)
+      if (n == 0 || dofs[n-1] != dofs[i])
+        dofs[n++] = dofs[i];
+    dofs.SetSize(n);
+  }
+
+  // sorted regular dofs of the elements in els
+  static Array<DofId> DofsOfElements (shared_ptr<FESpace> fes, FlatArray<int> els)
+  {
+    Array<DofId> dofs, eldofs;
+    for (int elnr : els)
+    {
+      fes->GetDofNrs(ElementId(VOL,elnr),eldofs);
+      for (DofId d : eldofs)
+        if (IsRegularDof(d))
+          dofs.Append(d);
+    }
+    SortUnique(dofs);
+    return dofs;
+  }
+
+  // elements in the band (marked in ba or where in_band(elnr,lh) is true)
+  // on which fes is defined, restricted to restrict_elements if given
+  template <typename TFUNC>
+  static Array<int> BandElements (shared_ptr<FESpace> fes, shared_ptr<BitArray> ba,
+                                  shared_ptr<BitArray> restrict_elements,
+                                  LocalHeap & clh, TFUNC in_band)
+  {
+    static Timer time_band ("LsetCurv::ProjectShift::MarkBand");
+    RegionTimer regb (time_band);
+
+    auto ma = fes->GetMeshAccess();
+    return BandElementList
+      (ma->GetNE(), clh,
+       [&] (int elnr, LocalHeap & lh)
+       {
+         if (restrict_elements && !restrict_elements->Test(elnr))
+           return false;
+         if (!fes->DefinedOn(VOL, ma->GetElIndex(ElementId(VOL,elnr))))
+           return false;
+         return ba ? ba->Test(elnr) : in_band(elnr, lh);
+       });
+  }
+
+  // calls func(elnr, lh, search_stats) for all band elements in parallel,
+  // the statistics of the point searches are gathered per task
+  template <typename TFUNC>
+  static void IterateBandElements (FlatArray<int> band_els, LocalHeap & clh,
+                                   SearchPointStatistics & search_stats, TFUNC func)
+  {
+    static Timer time_els ("LsetCurv::ProjectShift::Elements");
+    RegionTimer rege (time_els);
+
+    Array<SearchPointStatistics> task_stats(NumElementListTasks());
+    IterateElementList
+      (band_els, clh,
+       [&] (int elnr, LocalHeap & lh, int task_nr)
+       {
+         func(elnr, lh, task_stats[task_nr]);
+       });
+    for (auto & ts : task_stats)
+      search_stats.Add(ts);
+  }
+
+  ProjectShiftStatistics
+  ProjectShift (shared_ptr<GridFunction> lset_ho, shared_ptr<GridFunction> lset_p1,
+                shared_ptr<GridFunction> deform, shared_ptr<CoefficientFunction> qn,
+                shared_ptr<BitArray> ba,
+                shared_ptr<CoefficientFunction> blending,
+                double lower_lset_bound, double upper_lset_bound, double threshold,
+                LocalHeap & clh, shared_ptr<BitArray> update_elements)
   {
     static Timer time_fct ("LsetCurv::ProjectShift");
+    static Timer time_avg ("LsetCurv::ProjectShift::Averaging");
     RegionTimer reg (time_fct);
-    
+    const double starttime = WallTime();
+
     auto ma = lset_p1->GetMeshAccess();
+    auto fes = deform->GetFESpace();
     int ne=ma->GetNE();
     int D =ma->GetDimension();
+    const bool distributed = ma->GetCommunicator().Size() > 1;
+
+    // in the update mode only the band elements that contribute to the dofs
+    // of the update elements, i.e. that share a vertex with them, are treated
+    shared_ptr<BitArray> update_patch = nullptr;
+    if (update_elements)
+    {
+      if (distributed)
+        throw Exception("ProjectShift: update_elements is not supported with several ranks");
+      update_patch = GetElementsWithSharedVertex(ma, update_elements, clh);
+    }
+
+    // determine the elements in the band first, the (expensive) element
+    // computations below are only carried out on these
+    Array<int> band_els = BandElements
+      (fes, ba, update_patch, clh,
+       [&] (int elnr, LocalHeap & lh)
+       {
+         ArrayMem<DofId,8> p1_dofs;
+         lset_p1->GetFESpace()->GetDofNrs(ElementId(VOL,elnr),p1_dofs);
+         FlatVector<> vals(p1_dofs.Size(),lh);
+         lset_p1->GetVector().GetIndirect(p1_dofs,vals);
+         return ElementInRelevantBand(vals, lower_lset_bound, upper_lset_bound);
+       });
 
     shared_ptr<BilinearFormIntegrator> mass;
     if (D==2)
@@ -42,34 +178,70 @@ namespace ngcomp
     else
       shift3D = make_shared<ShiftIntegrator<3>>(shift_array);
 
-    shared_ptr<BaseVector> factor = deform->GetVector().CreateVector();
-    *factor = 0.0;
-    deform->GetVector() = 0.0;
+    // Only the dofs of the previous and the current band are reset. With
+    // several ranks a dof can get contributions from band elements of another
+    // rank only, there (and on the first call or after a change of the space)
+    // the whole vectors are reset.
+    auto prev_band = GetProjectShiftBand(deform);
+    const bool reuse_band = !distributed && prev_band->factor
+      && prev_band->vec == &deform->GetVector()
+      && prev_band->ndof == fes->GetNDof() && prev_band->timestamp == fes->GetTimeStamp();
 
-    ProgressOutput progress (ma, "project shift on element", ma->GetNE());
+    FlatVector<> fv_deform = deform->GetVector().FVDouble();
 
-    IterateElements
-      (*(deform->GetFESpace()), VOL, clh,  [&] (FESpace::Element el, LocalHeap & lh)
+    // update mode: the element contributions to the dofs of the update
+    // elements are summed up in a separate (compact) buffer, contributions to
+    // other dofs are dropped
+    Array<int> update_els;
+    Array<DofId> update_dofs;
+    Vector<> update_sum;
+    Array<double> update_factor;
+    Array<DofId> band_dofs;
+    shared_ptr<BaseVector> factor;
+    if (update_elements)
+    {
+      for (int elnr : Range(ne))
+        if (update_elements->Test(elnr) && fes->DefinedOn(VOL, ma->GetElIndex(ElementId(VOL,elnr))))
+          update_els.Append(elnr);
+      update_dofs = DofsOfElements(fes, update_els);
+      update_sum.SetSize(D*update_dofs.Size());
+      update_sum = 0.0;
+      update_factor.SetSize(update_dofs.Size());
+      update_factor = 0.0;
+    }
+    else
+    {
+      band_dofs = DofsOfElements(fes, band_els);
+      if (reuse_band)
+      {
+        for (DofId d : prev_band->dofs)
+          fv_deform.Range(D*d,D*(d+1)) = 0.0;
+        for (DofId d : band_dofs)
+          fv_deform.Range(D*d,D*(d+1)) = 0.0;
+      }
+      else
+      {
+        prev_band->factor = deform->GetVector().CreateVector();
+        *prev_band->factor = 0.0;
+        deform->GetVector() = 0.0;
+      }
+      factor = prev_band->factor;
+    }
+
+    // contributions of neighboring elements are added up atomically
+    FlatVector<> fv_factor = factor ? factor->FVDouble() : FlatVector<>(0,(double*)nullptr);
+
+    ProjectShiftStatistics stats;
+    IterateBandElements
+      (band_els, clh, stats.search,
+       [&] (int elnr, LocalHeap & lh, SearchPointStatistics & search_stats)
        {
-         int elnr = el.Nr();
-         HeapReset hr(lh);
-         progress.Update();
-      
-         Array<int> p1_dofs;
-         lset_p1->GetFESpace()->GetDofNrs(el,p1_dofs);
-         FlatVector<> vals(p1_dofs.Size(),lh);
-         lset_p1->GetVector().GetIndirect(p1_dofs,vals);
-         const ElementTransformation & eltrans = el.GetTrafo();
-      
-         if ( (ba) && ( !(ba->Test(elnr)) ))
-           return;
-         if ( (!ba) && !ElementInRelevantBand(vals, lower_lset_bound, upper_lset_bound) )
-           return;
-
-         int ndofs = el.GetDofs().Size();
-         const FiniteElement & fel_deform = el.GetFE();
-         // FlatVector<> vals(def_dofs.Size(),lh);
-         // lset_p1->GetVector().GetIndirect(def_dofs,vals);
+         ElementId ei(VOL,elnr);
+         Array<DofId> dofs;
+         fes->GetDofNrs(ei,dofs);
+         int ndofs = dofs.Size();
+         const FiniteElement & fel_deform = fes->GetFE(ei,lh);
+         const ElementTransformation & eltrans = ma->GetTrafo(ei,lh);
          FlatMatrix<> massmat (ndofs,lh);
          FlatVector<> elvec (D*ndofs,lh);
          FlatVector<> elres (D*ndofs,lh);
@@ -78,16 +250,16 @@ namespace ngcomp
 
       
          Array<int> lset_ho_dofs;
-         lset_ho->GetFESpace()->GetDofNrs(el,lset_ho_dofs);
+         lset_ho->GetFESpace()->GetDofNrs(ei,lset_ho_dofs);
          FlatVector<> lset_ho_vals(lset_ho_dofs.Size(),lh);
          lset_ho->GetVector().GetIndirect(lset_ho_dofs,lset_ho_vals);
-         const FiniteElement & fel_lset_ho = lset_ho->GetFESpace()->GetFE(el,lh);
+         const FiniteElement & fel_lset_ho = lset_ho->GetFESpace()->GetFE(ei,lh);
       
          if (D==2)
          {
            const ScalarFiniteElement<2> & scafe_lset_ho = dynamic_cast< const ScalarFiniteElement<2> &>(fel_lset_ho);
            shared_ptr<LsetEvaluator<2>> lseteval = make_shared<LsetEvaluator<2>>(scafe_lset_ho,lset_ho_vals);
-           shift2D->CalcElementVector(fel_deform, eltrans, elvec, lh, lseteval);
+           shift2D->CalcElementVector(fel_deform, eltrans, elvec, lh, lseteval, &search_stats);
         
            FlatMatrixFixWidth<2> elvec_vec(ndofs,&elvec(0));
            FlatMatrixFixWidth<2> shift_vec(ndofs,&elres(0));
@@ -102,7 +274,7 @@ namespace ngcomp
            const ScalarFiniteElement<3> & scafe_lset_ho = dynamic_cast< const ScalarFiniteElement<3> &>(fel_lset_ho);
            shared_ptr<LsetEvaluator<3>> lseteval = make_shared<LsetEvaluator<3>>(scafe_lset_ho,lset_ho_vals);
         
-           shift3D->CalcElementVector(fel_deform, eltrans, elvec, lh, lseteval);
+           shift3D->CalcElementVector(fel_deform, eltrans, elvec, lh, lseteval, &search_stats);
         
            FlatMatrixFixWidth<3> elvec_vec(ndofs,&elvec(0));
            FlatMatrixFixWidth<3> shift_vec(ndofs,&elres(0));
@@ -113,69 +285,345 @@ namespace ngcomp
              shift_vec.Row(l) = 0.0;
          }
 
-         FlatVector<> def_vals(D*ndofs,lh);
-         deform->GetVector().GetIndirect(el.GetDofs(),def_vals);
-         def_vals += elres;
-         deform->GetVector().SetIndirect(el.GetDofs(),def_vals);
-
-         // increase dof counter
-         FlatVector<> factors(D*ndofs,lh);
-         factor->GetIndirect(el.GetDofs(),factors);
-         for (int k = 0; k < factors.Size(); k+=D)
-           factors(k) += 1.0 ;
-         factor->SetIndirect(el.GetDofs(),factors);
-
-         
+         for (int j = 0; j < ndofs; ++j)
+         {
+           if (!IsRegularDof(dofs[j]))
+             continue;
+           if (update_elements)
+           {
+             const DofId * pos = lower_bound(update_dofs.Data(), update_dofs.Data()+update_dofs.Size(), dofs[j]);
+             if (pos == update_dofs.Data()+update_dofs.Size() || *pos != dofs[j])
+               continue;
+             const int k = pos - update_dofs.Data();
+             for (int d = 0; d < D; ++d)
+               AtomicAdd(update_sum(D*k+d), elres(D*j+d));
+             AtomicAdd(update_factor[k], 1.0);
+             continue;
+           }
+           for (int d = 0; d < D; ++d)
+             AtomicAdd(fv_deform(D*dofs[j]+d), elres(D*j+d));
+           // increase dof counter
+           AtomicAdd(fv_factor(D*dofs[j]), 1.0);
+         }
        });
-    
-    progress.Done();
 
-    factor->SetParallelStatus(DISTRIBUTED);
-    factor->Cumulate(); 	 
-    deform->GetVector().SetParallelStatus(DISTRIBUTED);
-    deform->GetVector().Cumulate(); 	 
-    
-    if (task_manager)
+    if (update_elements)
     {
-      SharedLoop sl (Range (factor->Size()));
-      task_manager->CreateJob
-        ( [&] (const TaskInfo & ti) {
-          LocalHeap lh = clh.Split();
-          
-          // averaging of the (summed) deformation
-          Array<int> dnums(1);
-
-          for (int i : sl)
-          {
-            HeapReset hr(lh);
-            FlatVector<> val_fac(D,lh);
-            FlatVector<> values(D,lh);
-            dnums[0] = i;
-            deform->GetVector().GetIndirect(dnums,values);
-            factor->GetIndirect(dnums,val_fac);
-            if (val_fac(0) > 0)
-              values *= 1.0/val_fac(0);
-            deform->GetVector().SetIndirect(dnums,values);
-          }
-        });
+      // take over the averages on the dofs of the update elements and mark
+      // the elements (sharing a vertex with them) with a changed dof
+      Array<DofId> changed_dofs;
+      Array<DofId> nonzero_dofs;
+      for (int k : Range(update_dofs))
+      {
+        const DofId d = update_dofs[k];
+        if (update_factor[k] > 0)
+        {
+          update_sum.Range(D*k,D*(k+1)) *= 1.0/update_factor[k];
+          nonzero_dofs.Append(d);
+        }
+        bool changed = false;
+        for (int l = 0; l < D; ++l)
+          if (fv_deform(D*d+l) != update_sum(D*k+l))
+            changed = true;
+        if (changed)
+        {
+          fv_deform.Range(D*d,D*(d+1)) = update_sum.Range(D*k,D*(k+1));
+          changed_dofs.Append(d);
+        }
+      }
+
+      stats.changed_elements = make_shared<BitArray>(ne);
+      stats.changed_elements->Clear();
+      IterateRange
+        (ne, clh,
+         [&] (int elnr, LocalHeap & lh)
+         {
+           if (!update_patch->Test(elnr))
+             return;
+           Array<DofId> dofs(0,lh);
+           fes->GetDofNrs(ElementId(VOL,elnr),dofs);
+           for (DofId d : dofs)
+             if (IsRegularDof(d)
+                 && binary_search(changed_dofs.Data(), changed_dofs.Data()+changed_dofs.Size(), d))
+             {
+               stats.changed_elements->SetBitAtomic(elnr);
+               return;
+             }
+         });
+
+      // the deformation can be non-zero on further dofs now
+      if (reuse_band)
+      {
+        for (DofId d : nonzero_dofs)
+          prev_band->dofs.Append(d);
+        SortUnique(prev_band->dofs);
+      }
     }
     else
     {
-      Array<int> dnums(1);
-      for (int i : Range(factor->Size()) )
+      factor->SetParallelStatus(DISTRIBUTED);
+      factor->Cumulate(); 	 
+      deform->GetVector().SetParallelStatus(DISTRIBUTED);
+      deform->GetVector().Cumulate(); 	 
+
+      // averaging of the (summed) deformation, only dofs of band elements
+      // (here or on another rank) have a non-zero counter. The counter is
+      // reset afterwards for the next call.
       {
-        HeapReset hr(clh);
-        FlatVector<> val_fac(D,clh);
-        FlatVector<> values(D,clh);
-        dnums[0] = i;
-        deform->GetVector().GetIndirect(dnums,values);
-        factor->GetIndirect(dnums,val_fac);
-        if (val_fac(0) > 0)
-              values *= 1.0/val_fac(0);
-        deform->GetVector().SetIndirect(dnums,values);
+        RegionTimer rega (time_avg);
+        if (distributed)
+          ParallelForRange
+            (fes->GetNDof(), [&] (IntRange r)
+             {
+               for (int i : r)
+                 if (fv_factor(D*i) > 0)
+                   fv_deform.Range(D*i,D*(i+1)) *= 1.0/fv_factor(D*i);
+             });
+        else
+          ParallelForRange
+            (band_dofs.Size(), [&] (IntRange r)
+             {
+               for (int i : r)
+               {
+                 const DofId d = band_dofs[i];
+                 fv_deform.Range(D*d,D*(d+1)) *= 1.0/fv_factor(D*d);
+                 fv_factor(D*d) = 0.0;
+               }
+             });
       }
+
+      prev_band->vec = &deform->GetVector();
+      prev_band->ndof = fes->GetNDof();
+      prev_band->timestamp = fes->GetTimeStamp();
+      prev_band->dofs = std::move(band_dofs);
+      if (distributed)
+        prev_band->factor = nullptr;
     }
+
+    stats.nband = band_els.Size();
+    stats.ne = ne;
+    stats.time = WallTime() - starttime;
+    return stats;
   }
   
-}
 
+  static shared_ptr<SpaceTimeFESpace> GetSpaceTimeFESpace (shared_ptr<GridFunction> gf, string name)
+  {
+    auto st_fes = dynamic_pointer_cast<SpaceTimeFESpace>(gf->GetFESpace());
+    if (!st_fes)
+      throw Exception("SpaceTimeProjectShift: " + name + " is not a space-time GridFunction");
+    return st_fes;
+  }
+
+  template <int D>
+  ProjectShiftStatistics
+  T_SpaceTimeProjectShift (shared_ptr<GridFunction> lset_ho, shared_ptr<GridFunction> lset_p1,
+                           shared_ptr<GridFunction> deform, shared_ptr<GridFunction> qn,
+                           shared_ptr<BitArray> ba,
+                           shared_ptr<CoefficientFunction> blending,
+                           double lower_lset_bound, double upper_lset_bound, double threshold,
+                           LocalHeap & clh)
+  {
+    static Timer time_fct ("LsetCurv::SpaceTimeProjectShift");
+    static Timer time_avg ("LsetCurv::SpaceTimeProjectShift::Averaging");
+    RegionTimer reg (time_fct);
+    const double starttime = WallTime();
+
+    auto fes_ho = GetSpaceTimeFESpace(lset_ho, "lset_ho")->GetSpaceFESpace();
+    auto fes_p1 = GetSpaceTimeFESpace(lset_p1, "lset_p1")->GetSpaceFESpace();
+    auto fes_def = GetSpaceTimeFESpace(deform, "deform")->GetSpaceFESpace();
+    shared_ptr<FESpace> fes_qn = qn ? GetSpaceTimeFESpace(qn, "qn")->GetSpaceFESpace() : nullptr;
+
+    const int nblocks = GetSpaceTimeFESpace(deform, "deform")->GetNTimeBlocks();
+    if ((GetSpaceTimeFESpace(lset_ho, "lset_ho")->GetNTimeBlocks() != nblocks)
+        || (GetSpaceTimeFESpace(lset_p1, "lset_p1")->GetNTimeBlocks() != nblocks)
+        || (qn && GetSpaceTimeFESpace(qn, "qn")->GetNTimeBlocks() != nblocks))
+      throw Exception("SpaceTimeProjectShift: GridFunctions have different time finite elements");
+
+    const size_t ndof_ho = fes_ho->GetNDof();
+    const size_t ndof_p1 = fes_p1->GetNDof();
+    const size_t ndof_def = fes_def->GetNDof();
+    const size_t ndof_qn = qn ? fes_qn->GetNDof() : 0;
+
+    FlatVector<> fv_ho = lset_ho->GetVector().FVDouble();
+    FlatVector<> fv_p1 = lset_p1->GetVector().FVDouble();
+    FlatVector<> fv_deform = deform->GetVector().FVDouble();
+    FlatVector<> fv_qn = qn ? qn->GetVector().FVDouble() : FlatVector<>(0,(double*)nullptr);
+
+    auto ma = fes_def->GetMeshAccess();
+    int ne=ma->GetNE();
+
+    // one band for all time nodes: elements in the band at any time node
+    Array<int> band_els = BandElements
+      (fes_def, ba, nullptr, clh,
+       [&] (int elnr, LocalHeap & lh)
+       {
+         ArrayMem<DofId,8> p1_dofs;
+         fes_p1->GetDofNrs(ElementId(VOL,elnr),p1_dofs);
+         FlatVector<> vals(p1_dofs.Size(),lh);
+         for (int k = 0; k < nblocks; ++k)
+         {
+           for (int j = 0; j < p1_dofs.Size(); ++j)
+             vals(j) = fv_p1(k*ndof_p1+p1_dofs[j]);
+           if (ElementInRelevantBand(vals, lower_lset_bound, upper_lset_bound))
+             return true;
+         }
+         return false;
+       });
+
+    MassIntegrator<D> mass(make_shared<ConstantCoefficientFunction>(1.0));
+
+    Array<shared_ptr<CoefficientFunction>> shift_array;
+    shift_array.Append(lset_p1);
+    shift_array.Append(lset_ho);
+    shift_array.Append(make_shared<ConstantCoefficientFunction>(threshold));
+    shift_array.Append(make_shared<ConstantCoefficientFunction>(lower_lset_bound));
+    shift_array.Append(make_shared<ConstantCoefficientFunction>(upper_lset_bound));
+    shift_array.Append(nullptr);
+    shift_array.Append(blending);
+    ShiftIntegrator<D> shift(shift_array);
+
+    // dof counter (the same for all time nodes, stored in the first time
+    // block of a vector like deform, so that it can be cumulated)
+    shared_ptr<BaseVector> factor = deform->GetVector().CreateVector();
+    *factor = 0.0;
+    deform->GetVector() = 0.0;
+    FlatVector<> fv_factor = factor->FVDouble();
+
+    ProjectShiftStatistics stats;
+    IterateBandElements
+      (band_els, clh, stats.search,
+       [&] (int elnr, LocalHeap & lh, SearchPointStatistics & search_stats)
+       {
+         ElementId ei(VOL,elnr);
+         const ElementTransformation & eltrans = ma->GetTrafo(ei,lh);
+
+         // geometry, finite elements and shape functions are shared by all time nodes
+         Array<DofId> dofs, ho_dofs, p1_dofs, qn_dofs;
+         fes_def->GetDofNrs(ei,dofs);
+         fes_ho->GetDofNrs(ei,ho_dofs);
+         fes_p1->GetDofNrs(ei,p1_dofs);
+         const int ndofs = dofs.Size();
+         const ScalarFiniteElement<D> & fel_deform = dynamic_cast<const ScalarFiniteElement<D> &>(fes_def->GetFE(ei,lh));
+         const ScalarFiniteElement<D> & fel_ho = dynamic_cast<const ScalarFiniteElement<D> &>(fes_ho->GetFE(ei,lh));
+         const ScalarFiniteElement<D> & fel_p1 = dynamic_cast<const ScalarFiniteElement<D> &>(fes_p1->GetFE(ei,lh));
+
+         FlatMatrix<> massmat (ndofs,lh);
+         mass.CalcElementMatrix(fel_deform, eltrans, massmat, lh);
+         CalcInverse(massmat);
+
+         const IntegrationRule & ir = SelectIntegrationRule (eltrans.GetElementType(), 2*fel_deform.Order());
+         const int nip = ir.GetNIP();
+         MappedIntegrationRule<D,D> mir(ir, eltrans, lh);
+
+         FlatMatrix<> shapes_p1(fel_p1.GetNDof(),nip,lh);
+         fel_p1.CalcShape(ir, shapes_p1);
+         FlatMatrix<> shapes_qn(0,nip,lh);
+         if (qn)
+         {
+           fes_qn->GetDofNrs(ei,qn_dofs);
+           const ScalarFiniteElement<D> & fel_qn = dynamic_cast<const ScalarFiniteElement<D> &>(fes_qn->GetFE(ei,lh));
+           shapes_qn.AssignMemory(fel_qn.GetNDof(),nip,lh);
+           fel_qn.CalcShape(ir, shapes_qn);
+         }
+
+         FlatVector<> ho_vals(ho_dofs.Size(),lh);
+         FlatVector<> p1_vals(p1_dofs.Size(),lh);
+         FlatMatrixFixWidth<D> qn_vals(qn_dofs.Size(),lh);
+         FlatVector<> lset_p1_vals(nip,lh);
+         FlatMatrixFixWidth<D> grads(nip,lh);
+         FlatVector<> elvec (D*ndofs,lh);
+         FlatMatrixFixWidth<D> elvec_vec(ndofs,&elvec(0));
+         FlatMatrixFixWidth<D> shift_vec(ndofs,lh);
+
+         for (int k = 0; k < nblocks; ++k)
+         {
+           HeapReset hr(lh);
+           for (int j = 0; j < ho_dofs.Size(); ++j)
+             ho_vals(j) = fv_ho(k*ndof_ho+ho_dofs[j]);
+           for (int j = 0; j < p1_dofs.Size(); ++j)
+             p1_vals(j) = fv_p1(k*ndof_p1+p1_dofs[j]);
+           lset_p1_vals = Trans(shapes_p1) * p1_vals;
+
+           LsetEvaluator<D> lseteval(fel_ho, ho_vals);
+           if (qn)
+           {
+             for (int j = 0; j < qn_dofs.Size(); ++j)
+               for (int d = 0; d < D; ++d)
+                 qn_vals(j,d) = fv_qn(D*(k*ndof_qn+qn_dofs[j])+d);
+             grads = Trans(shapes_qn) * qn_vals;
+           }
+           else
+           {
+             // gradient of the high order level set as search direction
+             FlatMatrixFixWidth<D> ref_grads(nip,lh);
+             lseteval.EvaluateGrad(ir, ref_grads, lh);
+             for (int l = 0; l < nip; ++l)
+               grads.Row(l) = Trans(mir[l].GetJacobianInverse()) * ref_grads.Row(l);
+           }
+
+           shift.CalcShiftVector(fel_deform, mir, lset_p1_vals, grads, lseteval, elvec, lh, &search_stats);
+
+           for (int d = 0; d < D; ++d)
+             shift_vec.Col(d) = massmat * elvec_vec.Col(d);
+           // vertex values to zero
+           for (int l = 0; l < D+1; ++l)
+             shift_vec.Row(l) = 0.0;
+
+           for (int j = 0; j < ndofs; ++j)
+           {
+             if (!IsRegularDof(dofs[j]))
+               continue;
+             for (int d = 0; d < D; ++d)
+               AtomicAdd(fv_deform(D*(k*ndof_def+dofs[j])+d), shift_vec(j,d));
+           }
+         }
+
+         // increase dof counter
+         for (int j = 0; j < ndofs; ++j)
+           if (IsRegularDof(dofs[j]))
+             AtomicAdd(fv_factor(D*dofs[j]), 1.0);
+       });
+
+    factor->SetParallelStatus(DISTRIBUTED);
+    factor->Cumulate();
+    deform->GetVector().SetParallelStatus(DISTRIBUTED);
+    deform->GetVector().Cumulate();
+
+    // averaging of the (summed) deformation, only dofs of band elements
+    // (here or on another rank) have a non-zero counter
+    {
+      RegionTimer rega (time_avg);
+      ParallelForRange
+        (ndof_def, [&] (IntRange r)
+         {
+           for (int i : r)
+             if (fv_factor(D*i) > 0)
+               for (int k = 0; k < nblocks; ++k)
+                 fv_deform.Range(D*(k*ndof_def+i),D*(k*ndof_def+i+1)) *= 1.0/fv_factor(D*i);
+         });
+    }
+
+    stats.nband = band_els.Size();
+    stats.ne = ne;
+    stats.time = WallTime() - starttime;
+    return stats;
+  }
+
+  ProjectShiftStatistics
+  SpaceTimeProjectShift (shared_ptr<GridFunction> lset_ho, shared_ptr<GridFunction> lset_p1,
+                         shared_ptr<GridFunction> deform, shared_ptr<GridFunction> qn,
+                         shared_ptr<BitArray> ba,
+                         shared_ptr<CoefficientFunction> blending,
+                         double lower_lset_bound, double upper_lset_bound, double threshold,
+                         LocalHeap & lh)
+  {
+    if (lset_p1->GetMeshAccess()->GetDimension() == 2)
+      return T_SpaceTimeProjectShift<2>(lset_ho, lset_p1, deform, qn, ba, blending,
+                                        lower_lset_bound, upper_lset_bound, threshold, lh);
+    else
+      return T_SpaceTimeProjectShift<3>(lset_ho, lset_p1, deform, qn, ba, blending,
+                                        lower_lset_bound, upper_lset_bound, threshold, lh);
+  }
+
+}
@@ -10,11 +10,42 @@
 namespace ngcomp
 {
 
-  void ProjectShift (shared_ptr<GridFunction> lset_ho, shared_ptr<GridFunction> lset_p1,
+  /// band of elements treated in ProjectShift and the time spent on it
+  struct ProjectShiftStatistics
+  {
+    int nband = 0;    // number of elements in the band
+    int ne = 0;       // number of (volume) elements of the mesh
+    double time = 0.0; // wall time of ProjectShift in seconds
+    SearchPointStatistics search; // point searches on the band elements
+    shared_ptr<BitArray> changed_elements = nullptr; // elements with a changed deformation (update mode)
+  };
+
+  /// Only the elements in the band (marked in ba or determined from the P1
+  /// level set values and the bounds) are treated. If update_elements is
+  /// given, deform is only updated (in place) on the dofs of these elements
+  /// and only the band elements sharing a vertex with them are treated, the
+  /// elements on which deform changed are returned in changed_elements.
+  /// deform is only reset on the dofs of the current band and of the band of
+  /// the previous ProjectShift into deform (outside of these it is zero
+  /// unless it has been changed otherwise in between).
+  ProjectShiftStatistics
+  ProjectShift (shared_ptr<GridFunction> lset_ho, shared_ptr<GridFunction> lset_p1,
                      shared_ptr<GridFunction> deform, shared_ptr<CoefficientFunction> qn,
                      shared_ptr<BitArray> ba,
                      shared_ptr<CoefficientFunction> blending,
                      double lower_lset_bound, double upper_lset_bound, double threshold,
-                     LocalHeap & lh);
+                     LocalHeap & lh, shared_ptr<BitArray> update_elements = nullptr);
+
+  /// ProjectShift for all time nodes of space-time GridFunctions at once.
+  /// The band (elements in the band at any time node), geometry and mass
+  /// matrices are shared by all time nodes. If qn is nullptr the gradient of
+  /// the high order level set is used as search direction.
+  ProjectShiftStatistics
+  SpaceTimeProjectShift (shared_ptr<GridFunction> lset_ho, shared_ptr<GridFunction> lset_p1,
+                         shared_ptr<GridFunction> deform, shared_ptr<GridFunction> qn,
+                         shared_ptr<BitArray> ba,
+                         shared_ptr<CoefficientFunction> blending,
+                         double lower_lset_bound, double upper_lset_bound, double threshold,
+                         LocalHeap & lh);
 
 }
@@ -1,4 +1,5 @@
 #include <python_ngstd.hpp>
+#include <pybind11/numpy.h>
 
 /// from ngsolve
 #include <solve.hpp>
@@ -12,6 +13,21 @@
 
 using namespace ngcomp;
 
+static py::dict ProjectShiftStatistics2Dict (const ProjectShiftStatistics & stats)
+{
+  py::dict ret;
+  ret["band_elements"] = stats.nband;
+  ret["elements"] = stats.ne;
+  ret["time"] = stats.time;
+  ret["search_points"] = stats.search.npoints;
+  ret["search_iterations"] = stats.search.nits;
+  ret["max_search_iterations"] = stats.search.maxits;
+  ret["search_not_converged"] = stats.search.nnotconverged;
+  if (stats.changed_elements)
+    ret["changed_elements"] = stats.changed_elements;
+  return ret;
+}
+
 void ExportNgsx_lsetcurving(py::module &m)
 {
   typedef shared_ptr<FESpace> PyFES;
@@ -46,17 +62,30 @@ void ExportNgsx_lsetcurving(py::module &m)
       )
     ;
 
-  m.def("CalcMaxDistance",  [] (PyCF lset_ho, PyGF lset_p1, PyGF deform, int heapsize)
+  m.def("CalcMaxDistance",  [] (PyCF lset_ho, PyGF lset_p1, PyGF deform, int heapsize,
+                                int intorder, bool element_wise) -> py::object
         {
           StatisticContainer dummy;
-          LocalHeap lh (heapsize, "CalcDistance-Heap");
+          Array<double> el_max_dist;
+          LocalHeap lh (heapsize, "CalcDistance-Heap", true);
           if (lset_p1->GetMeshAccess()->GetDimension()==2)
-            CalcDistances<2>(lset_ho, lset_p1, deform,  dummy, lh, -1.0, false);
+            CalcDistances<2>(lset_ho, lset_p1, deform,  dummy, lh, -1.0, false, intorder,
+                             element_wise ? &el_max_dist : nullptr);
           else
-            CalcDistances<3>(lset_ho, lset_p1, deform,  dummy, lh, -1.0, false);
-          return (double) dummy.ErrorMaxNorm[dummy.ErrorMaxNorm.Size()-1];
+            CalcDistances<3>(lset_ho, lset_p1, deform,  dummy, lh, -1.0, false, intorder,
+                             element_wise ? &el_max_dist : nullptr);
+          if (element_wise)
+          {
+            py::array_t<double> ret(el_max_dist.Size());
+            auto ret_data = ret.mutable_unchecked<1>();
+            for (int i = 0; i < el_max_dist.Size(); i++)
+              ret_data(i) = el_max_dist[i];
+            return ret;
+          }
+          return py::cast((double) dummy.ErrorMaxNorm[dummy.ErrorMaxNorm.Size()-1]);
         } ,
         py::arg("lset_ho")=NULL,py::arg("lset_p1")=NULL,py::arg("deform")=NULL,py::arg("heapsize")=1000000,
+        py::arg("intorder")=-1,py::arg("element_wise")=false,
         docu_string(R"raw_string(
 Compute approximated distance between of the isoparametrically obtained geometry.
 
@@ -76,7 +105,8 @@ where
   phi_lin = lset_p1
   Psi = Id + deform
 
-The approximation is obtained as the maximum that is only computed on the integration points.
+The approximation is obtained as the maximum that is only computed on the integration points
+of the interface integration rules on the cut elements (computed in parallel).
 
 Parameters
 
@@ -91,20 +121,28 @@ deform : ngsolve.GridFunction
 
 heapsize : int
   heapsize of local computations.
+
+intorder : int
+  order of the interface integration rules that provide the sample points on
+  each cut element (default: -1, i.e. 2 * order of deform).
+
+element_wise : bool
+  If True, a numpy array with the maximum distance on each element (0 on
+  elements that are not cut) is returned instead of the global maximum.
 )raw_string")
     )
     ;
 
   
-  m.def("CalcDistances",  [] (PyCF lset_ho, PyGF lset_p1, PyGF deform, StatisticContainer & stats, int heapsize, double refine_threshold, bool absolute)
+  m.def("CalcDistances",  [] (PyCF lset_ho, PyGF lset_p1, PyGF deform, StatisticContainer & stats, int heapsize, double refine_threshold, bool absolute, int intorder)
         {
-          LocalHeap lh (heapsize, "CalcDistance-Heap");
+          LocalHeap lh (heapsize, "CalcDistance-Heap", true);
           if (lset_p1->GetMeshAccess()->GetDimension()==2)
-            CalcDistances<2>(lset_ho, lset_p1, deform,  stats, lh, refine_threshold, absolute);
+            CalcDistances<2>(lset_ho, lset_p1, deform,  stats, lh, refine_threshold, absolute, intorder);
           else
-            CalcDistances<3>(lset_ho, lset_p1, deform,  stats, lh, refine_threshold, absolute);
+            CalcDistances<3>(lset_ho, lset_p1, deform,  stats, lh, refine_threshold, absolute, intorder);
         } ,
-        py::arg("lset_ho")=NULL,py::arg("lset_p1")=NULL,py::arg("deform")=NULL,py::arg("stats")=NULL,py::arg("heapsize")=1000000,py::arg("refine_threshold")=-1.0,py::arg("absolute")=false,
+        py::arg("lset_ho")=NULL,py::arg("lset_p1")=NULL,py::arg("deform")=NULL,py::arg("stats")=NULL,py::arg("heapsize")=1000000,py::arg("refine_threshold")=-1.0,py::arg("absolute")=false,py::arg("intorder")=-1,
         docu_string(R"raw_string(
 This is an internal function (and should be removed after some refactoring at some point)!
 )raw_string")
@@ -125,14 +163,19 @@ This is an internal function (and should be removed after some refactoring at so
   m.def("ProjectShift",  [] (PyGF lset_ho, PyGF lset_p1, PyGF deform, PyCF qn,
                              py::object active_elems_in,
                              PyCF blending,
-                             double lower, double upper, double threshold, int heapsize)
+                             double lower, double upper, double threshold, int heapsize,
+                             py::object update_elems_in)
         {
           shared_ptr<BitArray> active_elems = nullptr;
           if (py::extract<PyBA> (active_elems_in).check())
             active_elems = py::extract<PyBA>(active_elems_in)();
+          shared_ptr<BitArray> update_elems = nullptr;
+          if (py::extract<PyBA> (update_elems_in).check())
+            update_elems = py::extract<PyBA>(update_elems_in)();
           
-          LocalHeap lh (heapsize, "ProjectShift-Heap");
-          ProjectShift(lset_ho, lset_p1, deform, qn, active_elems, blending, lower, upper, threshold, lh);
+          LocalHeap lh (heapsize, "ProjectShift-Heap", true);
+          auto stats = ProjectShift(lset_ho, lset_p1, deform, qn, active_elems, blending, lower, upper, threshold, lh, update_elems);
+          return ProjectShiftStatistics2Dict(stats);
         } ,
         py::arg("lset_ho")=NULL,
         py::arg("lset_p1")=NULL,
@@ -143,7 +186,8 @@ This is an internal function (and should be removed after some refactoring at so
         py::arg("lower")=0.0,
         py::arg("upper")=0.0,
         py::arg("threshold")=1.0,
-        py::arg("heapsize")=1000000),
+        py::arg("heapsize")=1000000,
+        py::arg("update_elements")=DummyArgument()),
         docu_string(R"raw_string(
 Computes the shift between points that are on the (P1 ) approximated level set function and its
 higher order accurate version. This is only applied on elements where a level value inside
@@ -177,7 +221,9 @@ lset_p1 : ngsolve.GridFunction
   Scalar piecewise (multi-)linear Gridfunction
 
 deform : ngsolve.GridFunction
-  vector valued GridFunction to store the resulting deformation
+  vector valued GridFunction to store the resulting deformation. Only the dofs of the band and of
+  the band of the previous ProjectShift into deform are reset, i.e. deform should not be changed
+  otherwise between two calls (on a single rank).
 
 active_elements : ngsolve.BitArray / None
   explicit marking of elements on which the transformation should be applied. If this is not None
@@ -209,11 +255,99 @@ threshold: float
 
 heapsize : int
   heapsize of local computations.
+
+update_elements : ngsolve.BitArray / None
+  update mode: deform is expected to hold the result of a previous ProjectShift and is only updated
+  (in place) on the dofs of the marked elements. Only the band elements that share a vertex with the
+  marked elements are treated. The result is the same as that of a full ProjectShift if the input
+  (level sets, qn, blending, band) only changed on the marked elements.
+
+Returns
+
+dict with the number of elements in the band ("band_elements"), the number of
+elements of the mesh ("elements"), the time spent in ProjectShift ("time") and
+statistics of the point searches: number of points ("search_points"), total and
+maximum number of iterations ("search_iterations", "max_search_iterations") and
+the number of points where the search did not converge ("search_not_converged").
+In the update mode the BitArray of elements on which deform changed is
+returned as well ("changed_elements").
 )raw_string")
     ;
 
 // ProjectShift
 
+  m.def("SpaceTimeProjectShift",  [] (PyGF lset_ho, PyGF lset_p1, PyGF deform, py::object qn_in,
+                                      py::object active_elems_in,
+                                      PyCF blending,
+                                      double lower, double upper, double threshold, int heapsize)
+        {
+          shared_ptr<GridFunction> qn = nullptr;
+          if (py::extract<PyGF> (qn_in).check())
+            qn = py::extract<PyGF>(qn_in)();
+          shared_ptr<BitArray> active_elems = nullptr;
+          if (py::extract<PyBA> (active_elems_in).check())
+            active_elems = py::extract<PyBA>(active_elems_in)();
+
+          LocalHeap lh (heapsize, "SpaceTimeProjectShift-Heap", true);
+          auto stats = SpaceTimeProjectShift(lset_ho, lset_p1, deform, qn, active_elems, blending, lower, upper, threshold, lh);
+          return ProjectShiftStatistics2Dict(stats);
+        } ,
+        py::arg("lset_ho")=NULL,
+        py::arg("lset_p1")=NULL,
+        py::arg("deform")=NULL,
+        py::arg("qn")=DummyArgument(),
+        py::arg("active_elements")=DummyArgument(),
+        py::arg("blending")=NULL,
+        py::arg("lower")=0.0,
+        py::arg("upper")=0.0,
+        py::arg("threshold")=1.0,
+        py::arg("heapsize")=1000000,
+        docu_string(R"raw_string(
+Computes the shift of ProjectShift for all time nodes of space-time GridFunctions in one call. The
+band of elements (elements where a level set value inside (lower,upper) exists at some time node),
+the geometry and the element mass matrices are shared by all time nodes. The result is written
+directly into the space-time deformation.
+
+Parameters
+
+lset_ho : ngsolve.GridFunction
+  Scalar (higher order approximation) space-time level set fct.
+
+lset_p1 : ngsolve.GridFunction
+  Scalar space-time GridFunction, piecewise (multi-)linear in space
+
+deform : ngsolve.GridFunction
+  vector valued space-time GridFunction to store the resulting deformation
+
+qn : ngsolve.GridFunction / None
+  vector valued space-time GridFunction for the normal direction field. If None the gradient of
+  lset_ho is used.
+
+active_elements : ngsolve.BitArray / None
+  explicit marking of elements on which the transformation should be applied. If this is not None
+  lower and upper will be ignored.
+
+blending : ngsolve.CoefficientFunction
+  blending function, see ProjectShift
+
+lower: float
+  smallest relevant level set value to define the 'cut' elements where the mapping should be applied
+
+upper: float
+  highest relevant level set value to define the 'cut' elements where the mapping should be applied
+
+threshold: float
+  maximum (pointwise) value for d(x)/h in the mapping, see ProjectShift
+
+heapsize : int
+  heapsize of local computations.
+
+Returns
+
+dict with statistics, see ProjectShift.
+)raw_string")
+    ;
+
 
   m.def("RefineAtLevelSet",  [] (PyGF lset_p1, double lower, double upper, int heapsize)
         {
@@ -40,7 +40,8 @@ namespace ngfem
                                                 const ElementTransformation & eltrans,
                                                 FlatVector<double> elvec,
                                                 LocalHeap & lh,
-                                                shared_ptr<LsetEvaluator<D>> lseteval) const
+                                                shared_ptr<LsetEvaluator<D>> lseteval,
+                                                SearchPointStatistics * stats) const
   {
     static Timer time_fct ("ShiftIntegrator<D>::CalcElementVector");
     RegionTimer reg (time_fct);
@@ -51,11 +52,6 @@ namespace ngfem
     if (!lseteval)
       lseteval = make_shared<LsetEvaluator<D>>(coef_lset_ho, eltrans);
     
-    FlatMatrixFixWidth<D> elvecmat(scafe.GetNDof(),&elvec(0));
-    elvecmat = 0.0;
-    
-    FlatVector<> shape (scafe.GetNDof(),lh);
-      
     Vec<D> grad;
     if (!qn) //grad is constant on element...
     {
@@ -64,60 +60,94 @@ namespace ngfem
       CalcGradientOfCoeff(coef_lset_p1, mip, grad, lh);
     }
     
-    IntegrationRule ir = SelectIntegrationRule (eltrans.GetElementType(), 2*scafe.Order());
-    for (int l = 0 ; l < ir.GetNIP(); l++)
+    const IntegrationRule & ir = SelectIntegrationRule (eltrans.GetElementType(), 2*scafe.Order());
+    const int nip = ir.GetNIP();
+    MappedIntegrationRule<D,D> mir(ir, eltrans, lh);
+
+    FlatVector<> lset_p1_vals(nip,lh);
+    FlatMatrix<> lset_p1_vals_mat(nip,1,&lset_p1_vals(0));
+    coef_lset_p1->Evaluate(mir, lset_p1_vals_mat);
+
+    FlatMatrixFixWidth<D> grads(nip,lh);
+    if (qn)
     {
-      MappedIntegrationPoint<D,D> mip(ir[l], eltrans);
-      scafe.CalcShape(ir[l],shape);
-
-      Mat<D> trafo_of_normals = mip.GetJacobianInverse() * Trans(mip.GetJacobianInverse());
-        
-      if (qn)
-        qn->Evaluate(mip,grad);
-
-      Vec<D> normal = mip.GetJacobianInverse() * grad;
-      // double len = L2Norm(normal);
-      // normal /= len;
-        
-      Vec<D> orig_point;
+      FlatMatrix<> qn_vals(nip,D,&grads(0,0));
+      qn->Evaluate(mir, qn_vals);
+    }
+    else
+      for (int l = 0 ; l < nip; l++)
+        grads.Row(l) = grad;
+
+    CalcShiftVector(scafe, mir, lset_p1_vals, grads, *lseteval, elvec, lh, stats);
+  }
+
+  template <int D>
+  void ShiftIntegrator<D> :: CalcShiftVector (const ScalarFiniteElement<D> & scafe,
+                                              const MappedIntegrationRule<D,D> & mir,
+                                              FlatVector<> lset_p1_vals,
+                                              FlatMatrixFixWidth<D> grads,
+                                              const LsetEvaluator<D> & lseteval,
+                                              FlatVector<double> elvec,
+                                              LocalHeap & lh,
+                                              SearchPointStatistics * stats) const
+  {
+    HeapReset hr(lh);
+    const IntegrationRule & ir = mir.IR();
+    const int nip = ir.GetNIP();
+
+    FlatMatrixFixWidth<D> elvecmat(scafe.GetNDof(),&elvec(0));
+
+    // goal values of the point search:
+    // blending factor, 0.0 means: find phi_lin, 1.0 means: find phi (i.e. goal value = start value)
+    FlatVector<> goal_vals(nip,lh);
+    goal_vals = lset_p1_vals;
+    if (coef_blending)
+    {
+      FlatMatrix<> alpha(nip,1,lh);
+      coef_blending->Evaluate(mir, alpha);
+      FlatVector<> lset_ho_vals(nip,lh);
+      lseteval.Evaluate(ir, lset_ho_vals, lh);
+      for (int l = 0 ; l < nip; l++)
+      {
+        if (alpha(l,0) > 1)
+          throw Exception("alpha should not be larger than 1");
+        goal_vals(l) = (1.0-alpha(l,0)) * goal_vals(l) + alpha(l,0) * lset_ho_vals(l);
+      }
+    }
+
+    FlatMatrixFixWidth<D> orig_points(nip,lh);
+    FlatMatrixFixWidth<D> normals(nip,lh);
+    FlatArray<Mat<D>> trafo_of_normals(nip,lh);
+    for (int l = 0 ; l < nip; l++)
+    {
+      trafo_of_normals[l] = mir[l].GetJacobianInverse() * Trans(mir[l].GetJacobianInverse());
+      normals.Row(l) = mir[l].GetJacobianInverse() * grads.Row(l);
       for (int d = 0; d < D; ++d)
-        orig_point(d) = ir[l](d);
-
-      const double lsetp1val = coef_lset_p1->Evaluate(mip);
-                                                                                 
-      // const double h = D == 2 ? sqrt(2) * sqrt(mip.GetMeasure()) : sqrt(3) * cbrt(mip.GetMeasure());
-      // double alpha = abs(lsetp1val / h) * abs(lsetp1val / h);
-
-      double alpha = 0.0; // blending factor, 0.0 means: find phi_lin, 1.0 means: find phi (i.e. goal value = start value)
-      if (coef_blending)
-        alpha = coef_blending->Evaluate(mip);
-
-      if (alpha > 1)
-        throw Exception("alpha should not be larger than 1");
-      
-      double goal_val = (1.0-alpha) * lsetp1val + alpha * lseteval->Evaluate(mip.IP(),lh);
-
-      // double goal_val = coef_lset_p1->Evaluate(mip);
-      
-      Vec<D> final_point;
-      SearchCorrespondingPoint<D>(*lseteval,
-                                  orig_point, goal_val, 
-                                  trafo_of_normals, normal, false,
-                                  final_point, lh);
-      Vec<D> ref_dist = (final_point - orig_point);
+        orig_points(l,d) = ir[l](d);
+    }
+
+    FlatMatrixFixWidth<D> final_points(nip,lh);
+    SearchCorrespondingPoints<D>(lseteval,
+                                 orig_points, goal_vals,
+                                 trafo_of_normals, normals, false,
+                                 final_points, lh, stats);
+
+    // weighted deformations in the integration points
+    FlatMatrixFixWidth<D> deforms(nip,lh);
+    for (int l = 0 ; l < nip; l++)
+    {
+      Vec<D> ref_dist = final_points.Row(l) - orig_points.Row(l);
       const double ref_dist_size = L2Norm(ref_dist);
       if ((max_deform >= 0.0) && (ref_dist_size > max_deform))
       {
         ref_dist *= max_deform / ref_dist_size; 
       }
+      deforms.Row(l) = mir[l].GetWeight() * (mir[l].GetJacobian() * ref_dist);
+    }
 
-        
-      Vec<D> deform = mip.GetJacobian() * ref_dist;
-      // if (qn)
-      //   deform = InnerProduct(deform,qnormal) * qnormal;
-
-      elvecmat += mip.GetWeight() * shape * Trans(deform);
-    }      
+    FlatMatrix<> shapes(scafe.GetNDof(),nip,lh);
+    scafe.CalcShape(ir, shapes);
+    elvecmat = shapes * deforms;
   }
 
 
@@ -30,7 +30,8 @@ namespace ngfem
                                     const ElementTransformation & eltrans,
                                     FlatVector<double> elvec,
                                     LocalHeap & lh,
-                                    shared_ptr<LsetEvaluator<D>> lseteval) const;
+                                    shared_ptr<LsetEvaluator<D>> lseteval,
+                                    SearchPointStatistics * stats = nullptr) const;
     virtual void CalcElementVector (const FiniteElement & fel,
                                     const ElementTransformation & eltrans,
                                     FlatVector<double> elvec,
@@ -38,6 +39,18 @@ namespace ngfem
     {
       CalcElementVector(fel,eltrans,elvec,lh,nullptr);
     }
+
+    /// element vector for given values of the P1 level set and (physical)
+    /// search directions in the points of mir (the coefficients for these
+    /// are not used)
+    void CalcShiftVector (const ScalarFiniteElement<D> & scafe,
+                          const MappedIntegrationRule<D,D> & mir,
+                          FlatVector<> lset_p1_vals,
+                          FlatMatrixFixWidth<D> grads,
+                          const LsetEvaluator<D> & lseteval,
+                          FlatVector<double> elvec,
+                          LocalHeap & lh,
+                          SearchPointStatistics * stats = nullptr) const;
   };
 
 }
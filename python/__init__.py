@@ -115,8 +115,9 @@ SymbolicBFI function from NGSolve will be called.
 
 Parameters
 
-levelset_domain : dictionary
-  entries:
+levelset_domain : LevelsetDomain or dictionary
+  A LevelsetDomain (see help(LevelsetDomain)) is parsed only once and allows to reuse cut
+  integration rules. The dictionary has the entries:
   * "levelset": 
     singe level set : ngsolve.CoefficientFunction
       CoefficientFunction that describes the geometry. In the best case lset is a GridFunction of an
@@ -176,6 +177,15 @@ Other Parameters :
   time_order : int
     order in time that is used in the space-time integration. time_order=-1 means that no space-time
     rule will be applied. This is only relevant for space-time discretizations.
+
+  simd_evaluate : boolean
+    (default: True) use SIMD evaluation on cut elements. The integrator falls back to the scalar
+    evaluation automatically if the form can not be evaluated with SIMD.
+
+  dispatch_uncut : boolean
+    (default: True) elements that are not cut by the level set(s) are integrated with the
+    standard NGSolve integrator (only for P1 level sets and if "order" is not set in the
+    levelset_domain).
 """
     if levelset_domain != None and type(levelset_domain)==dict:
         # shallow copy is sufficient to modify "order" and "time_order" locally
@@ -191,6 +201,18 @@ Other Parameters :
 
         # print("SymbolicBFI-Wrapper: SymbolicCutBFI called")
         return SymbolicCutBFI(levelset_domain=levelset_domain_local,*args, **kwargs)
+    elif isinstance(levelset_domain, LevelsetDomain):
+        # the copy shares the cut rule cache of levelset_domain
+        levelset_domain_local = levelset_domain.Copy()
+        if "order" in kwargs:
+            if levelset_domain_local.order == -1:
+                levelset_domain_local.order = kwargs["order"]
+            del kwargs["order"]
+        if "time_order" in kwargs:
+            if levelset_domain_local.time_order == -1:
+                levelset_domain_local.time_order = kwargs["time_order"]
+            del kwargs["time_order"]
+        return SymbolicCutBFI(levelset_domain=levelset_domain_local,*args, **kwargs)
     else:
         # print("SymbolicBFI-Wrapper: original SymbolicBFI called")
         if (levelset_domain == None):
@@ -208,8 +230,9 @@ SymbolicLFI function from NGSolve will be called.
 
 Parameters
 
-levelset_domain : dictionary
-  entries:
+levelset_domain : LevelsetDomain or dictionary
+  A LevelsetDomain (see help(LevelsetDomain)) is parsed only once and allows to reuse cut
+  integration rules. The dictionary has the entries:
   * "levelset": 
     singe level set : ngsolve.CoefficientFunction
       CoefficientFunction that describes the geometry. In the best case lset is a GridFunction of an
@@ -270,6 +293,15 @@ Other Parameters :
     order in time that is used in the space-time integration. time_order=-1 means that no space-time
     rule will be applied. This is only relevant for space-time discretizations. Note that
     time_order can only be active if the key "time_order" of the levelset_domain is not set (or -1)
+
+  simd_evaluate : boolean
+    (default: True) use SIMD evaluation on cut elements. The integrator falls back to the scalar
+    evaluation automatically if the form can not be evaluated with SIMD.
+
+  dispatch_uncut : boolean
+    (default: True) elements that are not cut by the level set(s) are integrated with the
+    standard NGSolve integrator (only for P1 level sets and if "order" is not set in the
+    levelset_domain).
 """
     if levelset_domain != None and type(levelset_domain)==dict:
         # shallow copy is sufficient to modify "order" and "time_order" locally
@@ -284,6 +316,18 @@ Other Parameters :
             del kwargs["time_order"]
         
         return SymbolicCutLFI(levelset_domain=levelset_domain_local,*args, **kwargs)
+    elif isinstance(levelset_domain, LevelsetDomain):
+        # the copy shares the cut rule cache of levelset_domain
+        levelset_domain_local = levelset_domain.Copy()
+        if "order" in kwargs:
+            if levelset_domain_local.order == -1:
+                levelset_domain_local.order = kwargs["order"]
+            del kwargs["order"]
+        if "time_order" in kwargs:
+            if levelset_domain_local.time_order == -1:
+                levelset_domain_local.time_order = kwargs["time_order"]
+            del kwargs["time_order"]
+        return SymbolicCutLFI(levelset_domain=levelset_domain_local,*args, **kwargs)
     else:
         if (levelset_domain == None):
             return SymbolicLFI_old(*args,**kwargs)
@@ -295,13 +339,28 @@ def Integrate_X_special_args(levelset_domain={}, cf=None, mesh=None, VOL_or_BND=
 Integrate_X_special_args should not be called directly.
 See documentation of Integrate.
     """
-    levelset_domain_local = levelset_domain.copy() 
-    if not "order" in levelset_domain_local or levelset_domain_local["order"] == -1:
-        levelset_domain_local["order"] = order
-    if not "time_order" in levelset_domain_local or levelset_domain_local["time_order"] == -1:
-        levelset_domain_local["time_order"] = time_order
+    def localize(levelset_domain):
+        if isinstance(levelset_domain, LevelsetDomain):
+            levelset_domain_local = levelset_domain.Copy()
+            if levelset_domain_local.order == -1:
+                levelset_domain_local.order = order
+            if levelset_domain_local.time_order == -1:
+                levelset_domain_local.time_order = time_order
+        else:
+            levelset_domain_local = levelset_domain.copy()
+            if not "order" in levelset_domain_local or levelset_domain_local["order"] == -1:
+                levelset_domain_local["order"] = order
+            if not "time_order" in levelset_domain_local or levelset_domain_local["time_order"] == -1:
+                levelset_domain_local["time_order"] = time_order
+        return levelset_domain_local
+
+    if type(levelset_domain) == list:
+        levelset_domain_local = [localize(dom) for dom in levelset_domain]
+    else:
+        levelset_domain_local = localize(levelset_domain)
     return IntegrateX(levelset_domain = levelset_domain_local,
-                      mesh=mesh, cf=cf,
+                      mesh=mesh, cf=cf, VOL_or_BND=VOL_or_BND,
+                      element_wise=element_wise, region_wise=region_wise,
                       heapsize=heapsize)
 
 
@@ -316,8 +375,10 @@ Integrate function from NGSolve will be called.
 
 Parameters
 
-levelset_domain : dictionary
-  entries:
+levelset_domain : LevelsetDomain or dictionary (or a list thereof)
+  A LevelsetDomain (see help(LevelsetDomain)) is parsed only once and allows to reuse cut
+  integration rules. For a list of domains all integrals are computed in one sweep over the mesh
+  and a NumPy array is returned. The dictionary has the entries:
   * "levelset": 
     singe level set : ngsolve.CoefficientFunction
       CoefficientFunction that describes the geometry. In the best case lset is a GridFunction of an
@@ -330,6 +391,7 @@ levelset_domain : dictionary
       * the level set function is negative (NEG)
       * the level set function is positive (POS)
       * the level set function is zero     (IF )
+      A list of domain types results in one integral per domain type (NumPy array).
     multiple level sets: {tuple({ENUM}), list(tuple(ENUM)), DomainTypeArray}
       Integration on the domains specified
   * "subdivlvl" : int
@@ -350,8 +412,9 @@ levelset_domain : dictionary
 mesh :
   Mesh to integrate on (on some part)
 
-cf : ngsolve.CoefficientFunction
-  the integrand
+cf : ngsolve.CoefficientFunction (or a list thereof)
+  the integrand. For a list of (scalar) integrands, a NumPy array with one integral per
+  integrand (and domain) is returned.
 
 order : int (default = 5)
   integration order. Can be overruled by "order"-entry of the levelset_domain dictionary.
@@ -359,16 +422,23 @@ order : int (default = 5)
 time_order : int (default = -1)
   integration order in time (for space-time integration), default: -1 (no space-time integrals)
 
+VOL_or_BND : {VOL,BND} (default = VOL)
+  integrate over volume or boundary elements (for level set domains)
+
 region_wise : bool
-  (only active for non-levelset version)
+  integrals on each region (for level set domains: NumPy array with last axis of length nregions)
 
 element_wise : bool
-  (only active for non-levelset version)
+  integrals on each element (for level set domains: NumPy array with last axis of length ne)
 
 heapsize : int
   heapsize for local computations.
     """
-    if levelset_domain != None and type(levelset_domain)==dict:
+    def is_levelset_domain(dom):
+        return type(dom) == dict or isinstance(dom, LevelsetDomain)
+    if levelset_domain != None and (is_levelset_domain(levelset_domain)
+                                    or (type(levelset_domain) == list and len(levelset_domain) > 0
+                                        and all(is_levelset_domain(dom) for dom in levelset_domain))):
         # print("Integrate-Wrapper: IntegrateX called")
         return Integrate_X_special_args(levelset_domain, *args, **kwargs)
     else:
@@ -414,12 +484,9 @@ part of an element (deprecated).
     """
     print("kappa-function is deprecated - use CutRatioGF instead")
     kappa1 = GridFunction(L2(mesh,order=0))
-    lset_neg = { "levelset" : lset_approx, "domain_type" : NEG, "subdivlvl" : subdivlvl}
-    kappa_f = LinearForm(kappa1.space)
-    kappa_f += SymbolicLFI(levelset_domain = lset_neg, form = kappa1.space.TestFunction() )
-    kappa_f.Assemble();
-    kappa1.space.SolveM(CoefficientFunction(1.0),kappa_f.vec)
-    kappa1.vec.data = kappa_f.vec
+    lset_negpos = { "levelset" : lset_approx, "domain_type" : [NEG,POS], "subdivlvl" : subdivlvl}
+    vols = Integrate(levelset_domain = lset_negpos, cf = 1, mesh = mesh, order = 0, element_wise = True)
+    kappa1.vec.FV().NumPy()[:] = vols[0] / (vols[0] + vols[1])
     kappa2 = 1.0 - kappa1
     return (kappa1,kappa2)
 
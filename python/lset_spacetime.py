@@ -43,6 +43,7 @@ class LevelSetMeshAdaptation_Spacetime:
         else:
             self.v_qn = H1(mesh, order=self.order_qn, dim=mesh.dim)
         self.qn = GridFunction(self.v_qn, "qn")
+        self.discontinuous_qn = discontinuous_qn
     
         self.v_p1 = H1(mesh, order=1)
         self.lset_p1_node = GridFunction (self.v_p1, "lset_p1_node")
@@ -67,6 +68,9 @@ class LevelSetMeshAdaptation_Spacetime:
         
         self.v_def_st = SpaceTimeFESpace(self.v_def,self.tfe)
         self.deform = GridFunction(self.v_def_st)
+
+        self.v_qn_st = SpaceTimeFESpace(self.v_qn,self.tfe)
+        self.qn_st = GridFunction(self.v_qn_st)
         
         self.ci = CutInfo(mesh)
         
@@ -94,10 +98,7 @@ class LevelSetMeshAdaptation_Spacetime:
         t.UnfixTime()
 
     def interpol_p1(self):
-        for i in range(self.order_time + 1):
-            self.lset_ho_node.vec[:].data = self.lset_ho.vec[i*self.ndof_node : (i+1)*self.ndof_node]
-            InterpolateToP1(self.lset_ho_node,self.lset_p1_node)
-            self.lset_p1.vec[i*self.ndof_node_p1 : (i+1)*self.ndof_node_p1].data = self.lset_p1_node.vec[:]
+        SpaceTimeInterpolateToP1(self.lset_ho,self.lset_p1)
             
     def CalcDeformation(self, levelset,t,calc_kappa = False):
         """
@@ -134,13 +135,21 @@ class LevelSetMeshAdaptation_Spacetime:
         self.hasif_spacetime |= self.ci.GetElementsOfType(IF)
         
         
-        for i in range(self.order_time + 1):
-            self.lset_ho_node.vec[:].data = self.lset_ho.vec[i*self.ndof_node : (i+1)*self.ndof_node]
-            self.qn.Set(self.lset_ho_node.Deriv())
-            self.lset_p1_node.vec[:].data = self.lset_p1.vec[i*self.ndof_node_p1 : (i+1)*self.ndof_node_p1]
-            ProjectShift(self.lset_ho_node, self.lset_p1_node, self.deform_node, self.qn, self.hasif_spacetime, None, self.lset_lower_bound, 
-                         self.lset_upper_bound, self.threshold, heapsize=self.heapsize)
-            self.deform.vec[i*self.ndof_node : (i+1)*self.ndof_node].data = self.deform_node.vec[:]
+        # the discontinuous qn is the gradient of lset_ho (the L2 projection is exact), only the
+        # continuous projection has to be computed for each time node
+        if self.discontinuous_qn:
+            qn = None
+        else:
+            ndof_qn = self.v_qn.ndof
+            for i in range(self.order_time + 1):
+                self.lset_ho_node.vec[:].data = self.lset_ho.vec[i*self.ndof_node : (i+1)*self.ndof_node]
+                self.qn.Set(self.lset_ho_node.Deriv())
+                self.qn_st.vec[i*ndof_qn : (i+1)*ndof_qn].data = self.qn.vec[:]
+            qn = self.qn_st
+
+        SpaceTimeProjectShift(self.lset_ho, self.lset_p1, self.deform, qn, self.hasif_spacetime, None,
+                              self.lset_lower_bound, self.lset_upper_bound, self.threshold,
+                              heapsize=self.heapsize)
         return self.deform
             
     def CalcMaxDistance(self, levelset,t, given_pts = []):
@@ -152,18 +161,25 @@ class LevelSetMeshAdaptation_Spacetime:
         else:
             time_quad = self.v_ho_st.TimeFE_nodes() 
         # times = [tstart + delta_t * xi for xi in time_quad]
+        time_quad = list(time_quad)
+        # level set and deformation at all times (one sweep each)
+        lset_p1_nodes = [GridFunction(self.v_p1) for xi in time_quad]
+        deform_nodes = [GridFunction(self.v_def) for xi in time_quad]
+        RestrictGFInTime(self.lset_p1,time_quad,lset_p1_nodes)
+        RestrictGFInTime(self.deform,time_quad,deform_nodes)
         max_dists = []
         # for ti,xi in zip(times,time_quad):
-        for xi in time_quad:
-        
-            RestrictGFInTime(self.lset_p1,xi,self.lset_p1_node)
-            RestrictGFInTime(self.deform,xi,self.deform_node)
+        for xi, lset_p1_node, deform_node in zip(time_quad, lset_p1_nodes, deform_nodes):
             t.FixTime(xi)
             # t.Set(ti) 
             self.v_def_st.SetTime(xi)
             self.v_ho_st.SetTime(xi)
-            max_dists.append(CalcMaxDistance(levelset,self.lset_p1_node,self.deform_node,heapsize=self.heapsize))
+            max_dists.append(CalcMaxDistance(levelset,lset_p1_node,deform_node,heapsize=self.heapsize))
             #max_dists.append(CalcMaxDistance(self.lset_ho,self.lset_p1,self.deform,heapsize=self.heapsize))
+        # (the node functions hold the last time as before)
+        if time_quad:
+            self.lset_p1_node.vec.data = lset_p1_nodes[-1].vec
+            self.deform_node.vec.data = deform_nodes[-1].vec
         t.UnfixTime()
         self.v_def_st.SetOverrideTime(False)
         self.v_ho_st.SetOverrideTime(False)
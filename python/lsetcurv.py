@@ -105,6 +105,65 @@ The computed deformation depends on different options:
         self.deform = GridFunction(self.v_def, "deform")
         self.heapsize = heapsize
 
+    def _UpdateSpaces(self, force=True):
+        """
+Updates the spaces and GridFunctions. Unless force is set, this is only done if the mesh has
+changed (according to its timestamp) since the last update. Returns True if an update was carried
+out.
+        """
+        timestamp = MeshTimeStamp(self.v_p1.mesh)
+        if not force and getattr(self, "_mesh_timestamp", None) == timestamp:
+            return False
+        self._mesh_timestamp = timestamp
+        self.v_ho.Update()
+        self.lset_ho.Update()
+        self.v_p1.Update()
+        self.lset_p1.Update()
+        self.v_qn.Update()
+        self.qn.Update()
+        self.v_def.Update()
+        self.deform.Update()
+        return True
+
+    @staticmethod
+    def _SameBitArray(a, b):
+        """
+Compares the contents of two BitArrays (or None).
+        """
+        if a is None or b is None:
+            return a is None and b is None
+        return len(a) == len(b) and (a & ~b).NumSet() == 0 and (b & ~a).NumSet() == 0
+
+    def _SetLevelSet(self, levelset, blending):
+        """
+Sets lset_ho, qn and lset_p1 from the level set function and returns the blending function.
+        """
+        self.lset_ho.Set(levelset)
+        self.qn.Set(self.lset_ho.Deriv())
+        InterpolateToP1(self.lset_ho,self.lset_p1,eps_perturbation=self.eps_perturbation)
+        if blending == None or blending == "none":
+            blending = CoefficientFunction(0.0)
+        elif blending == "quadratic":
+            scale=sqrt(self.lset_p1.space.mesh.dim) * specialcf.mesh_size
+            blending = self.lset_p1*self.lset_p1/( scale * scale)
+        elif blending == "quartic":
+            scale=sqrt(self.lset_p1.space.mesh.dim) * specialcf.mesh_size
+            blending = self.lset_p1*self.lset_p1*self.lset_p1*self.lset_p1/(scale*scale*scale*scale)
+        return blending
+
+    def _ProjectShift(self, ba, blending, update_elements=None):
+        return ProjectShift(self.lset_ho,
+                            self.lset_p1,
+                            self.deform,
+                            self.qn,
+                            ba,
+                            blending,
+                            lower=self.lset_lower_bound,
+                            upper=self.lset_upper_bound,
+                            threshold=self.threshold,
+                            heapsize=self.heapsize,
+                            update_elements=update_elements)
+
     def CalcDeformation(self, levelset, ba =None, blending=None):
         """
 Compute the mesh deformation, s.t. isolines on cut elements of lset_p1 (the piecewise linear
@@ -128,40 +187,49 @@ blending : None/string/CoefficientFunction
      blending function that is 0 at the zero level set (of lset_p1) and increases like a fourth
      order polynomial with lset_p1. It is scaled with h, so that value 1 is not reached within cut
      elements.
+
+Returns the deformation (self.deform).
         """
-        self.v_ho.Update()
-        self.lset_ho.Update()
-        self.v_p1.Update()
-        self.lset_p1.Update()
-        self.v_qn.Update()
-        self.qn.Update()
-        self.v_def.Update()
-        self.deform.Update()
-        
-        self.lset_ho.Set(levelset)
-        self.qn.Set(self.lset_ho.Deriv())
-        InterpolateToP1(self.lset_ho,self.lset_p1,eps_perturbation=self.eps_perturbation)
-        if blending == None or blending == "none":
-            blending = CoefficientFunction(0.0)
-        elif blending == "quadratic":
-            scale=sqrt(self.lset_p1.space.mesh.dim) * specialcf.mesh_size
-            blending = self.lset_p1*self.lset_p1/( scale * scale)
-        elif blending == "quartic":
-            scale=sqrt(self.lset_p1.space.mesh.dim) * specialcf.mesh_size
-            blending = self.lset_p1*self.lset_p1*self.lset_p1*self.lset_p1/(scale*scale*scale*scale)
-            
-        ProjectShift(self.lset_ho,
-                     self.lset_p1,
-                     self.deform,
-                     self.qn,
-                     ba,
-                     blending,
-                     lower=self.lset_lower_bound,
-                     upper=self.lset_upper_bound,
-                     threshold=self.threshold,
-                     heapsize=self.heapsize)
+        self._UpdateSpaces()
+        self._previous_call = (None if ba is None else BitArray(ba), blending)
+        self._ProjectShift(ba, self._SetLevelSet(levelset, blending))
         return self.deform
 
+    def UpdateDeformation(self, levelset, ba =None, blending=None, tol=0.0):
+        """
+Incremental version of CalcDeformation: Reuses the deformation of the previous call (of
+CalcDeformation or UpdateDeformation). The deformation (self.deform) is only recomputed in the
+vicinity of elements where a dof of the higher order level set approximation changed by more than
+tol. Falls back to a full computation if the mesh, ba or blending changed since the last call.
+
+Parameters: see CalcDeformation and
+
+tol : float
+  tolerance for the change of the higher order level set dofs.
+
+Returns the BitArray of elements on which the deformation changed.
+        """
+        mesh_changed = self._UpdateSpaces(force=False)
+        previous = getattr(self, "_previous_call", None)
+        if (mesh_changed or previous is None or previous[1] is not blending
+            or not self._SameBitArray(previous[0], ba)):
+            self.CalcDeformation(levelset, ba, blending)
+            changed = BitArray(self.v_p1.mesh.ne)
+            changed.Set()
+            return changed
+
+        # BitArrays (e.g. from a CutInfo) can be changed in place, hence a copy
+        self._previous_call = (None if ba is None else BitArray(ba), blending)
+        lset_ho_old = self.lset_ho.vec.CreateVector()
+        lset_ho_old.data = self.lset_ho.vec
+        blending = self._SetLevelSet(levelset, blending)
+
+        # elements with changed level set dofs. The vertex patch around these contains all
+        # elements where qn (if continuous), lset_p1 or the blending changed. ProjectShift then
+        # recomputes the deformation on the dofs of those.
+        changed_lset = GetElementsWithChangedDofs(self.v_ho, lset_ho_old, self.lset_ho.vec, tol)
+        changed_input = GetElementsWithSharedVertex(self.v_p1.mesh, changed_lset)
+        return self._ProjectShift(ba, blending, update_elements=changed_input)["changed_elements"]
 
     # def CalcDistances(self, levelset,  lset_stats):
     #     """
@@ -169,16 +237,18 @@ blending : None/string/CoefficientFunction
     #     """
     #     CalcDistances(levelset,self.lset_p1,self.deform,lset_stats)
 
-    def CalcMaxDistance(self, levelset, heapsize=None):
+    def CalcMaxDistance(self, levelset, heapsize=None, intorder=-1, element_wise=False):
         """
 Compute approximated distance between of the isoparametrically obtained geometry.
+With element_wise=True a numpy array with the maximum distance per element is
+returned.
 
 See documentation of xfem.CalcMaxDistance 
         """
         if (heapsize == None):
-            return CalcMaxDistance(levelset,self.lset_p1,self.deform,heapsize=self.heapsize)
-        else:
-            return CalcMaxDistance(levelset,self.lset_p1,self.deform,heapsize=heapsize)
+            heapsize = self.heapsize
+        return CalcMaxDistance(levelset,self.lset_p1,self.deform,heapsize=heapsize,
+                               intorder=intorder,element_wise=element_wise)
         
     def MarkForRefinement(self, levelset = None, refine_threshold = 0.1, absolute = False):
         """
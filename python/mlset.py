@@ -2,9 +2,58 @@
 Convenience layer module for integration using multiple level sets.
 """
 from ngsolve import Norm, Grad, GridFunction, CoefficientFunction, IfPos
-from xfem import IF, POS, NEG, ANY, Integrate
-from itertools import chain, product, repeat
-from collections import Counter
+from xfem import IF, POS, NEG, ANY, MultiLevelsetCutInfo
+from itertools import product, repeat
+
+# A tuple of domain types is encoded in one integer with three bits per
+# level set (cf. COMBINED_DOMAIN_TYPE and MultiLevelsetCutInfo.GetElementCodes):
+# bit 3*i (NEG), 3*i+1 (POS) and 3*i+2 (IF) for the i-th level set. ANY is
+# NEG|POS and expanded before the codes are stored.
+_DT_BITS = {NEG: 1, POS: 2, IF: 4, ANY: 3}
+_BITS_DT = {1: NEG, 2: POS, 4: IF}
+
+
+def _low_bits(n):
+    return sum(1 << (3 * i) for i in range(n))
+
+
+def _encode(dtt):
+    code = 0
+    for i, dt in enumerate(dtt):
+        code |= _DT_BITS[dt] << (3 * i)
+    return code
+
+
+def _codim(code):
+    return sum(1 for i in range(code.bit_length() // 3 + 1)
+               if (code >> (3 * i)) & 4)
+
+
+def _decode(code, n):
+    return tuple(_BITS_DT[(code >> (3 * i)) & 7] for i in range(n))
+
+
+def _expand_any(code, n):
+    codes = [code]
+    for i in range(n):
+        if (code >> (3 * i)) & 7 == 3:
+            mask = ~(7 << (3 * i))
+            codes = [(c & mask) | (b << (3 * i)) for c in codes for b in (1, 2)]
+    return codes
+
+
+def _intersect_codes(code1, code2, low):
+    """
+    Intersection of two (different) regions: level sets with NEG in one
+    and POS in the other give an empty region (None), other differences
+    lead to IF.
+    """
+    u = code1 | code2
+    if u & (u >> 1) & low:
+        return None
+    d = code1 ^ code2
+    d_groups = (d | (d >> 1) | (d >> 2)) & low
+    return (code1 & ~(d_groups * 7)) | (d_groups << 2)
 
 
 class DomainTypeArray():
@@ -95,48 +144,58 @@ class DomainTypeArray():
                 raise Exception("The level set functions need to be "
                                 "ngsolve.GridFunctions!")
 
-        # Expansion of ANY
-        if (ANY in chain.from_iterable(dtlist)):
-            dtlist_expand = []
-            for dtt in dtlist:
-                if ANY in dtt:
-                    locations_expand = [i for i in range(len(dtt)) if dtt[i] == ANY]
-                    n = len(locations_expand)
-                    dt_lists = [list(dtt) for i in range(2**n)]
-                    dt_per = list(product(*list(repeat((POS, NEG), n))))
-                    for i, dtl in enumerate(dt_lists):
-                        for j, k in enumerate(locations_expand):
-                            dt_lists[i][k] = dt_per[i][j]
-                        dtlist_expand.append(tuple(dt_lists[i]))
-                else:
-                    dtlist_expand.append(dtt)
-            self.as_list = list(set(dtlist_expand))
-        else:
-            self.as_list = list(set(dtlist))
-
+        codes = []
+        for dtt in dtlist:
+            codes += _expand_any(_encode(dtt), dtt_len)
+
+        self._n = dtt_len
+        self._codes = sorted(set(codes))
+        self._finalize(lsets, persistent_compress)
+
+    @classmethod
+    def _from_codes(cls, codes, n, codim, lsets=None,
+                    persistent_compress=False):
+        dta = cls.__new__(cls)
+        dta._n = n
+        dta.codim = codim
+        dta._codes = sorted(set(codes))
+        dta._finalize(lsets, persistent_compress)
+        return dta
+
+    def _finalize(self, lsets, persistent_compress):
         self.lsets = lsets
         self.persistent_compress = persistent_compress
 
         if self.lsets:
             self.Compress(self.lsets, self.persistent_compress)
-        
+
         if not self.persistent_compress:
             self.lsets = None
 
+    @property
+    def as_list(self):
+        return [_decode(code, self._n) for code in self._codes]
+
+    @as_list.setter
+    def as_list(self, dtlist):
+        self._codes = sorted(set(_encode(dtt) for dtt in dtlist))
+
     def __len__(self):
-        return self.as_list.__len__()
+        return self._codes.__len__()
 
     def __iter__(self):
         return self.as_list.__iter__()
 
     def __contains__(self, dtt):
-        return dtt in self.as_list
+        if len(dtt) != self._n or any(dt not in _BITS_DT.values() for dt in dtt):
+            return False
+        return _encode(dtt) in self._codes
 
     def __eq__(self, dta_b):
         if self.codim != dta_b.codim or self.__len__() != len(dta_b):
             return False
         else:
-            return Counter(self.as_list) == Counter(dta_b.as_list)
+            return self._codes == dta_b._codes
 
     def __ne__(self, dta_b):
         return not self.__eq__(dta_b)
@@ -150,6 +209,9 @@ class DomainTypeArray():
         return str_out[:-2] + "]"
 
     def __or__(self, dta_b):
+        if self._n != dta_b._n:
+            raise Exception("DomainTypeArray initialised with tuples of "
+                            "different length!")
         if self.codim != dta_b.codim:
             raise Exception("Co-dims don't match: Union not possible!")
         if not self.persistent_compress and not dta_b.persistent_compress:
@@ -169,9 +231,13 @@ class DomainTypeArray():
             lsets_out = self.lsets
             pers_out = self.persistent_compress
 
-        return DomainTypeArray(self.as_list + dta_b.as_list, lsets_out, pers_out)
+        return DomainTypeArray._from_codes(self._codes + dta_b._codes, self._n,
+                                           self.codim, lsets_out, pers_out)
 
     def __and__(self, dta_b):
+        if self._n != dta_b._n:
+            raise Exception("DomainTypeArray initialised with tuples of "
+                            "different length!")
         if not self.persistent_compress and not dta_b.persistent_compress:
             lsets_out = None
             pers_out = False
@@ -189,34 +255,36 @@ class DomainTypeArray():
             lsets_out = self.lsets
             pers_out = self.persistent_compress
 
-        dtl_out = [dtt for dtt in self.as_list if dtt in dta_b.as_list]
-        
-        if len(dtl_out) == 0:
-            for dtt1, dtt2 in product(self.as_list, dta_b.as_list):
-                if dtt1 == dtt2:
-                    dtl_out.append(dtt1)
-                    continue
-                dtt_out = []
-                for i, dt in enumerate(dtt1):
-                    if dt != dtt2[i]:
-                        if dt in [POS, NEG] and dtt2[i] in [POS, NEG]:
-                            break
-                        else:
-                            dtt_out.append(IF)
-                    else:
-                        dtt_out.append(dt)
-                else:
-                    dtl_out.append(tuple(dtt_out))
-        
-        return DomainTypeArray(dtl_out, lsets_out, pers_out)
+        codes_b = set(dta_b._codes)
+        codes_out = [code for code in self._codes if code in codes_b]
+
+        if len(codes_out) == 0:
+            low = _low_bits(self._n)
+            for code1, code2 in product(self._codes, dta_b._codes):
+                code = _intersect_codes(code1, code2, low)
+                if code is not None:
+                    codes_out.append(code)
+
+        codims = set(_codim(code) for code in codes_out)
+        if len(codims) > 1:
+            raise Exception("Intersection leads to regions of different "
+                            "co-dimension!")
+        codim_out = codims.pop() if codims else self.codim
+        return DomainTypeArray._from_codes(codes_out, self._n, codim_out,
+                                           lsets_out, pers_out)
 
     def __invert__(self):
-        n = len(self.as_list[0])
-        dt_per = list(product(*list(repeat((POS, NEG, IF), n))))
-        dt_per = list(filter(lambda dtt: dtt.count(IF) == self.codim, dt_per))
-        for dt in self.as_list:
-            dt_per.remove(dt)
-        return DomainTypeArray(dt_per, self.lsets, self.persistent_compress)
+        codes = set(self._codes)
+        dt_per = product(*list(repeat((1, 2, 4), self._n)))
+        codes_out = []
+        for bits in dt_per:
+            if bits.count(4) != self.codim:
+                continue
+            code = sum(b << (3 * i) for i, b in enumerate(bits))
+            if code not in codes:
+                codes_out.append(code)
+        return DomainTypeArray._from_codes(codes_out, self._n, self.codim,
+                                           self.lsets, self.persistent_compress)
 
     def __ior__(self, dta_b):
         return self.__or__(dta_b)
@@ -246,20 +314,17 @@ class DomainTypeArray():
         None
         """
 
-        if len(lsets) != len(self.as_list[0]):
+        if len(lsets) != self._n:
             raise Exception("The number of level sets does not match the "
                             " length of the arrays domain tuples!")
         if type(lsets[0]) != GridFunction:
             raise Exception("The level set functions need to be "
                             "ngsolve.GridFunctions!")
 
-        dtl_out = []
-        for dtt in self.as_list:
-            weight = Integrate({"levelset": lsets, "domain_type": dtt},
-                                cf=1, mesh=lsets[0].space.mesh, order=0)
-            if abs(weight) > 1e-12:
-                dtl_out.append(dtt)
-        self.as_list = dtl_out
+        mlci = MultiLevelsetCutInfo(lsets[0].space.mesh, lsets)
+        has_measure = mlci.HasPositiveMeasure(self.as_list)
+        self._codes = [code for code, keep in zip(self._codes, has_measure)
+                       if keep]
 
         if persistent:
             self.persistent_compress = persistent
@@ -283,33 +348,32 @@ class DomainTypeArray():
         if self.codim >= 3:
             raise Exception("Boundary does not make sense for codim >=3")
 
-        dtl_out = []
-        for dtt in self.as_list:
-            for i, dt in enumerate(dtt):
-                if dt != IF:
-                    if ( dtt[:i] + tuple([POS]) + dtt[i+1:] in self and 
-                         dtt[:i] + tuple([NEG]) + dtt[i+1:] in self):
-                        continue
-                    else:
-                        is_relevant = True
-                        dtt_out = dtt[:i] + tuple([IF]) + dtt[i+1:]
-                        if self.lsets:
-                            weight = Integrate({"levelset": self.lsets,
-                                                "domain_type": dtt_out},
-                                                cf=1, 
-                                                mesh=self.lsets[0].space.mesh,
-                                                order=0)
-                            if abs(weight) < 1e-12:
-                                is_relevant = False
-                        if is_relevant:
-                            dtl_out.append(dtt_out)
-
+        codes = set(self._codes)
+        codes_out = set()
+        for code in self._codes:
+            for i in range(self._n):
+                if (code >> (3 * i)) & 4:
+                    continue
+                rest = code & ~(7 << (3 * i))
+                if (rest | (1 << (3 * i)) in codes and
+                    rest | (2 << (3 * i)) in codes):
+                    continue
+                codes_out.add(rest | (4 << (3 * i)))
+        codes_out = sorted(codes_out)
+
+        if self.lsets and len(codes_out) > 0:
+            mlci = MultiLevelsetCutInfo(self.lsets[0].space.mesh, self.lsets)
+            has_measure = mlci.HasPositiveMeasure(
+                [_decode(code, self._n) for code in codes_out])
+            codes_out = [code for code, keep in zip(codes_out, has_measure)
+                         if keep]
+
+        dta_out = DomainTypeArray._from_codes(codes_out, self._n,
+                                              self.codim + 1)
         if self.persistent_compress:
-            dta_out = DomainTypeArray(dtl_out, self.lsets, 
-                                      self.persistent_compress)
-        else:
-            dta_out = DomainTypeArray(dtl_out)
-    
+            dta_out.lsets = self.lsets
+            dta_out.persistent_compress = self.persistent_compress
+
         return dta_out
 
     def Indicator(self, lsets):
@@ -466,19 +530,19 @@ def TensorUnion(*args):
             raise TypeError("TensorUnion only possible for DomainTypeArrays")
         if dta.codim != codim:
             raise Exception("Cannot form TensorUnion for arrays of different codimension")
-        n_dtas.append(len(dta.as_list[0]))
+        n_dtas.append(dta._n)
 
+    n = sum(n_dtas)
     i = 0
-    dtl_out = []
-    dtt_candiate = [ANY for j in range(sum(n_dtas))]
+    codes_out = []
     for j, dta in enumerate(args):
-        for dtt in dta.as_list:
-            dtt_out = dtt_candiate.copy()
-            dtt_out[i:i+n_dtas[j]] = dtt   
-            dtl_out.append(tuple(dtt_out))
+        # all other level sets are ANY
+        code_any = _DT_BITS[ANY] * (_low_bits(n) & ~(_low_bits(n_dtas[j]) << (3 * i)))
+        for code in dta._codes:
+            codes_out += _expand_any(code_any | (code << (3 * i)), n)
         i += n_dtas[j]
 
-    return DomainTypeArray(dtl_out)
+    return DomainTypeArray._from_codes(codes_out, n, codim)
 
 
 def TensorIntersection(*args):
@@ -503,8 +567,12 @@ def TensorIntersection(*args):
         if type(dta) != DomainTypeArray:
             raise TypeError("TensorUnion only possible for DomainTypeArrays")
 
-    dtl_out = []
-    for dtt in product(*[dta.as_list for dta in args]):
-        dtl_out.append(tuple(chain(*dtt)))
+    codes_out = [0]
+    n = 0
+    for dta in args:
+        codes_out = [code | (code_b << (3 * n))
+                     for code in codes_out for code_b in dta._codes]
+        n += dta._n
     
-    return DomainTypeArray(dtl_out)
+    return DomainTypeArray._from_codes(codes_out, n,
+                                       sum(dta.codim for dta in args))
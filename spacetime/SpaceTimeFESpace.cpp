@@ -141,99 +141,162 @@ SpaceTimeFESpace :: SpaceTimeFESpace (shared_ptr<MeshAccess> ama, shared_ptr<FES
        throw Exception("SpaceTimeFESpace :: GetFE cannot help dimension != 2,3");
    }
 
-  template<typename SCAL>
+  void SpaceTimeFESpace :: RestrictInTime(shared_ptr<GridFunction> st_GF, FlatArray<double> times, SliceMatrix<> values)
+  {
+    static Timer t ("SpaceTimeFESpace::RestrictInTime");
+    RegionTimer reg (t);
+
+    FlatVector<> st_vec = st_GF->GetVector().FVDouble();
+    // the space-time vector has one block (of all space dofs) per active time node
+    const int nblocks = tfe->GetNDof();
+    const size_t n = st_vec.Size() / nblocks;
+    if (n * nblocks != st_vec.Size() || values.Width() != n || values.Height() != times.Size())
+      throw Exception("SpaceTimeFESpace::RestrictInTime : sizes do not match");
+    FlatMatrix<> st_mat(nblocks, n, st_vec.Data());
+
+    // weights(k,cnt) : value of the time basis function of the cnt-th active
+    // node at times[k] (nodal property is used at the nodes)
+    NodalTimeFE * time_FE = dynamic_cast<NodalTimeFE*>(tfe);
+    Array<double> & nodes = TimeFE_nodes();
+    Matrix<> weights(times.Size(), nblocks);
+    for (int k = 0; k < times.Size(); k++)
+    {
+      int node_of_time = -1;
+      for (int i = 0; i < nodes.Size(); i++)
+        if (abs(times[k] - nodes[i]) < EPS)
+          node_of_time = i;
+      for (int i = 0, cnt = 0; i < nodes.Size(); i++)
+      {
+        if (!IsTimeNodeActive(i))
+          continue;
+        if (node_of_time >= 0)
+          weights(k,cnt) = (i == node_of_time) ? 1.0 : 0.0;
+        else
+          weights(k,cnt) = time_FE->Lagrange_Pol(times[k],i);
+        cnt++;
+      }
+    }
+
+    ParallelForRange (n, [&] (IntRange r)
+    {
+      values.Cols(r) = weights * st_mat.Cols(r);
+    });
+  }
+
   void SpaceTimeFESpace :: RestrictGFInTime(shared_ptr<GridFunction> st_GF, double time, shared_ptr<GridFunction> s_GF)
   {
-     auto st_vec = st_GF->GetVectorPtr()->FV<SCAL>();   
-     auto restricted_vec = s_GF->GetVectorPtr()->FV<SCAL>();
-     //restricted_vec = SCAL(0.0);
-
-     Array<double> & nodes = TimeFE_nodes();
-
-     //cout << "Vhdim = " << Vh->GetDimension() << endl;
-     // Using nodal property for special case
-     int cnt = 0;
-     for(int i= 0; i < nodes.Size(); i++) {
-         if (!IsTimeNodeActive(i))
-           continue;
-         if(abs(time - nodes[i]) < EPS) {
-             cout << IM(3) <<"Node case" << endl;
-             for(int j = 0; j < Vh->GetNDof();j++)
-                 restricted_vec[j] = st_vec[j+cnt*Vh->GetNDof()];
-             return;
-         }
-         cnt++;
-     }
-     cout << IM(3) <<"General case" << endl;
-     // General case
-     //cout << IM(3) <<"time fe:" << GetTimeFE() << endl;
-     NodalTimeFE * time_FE = dynamic_cast<NodalTimeFE*>(tfe);
-
-     const int dim = Vh->GetDimension();
-     for(int j=0; j< Vh->GetNDof(); j++) restricted_vec[j] = 0.;
-
-     for(int i= 0; i < nodes.Size(); i++) {
-       if (IsTimeNodeActive(i))
-       {
-         double weight_time = time_FE->Lagrange_Pol(time,i);
-         for(int j = 0; j < Vh->GetNDof();j++)
-             //for(int d = 0; d < dim;d++)
-                 //restricted_vec[dim*j+d] += weight_time * st_vec[dim*(j+i*Vh->GetNDof())+d];
-             restricted_vec[j] += weight_time * st_vec[j+i*Vh->GetNDof()];
-       }
-     }
+    ArrayMem<double,1> times(1);
+    times[0] = time;
+    FlatVector<> restricted_vec = s_GF->GetVector().FVDouble();
+    RestrictInTime(st_GF, times, FlatMatrix<>(1, restricted_vec.Size(), restricted_vec.Data()));
+  }
+
+  void SpaceTimeFESpace :: RestrictGFInTime(shared_ptr<GridFunction> st_GF, FlatArray<double> times,
+                                            FlatArray<shared_ptr<GridFunction>> s_GFs)
+  {
+    if (times.Size() != s_GFs.Size())
+      throw Exception("SpaceTimeFESpace::RestrictGFInTime : number of times and GridFunctions do not match");
+    if (times.Size() == 0)
+      return;
+    Matrix<> values(times.Size(), s_GFs[0]->GetVector().FVDouble().Size());
+    RestrictInTime(st_GF, times, values);
+    for (int k = 0; k < times.Size(); k++)
+    {
+      FlatVector<> restricted_vec = s_GFs[k]->GetVector().FVDouble();
+      if (restricted_vec.Size() != values.Width())
+        throw Exception("SpaceTimeFESpace::RestrictGFInTime : sizes do not match");
+      restricted_vec = values.Row(k);
+    }
   }
 
-  
   shared_ptr<GridFunction> SpaceTimeFESpace :: CreateRestrictedGF(shared_ptr<GridFunction> st_GF, double time)
   {
-     shared_ptr<GridFunction> restricted_GF = nullptr;
-     restricted_GF = make_shared < S_GridFunction < double > >( Vh_ptr);
-     restricted_GF->Update();
-     switch (Vh->GetDimension())
-     {
-       case 1: RestrictGFInTime<double>(st_GF, time, restricted_GF); break;
-       case 2: RestrictGFInTime<Vec<2>>(st_GF, time, restricted_GF); break;
-       case 3: RestrictGFInTime<Vec<3>>(st_GF, time, restricted_GF); break;
-       default: throw Exception("cannot handle GridFunction type (dimension too large?)."); break;
-     }
+    ArrayMem<double,1> times(1);
+    times[0] = time;
+    return CreateRestrictedGFs(st_GF, times)[0];
+  }
 
-     return restricted_GF;
+  Array<shared_ptr<GridFunction>> SpaceTimeFESpace :: CreateRestrictedGFs(shared_ptr<GridFunction> st_GF, FlatArray<double> times)
+  {
+    Array<shared_ptr<GridFunction>> restricted_GFs(times.Size());
+    for (int k = 0; k < times.Size(); k++)
+    {
+      restricted_GFs[k] = make_shared < S_GridFunction < double > >( Vh_ptr);
+      restricted_GFs[k]->Update();
+    }
+    RestrictGFInTime(st_GF, times, restricted_GFs);
+    return restricted_GFs;
   }
 
   void SpaceTimeFESpace ::InterpolateToP1(shared_ptr<CoefficientFunction> st_CF, shared_ptr<CoefficientFunction> ctref, shared_ptr<GridFunction> st_GF)
   {
-    LocalHeapMem<100000> lh("SpacetimeInterpolateToP1");
+    static Timer t ("SpaceTimeFESpace::InterpolateToP1");
+    RegionTimer reg (t);
+    // (split between the threads of the parallel element loop in InterpolateP1)
+    LocalHeap lh(10000000, "SpacetimeInterpolateToP1", true);
     auto node_gf = make_shared < S_GridFunction < double > >( Vh_ptr);
     node_gf->Update();
-    auto gf_vec = st_GF->GetVectorPtr()->FV<double>();
-    auto node_gf_vec = node_gf->GetVectorPtr()->FV<double>();
     shared_ptr<TimeVariableCoefficientFunction> coef_tref = dynamic_pointer_cast<TimeVariableCoefficientFunction>(ctref);
     if (!coef_tref)
       throw Exception("SpaceTimeFESpace ::InterpolateToP1 : tref is not a TimeVariableCoefficientFunction");
-    //const double backup_tref = coef_tref->GetValue();
+
+    // all active time nodes are treated in one sweep, the reference time is
+    // taken from the integration points (the space-time vector has one block
+    // per active time node)
     Array<double> & nodes = TimeFE_nodes();
-    for(int i= 0; i < nodes.Size(); i++) {
+    Array<double> trefs;
+    Array<int> blocks;
+    for(int i= 0; i < nodes.Size(); i++)
       if (IsTimeNodeActive(i))
       {
-        //coef_tref->SetValue(t+nodes[i]*dt);
-          coef_tref->FixTime(nodes[i]);
-
-        InterpolateP1 iP1(st_CF, node_gf);
-        iP1.Do(lh,1e-15,nodes[i]);
-        for(int j = 0; j < Vh_ptr->GetNDof();j++)
-        {
-          gf_vec(i*Vh_ptr->GetNDof()+j) = node_gf_vec(j);
-        }
+        blocks.Append(trefs.Size());
+        trefs.Append(nodes[i]);
       }
-    }        
+    if (trefs.Size() == 0)
+      return;
+
     coef_tref->UnfixTime();
-    //coef_tref->SetValue(backup_tref);
+    InterpolateP1 iP1(st_CF, node_gf);
+    iP1.DoSpaceTime(lh, trefs, blocks, st_GF->GetVectorPtr()->FV<double>(), 1e-15);
   }
 
+  void SpaceTimeFESpace ::InterpolateToP1(shared_ptr<GridFunction> st_GF_ho, shared_ptr<GridFunction> st_GF, double eps_perturbation)
+  {
+    static Timer t ("SpaceTimeFESpace::InterpolateToP1(GF)");
+    RegionTimer reg (t);
+    SpaceTimeFESpace * st_FES_ho = dynamic_cast<SpaceTimeFESpace*>(st_GF_ho->GetFESpace().get());
+    if (!st_FES_ho)
+      throw Exception("SpaceTimeFESpace ::InterpolateToP1 : not a spacetime gridfunction");
+    if (st_FES_ho->TimeFE_nodes().Size() != TimeFE_nodes().Size())
+      throw Exception("SpaceTimeFESpace ::InterpolateToP1 : time finite elements do not match");
+
+    const size_t ndof_ho = st_FES_ho->Vh_ptr->GetNDof();
+    const size_t ndof_p1 = Vh_ptr->GetNDof();
+    auto vec_ho = st_GF_ho->GetVectorPtr()->FV<double>();
+    auto vec_p1 = st_GF->GetVectorPtr()->FV<double>();
+    Array<double> & nodes = TimeFE_nodes();
+
+    ParallelFor (ma->GetNV(), [&] (size_t vnr)
+    {
+      ArrayMem<DofId,4> dof_ho, dof_p1;
+      st_FES_ho->Vh_ptr->GetDofNrs(NodeId(NT_VERTEX,vnr), dof_ho);
+      Vh_ptr->GetVertexDofNrs(vnr, dof_p1);
+      if (dof_p1[0] == -1 || dof_ho.Size() == 0 || dof_ho[0] == -1)
+        return;
+      // (one block per active time node)
+      for (int i = 0, cnt = 0; i < nodes.Size(); i++)
+      {
+        if (!IsTimeNodeActive(i))
+          continue;
+        double val = vec_ho(cnt*ndof_ho + dof_ho[0]);
+        // avoid vertex cuts by introducing a small perturbation:
+        if (abs(val) < eps_perturbation)
+          val = eps_perturbation;
+        vec_p1(cnt*ndof_p1 + dof_p1[0]) = val;
+        cnt++;
+      }
+    });
+  }
 
-  template void SpaceTimeFESpace :: RestrictGFInTime<double>(shared_ptr<GridFunction>, double, shared_ptr<GridFunction>);
-  template void SpaceTimeFESpace :: RestrictGFInTime<Vec<2>>(shared_ptr<GridFunction>, double, shared_ptr<GridFunction>);
-  template void SpaceTimeFESpace :: RestrictGFInTime<Vec<3>>(shared_ptr<GridFunction>, double, shared_ptr<GridFunction>);
 
 }
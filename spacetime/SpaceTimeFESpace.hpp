@@ -48,6 +48,9 @@ namespace ngcomp
     virtual void GetDofNrs (ElementId ei, Array<DofId> & dnums) const;
     virtual FiniteElement & GetFE (ElementId ei, Allocator & alloc) const;
     FiniteElement* GetTimeFE() { return tfe; }
+    shared_ptr<FESpace> GetSpaceFESpace() const { return Vh_ptr; }
+    /// number of blocks (of size of the spatial space) in a vector
+    int GetNTimeBlocks() const { return tfe->GetNDof(); }
 
     // For debugging
     void SetTime(double a) {time = a; override_time = true;}
@@ -71,10 +74,16 @@ namespace ngcomp
       return time_FE->IsNodeActive(i);
     }
 
-    template<typename SCAL>
+    /// restriction of st_GF to several reference times at once: row k of
+    /// values is the (flat) space vector at times[k]
+    void RestrictInTime(shared_ptr<GridFunction> st_GF, FlatArray<double> times, SliceMatrix<> values);
     void RestrictGFInTime(shared_ptr<GridFunction> st_GF, double time, shared_ptr<GridFunction> s_GF);
+    void RestrictGFInTime(shared_ptr<GridFunction> st_GF, FlatArray<double> times, FlatArray<shared_ptr<GridFunction>> s_GFs);
     shared_ptr<GridFunction> CreateRestrictedGF( shared_ptr<GridFunction> st_GF, double time);
+    Array<shared_ptr<GridFunction>> CreateRestrictedGFs( shared_ptr<GridFunction> st_GF, FlatArray<double> times);
     void InterpolateToP1(shared_ptr<CoefficientFunction> st_CF, shared_ptr<CoefficientFunction> tref, shared_ptr<GridFunction> st_GF);
+    /// vertex values of a space-time GridFunction st_GF_ho (all time nodes)
+    void InterpolateToP1(shared_ptr<GridFunction> st_GF_ho, shared_ptr<GridFunction> st_GF, double eps_perturbation);
 
   };
 
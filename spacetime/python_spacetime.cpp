@@ -1,6 +1,7 @@
 //#include "../ngstd/python_ngstd.hpp"
 #include <regex>
 #include <python_ngstd.hpp>
+#include <pybind11/numpy.h>
 // #include "../utils/bitarraycf.hpp"
 // #include "../xfem/cutinfo.hpp"
 // #include "../xfem/xFESpace.hpp"
@@ -505,37 +506,82 @@ use_FixAnyTime: bool
    {
      FESpace* raw_FE = (st_GF->GetFESpace()).get();
      SpaceTimeFESpace * st_FES = dynamic_cast<SpaceTimeFESpace*>(raw_FE);
+     if (!st_FES) throw Exception("not a spacetime gridfunction");
      return st_FES->CreateRestrictedGF(st_GF,time);
    },
    py::arg("gf"),
    py::arg("reference_time") = 0.0,
    "Create spatial-only Gridfunction corresponding to a fixed time.");
 
+   m.def("CreateTimeRestrictedGF", [](PyGF st_GF, py::list times) -> py::list
+   {
+     FESpace* raw_FE = (st_GF->GetFESpace()).get();
+     SpaceTimeFESpace * st_FES = dynamic_cast<SpaceTimeFESpace*>(raw_FE);
+     if (!st_FES) throw Exception("not a spacetime gridfunction");
+     Array<double> times_a = makeCArray<double> (times);
+     py::list ret;
+     for (auto gf : st_FES->CreateRestrictedGFs(st_GF,times_a))
+       ret.append(py::cast(gf));
+     return ret;
+   },
+   py::arg("gf"),
+   py::arg("reference_time"),
+   "Create spatial-only Gridfunctions corresponding to a list of fixed times (in one sweep).");
+
    m.def("RestrictGFInTime", [](PyGF st_GF,double time,PyGF s_GF)
    {
      FESpace* raw_FE = (st_GF->GetFESpace()).get();
      SpaceTimeFESpace * st_FES = dynamic_cast<SpaceTimeFESpace*>(raw_FE);
-     switch (st_FES->GetDimension())
-     {
-       case 1:
-         st_FES->RestrictGFInTime<double>(st_GF,time,s_GF);
-         break;
-       case 2:
-         st_FES->RestrictGFInTime<Vec<2>>(st_GF,time,s_GF);
-         break;
-       case 3:
-         st_FES->RestrictGFInTime<Vec<3>>(st_GF,time,s_GF);
-         break;
-       default:
-         throw Exception("cannot handle GridFunction type (dimension too large?).");
-         break;
-     }
+     if (!st_FES) throw Exception("not a spacetime gridfunction");
+     st_FES->RestrictGFInTime(st_GF,time,s_GF);
    }, 
    py::arg("spacetime_gf"),
    py::arg("reference_time") = 0.0,
    py::arg("space_gf"),
    "Extract Gridfunction corresponding to a fixed time from a space-time GridFunction.");
 
+   m.def("RestrictGFInTime", [](PyGF st_GF, py::list times, py::list s_GFs)
+   {
+     FESpace* raw_FE = (st_GF->GetFESpace()).get();
+     SpaceTimeFESpace * st_FES = dynamic_cast<SpaceTimeFESpace*>(raw_FE);
+     if (!st_FES) throw Exception("not a spacetime gridfunction");
+     Array<double> times_a = makeCArray<double> (times);
+     Array<shared_ptr<GridFunction>> s_GFs_a = makeCArray<shared_ptr<GridFunction>> (s_GFs);
+     st_FES->RestrictGFInTime(st_GF,times_a,s_GFs_a);
+   }, 
+   py::arg("spacetime_gf"),
+   py::arg("reference_time"),
+   py::arg("space_gf"),
+   "Extract Gridfunctions corresponding to a list of fixed times from a space-time GridFunction\n"
+   "(in one sweep).");
+
+   m.def("TimeRestrictedValues", [](PyGF st_GF, py::list times)
+   {
+     FESpace* raw_FE = (st_GF->GetFESpace()).get();
+     SpaceTimeFESpace * st_FES = dynamic_cast<SpaceTimeFESpace*>(raw_FE);
+     if (!st_FES) throw Exception("not a spacetime gridfunction");
+     Array<double> times_a = makeCArray<double> (times);
+     const size_t n = st_GF->GetVector().FVDouble().Size() / st_FES->GetTimeFE()->GetNDof();
+     py::array_t<double> ret({ size_t(times_a.Size()), n });
+     st_FES->RestrictInTime(st_GF, times_a, FlatMatrix<>(times_a.Size(), n, ret.mutable_data()));
+     return ret;
+   },
+   py::arg("spacetime_gf"),
+   py::arg("reference_time"),
+   docu_string(R"raw_string(
+Returns the values of a space-time GridFunction at a list of fixed times as numpy array.
+Row k contains the coefficient vector of the spatial GridFunction at reference_time[k] (as
+CreateTimeRestrictedGF, for vector-valued spaces the flattened vector).
+
+Parameters
+
+spacetime_gf : ngsolve.GridFunction
+  space-time GridFunction
+
+reference_time : list(float)
+  reference times in [0,1]
+)raw_string"));
+
    m.def("SpaceTimeInterpolateToP1", [](PyCF st_CF, PyCF tref, PyGF st_GF)
    {
      FESpace* raw_FE = (st_GF->GetFESpace()).get();
@@ -546,7 +592,21 @@ use_FixAnyTime: bool
    py::arg("spacetime_cf"),
    py::arg("time"),
    py::arg("spacetime_gf"),
-   "Interpolate nodal in time (possible high order) and nodal in space (P1).");
+   "Interpolate nodal in time (possible high order) and nodal in space (P1).\n"
+   "All active time nodes are interpolated in one (parallel) sweep over the mesh.");
+
+   m.def("SpaceTimeInterpolateToP1", [](PyGF st_GF_ho, PyGF st_GF, double eps_perturbation)
+   {
+     FESpace* raw_FE = (st_GF->GetFESpace()).get();
+     SpaceTimeFESpace * st_FES = dynamic_cast<SpaceTimeFESpace*>(raw_FE);
+     if (!st_FES) throw Exception("not a spacetime gridfunction");
+     st_FES->InterpolateToP1(st_GF_ho,st_GF,eps_perturbation);
+   }, 
+   py::arg("spacetime_gf_ho"),
+   py::arg("spacetime_gf"),
+   py::arg("eps_perturbation")=1e-14,
+   "Takes the vertex values of a space-time GridFunction at all time nodes and puts them into\n"
+   "a space-time GridFunction that is P1 in space (cf. InterpolateToP1).");
 
 
    py::class_<SpaceTimeVTKOutput, shared_ptr<SpaceTimeVTKOutput>>(m, "SpaceTimeVTKOutput")
@@ -0,0 +1,64 @@
+"""
+Microbenchmark for the incremental mesh deformation of LevelSetMeshAdaptation.
+
+A sphere is moved by a small local bump in every time step. The full
+computation (CalcDeformation) is compared with the incremental one
+(UpdateDeformation), which only recomputes the deformation in the vicinity
+of the elements where the level set changed. Both results are checked to
+agree:
+
+  python3 bench_calcdeformation.py [nthreads]
+"""
+import sys
+from time import perf_counter
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+from xfem.lsetcurv import *
+
+ngsglobals.msg_level = 0
+
+
+def levelset(t):
+    # sphere with a bump that moves in x-direction (only local changes per step)
+    r = sqrt((x - 0.5) * (x - 0.5) + (y - 0.5) * (y - 0.5) + (z - 0.5) * (z - 0.5))
+    xc = 0.3 + 0.05 * t
+    bump = (x - xc) * (x - xc) + (y - 0.5) * (y - 0.5)
+    return r - 0.3 + 0.05 * IfPos(0.01 - bump, 0.01 - bump, 0)
+
+
+def bench(mesh, order, steps=5):
+    full = LevelSetMeshAdaptation(mesh, order=order, threshold=0.2)
+    incr = LevelSetMeshAdaptation(mesh, order=order, threshold=0.2)
+    full.CalcDeformation(levelset(0))
+    incr.UpdateDeformation(levelset(0))
+    t_full = t_incr = 0.0
+    nchanged = 0
+    for step in range(1, steps + 1):
+        start = perf_counter()
+        full.CalcDeformation(levelset(step))
+        t_full += perf_counter() - start
+        start = perf_counter()
+        changed = incr.UpdateDeformation(levelset(step))
+        t_incr += perf_counter() - start
+        nchanged += changed.NumSet()
+        diff = full.deform.vec.CreateVector()
+        diff.data = full.deform.vec - incr.deform.vec
+        assert Norm(diff) < 1e-10
+    return t_full / steps, t_incr / steps, nchanged / steps
+
+
+def main(nthreads):
+    SetNumThreads(nthreads)
+    mesh = MakeStructured3DMesh(hexes=False, nx=24, ny=24, nz=24)
+    print("threads: {}, elements: {}".format(nthreads, mesh.ne))
+    with TaskManager():
+        for order in [2, 3]:
+            t_full, t_incr, nchanged = bench(mesh, order)
+            print("order {}: CalcDeformation {:.3f}s, UpdateDeformation {:.3f}s (x{:.2f}), "
+                  "{:.0f} elements changed per step"
+                  .format(order, t_full, t_incr, t_full / t_incr, nchanged))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
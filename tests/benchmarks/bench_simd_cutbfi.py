@@ -0,0 +1,62 @@
+"""
+Microbenchmark for the assembly of SymbolicCutBFI / SymbolicCutLFI with and
+without SIMD evaluation on the cut elements.
+
+Assembles a mass + stiffness matrix and a load vector on the NEG part of a
+3D mesh for several polynomial orders. Only cut elements are integrated
+(definedonelements), so that the timings reflect the cost of the cut
+element kernels:
+
+  python3 bench_simd_cutbfi.py [nthreads]
+"""
+import sys
+from time import perf_counter
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+ngsglobals.msg_level = 0
+
+
+def bench(mesh, lsetp1, order, simd, repetitions=3):
+    ci = CutInfo(mesh, lsetp1)
+    cut_els = ci.GetElementsOfType(IF)
+    lset_dom = {"levelset": lsetp1, "domain_type": NEG}
+    V = H1(mesh, order=order)
+    u, v = V.TnT()
+    a = BilinearForm(V)
+    a += SymbolicBFI(levelset_domain=lset_dom, form=grad(u) * grad(v) + u * v,
+                     definedonelements=cut_els, simd_evaluate=simd)
+    f = LinearForm(V)
+    f += SymbolicLFI(levelset_domain=lset_dom, form=(1 + x * x) * v,
+                     definedonelements=cut_els, simd_evaluate=simd)
+    start = perf_counter()
+    for i in range(repetitions):
+        a.Assemble()
+    t_bfi = (perf_counter() - start) / repetitions
+    start = perf_counter()
+    for i in range(repetitions):
+        f.Assemble()
+    t_lfi = (perf_counter() - start) / repetitions
+    return sum(cut_els), t_bfi, t_lfi
+
+
+def main(nthreads):
+    SetNumThreads(nthreads)
+    mesh = MakeStructured3DMesh(hexes=False, nx=16, ny=16, nz=16)
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt((x - 0.5) * (x - 0.5) + (y - 0.5) * (y - 0.5) + (z - 0.5) * (z - 0.5)) - 0.3,
+                    lsetp1)
+    print("threads: {}".format(nthreads))
+    with TaskManager():
+        for order in [3, 4, 5]:
+            ncut, bfi_simd, lfi_simd = bench(mesh, lsetp1, order, True)
+            ncut, bfi_scal, lfi_scal = bench(mesh, lsetp1, order, False)
+            print("order {} ({} cut elements): BFI {:.3f}s / {:.3f}s (x{:.2f}), "
+                  "LFI {:.3f}s / {:.3f}s (x{:.2f})  [simd / scalar]"
+                  .format(order, ncut, bfi_simd, bfi_scal, bfi_scal / bfi_simd,
+                          lfi_simd, lfi_scal, lfi_scal / lfi_simd))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
@@ -0,0 +1,75 @@
+"""
+Microbenchmark for the construction of cut integration rules (straight cuts).
+
+Integrates a constant over the NEG / POS / IF part of a mesh with a P1 level
+set function. The cost of the integral is dominated by the construction of
+the cut rules on the cut elements, so that the number of cut rules per second
+and thread is a measure for the efficiency of StraightCutIntegrationRule (the
+cache of cut rules is cleared before every repetition, so that all rules are
+constructed). Revisions without the cache (and CutRuleStatistics) are
+supported as well.
+Run this script on two revisions to compare them:
+
+  python3 bench_straightcutrule.py [nthreads]
+"""
+import sys
+from time import perf_counter
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+ngsglobals.msg_level = 0
+
+# older revisions have no cut rule cache
+has_cut_rule_cache = "CutRuleStatistics" in globals()
+
+
+def clear_cut_rule_cache():
+    if has_cut_rule_cache:
+        CutRuleStatistics(reset=True, clear_cache=True)
+
+
+def bench(mesh, lset, order=2, repetitions=5):
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(lset, lsetp1)
+    ci = CutInfo(mesh, lsetp1)
+    ncut = sum(ci.GetElementsOfType(IF))
+    results = {}
+    for dt in [NEG, POS, IF]:
+        elapsed = 0.0
+        for i in range(repetitions):
+            # the shared cut rule cache would turn all repetitions after the
+            # first into lookups, hence it is cleared before each of them
+            clear_cut_rule_cache()
+            start = perf_counter()
+            Integrate(levelset_domain={"levelset": lsetp1, "domain_type": dt},
+                      cf=1, mesh=mesh, order=order)
+            elapsed += perf_counter() - start
+            if has_cut_rule_cache:
+                assert CutRuleStatistics()["reused"] == 0
+        results[dt] = repetitions * ncut / elapsed
+    clear_cut_rule_cache()
+    return ncut, results
+
+
+def main(nthreads):
+    SetNumThreads(nthreads)
+    cases = [("trig", MakeStructured2DMesh(quads=False, nx=256, ny=256),
+              sqrt((x - 0.5) * (x - 0.5) + (y - 0.5) * (y - 0.5)) - 0.3),
+             ("quad", MakeStructured2DMesh(quads=True, nx=256, ny=256),
+              sqrt((x - 0.5) * (x - 0.5) + (y - 0.5) * (y - 0.5)) - 0.3),
+             ("tet", MakeStructured3DMesh(hexes=False, nx=32, ny=32, nz=32),
+              sqrt((x - 0.5) * (x - 0.5) + (y - 0.5) * (y - 0.5) + (z - 0.5) * (z - 0.5)) - 0.3),
+             ("hex", MakeStructured3DMesh(hexes=True, nx=32, ny=32, nz=32),
+              sqrt((x - 0.5) * (x - 0.5) + (y - 0.5) * (y - 0.5) + (z - 0.5) * (z - 0.5)) - 0.3)]
+    print("threads: {}".format(nthreads))
+    with TaskManager():
+        for name, mesh, lset in cases:
+            ncut, results = bench(mesh, lset)
+            print("{:5s} ({:6d} cut elements): ".format(name, ncut)
+                  + ", ".join("{}: {:10.0f} rules/s/thread".format(dt, results[dt] / nthreads)
+                              for dt in [NEG, POS, IF]))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
@@ -49,6 +49,56 @@ def test_apply():
     print("diff : ",diff)
     assert diff < 1e-12
 
+
+@pytest.mark.parametrize("quad", [False, True])
+def test_apply_facet_and_eb(quad):
+    mesh = MakeStructured2DMesh(quads=quad, nx=8, ny=8, mapping=lambda x, y: (3 * x - 1.5, 3 * y - 1.5))
+    lsetp1 = GridFunction(H1(mesh))
+    InterpolateToP1(sqrt(x * x + y * y) - 1.0, lsetp1)
+    lset_neg = {"levelset": lsetp1, "domain_type": NEG}
+
+    ci = CutInfo(mesh, lsetp1)
+    hasneg = ci.GetElementsOfType(HASNEG)
+    ba_facets = GetFacetsWithNeighborTypes(mesh, a=hasneg, b=ci.GetElementsOfType(IF))
+
+    Vh = Compress(H1(mesh, order=2, dirichlet=[], dgjumps=True), GetDofsOfElements(H1(mesh, order=2), hasneg))
+    u, v = Vh.TnT()
+    h = specialcf.mesh_size
+
+    def add_integrators(a):
+        a += SymbolicBFI(levelset_domain=lset_neg, form=grad(u) * grad(v) + u * v)
+        a += SymbolicBFI(levelset_domain=lset_neg, form=(u - u.Other()) * (v - v.Other()),
+                         skeleton=True, definedonelements=ba_facets)
+        a += SymbolicFacetPatchBFI(form=h**(-2) * (u - u.Other()) * (v - v.Other()),
+                                   skeleton=True, definedonelements=ba_facets)
+        a += SymbolicFacetPatchBFI(form=h**(-2) * (u - u.Other()) * (v - v.Other()),
+                                   skeleton=False, definedonelements=ba_facets)
+
+    a = BilinearForm(Vh, check_unused=False)
+    add_integrators(a)
+    a.Assemble()
+    a_mf = BilinearForm(Vh, nonassemble=True, check_unused=False)
+    add_integrators(a_mf)
+
+    gfu = GridFunction(Vh)
+    gfu.vec.SetRandom()
+    Au1 = gfu.vec.CreateVector()
+    Au2 = gfu.vec.CreateVector()
+    Au1.data = a.mat * gfu.vec
+    a_mf.Apply(gfu.vec, Au2)
+    Au2.data -= Au1
+    assert Norm(Au2) < 1e-10 * Norm(Au1)
+
+    # element boundary integrals
+    a_eb = BilinearForm(Vh, check_unused=False)
+    a_eb += SymbolicBFI(levelset_domain=lset_neg, form=u * v, element_boundary=True)
+    a_eb.Assemble()
+    Au1.data = a_eb.mat * gfu.vec
+    a_eb.Apply(gfu.vec, Au2)
+    Au2.data -= Au1
+    assert Norm(Au2) < 1e-10 * Norm(Au1)
+
+
 if __name__ == "__main__":
     test_apply()
     
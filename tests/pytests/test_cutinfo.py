@@ -0,0 +1,65 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+def bitarray_to_list(ba):
+    return [ba[i] for i in range(len(ba))]
+
+
+@pytest.mark.parametrize("quad", [False, True])
+def test_cutinfo_incremental_update(quad):
+    mesh = MakeStructured2DMesh(quads=quad, nx=16, ny=16, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.5, lsetp1)
+    ci = CutInfo(mesh, lsetp1)
+
+    for shift in [0.05, 0.1, 0.1]:
+        old_types = [bitarray_to_list(ci.GetElementsOfType(dt, vb))
+                     for dt in [NEG, POS, IF] for vb in [VOL, BND]]
+        InterpolateToP1(sqrt((x - shift) * (x - shift) + y * y) - 0.5, lsetp1)
+        ci.Update(lsetp1, incremental=True)
+        ci_ref = CutInfo(mesh, lsetp1)
+
+        for vb in [VOL, BND]:
+            for dt in [NEG, POS, IF, UNCUT, HASNEG, HASPOS, ANY]:
+                assert bitarray_to_list(ci.GetElementsOfType(dt, vb)) \
+                    == bitarray_to_list(ci_ref.GetElementsOfType(dt, vb))
+            assert max(abs(a - b) for a, b in zip(ci.GetCutRatios(vb), ci_ref.GetCutRatios(vb))) == 0
+
+        new_types = [bitarray_to_list(ci.GetElementsOfType(dt, vb))
+                     for dt in [NEG, POS, IF] for vb in [VOL, BND]]
+        for vb in [VOL, BND]:
+            changed = bitarray_to_list(ci.GetChangedElements(vb))
+            for i in range(len(changed)):
+                expected = any(old_types[3 * k + int(vb == BND)][i] != new_types[3 * k + int(vb == BND)][i]
+                               for k in range(3))
+                assert changed[i] == expected
+
+        Vhx = XFESpace(H1(mesh, order=1), cutinfo=ci)
+        Vhx_ref = XFESpace(H1(mesh, order=1), cutinfo=ci_ref)
+        assert Vhx.ndof == Vhx_ref.ndof
+
+
+@pytest.mark.parametrize("dim", [2, 3])
+def test_cutinfo_cutratios_full_path(dim):
+    # on these meshes the element measures are powers of two so that the ratios of
+    # the element-wise NEG and POS integrals (full computation of the cut rules on
+    # every element) are exactly the ratios of the sums of the cut rule weights
+    if dim == 2:
+        mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8)
+        lset = sqrt((x - 0.5) * (x - 0.5) + (y - 0.5) * (y - 0.5)) - 0.6
+    else:
+        mesh = MakeStructured3DMesh(hexes=False, nx=4, ny=4, nz=4)
+        lset = sqrt((x - 0.5) * (x - 0.5) + (y - 0.5) * (y - 0.5) + (z - 0.5) * (z - 0.5)) - 0.6
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(lset, lsetp1)
+    ci = CutInfo(mesh, lsetp1)
+
+    for vb in [VOL, BND]:
+        parts = Integrate(levelset_domain={"levelset": lsetp1, "domain_type": [NEG, POS]},
+                          cf=1, mesh=mesh, order=0, VOL_or_BND=vb, element_wise=True)
+        ratios_ref = parts[0] / (parts[0] + parts[1])
+        assert 0 < ci.GetElementsOfType(IF, vb).NumSet() < len(ratios_ref)
+        assert list(ci.GetCutRatios(vb)) == list(ratios_ref)
@@ -0,0 +1,60 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+def integrate_neg(lsetp1, mesh, **kwargs):
+    lsetdom = {"levelset": lsetp1, "domain_type": kwargs.pop("domain_type", NEG)}
+    lsetdom.update(kwargs)
+    return Integrate(levelset_domain=lsetdom, cf=1, mesh=mesh, order=lsetdom.get("order", 2))
+
+
+def test_cutrulecache_reuse_and_invalidation():
+    mesh = MakeStructured2DMesh(quads=True, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.55, lsetp1)
+
+    CutRuleStatistics(reset=True, clear_cache=True)
+    val = integrate_neg(lsetp1, mesh)
+    stats = CutRuleStatistics(reset=True)
+    assert stats["constructed"] > 0 and stats["reused"] == 0
+
+    # unchanged level set values: all rules are reused
+    assert integrate_neg(lsetp1, mesh) == val
+    stats = CutRuleStatistics(reset=True)
+    assert stats["constructed"] == 0 and stats["reused"] > 0
+
+    # other domain type, order or quad direction policy: no reuse
+    for kwargs in [{"domain_type": POS}, {"order": 4}, {"quad_dir_policy": FIRST}]:
+        integrate_neg(lsetp1, mesh, **kwargs)
+        stats = CutRuleStatistics(reset=True)
+        assert stats["constructed"] > 0 and stats["reused"] == 0
+        assert stats["invalidations"] == 0
+
+    # changed level set vector: the entries are invalidated
+    InterpolateToP1(sqrt(x * x + y * y) - 0.45, lsetp1)
+    val_new = integrate_neg(lsetp1, mesh)
+    stats = CutRuleStatistics(reset=True)
+    assert stats["invalidations"] > 0 and stats["constructed"] > 0
+    CutRuleStatistics(clear_cache=True)
+    assert abs(integrate_neg(lsetp1, mesh) - val_new) < 1e-14
+
+
+def test_cutrulecache_cutinfo():
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.55, lsetp1)
+
+    CutRuleStatistics(reset=True, clear_cache=True)
+    ci = CutInfo(mesh, lsetp1)
+    stats = CutRuleStatistics(reset=True)
+    assert stats["constructed"] > 0 and stats["reused"] == 0
+
+    # a second classification on the same level set reuses the NEG/POS rules
+    ci2 = CutInfo(mesh, lsetp1)
+    stats = CutRuleStatistics(reset=True)
+    assert stats["constructed"] == 0 and stats["reused"] > 0
+    for vb in [VOL, BND]:
+        assert list(ci.GetCutRatios(vb)) == list(ci2.GetCutRatios(vb))
+    CutRuleStatistics(clear_cache=True)
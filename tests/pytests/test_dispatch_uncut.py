@@ -0,0 +1,62 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+@pytest.mark.parametrize("quad", [False, True])
+@pytest.mark.parametrize("dt", [NEG, POS, IF])
+def test_dispatch_uncut_matches_cut_kernel(quad, dt):
+    mesh = MakeStructured2DMesh(quads=quad, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.55, lsetp1)
+    lset_dom = {"levelset": lsetp1, "domain_type": dt}
+
+    V = H1(mesh, order=2)
+    u, v = V.TnT()
+    if dt == IF:
+        form_a = u * v
+    else:
+        form_a = (1 + x * x) * grad(u) * grad(v) + u * v
+    form_f = (1 + y) * v
+
+    mats, vecs = [], []
+    for dispatch in [True, False]:
+        a = BilinearForm(V)
+        a += SymbolicBFI(levelset_domain=lset_dom, form=form_a, dispatch_uncut=dispatch)
+        a.Assemble()
+        f = LinearForm(V)
+        f += SymbolicLFI(levelset_domain=lset_dom, form=form_f, dispatch_uncut=dispatch)
+        f.Assemble()
+        mats.append(a.mat)
+        vecs.append(f.vec)
+
+    w = mats[0].CreateColVector()
+    w.SetRandom()
+    diff = mats[0].CreateColVector()
+    diff.data = mats[0] * w - mats[1] * w
+    assert Norm(diff) < 1e-10 * max(1, Norm(mats[1] * w))
+
+    diff.data = vecs[0] - vecs[1]
+    assert Norm(diff) < 1e-10 * max(1, Norm(vecs[1]))
+
+
+def test_dispatch_uncut_multiple_levelsets():
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsets = tuple(GridFunction(H1(mesh, order=1)) for i in range(2))
+    InterpolateToP1(x - 0.3, lsets[0])
+    InterpolateToP1(y + 0.2, lsets[1])
+    lset_dom = {"levelset": lsets, "domain_type": (NEG, POS)}
+
+    V = H1(mesh, order=2)
+    u, v = V.TnT()
+    vals = []
+    for dispatch in [True, False]:
+        a = BilinearForm(V)
+        a += SymbolicBFI(levelset_domain=lset_dom, form=grad(u) * grad(v) + u * v, dispatch_uncut=dispatch)
+        a.Assemble()
+        w = a.mat.CreateColVector()
+        w[:] = 1
+        vals.append(InnerProduct(w, a.mat * w))
+    assert abs(vals[0] - 1.3 * 1.2) < 1e-10
+    assert abs(vals[0] - vals[1]) < 1e-10
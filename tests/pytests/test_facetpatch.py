@@ -0,0 +1,100 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+@pytest.mark.parametrize("quad", [False, True])
+def test_facetpatch_mapped_points(quad):
+    mesh = MakeStructured2DMesh(quads=quad, nx=6, ny=6, mapping=lambda x, y: (x + 0.1 * y * y, y))
+    V = H1(mesh, order=2, dgjumps=True)
+    u, v = V.TnT()
+
+    a = BilinearForm(V, check_unused=False)
+    bfi = SymbolicFacetPatchBFI(form=(u - u.Other()) * (v - v.Other()), skeleton=False)
+    a += bfi
+
+    gfu = GridFunction(V)
+    gfu.Set(x * x + 2 * x * y - y)
+    res = gfu.vec.CreateVector()
+
+    for i in range(2):
+        a.Assemble()
+        # the patch jump of a global polynomial vanishes
+        res.data = a.mat * gfu.vec
+        assert Norm(res) < 1e-8
+
+        stats = FacetPatchMapStatistics(bfi, reset=True)
+        if not quad:
+            assert stats["newton_maps"] == 0 and stats["affine_maps"] > 0
+        elif i == 0:
+            assert stats["newton_maps"] > 0 and stats["newton_iterations"] >= stats["newton_maps"]
+        else:
+            assert stats["newton_maps"] == 0 and stats["cached_maps"] > 0
+
+
+def test_facetpatch_deformed_mesh():
+    mesh = MakeStructured2DMesh(quads=False, nx=6, ny=6)
+    V = H1(mesh, order=2, dgjumps=True)
+    u, v = V.TnT()
+    form = (u - u.Other()) * (v - v.Other())
+
+    deform = GridFunction(H1(mesh, order=2, dim=2))
+    deform.Set(CoefficientFunction((0.1 * x * y, 0.05 * x * x)))
+
+    # reference: deformation given to the integrator (no closed form)
+    a_ref = BilinearForm(V, check_unused=False)
+    a_ref += SymbolicFacetPatchBFI(form=form, skeleton=False, deformation=deform)
+    a_ref.Assemble()
+
+    a = BilinearForm(V, check_unused=False)
+    bfi = SymbolicFacetPatchBFI(form=form, skeleton=False)
+    a += bfi
+
+    gfu = GridFunction(V)
+    gfu.vec.SetRandom()
+    res = gfu.vec.CreateVector()
+
+    # undeformed mesh first (closed form and no cache entries), then on the
+    # deformed mesh the closed form must not be used
+    a.Assemble()
+    FacetPatchMapStatistics(bfi, reset=True)
+    mesh.SetDeformation(deform)
+    a.Assemble()
+    mesh.UnsetDeformation()
+    stats = FacetPatchMapStatistics(bfi, reset=True)
+    assert stats["newton_maps"] > 0
+
+    res.data = a_ref.mat * gfu.vec - a.mat * gfu.vec
+    assert Norm(res) < 1e-8 * Norm(a_ref.mat * gfu.vec)
+
+    # back on the undeformed mesh
+    a.Assemble()
+    stats = FacetPatchMapStatistics(bfi, reset=True)
+    assert stats["newton_maps"] == 0 and stats["affine_maps"] > 0
+
+
+def test_facetpatch_spacetime_cache():
+    mesh = MakeStructured2DMesh(quads=True, nx=4, ny=4, mapping=lambda x, y: (x + 0.1 * y * y, y))
+    st_fes = SpaceTimeFESpace(H1(mesh, order=2), ScalarTimeFE(1), flags={"dgjumps": True})
+    u, v = st_fes.TnT()
+
+    a = BilinearForm(st_fes, check_unused=False)
+    bfi = SymbolicFacetPatchBFI(form=(u - u.Other()) * (v - v.Other()), skeleton=False, time_order=2)
+    a += bfi
+
+    gfu = GridFunction(st_fes)
+    gfu.vec.SetRandom()
+    res = [gfu.vec.CreateVector() for i in range(2)]
+
+    # the mapped points of the non-affine patches are cached for all time points
+    for i in range(2):
+        a.Assemble()
+        res[i].data = a.mat * gfu.vec
+        stats = FacetPatchMapStatistics(bfi, reset=True)
+        if i == 0:
+            assert stats["newton_maps"] > 0 and stats["cached_maps"] == 0
+        else:
+            assert stats["newton_maps"] == 0 and stats["cached_maps"] > 0
+    res[1].data -= res[0]
+    assert Norm(res[1]) < 1e-10 * Norm(res[0])
@@ -0,0 +1,119 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+def gp_facets(mesh, lsetp1):
+    ci = CutInfo(mesh, lsetp1)
+    return GetFacetsWithNeighborTypes(mesh, a=ci.GetElementsOfType(HASNEG), b=ci.GetElementsOfType(IF))
+
+
+@pytest.mark.parametrize("skeleton", [False, True])
+def test_ghostpenaltymatrix_update(skeleton):
+    mesh = MakeStructured2DMesh(quads=False, nx=10, ny=10, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    V = H1(mesh, order=2, dgjumps=True)
+    u, v = V.TnT()
+    h = specialcf.mesh_size
+    if skeleton:
+        gp_form = h**(-2) * (grad(u) - grad(u.Other())) * (grad(v) - grad(v.Other()))
+    else:
+        gp_form = h**(-2) * (u - u.Other()) * (v - v.Other())
+
+    gp = GhostPenaltyMatrix(V, [SymbolicFacetPatchBFI(form=gp_form, skeleton=skeleton)])
+
+    w = GridFunction(V)
+    w.vec.SetRandom()
+    res = w.vec.CreateVector()
+
+    n_prev = None
+    for shift in [0.0, 0.05, 0.1]:
+        InterpolateToP1(sqrt((x - shift) * (x - shift) + y * y) - 0.5, lsetp1)
+        facets = gp_facets(mesh, lsetp1)
+        gp.Update(facets)
+
+        if n_prev is None:
+            assert gp.nintegrated == sum(facets)
+        else:
+            added = sum(facets[i] and not facets_prev[i] for i in range(len(facets)))
+            removed = sum(facets_prev[i] and not facets[i] for i in range(len(facets)))
+            assert gp.nintegrated == added and gp.nremoved == removed
+        n_prev, facets_prev = sum(facets), BitArray(facets)
+
+        a = BilinearForm(V, check_unused=False)
+        a += SymbolicFacetPatchBFI(form=gp_form, skeleton=skeleton, definedonelements=facets)
+        a.Assemble()
+
+        res.data = a.mat * w.vec - gp.mat * w.vec
+        assert Norm(res) < 1e-10 * Norm(a.mat * w.vec)
+
+        b = BilinearForm(V, check_unused=False)
+        b += SymbolicBFI(u * v)
+        b.Assemble()
+        gp.AddTo(b.mat, scale=2.0)
+        res.data = b.mat * w.vec - 2 * (a.mat * w.vec)
+        b2 = BilinearForm(V, check_unused=False)
+        b2 += SymbolicBFI(u * v)
+        b2.Assemble()
+        res.data -= b2.mat * w.vec
+        assert Norm(res) < 1e-10 * Norm(b.mat * w.vec)
+
+    gp.Update(facets_prev)
+    assert gp.nintegrated == 0 and gp.nremoved == 0
+
+
+def test_ghostpenaltymatrix_space_update():
+    mesh = MakeStructured2DMesh(quads=False, nx=10, ny=10, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    V = H1(mesh, order=2, dgjumps=True)
+    Vc = Compress(V)
+    u, v = Vc.TnT()
+    h = specialcf.mesh_size
+    gp_form = h**(-2) * (u - u.Other()) * (v - v.Other())
+    gp = GhostPenaltyMatrix(Vc, [SymbolicFacetPatchBFI(form=gp_form, skeleton=False)])
+
+    ndofs = []
+    for shift in [0.0, 0.05]:
+        InterpolateToP1(sqrt((x - shift) * (x - shift) + y * y) - 0.5, lsetp1)
+        ci = CutInfo(mesh, lsetp1)
+        # the compressed space (ndof and dof numbering) changes with the level set
+        Vc.SetActiveDofs(GetDofsOfElements(V, ci.GetElementsOfType(HASNEG)))
+        Vc.Update()
+        ndofs.append(Vc.ndof)
+        facets = gp_facets(mesh, lsetp1)
+        gp.Update(facets)
+        # the facet data of the old space is not reused
+        assert gp.nintegrated == sum(facets)
+
+        gp_ref = GhostPenaltyMatrix(Vc, [SymbolicFacetPatchBFI(form=gp_form, skeleton=False)])
+        gp_ref.Update(facets)
+        assert gp.mat.height == Vc.ndof
+
+        w = GridFunction(Vc)
+        w.vec.SetRandom()
+        res = w.vec.CreateVector()
+        res.data = gp_ref.mat * w.vec - gp.mat * w.vec
+        assert Norm(res) < 1e-10 * Norm(gp_ref.mat * w.vec)
+    assert ndofs[0] != ndofs[1]
+
+
+def test_ghostpenaltymatrix_addto_pattern():
+    mesh = MakeStructured2DMesh(quads=False, nx=10, ny=10, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.5, lsetp1)
+    V = H1(mesh, order=2, dgjumps=True)
+    u, v = V.TnT()
+    gp = GhostPenaltyMatrix(V, [SymbolicFacetPatchBFI(form=(u - u.Other()) * (v - v.Other()), skeleton=False)])
+    gp.Update(gp_facets(mesh, lsetp1))
+
+    # the matrix graph without dgjumps does not contain the facet patch couplings
+    V_nodg = H1(mesh, order=2)
+    u, v = V_nodg.TnT()
+    b = BilinearForm(V_nodg)
+    b += SymbolicBFI(u * v)
+    b.Assemble()
+    values = list(b.mat.AsVector())
+    with pytest.raises(Exception, match="dgjumps"):
+        gp.AddTo(b.mat)
+    assert list(b.mat.AsVector()) == values
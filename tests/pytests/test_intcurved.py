@@ -89,3 +89,168 @@ def test_intcurved(quad, order):
     assert sum(eoc_curved[IF][s:])/len(eoc_curved[IF][s:]) > order + 0.75
     assert sum(eoc_curved[NEG][s:])/len(eoc_curved[NEG][s:]) > order + 0.75
     assert sum(eoc_curved[POS][s:])/len(eoc_curved[POS][s:]) > order + 0.75
+
+
+def test_projectshift_band():
+    mesh = MakeStructured2DMesh(quads = False, nx=16, ny=16,
+                                mapping = lambda x,y : (2*x-1,2*y-1))
+    levelset = sqrt(x*x+y*y)-0.5
+    lsetmeshadap = LevelSetMeshAdaptation(mesh, order=3, threshold=0.2, discontinuous_qn=True)
+    deformation = lsetmeshadap.CalcDeformation(levelset)
+    lsetp1 = lsetmeshadap.lset_p1
+
+    ci = CutInfo(mesh, lsetp1)
+    hasif = ci.GetElementsOfType(IF)
+
+    deform = GridFunction(deformation.space)
+    stats = ProjectShift(lsetmeshadap.lset_ho, lsetp1, deform, lsetmeshadap.qn,
+                         blending=CoefficientFunction(0.0), threshold=0.2)
+    assert stats["elements"] == mesh.ne
+    assert stats["band_elements"] == hasif.NumSet()
+    assert stats["time"] >= 0
+    # one point search per integration point of the band elements
+    assert stats["search_points"] > 0
+    assert stats["search_points"] % stats["band_elements"] == 0
+    assert stats["search_not_converged"] == 0
+    assert 0 < stats["max_search_iterations"] < 20
+    assert stats["search_iterations"] <= stats["max_search_iterations"] * stats["search_points"]
+    # same deformation as with the band given explicitly
+    deform_ba = GridFunction(deformation.space)
+    stats_ba = ProjectShift(lsetmeshadap.lset_ho, lsetp1, deform_ba, lsetmeshadap.qn, hasif,
+                            blending=CoefficientFunction(0.0), threshold=0.2)
+    assert stats_ba["band_elements"] == stats["band_elements"]
+    deform_ba.vec.data -= deform.vec
+    assert Norm(deform_ba.vec) < 1e-12
+    # no deformation on dofs outside the band
+    band_dofs = GetDofsOfElements(deform.space, hasif)
+    vals = deform.vec.FV().NumPy().reshape(-1,mesh.dim)
+    for i in range(deform.space.ndof):
+        if not band_dofs[i]:
+            assert max(abs(vals[i])) == 0
+    # ... and the same as in the LevelSetMeshAdaptation
+    deform.vec.data -= deformation.vec
+    assert Norm(deform.vec) < 1e-12
+
+
+def test_projectshift_band_reset():
+    mesh = MakeStructured2DMesh(quads = False, nx=16, ny=16,
+                                mapping = lambda x,y : (2*x-1,2*y-1))
+    levelset = sqrt(x*x+y*y)-0.5
+    lsetmeshadap = LevelSetMeshAdaptation(mesh, order=2, threshold=0.2, discontinuous_qn=True)
+    deformation = lsetmeshadap.CalcDeformation(levelset)
+    args = (lsetmeshadap.lset_ho, lsetmeshadap.lset_p1)
+
+    # a wide band first, then a narrow one into the same GridFunction: only the dofs of
+    # both bands are reset, the result is the same as on a fresh GridFunction
+    deform = GridFunction(deformation.space)
+    for lower, upper in [(-0.3,0.3), (0,0), (-0.1,0.2), (0,0)]:
+        stats = ProjectShift(*args, deform, lsetmeshadap.qn, blending=CoefficientFunction(0.0),
+                             lower=lower, upper=upper, threshold=0.2)
+        deform_ref = GridFunction(deformation.space)
+        stats_ref = ProjectShift(*args, deform_ref, lsetmeshadap.qn,
+                                 blending=CoefficientFunction(0.0),
+                                 lower=lower, upper=upper, threshold=0.2)
+        assert stats["band_elements"] == stats_ref["band_elements"]
+        deform_ref.vec.data -= deform.vec
+        assert Norm(deform_ref.vec) < 1e-14
+
+
+@pytest.mark.parametrize("discontinuous_qn", [False,True])
+def test_updatedeformation(discontinuous_qn):
+    mesh = MakeStructured2DMesh(quads = False, nx=16, ny=16,
+                                mapping = lambda x,y : (2*x-1,2*y-1))
+    levelset = sqrt(x*x+y*y)-0.5
+    # same level set except for x > 0.3
+    levelset_moved = levelset + 0.5*IfPos(x-0.3, (x-0.3)*(x-0.3), 0)
+
+    lsetmeshadap = LevelSetMeshAdaptation(mesh, order=2, threshold=0.2,
+                                          discontinuous_qn=discontinuous_qn)
+    deformation = lsetmeshadap.deform
+    changed = lsetmeshadap.UpdateDeformation(levelset)
+    assert changed.NumSet() == mesh.ne
+
+    changed = lsetmeshadap.UpdateDeformation(levelset)
+    assert changed.NumSet() == 0
+
+    deformation_old = GridFunction(deformation.space)
+    deformation_old.vec.data = deformation.vec
+    changed = lsetmeshadap.UpdateDeformation(levelset_moved)
+    assert 0 < changed.NumSet() < mesh.ne
+
+    reference = LevelSetMeshAdaptation(mesh, order=2, threshold=0.2,
+                                       discontinuous_qn=discontinuous_qn)
+    deformation_ref = reference.CalcDeformation(levelset_moved)
+    diff = deformation_ref.vec.CreateVector()
+    diff.data = deformation_ref.vec - deformation.vec
+    assert Norm(diff) < 1e-12
+
+    # changed are exactly the elements where the full results differ
+    deform_diff = GridFunction(deformation.space)
+    deform_diff.vec.data = deformation_ref.vec - deformation_old.vec
+    differ = Integrate(InnerProduct(deform_diff,deform_diff), mesh, order=4, element_wise=True)
+    for i in range(mesh.ne):
+        assert changed[i] == (differ[i] > 0)
+
+    # a full computation afterwards (with a smaller band) resets all dofs
+    # that were changed in the update
+    lsetmeshadap.lset_lower_bound = lsetmeshadap.lset_upper_bound = 0
+    reference.lset_lower_bound = reference.lset_upper_bound = 0
+    lsetmeshadap.CalcDeformation(levelset)
+    diff.data = reference.CalcDeformation(levelset).vec - lsetmeshadap.deform.vec
+    assert Norm(diff) < 1e-12
+
+    # a band that is changed in place is detected
+    ci = CutInfo(mesh, lsetmeshadap.lset_p1)
+    band = ci.GetElementsOfType(IF)
+    lsetmeshadap.UpdateDeformation(levelset_moved, ba=band)
+    ci.Update(levelset)
+    changed = lsetmeshadap.UpdateDeformation(levelset_moved, ba=band)
+    assert changed.NumSet() == mesh.ne
+
+
+def test_elements_with_shared_vertex_and_changed_dofs():
+    mesh = MakeStructured2DMesh(quads = True, nx=4, ny=4)
+    els = BitArray(mesh.ne)
+    els.Clear()
+    els.Set(5)
+    patch = GetElementsWithSharedVertex(mesh, els)
+    assert patch.NumSet() == 9
+    for el in mesh.Elements(VOL):
+        shares_vertex = len(set(el.vertices) & set(mesh[ElementId(VOL,5)].vertices)) > 0
+        assert patch[el.nr] == shares_vertex
+
+    V = H1(mesh, order=2)
+    a = GridFunction(V)
+    b = GridFunction(V)
+    b.vec.data = a.vec
+    assert GetElementsWithChangedDofs(V, a.vec, b.vec).NumSet() == 0
+    dof = V.GetDofNrs(ElementId(VOL,5))[-1]  # an inner dof
+    b.vec[dof] = 0.5
+    changed = GetElementsWithChangedDofs(V, a.vec, b.vec)
+    assert changed.NumSet() == 1 and changed[5]
+    assert GetElementsWithChangedDofs(V, a.vec, b.vec, tol=0.5).NumSet() == 0
+
+
+def test_calcmaxdistance_elementwise():
+    mesh = MakeStructured2DMesh(quads = False, nx=16, ny=16,
+                                mapping = lambda x,y : (2*x-1,2*y-1))
+    levelset = sqrt(x*x+y*y)-0.5
+    lsetmeshadap = LevelSetMeshAdaptation(mesh, order=2, threshold=0.2, discontinuous_qn=True)
+    lsetmeshadap.CalcDeformation(levelset)
+
+    maxdist = lsetmeshadap.CalcMaxDistance(levelset)
+    el_maxdist = lsetmeshadap.CalcMaxDistance(levelset, element_wise=True)
+    assert len(el_maxdist) == mesh.ne
+    assert abs(max(el_maxdist) - maxdist) < 1e-14
+
+    # only cut elements contribute
+    ci = CutInfo(mesh, lsetmeshadap.lset_p1)
+    hasif = ci.GetElementsOfType(IF)
+    for i in range(mesh.ne):
+        if not hasif[i]:
+            assert el_maxdist[i] == 0
+
+    # more sample points per element: same order of magnitude
+    maxdist_fine = lsetmeshadap.CalcMaxDistance(levelset, intorder=10)
+    assert maxdist_fine > 0.5 * maxdist
+    assert maxdist_fine < 2 * maxdist
@@ -0,0 +1,86 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+@pytest.mark.parametrize("quad", [False, True])
+def test_integratex_batched(quad):
+    mesh = MakeStructured2DMesh(quads=quad, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.55, lsetp1)
+
+    dts = [NEG, POS, IF]
+    cfs = [1, x * x, 1 + y]
+    ref = [[Integrate({"levelset": lsetp1, "domain_type": dt}, cf=cf, mesh=mesh, order=3)
+            for cf in cfs] for dt in dts]
+
+    vals = Integrate({"levelset": lsetp1, "domain_type": dts}, cf=cfs, mesh=mesh, order=3)
+    assert vals.shape == (3, 3)
+    for i in range(3):
+        for j in range(3):
+            assert abs(vals[i, j] - ref[i][j]) < 1e-12
+
+    vals = Integrate([{"levelset": lsetp1, "domain_type": dt} for dt in dts], cf=cfs[1], mesh=mesh, order=3)
+    assert vals.shape == (3,)
+    for i in range(3):
+        assert abs(vals[i] - ref[i][1]) < 1e-12
+
+    vals = Integrate(LevelsetDomain(lsetp1, POS), cf=cfs, mesh=mesh, order=3)
+    assert vals.shape == (3,)
+    for j in range(3):
+        assert abs(vals[j] - ref[1][j]) < 1e-12
+
+    # the volumes of the two phases sum up to the volume of the domain
+    vol = Integrate({"levelset": lsetp1, "domain_type": [NEG, POS]}, cf=1, mesh=mesh, order=0)
+    assert abs(sum(vol) - 4) < 1e-12
+
+
+def test_integratex_batched_multiple_levelsets():
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsets = tuple(GridFunction(H1(mesh, order=1)) for i in range(2))
+    InterpolateToP1(x - 0.3, lsets[0])
+    InterpolateToP1(y + 0.2, lsets[1])
+
+    doms = [{"levelset": lsets, "domain_type": dtt} for dtt in [(NEG, NEG), (NEG, POS), (POS, NEG), (POS, POS)]]
+    vals = Integrate(doms, cf=1, mesh=mesh, order=0)
+    ref = [1.3 * 0.8, 1.3 * 1.2, 0.7 * 0.8, 0.7 * 1.2]
+    for i in range(4):
+        assert abs(vals[i] - ref[i]) < 1e-12
+
+
+@pytest.mark.parametrize("quad", [False, True])
+def test_integratex_element_and_region_wise(quad):
+    mesh = MakeStructured2DMesh(quads=quad, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.55, lsetp1)
+    lset_neg = {"levelset": lsetp1, "domain_type": NEG}
+
+    total = Integrate(lset_neg, cf=1 + x * x, mesh=mesh, order=3)
+    vals = Integrate(lset_neg, cf=1 + x * x, mesh=mesh, order=3, element_wise=True)
+    assert vals.shape == (mesh.ne,)
+    assert abs(sum(vals) - total) < 1e-12
+
+    # only elements with a negative part contribute
+    ci = CutInfo(mesh, lsetp1)
+    haspos_only = ci.GetElementsOfType(POS)
+    for i in range(mesh.ne):
+        if haspos_only[i]:
+            assert vals[i] == 0
+        else:
+            assert vals[i] > 0
+
+    vals = Integrate({"levelset": lsetp1, "domain_type": [NEG, POS]}, cf=[1, x], mesh=mesh, order=3,
+                     element_wise=True)
+    assert vals.shape == (2, 2, mesh.ne)
+    assert abs(sum(vals[0, 0]) + sum(vals[1, 0]) - 4) < 1e-12
+
+    vals = Integrate(lset_neg, cf=1 + x * x, mesh=mesh, order=3, region_wise=True)
+    assert vals.shape == (len(mesh.GetMaterials()),)
+    assert abs(sum(vals) - total) < 1e-12
+
+    kappa_neg, kappa_pos = kappa(mesh, lsetp1)
+    cut_ratio = CutRatioGF(ci)
+    diff = kappa_neg.vec.CreateVector()
+    diff.data = kappa_neg.vec - cut_ratio.vec
+    assert Norm(diff) < 1e-12
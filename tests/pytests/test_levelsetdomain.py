@@ -0,0 +1,94 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+from math import pi
+
+
+@pytest.mark.parametrize("quad", [False, True])
+@pytest.mark.parametrize("dt", [NEG, POS, IF])
+def test_levelsetdomain_vs_dict(quad, dt):
+    mesh = MakeStructured2DMesh(quads=quad, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.55, lsetp1)
+
+    lset_dict = {"levelset": lsetp1, "domain_type": dt}
+    lset_dom = LevelsetDomain(lsetp1, dt)
+    assert lset_dom.domain_type == dt
+    assert lset_dom.order == -1
+    assert not lset_dom.multi_levelset
+
+    V = H1(mesh, order=2)
+    u, v = V.TnT()
+    mats, vecs, vals = [], [], []
+    for dom in [lset_dict, lset_dom]:
+        a = BilinearForm(V)
+        a += SymbolicBFI(levelset_domain=dom, form=grad(u) * grad(v) + u * v)
+        a.Assemble()
+        f = LinearForm(V)
+        f += SymbolicLFI(levelset_domain=dom, form=(1 + x) * v)
+        f.Assemble()
+        mats.append(a.mat)
+        vecs.append(f.vec)
+        vals.append(Integrate(levelset_domain=dom, cf=1 + x * x, mesh=mesh, order=3))
+
+    w = mats[0].CreateColVector()
+    w.SetRandom()
+    diff = mats[0].CreateColVector()
+    diff.data = mats[0] * w - mats[1] * w
+    assert Norm(diff) < 1e-12 * max(1, Norm(mats[0] * w))
+    diff.data = vecs[0] - vecs[1]
+    assert Norm(diff) < 1e-12 * max(1, Norm(vecs[0]))
+    assert abs(vals[0] - vals[1]) < 1e-12
+
+    # the orders given to the wrappers do not change the LevelsetDomain itself
+    assert lset_dom.order == -1
+
+
+def test_levelsetdomain_reuses_cut_rules():
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.55, lsetp1)
+    ci = CutInfo(mesh, lsetp1)
+    ncut = ci.GetElementsOfType(IF).NumSet()
+
+    lset_dom = LevelsetDomain({"levelset": lsetp1, "domain_type": NEG, "order": 2})
+    CutRuleStatistics(reset=True, clear_cache=True)
+    Integrate(levelset_domain=lset_dom, cf=1, mesh=mesh)
+    val = Integrate(levelset_domain=lset_dom, cf=1, mesh=mesh)
+    stats = CutRuleStatistics(reset=True)
+    assert stats["constructed"] == ncut
+    assert stats["reused"] == ncut
+
+    InterpolateToP1(sqrt(x * x + y * y) - 0.5, lsetp1)
+    val = Integrate(levelset_domain=lset_dom, cf=1, mesh=mesh)
+    assert abs(val - 0.25 * pi) < 1e-2
+    stats = CutRuleStatistics(reset=True)
+    assert stats["invalidations"] > 0
+
+
+def test_levelsetdomain_multiple_levelsets():
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsets = tuple(GridFunction(H1(mesh, order=1)) for i in range(2))
+    InterpolateToP1(x - 0.3, lsets[0])
+    InterpolateToP1(y + 0.2, lsets[1])
+
+    lset_dom = LevelsetDomain(lsets, (NEG, POS))
+    assert lset_dom.multi_levelset
+    assert lset_dom.domain_type == [(NEG, POS)]
+    assert len(lset_dom.levelset) == 2
+
+    val_dict = Integrate({"levelset": lsets, "domain_type": (NEG, POS)}, cf=1, mesh=mesh, order=0)
+    val_dom = Integrate(lset_dom, cf=1, mesh=mesh, order=0)
+    assert abs(val_dict - 1.3 * 1.2) < 1e-12
+    assert abs(val_dom - val_dict) < 1e-12
+
+
+def test_levelsetdomain_subdivlvl():
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lset = sqrt(x * x + y * y) - 0.5
+    lset_dom = LevelsetDomain(lset, NEG, subdivlvl=2)
+    assert lset_dom.subdivlvl == 2
+    val_dict = Integrate({"levelset": lset, "domain_type": NEG, "subdivlvl": 2}, cf=1, mesh=mesh, order=2)
+    val_dom = Integrate(lset_dom, cf=1, mesh=mesh, order=2)
+    assert abs(val_dom - val_dict) < 1e-12
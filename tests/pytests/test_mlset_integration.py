@@ -291,6 +291,119 @@ def test_multilevelsetcutinfo():
         a4 = mlci.GetElementsWithContribution([(NEG, NEG, NEG)])
 
 
+def test_mlset_positive_measure():
+    from ngsolve.meshes import MakeStructured2DMesh
+    from itertools import product
+    mesh = MakeStructured2DMesh(quads=False, nx=10, ny=10,
+                                mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+
+    P1 = H1(mesh, order=1)
+    lsets = tuple(GridFunction(P1) for i in range(3))
+    InterpolateToP1(x - 0.31, lsets[0])
+    InterpolateToP1(y + 0.47, lsets[1])
+    InterpolateToP1(x + 2, lsets[2])
+
+    mlci = MultiLevelsetCutInfo(mesh, lsets)
+    dtts = list(product((NEG, POS, IF), repeat=3))
+    has_measure = mlci.HasPositiveMeasure(dtts)
+    for dtt, has_m in zip(dtts, has_measure):
+        weight = Integrate({"levelset": lsets, "domain_type": dtt},
+                           cf=1, mesh=mesh, order=0)
+        assert has_m == (abs(weight) > 1e-12)
+    # the third level set is positive everywhere
+    assert has_measure[dtts.index((NEG, NEG, POS))]
+    assert not has_measure[dtts.index((NEG, NEG, NEG))]
+    assert not has_measure[dtts.index((IF, IF, IF))]
+
+
+def test_mlset_element_codes():
+    from ngsolve.meshes import MakeStructured2DMesh
+    from itertools import product
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8)
+
+    P1 = H1(mesh, order=1)
+    lsets = tuple(GridFunction(P1) for i in range(3))
+    InterpolateToP1(x - 0.51, lsets[0])
+    InterpolateToP1(y - 0.27, lsets[1])
+    InterpolateToP1(x + y - 0.9, lsets[2])
+
+    mlci = MultiLevelsetCutInfo(mesh, lsets)
+    codes = mlci.GetElementCodes(VOL)
+    assert len(codes) == mesh.ne
+
+    bits = {NEG: 1, POS: 2, IF: 4}
+    for dtt in product((NEG, POS, IF), repeat=3):
+        code = sum(bits[dt] << (3 * i) for i, dt in enumerate(dtt))
+        els = mlci.GetElementsOfType(dtt)
+        for el in range(mesh.ne):
+            assert els[el] == (codes[el] == code)
+
+    # the codes are updated together with the level sets
+    InterpolateToP1(x + 2, lsets[0])
+    mlci.Update(lsets)
+    codes = mlci.GetElementCodes(VOL)
+    assert all((c & 7) == bits[POS] for c in codes)
+
+
+def test_mlci_marker_batch_and_cache():
+    from ngsolve.meshes import MakeStructured2DMesh
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8)
+
+    P1 = H1(mesh, order=1)
+    lsets = tuple(GridFunction(P1) for i in range(2))
+    InterpolateToP1(x - 0.51, lsets[0])
+    InterpolateToP1(y - 0.27, lsets[1])
+
+    domains = [DomainTypeArray((NEG, NEG)), [(POS, NEG), (POS, POS)],
+               DomainTypeArray((IF, ANY))]
+    mlci = MultiLevelsetCutInfo(mesh, lsets)
+    mlci_ref = MultiLevelsetCutInfo(mesh, lsets)
+    els_type = mlci.GetElementsOfType(domains)
+    els_contr = mlci.GetElementsWithContribution(domains)
+    assert len(els_type) == len(els_contr) == len(domains)
+    for dom, e_type, e_contr in zip(domains, els_type, els_contr):
+        assert MarkersEqual(e_type, mlci_ref.GetElementsOfType(dom))
+        assert MarkersEqual(e_contr,
+                            mlci_ref.GetElementsWithContribution(dom))
+
+    # markers are cached per VOL_or_BND
+    els_bnd = mlci.GetElementsOfType((NEG, NEG), VOL_or_BND=BND)
+    assert len(els_bnd) == mesh.GetNE(BND)
+
+    # cached markers are updated in place
+    InterpolateToP1(x + 2, lsets[0])
+    mlci.Update(lsets)
+    assert not any(els_type[0])
+    assert not any(els_contr[0])
+    assert MarkersEqual(els_contr[1],
+                        MultiLevelsetCutInfo(mesh, lsets).GetElementsWithContribution(domains[1]))
+
+
+def test_domaintypearray_operations():
+    tri = DomainTypeArray((NEG, NEG, NEG))
+    outer = DomainTypeArray([(POS, ANY, ANY), (ANY, POS, ANY),
+                             (ANY, ANY, POS)])
+    assert len(outer) == 7
+    assert (NEG, NEG, NEG) not in outer
+    assert (POS, NEG, IF) not in outer
+    assert ~tri == outer
+    assert (tri | outer) == DomainTypeArray((ANY, ANY, ANY))
+
+    bnd = tri.Boundary()
+    assert bnd.codim == 1
+    assert bnd == DomainTypeArray([(IF, NEG, NEG), (NEG, IF, NEG),
+                                   (NEG, NEG, IF)])
+    assert (bnd & tri) == bnd
+    assert len(tri & DomainTypeArray((POS, NEG, NEG))) == 0
+
+    union = TensorUnion(DomainTypeArray((NEG,)), DomainTypeArray((POS, POS)))
+    assert union == DomainTypeArray([(NEG, ANY, ANY), (ANY, POS, POS)])
+    inters = TensorIntersection(DomainTypeArray([(NEG,), (POS,)]),
+                                DomainTypeArray((IF, POS)))
+    assert inters.codim == 1
+    assert inters == DomainTypeArray([(NEG, IF, POS), (POS, IF, POS)])
+
+
 # -----------------------------------------------------------------------------
 # --------------------------------- 3D TESTS ----------------------------------
 # -----------------------------------------------------------------------------
@@ -102,6 +102,26 @@ def test_operators():
     assert dta8.Boundary() == target
 
 
+def test_operators_empty_and_length():
+    # operations with an empty result give an empty DomainTypeArray
+    dta_empty = DomainTypeArray((POS, NEG)) & DomainTypeArray((NEG, NEG))
+    assert len(dta_empty) == 0
+    assert dta_empty.as_list == []
+    assert len(~DomainTypeArray([(POS,), (NEG,)])) == 0
+
+    # ... which can be combined further
+    dta1 = DomainTypeArray((POS, NEG))
+    assert (dta_empty | dta1) == dta1
+    assert len(dta_empty & dta1) == 0
+    assert ~dta_empty == DomainTypeArray((ANY, ANY))
+
+    # combining arrays for different numbers of level sets is not possible
+    with pytest.raises(Exception, match="different length"):
+        DomainTypeArray((POS, NEG)) | DomainTypeArray((POS,))
+    with pytest.raises(Exception, match="different length"):
+        DomainTypeArray((POS, NEG)) & DomainTypeArray((POS,))
+
+
 # -----------------------------------------------------------------------------
 # ---------------------------- TEST ANY EXPANSION -----------------------------
 # -----------------------------------------------------------------------------
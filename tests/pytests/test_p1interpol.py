@@ -0,0 +1,113 @@
+import pytest
+from math import sqrt as msqrt
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+def VertexValues(mesh, func):
+    return [func(*v.point) for v in mesh.vertices]
+
+
+@pytest.mark.parametrize("quad", [False, True])
+@pytest.mark.parametrize("dim", [2, 3])
+def test_interpolate_p1_vertex_values(quad, dim):
+    if dim == 2:
+        mesh = MakeStructured2DMesh(quads=quad, nx=6, ny=5)
+        cf = sqrt(x * x + y * y) - 0.55
+        exact = VertexValues(mesh, lambda px, py: msqrt(px * px + py * py) - 0.55)
+    else:
+        mesh = MakeStructured3DMesh(hexes=quad, nx=3, ny=4, nz=3)
+        cf = x * y - z + 0.3
+        exact = VertexValues(mesh, lambda px, py, pz: px * py - pz + 0.3)
+
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(cf, lsetp1)
+    for i, val in enumerate(exact):
+        assert abs(lsetp1.vec[i] - val) < 1e-12
+
+    # interpolation of a (higher order) GridFunction
+    gf_ho = GridFunction(H1(mesh, order=2))
+    gf_ho.Set(cf)
+    lsetp1_gf = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(gf_ho, lsetp1_gf)
+    for i in range(mesh.nv):
+        assert abs(lsetp1_gf.vec[i] - gf_ho.vec[i]) < 1e-14
+
+
+def test_interpolate_p1_repeated_and_refined():
+    mesh = MakeStructured2DMesh(quads=False, nx=4, ny=4)
+    t = Parameter(0)
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    for tval in [0.1, 0.2]:
+        t.Set(tval)
+        InterpolateToP1(x - t, lsetp1)
+        exact = VertexValues(mesh, lambda px, py: px - tval)
+        for i, val in enumerate(exact):
+            assert abs(lsetp1.vec[i] - val) < 1e-12
+
+    # the vertex tables are rebuilt for the refined mesh
+    mesh.Refine()
+    lsetp1.space.Update()
+    lsetp1.Update()
+    InterpolateToP1(x + 2 * y, lsetp1)
+    exact = VertexValues(mesh, lambda px, py: px + 2 * py)
+    for i, val in enumerate(exact):
+        assert abs(lsetp1.vec[i] - val) < 1e-12
+
+
+
+@pytest.mark.parametrize("dim", [2, 3])
+def test_interpolate_p1_deformed_mesh(dim):
+    if dim == 2:
+        mesh = MakeStructured2DMesh(quads=False, nx=6, ny=5)
+        cf = x * x + 2 * y - 0.5
+        exact = VertexValues(mesh, lambda px, py: px * px + 2 * py - 0.5)
+        deform_cf = CoefficientFunction((0.1 * x + 0.05 * y, 0.02 * x))
+    else:
+        mesh = MakeStructured3DMesh(hexes=False, nx=3, ny=4, nz=3)
+        cf = x * y - z + 0.3
+        exact = VertexValues(mesh, lambda px, py, pz: px * py - pz + 0.3)
+        deform_cf = CoefficientFunction((0.1 * x + 0.05 * z, 0.02 * x, 0.03 * y))
+    # (element-wise) affine deformation
+    deform = GridFunction(VectorH1(mesh, order=1))
+    deform.Set(deform_cf)
+
+    # on a deformed mesh the function is evaluated in the undeformed vertices
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    mesh.SetDeformation(deform)
+    InterpolateToP1(cf, lsetp1)
+    mesh.UnsetDeformation()
+    for i, val in enumerate(exact):
+        assert abs(lsetp1.vec[i] - val) < 1e-12
+
+
+@pytest.mark.parametrize("order_time", [1, 2])
+def test_spacetime_interpolate_p1(order_time):
+    mesh = MakeStructured2DMesh(quads=False, nx=5, ny=4)
+    tref = ReferenceTimeVariable()
+    tfe = ScalarTimeFE(order_time)
+
+    st_p1 = SpaceTimeFESpace(H1(mesh, order=1), tfe)
+    lset_p1 = GridFunction(st_p1)
+    SpaceTimeInterpolateToP1(x * y - 0.3 * tref + 0.01, tref, lset_p1)
+
+    nodes = st_p1.TimeFE_nodes()
+    for i, ti in enumerate(nodes):
+        exact = VertexValues(mesh, lambda px, py: px * py - 0.3 * ti + 0.01)
+        for v, val in enumerate(exact):
+            assert abs(lset_p1.vec[i * mesh.nv + v] - val) < 1e-12
+
+    # all time nodes of a space-time GridFunction at once
+    st_ho = SpaceTimeFESpace(H1(mesh, order=2), tfe)
+    lset_ho = GridFunction(st_ho)
+    lset_ho.vec.FV().NumPy()[:] = [0.1 * (j % 7) - 0.3 for j in range(st_ho.ndof)]
+    lset_p1_gf = GridFunction(st_p1)
+    SpaceTimeInterpolateToP1(lset_ho, lset_p1_gf, eps_perturbation=1e-14)
+    ndof_ho = st_ho.ndof // len(nodes)
+    for i in range(len(nodes)):
+        for v in range(mesh.nv):
+            val = lset_ho.vec[i * ndof_ho + v]
+            if abs(val) < 1e-14:
+                val = 1e-14
+            assert lset_p1_gf.vec[i * mesh.nv + v] == pytest.approx(val)
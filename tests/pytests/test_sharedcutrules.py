@@ -0,0 +1,70 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+@pytest.mark.parametrize("quad", [False, True])
+def test_shared_cut_rules(quad):
+    mesh = MakeStructured2DMesh(quads=quad, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(sqrt(x * x + y * y) - 0.55, lsetp1)
+    V = H1(mesh, order=1)
+    u, v = V.TnT()
+
+    a_ref = BilinearForm(V)
+    a_ref += SymbolicBFI(levelset_domain={"levelset": lsetp1, "domain_type": NEG}, form=3 * u * v)
+
+    # two integrators on the same level set (and two different dictionaries)
+    a = BilinearForm(V)
+    a += SymbolicBFI(levelset_domain={"levelset": lsetp1, "domain_type": NEG}, form=u * v)
+    a += SymbolicBFI(levelset_domain={"levelset": lsetp1, "domain_type": NEG}, form=2 * u * v)
+
+    CutRuleStatistics(reset=True, clear_cache=True)
+    a.Assemble()
+    stats = CutRuleStatistics(reset=True)
+    assert stats["constructed"] > 0
+    assert stats["reused"] > 0
+
+    # the cut rules from above are reused by the third integrator
+    a_ref.Assemble()
+    stats = CutRuleStatistics(reset=True)
+    assert stats["reused"] > 0
+
+    w = a.mat.CreateColVector()
+    w.SetRandom()
+    diff = a.mat.CreateColVector()
+    diff.data = a.mat * w - a_ref.mat * w
+    assert Norm(diff) < 1e-12 * max(1, Norm(a_ref.mat * w))
+
+    # a new level set invalidates the shared rules of all integrators
+    InterpolateToP1(sqrt(x * x + y * y) - 0.45, lsetp1)
+    a.Assemble()
+    stats = CutRuleStatistics(reset=True)
+    assert stats["invalidations"] > 0
+    assert stats["constructed"] > 0
+
+
+def test_shared_cut_rules_cf_levelset():
+    mesh = MakeStructured2DMesh(quads=False, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    t = Parameter(0)
+    lset = sqrt((x - t) * (x - t) + y * y) - 0.5
+    lset_neg = {"levelset": lset, "domain_type": NEG}
+
+    CutRuleStatistics(reset=True, clear_cache=True)
+    val = Integrate(levelset_domain=lset_neg, cf=1, mesh=mesh, order=2)
+    stats = CutRuleStatistics(reset=True)
+    assert stats["constructed"] > 0
+    assert stats["reused"] == 0
+
+    assert abs(Integrate(levelset_domain=lset_neg, cf=1, mesh=mesh, order=2) - val) < 1e-14
+    stats = CutRuleStatistics(reset=True)
+    assert stats["reused"] > 0
+
+    # a changed parameter in the level set invalidates the rules
+    t.Set(0.1)
+    val_t = Integrate(levelset_domain=lset_neg, cf=x, mesh=mesh, order=2)
+    stats = CutRuleStatistics(reset=True)
+    assert stats["invalidations"] > 0
+    CutRuleStatistics(clear_cache=True)
+    assert abs(Integrate(levelset_domain=lset_neg, cf=x, mesh=mesh, order=2) - val_t) < 1e-14
@@ -0,0 +1,52 @@
+import pytest
+from ngsolve import *
+from ngsolve.meshes import *
+from xfem import *
+
+
+def make_mesh(dim, quad):
+    if dim == 2:
+        return MakeStructured2DMesh(quads=quad, nx=8, ny=8, mapping=lambda x, y: (2 * x - 1, 2 * y - 1))
+    else:
+        return MakeStructured3DMesh(hexes=quad, nx=4, ny=4, nz=4,
+                                    mapping=lambda x, y, z: (2 * x - 1, 2 * y - 1, 2 * z - 1))
+
+
+@pytest.mark.parametrize("dim", [2, 3])
+@pytest.mark.parametrize("quad", [False, True])
+@pytest.mark.parametrize("dt", [NEG, POS, IF])
+def test_simd_cutint_matches_scalar(dim, quad, dt):
+    mesh = make_mesh(dim, quad)
+    r = sqrt(sum(x_ * x_ for x_ in [x, y, z][:dim]))
+    lsetp1 = GridFunction(H1(mesh, order=1))
+    InterpolateToP1(r - 0.55, lsetp1)
+    lset_dom = {"levelset": lsetp1, "domain_type": dt}
+
+    V = H1(mesh, order=3)
+    u, v = V.TnT()
+    coef = 1 + x * x
+    if dt == IF:
+        form_a = coef * u * v
+    else:
+        form_a = coef * grad(u) * grad(v) + u * v
+    form_f = coef * v
+
+    mats, vecs = [], []
+    for simd in [True, False]:
+        a = BilinearForm(V)
+        a += SymbolicBFI(levelset_domain=lset_dom, form=form_a, simd_evaluate=simd)
+        a.Assemble()
+        f = LinearForm(V)
+        f += SymbolicLFI(levelset_domain=lset_dom, form=form_f, simd_evaluate=simd)
+        f.Assemble()
+        mats.append(a.mat)
+        vecs.append(f.vec)
+
+    diff = mats[0].CreateColVector()
+    w = mats[0].CreateColVector()
+    w.SetRandom()
+    diff.data = mats[0] * w - mats[1] * w
+    assert Norm(diff) < 1e-10 * max(1, Norm(mats[1] * w))
+
+    diff.data = vecs[0] - vecs[1]
+    assert Norm(diff) < 1e-10 * max(1, Norm(vecs[1]))
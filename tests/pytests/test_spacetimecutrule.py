@@ -493,3 +493,130 @@ def test_spacetime_area_of_a_hypersphere(structured):
     avg = sum(eocs_int)/len(eocs_int)
     print("Average: ", avg)
     assert avg > 1.9
+
+
+@pytest.mark.parametrize("quad", [True, False])
+def test_spacetime_apply(quad):
+    mesh = MakeStructured2DMesh(quads=quad, nx=4, ny=4)
+
+    h1fes = H1(mesh, order=1)
+    lset_approx_h1 = GridFunction(h1fes)
+    tfe = ScalarTimeFE(1)
+    lsetfes = SpaceTimeFESpace(h1fes, tfe)
+    lset_approx = GridFunction(lsetfes)
+    InterpolateToP1(0.6 - x - 0.3 * y, lset_approx_h1)
+    lset_approx.vec[0:h1fes.ndof].data = lset_approx_h1.vec
+    InterpolateToP1(0.4 - x - 0.3 * y, lset_approx_h1)
+    lset_approx.vec[h1fes.ndof:2 * h1fes.ndof].data = lset_approx_h1.vec
+
+    st_fes = SpaceTimeFESpace(H1(mesh, order=2), ScalarTimeFE(1), flags={"dgjumps": True})
+    u, v = st_fes.TnT()
+    lset_neg = {"levelset": lset_approx, "domain_type": NEG}
+    h = specialcf.mesh_size
+
+    def add_integrators(a):
+        a += SymbolicBFI(levelset_domain=lset_neg, form=(1 + tref) * (grad(u) * grad(v) + u * v), time_order=2)
+        a += SymbolicFacetPatchBFI(form=h**(-2) * (u - u.Other()) * (v - v.Other()),
+                                   skeleton=False, time_order=2)
+
+    a = BilinearForm(st_fes, check_unused=False)
+    add_integrators(a)
+    a.Assemble()
+    a_mf = BilinearForm(st_fes, nonassemble=True, check_unused=False)
+    add_integrators(a_mf)
+
+    gfu = GridFunction(st_fes)
+    gfu.vec.SetRandom()
+    Au1 = gfu.vec.CreateVector()
+    Au2 = gfu.vec.CreateVector()
+    Au1.data = a.mat * gfu.vec
+    a_mf.Apply(gfu.vec, Au2)
+    Au2.data -= Au1
+    assert Norm(Au2) < 1e-10 * Norm(Au1)
+
+
+@pytest.mark.parametrize("dim", [1, 2, 4])
+@pytest.mark.parametrize("order_time", [1, 2, 3])
+def test_restrict_in_time_batch(dim, order_time):
+    mesh = MakeStructured2DMesh(quads=True, nx=3, ny=3)
+    tfe = ScalarTimeFE(order_time)
+    V = H1(mesh, order=2, dim=dim)
+    st_fes = SpaceTimeFESpace(V, tfe)
+    gf = GridFunction(st_fes)
+    gf.vec.FV().NumPy()[:] = [(j % 11) * 0.1 - 0.5 for j in range(len(gf.vec.FV()))]
+
+    times = [0.0, 0.1, 0.5, 0.75, 1.0]
+    gfs = CreateTimeRestrictedGF(gf, times)
+    values = TimeRestrictedValues(gf, times)
+    assert values.shape == (len(times), len(gfs[0].vec.FV()))
+
+    gfs2 = [GridFunction(V) for t in times]
+    RestrictGFInTime(gf, times, gfs2)
+
+    nodes = st_fes.TimeFE_nodes()
+    nblock = len(gfs[0].vec.FV())
+    all_vals = gf.vec.FV().NumPy()
+    for k, t in enumerate(times):
+        single = CreateTimeRestrictedGF(gf, t)
+        # reference: Lagrange interpolation in time
+        ref = 0 * all_vals[:nblock]
+        for i, ti in enumerate(nodes):
+            li = 1.0
+            for j, tj in enumerate(nodes):
+                if i != j:
+                    li *= (t - tj) / (ti - tj)
+            ref = ref + li * all_vals[i * nblock:(i + 1) * nblock]
+        for vals in [single.vec.FV().NumPy(), gfs[k].vec.FV().NumPy(),
+                     gfs2[k].vec.FV().NumPy(), values[k, :]]:
+            assert max(abs(vals - ref)) < 1e-12
+
+
+@pytest.mark.parametrize("discontinuous_qn", [True, False])
+def test_spacetime_projectshift(discontinuous_qn):
+    mesh = MakeStructured2DMesh(quads = False, nx=8, ny=8, mapping = lambda x,y : (2*x-1,2*y-1))
+    tfe = ScalarTimeFE(2)
+    t = tref
+    levelset = sqrt((x-0.2*t)*(x-0.2*t)+y*y)-0.5
+
+    V_ho = H1(mesh, order=2)
+    V_p1 = H1(mesh, order=1)
+    V_def = H1(mesh, order=2, dim=mesh.dim)
+    V_qn = L2(mesh, order=2, dim=mesh.dim) if discontinuous_qn else H1(mesh, order=2, dim=mesh.dim)
+    lset_ho = GridFunction(SpaceTimeFESpace(V_ho, tfe))
+    lset_p1 = GridFunction(SpaceTimeFESpace(V_p1, tfe))
+    deform = GridFunction(SpaceTimeFESpace(V_def, tfe))
+    qn_st = GridFunction(SpaceTimeFESpace(V_qn, tfe))
+
+    nodes = lset_ho.space.TimeFE_nodes()
+    lset_ho_node = GridFunction(V_ho)
+    for i, ti in enumerate(nodes):
+        t.FixTime(ti)
+        lset_ho_node.Set(levelset)
+        lset_ho.vec[i*V_ho.ndof : (i+1)*V_ho.ndof].data = lset_ho_node.vec
+    t.UnfixTime()
+    SpaceTimeInterpolateToP1(lset_ho, lset_p1)
+
+    ci = CutInfo(mesh, lset_p1, time_order=2)
+    hasif = ci.GetElementsOfType(IF)
+
+    # reference: ProjectShift for every time node (on the same band)
+    lset_p1_node = GridFunction(V_p1)
+    qn = GridFunction(V_qn)
+    deform_node = GridFunction(V_def)
+    deform_ref = GridFunction(deform.space)
+    for i in range(len(nodes)):
+        lset_ho_node.vec.data = lset_ho.vec[i*V_ho.ndof : (i+1)*V_ho.ndof]
+        lset_p1_node.vec.data = lset_p1.vec[i*V_p1.ndof : (i+1)*V_p1.ndof]
+        qn.Set(lset_ho_node.Deriv())
+        qn_st.vec[i*V_qn.ndof : (i+1)*V_qn.ndof].data = qn.vec
+        ProjectShift(lset_ho_node, lset_p1_node, deform_node, qn, hasif, None, threshold=0.2)
+        deform_ref.vec[i*V_def.ndof : (i+1)*V_def.ndof].data = deform_node.vec
+
+    stats = SpaceTimeProjectShift(lset_ho, lset_p1, deform,
+                                  None if discontinuous_qn else qn_st, hasif, threshold=0.2)
+    assert stats["band_elements"] == hasif.NumSet()
+    assert stats["search_not_converged"] == 0
+    # qn=None uses the exact gradient, the L2 projection of the reference
+    # differs only by round-off
+    deform.vec.data -= deform_ref.vec
+    assert Norm(deform.vec) < 1e-8
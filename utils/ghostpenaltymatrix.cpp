@@ -0,0 +1,223 @@
+#include "ghostpenaltymatrix.hpp"
+#include "ngsxstd.hpp"
+
+namespace ngcomp
+{
+
+  GhostPenaltyMatrix ::
+  GhostPenaltyMatrix (shared_ptr<FESpace> afes,
+                      const Array<shared_ptr<BilinearFormIntegrator>> & abfis)
+    : fes(afes), ma(afes->GetMeshAccess())
+  {
+    if (fes->IsComplex())
+      throw Exception("GhostPenaltyMatrix not implemented for complex fespace");
+    for (auto bfi : abfis)
+    {
+      auto fbfi = dynamic_pointer_cast<FacetBilinearFormIntegrator>(bfi);
+      if (!fbfi || !bfi->SkeletonForm() || bfi->VB() != VOL)
+        throw Exception("GhostPenaltyMatrix: only facet integrators (skeleton=True or facet patch integrators) can be used");
+      if (bfi->GetDeformation())
+        throw Exception("GhostPenaltyMatrix: integrators with deformation are not supported");
+      bfis.Append(fbfi);
+    }
+  }
+
+  void GhostPenaltyMatrix :: IntegrateFacet (int facnr, LocalHeap & lh)
+  {
+    HeapReset hr(lh);
+    facet_dnums[facnr].SetSize(0);
+    facet_integrated[facnr] = true;
+
+    ArrayMem<int,2> elnums;
+    ma->GetFacetElements(facnr, elnums);
+    if (elnums.Size() < 2)
+    {
+      facet_elmats[facnr].SetSize(0,0);
+      return;
+    }
+
+    ElementId ei1(VOL, elnums[0]);
+    ElementId ei2(VOL, elnums[1]);
+    if (!fes->DefinedOn(VOL, ma->GetElIndex(ei1)) || !fes->DefinedOn(VOL, ma->GetElIndex(ei2)))
+    {
+      facet_elmats[facnr].SetSize(0,0);
+      return;
+    }
+
+    int facnr1 = -1, facnr2 = -1;
+    auto fnums1 = ma->GetElFacets(ei1);
+    for (int k = 0; k < fnums1.Size(); k++)
+      if (facnr == fnums1[k]) facnr1 = k;
+    auto fnums2 = ma->GetElFacets(ei2);
+    for (int k = 0; k < fnums2.Size(); k++)
+      if (facnr == fnums2[k]) facnr2 = k;
+
+    const FiniteElement & fel1 = fes->GetFE(ei1, lh);
+    const FiniteElement & fel2 = fes->GetFE(ei2, lh);
+    ElementTransformation & eltrans1 = ma->GetTrafo(ei1, lh);
+    ElementTransformation & eltrans2 = ma->GetTrafo(ei2, lh);
+    ArrayMem<int,8> vnums1, vnums2;
+    vnums1 = ma->GetElVertices(ei1);
+    vnums2 = ma->GetElVertices(ei2);
+
+    Array<DofId> dnums1(fel1.GetNDof(), lh), dnums2(fel2.GetNDof(), lh);
+    fes->GetDofNrs(ei1, dnums1);
+    fes->GetDofNrs(ei2, dnums2);
+    facet_dnums[facnr] = dnums1;
+    facet_dnums[facnr].Append(dnums2);
+
+    const int nd = facet_dnums[facnr].Size();
+    Matrix<> & elmat = facet_elmats[facnr];
+    elmat.SetSize(nd, nd);
+    elmat = 0.0;
+    FlatMatrix<> elmat_bfi(nd, nd, lh);
+    for (auto & bfi : bfis)
+    {
+      if (!bfi->DefinedOnElement(facnr)) continue;
+      bfi->CalcFacetMatrix(fel1, facnr1, eltrans1, vnums1,
+                           fel2, facnr2, eltrans2, vnums2, elmat_bfi, lh);
+      elmat += elmat_bfi;
+    }
+    fes->TransformMat(ei1, elmat.Rows(0, dnums1.Size()), TRANSFORM_MAT_LEFT);
+    fes->TransformMat(ei2, elmat.Rows(dnums1.Size(), nd), TRANSFORM_MAT_LEFT);
+    fes->TransformMat(ei1, elmat.Cols(0, dnums1.Size()), TRANSFORM_MAT_RIGHT);
+    fes->TransformMat(ei2, elmat.Cols(dnums1.Size(), nd), TRANSFORM_MAT_RIGHT);
+  }
+
+  void GhostPenaltyMatrix :: BuildMatrix ()
+  {
+    static Timer t("GhostPenaltyMatrix::BuildMatrix");
+    RegionTimer reg(t);
+
+    const int ndof = fes->GetNDof();
+    Array<int> active_facets;
+    for (int i = 0; i < facets->Size(); i++)
+      if (facets->Test(i))
+        active_facets.Append(i);
+
+    TableCreator<int> creator(active_facets.Size());
+    for ( ; !creator.Done(); creator++)
+      for (int k = 0; k < active_facets.Size(); k++)
+        for (DofId d : facet_dnums[active_facets[k]])
+          if (IsRegularDof(d))
+            creator.Add(k, d);
+    auto table = creator.MoveTable();
+
+    MatrixGraph graph(ndof, ndof, table, table, false);
+    mat = make_shared<SparseMatrix<double>>(graph, false);
+    mat->SetZero();
+
+    ParallelForRange (active_facets.Size(), [&] (IntRange r)
+                      {
+                        for (auto k : r)
+                        {
+                          const int facnr = active_facets[k];
+                          if (facet_elmats[facnr].Height() == 0) continue;
+                          mat->AddElementMatrix(facet_dnums[facnr], facet_dnums[facnr], facet_elmats[facnr], true);
+                        }
+                      });
+  }
+
+  void GhostPenaltyMatrix :: Update (shared_ptr<BitArray> afacets, LocalHeap & lh, bool force)
+  {
+    static Timer t("GhostPenaltyMatrix::Update");
+    RegionTimer reg(t);
+
+    const int nf = ma->GetNFacets();
+    if (afacets->Size() != nf)
+      throw Exception("GhostPenaltyMatrix::Update: BitArray size does not match number of facets");
+
+    // dof numbers and facet matrices are only valid for the state of the
+    // space at the time of integration (an update of the space, e.g. of an
+    // XFESpace or a compressed space, can change ndof and dof numbering)
+    const size_t ndof = fes->GetNDof();
+    const size_t timestamp = fes->GetTimeStamp();
+    if (force || facet_integrated.Size() != nf
+        || ndof != fes_ndof || timestamp != fes_timestamp)
+    {
+      fes_ndof = ndof;
+      fes_timestamp = timestamp;
+      mat = nullptr;
+      for (auto & dnums : facet_dnums)
+        dnums.SetSize(0);
+      for (auto & elmat : facet_elmats)
+        elmat.SetSize(0,0);
+      facet_dnums.SetSize(nf);
+      facet_elmats.SetSize(nf);
+      facet_integrated.SetSize(nf);
+      facet_integrated = false;
+    }
+
+    n_integrated = 0;
+    n_removed = 0;
+    Array<int> new_facets;
+    for (int i = 0; i < nf; i++)
+    {
+      if (afacets->Test(i) && !facet_integrated[i])
+        new_facets.Append(i);
+      else if (!afacets->Test(i) && facet_integrated[i])
+      {
+        // contribution of removed facets is dropped (and has to be
+        // recomputed if the facet is added again)
+        facet_integrated[i] = false;
+        facet_dnums[i].SetSize(0);
+        facet_elmats[i].SetSize(0,0);
+        n_removed++;
+      }
+    }
+
+    IterateRange
+      (new_facets.Size(), lh,
+       [&] (int k, LocalHeap & lh)
+       {
+         IntegrateFacet(new_facets[k], lh);
+       });
+    n_integrated = new_facets.Size();
+
+    facets = make_shared<BitArray>(*afacets);
+    if (mat == nullptr || n_integrated > 0 || n_removed > 0)
+      BuildMatrix();
+  }
+
+  void GhostPenaltyMatrix :: AddTo (BaseMatrix & amat, double scale) const
+  {
+    static Timer t("GhostPenaltyMatrix::AddTo");
+    RegionTimer reg(t);
+
+    if (mat == nullptr)
+      throw Exception("GhostPenaltyMatrix::AddTo: Update has not been called");
+    auto spmat = dynamic_cast<SparseMatrix<double>*>(&amat);
+    if (!spmat)
+      throw Exception("GhostPenaltyMatrix::AddTo: only implemented for (real) sparse matrices");
+    if (spmat->Height() != mat->Height())
+      throw Exception("GhostPenaltyMatrix::AddTo: matrix sizes do not match");
+
+    // the sparsity pattern of amat is checked once before anything is added
+    std::atomic<size_t> n_missing{0};
+    ParallelForRange (mat->Height(), [&] (IntRange r)
+                      {
+                        size_t missing = 0;
+                        for (auto row : r)
+                          for (auto col : mat->GetRowIndices(row))
+                            if (spmat->GetPositionTest(row, col) == numeric_limits<size_t>::max())
+                              missing++;
+                        n_missing += missing;
+                      });
+    if (n_missing > 0)
+      throw Exception("GhostPenaltyMatrix::AddTo: the sparsity pattern of the matrix misses "
+                      + ToString(size_t(n_missing)) + " couplings of the stabilization "
+                      + "(the space of the bilinear form needs dgjumps=True)");
+
+    ParallelForRange (mat->Height(), [&] (IntRange r)
+                      {
+                        for (auto row : r)
+                        {
+                          auto cols = mat->GetRowIndices(row);
+                          auto vals = mat->GetRowValues(row);
+                          for (int j = 0; j < cols.Size(); j++)
+                            (*spmat)(row, cols[j]) += scale * vals(j);
+                        }
+                      });
+  }
+
+}
@@ -0,0 +1,60 @@
+#pragma once
+#include <comp.hpp>
+
+namespace ngcomp
+{
+
+  /// Sparse matrix of (ghost penalty type) facet stabilization terms on a set
+  /// of facets (given as a BitArray). The facet matrices of all facets are
+  /// stored, so that on a change of the set of facets only the added facets
+  /// need to be integrated (and the contributions of removed facets are
+  /// dropped). The stabilization terms are assumed to depend only on the mesh
+  /// (and not on the level set or the current iterate).
+  class GhostPenaltyMatrix
+  {
+    shared_ptr<FESpace> fes;
+    shared_ptr<MeshAccess> ma;
+    Array<shared_ptr<FacetBilinearFormIntegrator>> bfis;
+
+    /// facets that the matrix is currently assembled on
+    shared_ptr<BitArray> facets = nullptr;
+    /// dofs (of both neighbor elements) and facet matrices, per facet
+    Array<Array<DofId>> facet_dnums;
+    Array<Matrix<>> facet_elmats;
+    Array<bool> facet_integrated;
+    /// ndof and timestamp of the space that the facet data belongs to (the
+    /// stored data is dropped if the space has changed)
+    size_t fes_ndof = 0;
+    size_t fes_timestamp = 0;
+
+    shared_ptr<SparseMatrix<double>> mat = nullptr;
+
+    size_t n_integrated = 0;
+    size_t n_removed = 0;
+
+    void IntegrateFacet (int facnr, LocalHeap & lh);
+    void BuildMatrix ();
+  public:
+    GhostPenaltyMatrix (shared_ptr<FESpace> afes,
+                        const Array<shared_ptr<BilinearFormIntegrator>> & abfis);
+
+    /// Sets the facets of the stabilization. Only facets that have not been
+    /// integrated before are integrated (unless force is set or the space
+    /// has been updated in the meantime).
+    void Update (shared_ptr<BitArray> afacets, LocalHeap & lh, bool force = false);
+
+    shared_ptr<SparseMatrix<double>> GetMatrix () const { return mat; }
+    shared_ptr<BitArray> GetFacets () const { return facets; }
+
+    /// adds scale * (stabilization matrix) to the sparse matrix amat. The
+    /// MatrixGraph of amat has to contain the couplings of the stabilization,
+    /// i.e. the space of the bilinear form needs dgjumps=True (otherwise an
+    /// exception is thrown and amat is not changed).
+    void AddTo (BaseMatrix & amat, double scale = 1.0) const;
+
+    /// number of facets integrated / removed in the last Update
+    size_t GetNIntegratedFacets () const { return n_integrated; }
+    size_t GetNRemovedFacets () const { return n_removed; }
+  };
+
+}
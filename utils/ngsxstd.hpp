@@ -77,6 +77,54 @@ INLINE DOMAIN_TYPE INVERT( DOMAIN_TYPE dt)
   }
 }
 
+/// Encoding of a tuple of (combined) domain types w.r.t. several level sets
+/// in one integer: the bits 3*i,3*i+1,3*i+2 contain the COMBINED_DOMAIN_TYPE
+/// of the i-th level set. An element is described by the domain types of the
+/// (straight cut) level sets on it, i.e. IF if the element is cut.
+typedef uint64_t MLSET_CODE;
+const int MLSET_CODE_MAX_LEVELSETS = 21;
+
+/// bit 3*i set for all i < M
+INLINE MLSET_CODE MlsetCodeLowBits (int M)
+{
+  MLSET_CODE low = 0;
+  for (int i = 0; i < M; i++)
+    low |= MLSET_CODE(1) << (3*i);
+  return low;
+}
+
+INLINE MLSET_CODE EncodeDomainTypes (FlatArray<DOMAIN_TYPE> dts)
+{
+  if (dts.Size() > MLSET_CODE_MAX_LEVELSETS)
+    throw Exception("EncodeDomainTypes: too many level sets");
+  MLSET_CODE code = 0;
+  for (int i = 0; i < dts.Size(); i++)
+    code |= MLSET_CODE(TO_CDT(dts[i])) << (3*i);
+  return code;
+}
+
+INLINE COMBINED_DOMAIN_TYPE DecodeDomainType (MLSET_CODE code, int i)
+{
+  return COMBINED_DOMAIN_TYPE((code >> (3*i)) & 7);
+}
+
+/// is the element (code) cut by one of the M level sets
+INLINE bool MlsetCodeIsCut (MLSET_CODE el_code, int M)
+{
+  return (el_code & (MlsetCodeLowBits(M) << 2)) != 0;
+}
+
+/// can the domain (code) have a contribution on the element (code)? That is
+/// the case if for every level set the element is cut or the domain types
+/// match.
+INLINE bool MlsetCodesCompatible (MLSET_CODE el_code, MLSET_CODE dt_code, int M)
+{
+  const MLSET_CODE low = MlsetCodeLowBits(M);
+  const MLSET_CODE if_bits = el_code & (low << 2);
+  // a cut level set is compatible with all domain types
+  const MLSET_CODE x = (el_code | (if_bits >> 1) | (if_bits >> 2)) & dt_code;
+  return ((x | (x >> 1) | (x >> 2)) & low) == low;
+}
 
 void IterateRange (int ne, LocalHeap & clh, const function<void(int,LocalHeap&)> & func);
 
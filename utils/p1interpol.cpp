@@ -6,6 +6,8 @@
 
 #include "p1interpol.hpp"
 #include "../cutint/spacetimecutrule.hpp"
+#include <map>
+#include <mutex>
 
 namespace ngcomp
 {
@@ -23,6 +25,102 @@ namespace ngcomp
     : ma(a_gf_p1->GetMeshAccess()), coef(nullptr), gf(a_gf), gf_p1(a_gf_p1)
   {; }
 
+  /// For every vertex the element (first element of GetVertexElements) and
+  /// the local vertex number from which the vertex value is taken. Every
+  /// vertex is owned by exactly one element so that the element loop below
+  /// writes every vertex value exactly once. The tables are shared for all
+  /// interpolations on the same mesh (as long as the mesh does not change).
+  struct P1InterpolationTable
+  {
+    size_t timestamp;
+    Array<int> vertex_element;
+    Array<int> vertex_local_nr;
+    // bit j is set if the element owns its j-th vertex
+    Array<unsigned char> owned_vertices;
+  };
+
+  static shared_ptr<P1InterpolationTable> GetP1InterpolationTable(shared_ptr<MeshAccess> ma, LocalHeap & lh)
+  {
+    static mutex tables_mutex;
+    static map<const MeshAccess*, tuple<weak_ptr<MeshAccess>, shared_ptr<P1InterpolationTable>>> tables;
+
+    lock_guard<mutex> guard(tables_mutex);
+    auto it = tables.find(ma.get());
+    if (it != tables.end() && get<0>(it->second).lock() == ma
+        && get<1>(it->second)->timestamp == ma->GetTimeStamp())
+      return get<1>(it->second);
+
+    static Timer t ("InterpolateP1::BuildTable");
+    RegionTimer reg (t);
+
+    // remove tables of meshes that do not exist anymore
+    for (auto it2 = tables.begin(); it2 != tables.end(); )
+      if (get<0>(it2->second).expired())
+        it2 = tables.erase(it2);
+      else
+        ++it2;
+
+    auto table = make_shared<P1InterpolationTable>();
+    table->timestamp = ma->GetTimeStamp();
+    const int nv = ma->GetNV();
+    const int ne = ma->GetNE(VOL);
+    table->vertex_element.SetSize(nv);
+    table->vertex_local_nr.SetSize(nv);
+    table->owned_vertices.SetSize(ne);
+    table->owned_vertices = 0;
+
+    IterateRange
+      (nv, lh,
+       [&] (int vnr, LocalHeap & lh)
+       {
+         Array<int> elnums;
+         ma->GetVertexElements (vnr, elnums);
+         table->vertex_element[vnr] = -1;
+         table->vertex_local_nr[vnr] = -1;
+         if (elnums.Size() == 0)
+           return;
+         const int elnr = elnums[0];
+         auto verts = ma->GetElement(ElementId(VOL,elnr)).Vertices();
+         for (int j = 0; j < verts.Size(); j++)
+           if (verts[j] == vnr)
+           {
+             table->vertex_element[vnr] = elnr;
+             table->vertex_local_nr[vnr] = j;
+           }
+       });
+    // (serial, as several vertices of one element may be owned by it)
+    for (int vnr = 0; vnr < nv; vnr++)
+      if (table->vertex_element[vnr] != -1)
+        table->owned_vertices[table->vertex_element[vnr]] |= 1 << table->vertex_local_nr[vnr];
+
+    tables[ma.get()] = make_tuple(weak_ptr<MeshAccess>(ma), table);
+    return table;
+  }
+
+  /// Reference coordinates (w.r.t. eltrans) of the undeformed vertices of
+  /// an element: on a deformed mesh (mesh.SetDeformation) the element
+  /// transformation maps the reference vertices to the deformed vertices,
+  /// but the function is evaluated in the (undeformed) mesh vertices. As in
+  /// the former vertex based implementation, the vertices are pulled back
+  /// with the linearization of eltrans in the reference point 0.
+  template <int D>
+  static void UndeformedVertexRefPoints(const MeshAccess & ma, const Ngs_Element & ngel,
+                                        const ElementTransformation & eltrans,
+                                        FlatArray<Vec<3>> ref_verts)
+  {
+    IntegrationPoint ip(0,0,0,0);
+    MappedIntegrationPoint<D,D> mip(ip,eltrans);
+    for (int j = 0; j < ref_verts.Size(); j++)
+    {
+      Vec<D> point;
+      ma.GetPoint<D>(ngel.Vertices()[j],point);
+      Vec<D> refpoint = mip.GetJacobianInverse() * (point - mip.GetPoint());
+      ref_verts[j] = 0.0;
+      for (int d = 0; d < D; d++)
+        ref_verts[j](d) = refpoint(d);
+    }
+  }
+
   void InterpolateP1::Do(LocalHeap & lh, double eps_perturbation, double tref_val)
   {
     static Timer time_fct ("LsetCurv::InterpolateP1::Do");
@@ -31,68 +129,158 @@ namespace ngcomp
     int nv=ma->GetNV();
     gf_p1->GetVector() = 0.0;
 
-    for (int vnr = 0; vnr < nv; ++vnr)
+    auto set_vertex_value = [&] (int vnr, int k, double val_lset)
     {
-      HeapReset hr(lh);
-
-      double val_lset;
-      if (coef)
-      {
-        Array<int> elnums;
-        ma -> GetVertexElements (vnr, elnums);
-        Ngs_Element ngel = ma -> GetElement (ElementId(VOL,elnums[0]));
-        auto & eltrans = ma -> GetTrafo (ngel, lh);
-
-        if( ma -> GetDimension() == 2)
-        {
-          Vec<2> point;
-          ma->GetPoint<2>(vnr,point);
-          IntegrationPoint ip(0,0,0,0);
-          MappedIntegrationPoint<2,2> mip(ip,eltrans);
-          Vec<2> refpoint = mip.GetJacobianInverse() * (point - mip.GetPoint());
-          IntegrationPoint ip_f(refpoint[0],refpoint[1],0.0,tref_val);
-          if (tref_val >= 0)
-            MarkAsSpaceTimeIntegrationPoint(ip_f);
-          MappedIntegrationPoint<2,2> mip_f(ip_f,eltrans);
-          val_lset = coef->Evaluate(mip_f);
-        }
-        else if ( ma -> GetDimension() == 3)
-        {
-          Vec<3> point;
-          ma->GetPoint<3>(vnr,point);
-          IntegrationPoint ip(0,0,0,0);
-          
-          MappedIntegrationPoint<3,3> mip(ip,eltrans);
-          Vec<3> refpoint = mip.GetJacobianInverse() * (point - mip.GetPoint());
-          IntegrationPoint ip_f(refpoint,tref_val);
-          if (tref_val >= 0)
-            MarkAsSpaceTimeIntegrationPoint(ip_f);
-          MappedIntegrationPoint<3,3> mip_f(ip_f,eltrans);
-          val_lset = coef->Evaluate(mip_f);
-        }
-        else
-          throw Exception ("D==0,D==1 not yet implemnted");
-      }
-      else
-      {
-        Array<int> dof;
-        // gf->GetFESpace()->GetVertexDofNrs(vnr, dof);
-        gf->GetFESpace()->GetDofNrs(NodeId(NT_VERTEX,vnr), dof); //vnr, dof);
-        FlatVector<> fval(1,&val_lset);
-        gf->GetVector().GetIndirect(dof,fval);
-      }
-
-      Array<int> dof;
+      ArrayMem<DofId,4> dof;
       gf_p1->GetFESpace()->GetVertexDofNrs(vnr,dof);
-      FlatVector<> val(1,&val_lset);
       // avoid vertex cuts by introducing a small perturbation:
-      if (abs(val(0)) < eps_perturbation)
-        val(0) = eps_perturbation;
+      if (abs(val_lset) < eps_perturbation)
+        val_lset = eps_perturbation;
+      FlatVector<> val(1,&val_lset);
       if (dof[0] != -1)
         gf_p1->GetVector().SetIndirect(dof,val);
+    };
+
+    if (!coef)
+    {
+      IterateRange
+        (nv, lh,
+         [&] (int vnr, LocalHeap & lh)
+         {
+           double val_lset;
+           ArrayMem<DofId,4> dof;
+           gf->GetFESpace()->GetDofNrs(NodeId(NT_VERTEX,vnr), dof);
+           FlatVector<> fval(1,&val_lset);
+           gf->GetVector().GetIndirect(dof,fval);
+           set_vertex_value(vnr, 0, val_lset);
+         });
+      return;
     }
 
+    ArrayMem<double,1> tref_vals(1);
+    tref_vals[0] = tref_val;
+    EvaluateAtVertices(lh, tref_vals, set_vertex_value);
+  }
+
+  void InterpolateP1::DoSpaceTime(LocalHeap & lh, FlatArray<double> tref_vals,
+                                  FlatArray<int> blocks, FlatVector<> st_vec,
+                                  double eps_perturbation)
+  {
+    static Timer time_fct ("LsetCurv::InterpolateP1::DoSpaceTime");
+    RegionTimer reg (time_fct);
+
+    if (!coef)
+      throw Exception ("InterpolateP1::DoSpaceTime only for CoefficientFunctions");
+
+    const size_t ndof = gf_p1->GetFESpace()->GetNDof();
+    EvaluateAtVertices
+      (lh, tref_vals,
+       [&] (int vnr, int k, double val_lset)
+       {
+         ArrayMem<DofId,4> dof;
+         gf_p1->GetFESpace()->GetVertexDofNrs(vnr,dof);
+         // avoid vertex cuts by introducing a small perturbation:
+         if (abs(val_lset) < eps_perturbation)
+           val_lset = eps_perturbation;
+         if (dof[0] != -1)
+           st_vec(blocks[k]*ndof + dof[0]) = val_lset;
+       });
+  }
+
+  void InterpolateP1::EvaluateAtVertices(LocalHeap & lh, FlatArray<double> tref_vals,
+                                         const function<void(int,int,double)> & set_value)
+  {
+    if (ma->GetDimension() != 2 && ma->GetDimension() != 3)
+      throw Exception ("D==0,D==1 not yet implemnted");
+
+    auto table = GetP1InterpolationTable(ma, lh);
+
+    // The coefficient function is evaluated once per element on all vertices
+    // of the element and all reference times (SIMD evaluation if possible,
+    // not for space-time).
+    const bool spacetime = tref_vals.Size() > 1 || tref_vals[0] >= 0;
+    const int ntimes = tref_vals.Size();
+    const bool deformed = ma->GetDeformation() != nullptr;
+    const int dim = ma->GetDimension();
+    atomic<bool> simd_evaluate(!spacetime);
+    constexpr int SW = SIMD<IntegrationPoint>::Size();
+
+    IterateRange
+      (ma->GetNE(VOL), lh,
+       [&] (int elnr, LocalHeap & lh)
+       {
+         const unsigned char owned = table->owned_vertices[elnr];
+         if (owned == 0)
+           return;
+
+         ElementId ei(VOL,elnr);
+         Ngs_Element ngel = ma->GetElement(ei);
+         ELEMENT_TYPE et = ngel.GetType();
+         const POINT3D * verts = ElementTopology::GetVertices(et);
+         const int nv_el = ElementTopology::GetNVertices(et);
+         ElementTransformation & eltrans = ma->GetTrafo (ei, lh);
+
+         FlatArray<Vec<3>> ref_verts(nv_el, lh);
+         if (deformed)
+         {
+           if (dim == 2)
+             UndeformedVertexRefPoints<2>(*ma, ngel, eltrans, ref_verts);
+           else
+             UndeformedVertexRefPoints<3>(*ma, ngel, eltrans, ref_verts);
+         }
+         else
+           for (int j = 0; j < nv_el; j++)
+             ref_verts[j] = Vec<3>(verts[j][0], verts[j][1], verts[j][2]);
+
+         // point k*nv_el+j is the j-th vertex at the k-th reference time
+         // (for SIMD the rule is padded with copies of the last vertex)
+         const int npts = ntimes * nv_el;
+         const bool use_simd = simd_evaluate;
+         const int nip = use_simd ? SW * ((npts + SW - 1) / SW) : npts;
+         IntegrationRule & ir = *(new (lh) IntegrationRule(nip, lh));
+         for (int i = 0; i < nip; i++)
+         {
+           const int ii = min(i, npts-1);
+           const Vec<3> & v = ref_verts[ii % nv_el];
+           ir[i] = IntegrationPoint(v(0), v(1), v(2), tref_vals[ii / nv_el]);
+           if (spacetime)
+             MarkAsSpaceTimeIntegrationPoint(ir[i]);
+         }
+
+         FlatVector<> vals(nip, lh);
+         bool done = false;
+         if (use_simd)
+         {
+           try
+           {
+             SIMD_IntegrationRule & simd_ir = *(new (lh) SIMD_IntegrationRule(ir, lh));
+             SIMD_BaseMappedIntegrationRule & simd_mir = eltrans(simd_ir, lh);
+             FlatMatrix<SIMD<double>> simd_vals(1, simd_ir.Size(), lh);
+             coef->Evaluate(simd_mir, simd_vals);
+             for (int i = 0; i < nip; i++)
+               vals(i) = simd_vals(0, i / SW)[i % SW];
+             done = true;
+           }
+           catch (ExceptionNOSIMD e)
+           {
+             cout << IM(6) << e.What() << endl
+                  << "switching to scalar evaluation in InterpolateP1" << endl;
+             simd_evaluate = false;
+           }
+         }
+         if (!done)
+         {
+           BaseMappedIntegrationRule & mir = eltrans(ir, lh);
+           FlatMatrix<> mvals(nip, 1, lh);
+           coef->Evaluate(mir, mvals);
+           vals = mvals.Col(0);
+         }
 
+         for (int k = 0; k < ntimes; k++)
+           for (int j = 0; j < nv_el; j++)
+             if (owned & (1 << j))
+               set_value(ngel.Vertices()[j], k, vals(k*nv_el+j));
+       });
   }
 
 }
@@ -33,6 +33,16 @@ namespace ngcomp
     InterpolateP1 (shared_ptr<CoefficientFunction> a_coef, shared_ptr<GridFunction> a_gf_p1);
     InterpolateP1 (shared_ptr<GridFunction> a_gf, shared_ptr<GridFunction> a_gf_p1);
     void Do (LocalHeap & lh, double eps_perturbation=1e-15, double tref_val = -1);
+    /// space-time interpolation at all reference times tref_vals in one sweep
+    /// over the mesh. The values for tref_vals[k] are written to block
+    /// blocks[k] (of the size of the P1 space of gf_p1) of st_vec.
+    void DoSpaceTime (LocalHeap & lh, FlatArray<double> tref_vals, FlatArray<int> blocks,
+                      FlatVector<> st_vec, double eps_perturbation=1e-15);
+  protected:
+    /// calls set_value(vertex, k, value) for every vertex and reference time
+    /// tref_vals[k] (a negative reference time means pure spatial evaluation)
+    void EvaluateAtVertices (LocalHeap & lh, FlatArray<double> tref_vals,
+                             const function<void(int,int,double)> & set_value);
   };
 
 }
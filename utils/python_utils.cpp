@@ -7,6 +7,7 @@
 
 #include "../utils/bitarraycf.hpp"
 #include "../utils/restrictedblf.hpp"
+#include "../utils/ghostpenaltymatrix.hpp"
 #include "../utils/p1interpol.hpp"
 #include "../utils/xprolongation.hpp"
 
@@ -21,7 +22,7 @@ void ExportNgsx_utils(py::module &m)
   m.def("InterpolateToP1",  [] (PyGF gf_ho, PyGF gf_p1, double eps_perturbation, int heapsize)
         {
           InterpolateP1 interpol(gf_ho, gf_p1);
-          LocalHeap lh (heapsize, "InterpolateP1-Heap");
+          LocalHeap lh (heapsize, "InterpolateP1-Heap", true);
           interpol.Do(lh,eps_perturbation);
         } ,
         py::arg("gf_ho")=NULL,py::arg("gf_p1")=NULL,
@@ -52,14 +53,15 @@ heapsize : int
   m.def("InterpolateToP1",  [] (PyCF coef, PyGF gf_p1, double eps_perturbation, int heapsize)
         {
           InterpolateP1 interpol(coef, gf_p1);
-          LocalHeap lh (heapsize, "InterpolateP1-Heap");
+          LocalHeap lh (heapsize, "InterpolateP1-Heap", true);
           interpol.Do(lh,eps_perturbation);
         } ,
         py::arg("coef"),py::arg("gf"),
         py::arg("eps_perturbation")=1e-14,py::arg("heapsize")=1000000,
         docu_string(R"raw_string(
 Takes the vertex values of a CoefficentFunction) and puts them into a piecewise (multi-) linear
-function.
+function. On a deformed mesh (mesh.SetDeformation) the CoefficientFunction is evaluated in the
+undeformed vertex positions.
 
 Parameters
 
@@ -183,7 +185,118 @@ CompoundFESpaces.
 )raw_string")
     );
 
+  m.def("MeshTimeStamp",
+        [] (shared_ptr<MeshAccess> ma)
+        {
+          return ma->GetTimeStamp();
+        } ,
+        py::arg("mesh"),
+        docu_string(R"raw_string(
+Returns the timestamp of the mesh. It changes whenever the mesh changes (e.g. on refinement), so
+that it can be used to decide if spaces and GridFunctions on the mesh need an Update.
+)raw_string")
+    );
+
+
+
+  py::class_<GhostPenaltyMatrix, shared_ptr<GhostPenaltyMatrix>>
+    (m, "GhostPenaltyMatrix",
+        docu_string(R"raw_string(
+Sparse matrix of facet stabilization terms (e.g. ghost penalty terms with SymbolicFacetPatchBFI or
+SymbolicBFI(..., skeleton=True)) on a set of facets. The facet matrices are stored, so that on a
+change of the facet set (e.g. from GetFacetsWithNeighborTypes in a time stepping loop) only the
+added facets are integrated. The stabilization terms should only depend on the mesh.
+
+The matrix can be added to an assembled (sparse) matrix with AddTo, or be used as an operator
+(e.g. in a sum with an assembled matrix) through the property mat.
+)raw_string"))
+    .def("__init__",
+         [](GhostPenaltyMatrix *instance, shared_ptr<FESpace> fes, py::list integrators,
+            py::object facets, int heapsize)
+         {
+           Array<shared_ptr<BilinearFormIntegrator>> bfis;
+           for (auto bfi : integrators)
+             bfis.Append(py::extract<shared_ptr<BilinearFormIntegrator>>(bfi)());
+           new (instance) GhostPenaltyMatrix (fes, bfis);
+           if (py::extract<PyBA> (facets).check())
+           {
+             LocalHeap lh (heapsize, "GhostPenaltyMatrix-heap", true);
+             instance->Update(py::extract<PyBA>(facets)(), lh);
+           }
+         },
+         py::arg("space"),
+         py::arg("integrators"),
+         py::arg("facets") = DummyArgument(),
+         py::arg("heapsize") = 1000000,
+         docu_string(R"raw_string(
+Parameters
+
+space : ngsolve.FESpace
+  finite element space (should have dgjumps=True if added to an assembled matrix)
+
+integrators : list
+  list of facet integrators
+
+facets : ngsolve.BitArray
+  facets on which the stabilization is applied (if provided, the matrix is assembled directly)
 
+heapsize : int
+  heapsize of local computations.
+)raw_string"))
+    .def("Update",
+         [](shared_ptr<GhostPenaltyMatrix> gpmat, PyBA facets, bool force, int heapsize)
+         {
+           LocalHeap lh (heapsize, "GhostPenaltyMatrix-heap", true);
+           gpmat->Update(facets, lh, force);
+         },
+         py::arg("facets"),
+         py::arg("force") = false,
+         py::arg("heapsize") = 1000000,
+         docu_string(R"raw_string(
+Sets the facets of the stabilization. Only facets that have not been integrated before are
+integrated, the contributions of removed facets are dropped.
+
+Parameters
+
+facets : ngsolve.BitArray
+  facets on which the stabilization is applied
+
+force : boolean
+  integrate all facets (e.g. if coefficients of the integrators changed)
+
+heapsize : int
+  heapsize of local computations.
+)raw_string"))
+    .def("AddTo",
+         [](shared_ptr<GhostPenaltyMatrix> gpmat, shared_ptr<BaseMatrix> mat, double scale)
+         {
+           gpmat->AddTo(*mat, scale);
+         },
+         py::arg("mat"),
+         py::arg("scale") = 1.0,
+         docu_string(R"raw_string(
+Adds scale times the stabilization matrix to a sparse matrix whose MatrixGraph contains the
+couplings of the facets (e.g. the matrix of a BilinearForm on a space with dgjumps=True or of a
+RestrictedBilinearForm with a suitable facet_restriction). If the MatrixGraph misses couplings of
+the stabilization, an exception is thrown before the matrix is changed.
+)raw_string"))
+    .def_property_readonly("mat", [](shared_ptr<GhostPenaltyMatrix> gpmat) -> shared_ptr<BaseMatrix>
+                           {
+                             return gpmat->GetMatrix();
+                           }, "stabilization matrix")
+    .def_property_readonly("facets", [](shared_ptr<GhostPenaltyMatrix> gpmat)
+                           {
+                             return gpmat->GetFacets();
+                           }, "facets of the stabilization")
+    .def_property_readonly("nintegrated", [](shared_ptr<GhostPenaltyMatrix> gpmat)
+                           {
+                             return gpmat->GetNIntegratedFacets();
+                           }, "number of facets integrated in the last Update")
+    .def_property_readonly("nremoved", [](shared_ptr<GhostPenaltyMatrix> gpmat)
+                           {
+                             return gpmat->GetNRemovedFacets();
+                           }, "number of facets removed in the last Update")
+    ;
 
   typedef shared_ptr<BitArrayCoefficientFunction> PyBACF;
   py::class_<BitArrayCoefficientFunction, PyBACF, CoefficientFunction>
@@ -3,6 +3,7 @@
 #include "../cutint/xintegration.hpp"
 #include "../cutint/straightcutrule.hpp"
 #include <unordered_map>
+#include <algorithm>
 
 using namespace ngsolve;
 using namespace xintegration;
@@ -51,14 +52,109 @@ namespace ngcomp
     {
       int ne = ma->GetNE(vb);
       cut_ratio_of_element[vb] = make_shared<VVector<double>>(ne);
+      changed_elements[vb] = make_shared<BitArray>(ne);
+      changed_elements[vb]->Clear();
     }
   }
 
-  void CutInformation::Update(shared_ptr<CoefficientFunction> cf_lset, int subdivlvl, int time_order, LocalHeap & lh)
+  // level set domain for the NEG/POS rules of the classification. For level
+  // sets in space the shared cut rule cache of the level set is used, so that
+  // the rules of cut elements are reused by later updates (if the level set
+  // values on the element did not change) and by integrators on the same
+  // level set.
+  static LevelsetIntegrationDomain ClassificationDomain(shared_ptr<CoefficientFunction> cf_lset,
+                                                        shared_ptr<GridFunction> gf_lset,
+                                                        DOMAIN_TYPE dt, int subdivlvl, int time_order)
+  {
+    LevelsetIntegrationDomain lsetdom(cf_lset, gf_lset, dt, 0, time_order, subdivlvl);
+    if (time_order < 0)
+      lsetdom.EnableCutRuleCache();
+    return lsetdom;
+  }
+
+  DOMAIN_TYPE CutInformation::ClassifyElement(ElementId ei,
+                                              const LevelsetIntegrationDomain & lsetdom_neg,
+                                              const LevelsetIntegrationDomain & lsetdom_pos,
+                                              double & cut_ratio, LocalHeap & lh) const
+  {
+    HeapReset hr(lh);
+    Ngs_Element ngel = ma->GetElement(ei);
+    ELEMENT_TYPE eltype = ngel.GetType();
+    auto gf_lset = lsetdom_neg.GetLevelsetGF();
+    const int time_order = lsetdom_neg.GetTimeIntegrationOrder();
+
+    // fast classification for (spatial) P1 level sets: the vertex values
+    // already decide if the element is cut. Only for cut elements the cut
+    // rules are required to compute the cut ratio. For uncut elements the
+    // result coincides with part_vol[NEG]/(part_vol[NEG]+part_vol[POS]) of
+    // the full computation, i.e. 1.0 (NEG) or 0.0 (POS).
+    if (gf_lset && time_order < 0 && eltype != ET_PRISM && eltype != ET_PYRAMID)
+    {
+      HeapReset hr(lh);
+      Array<DofId> dnums(0,lh);
+      gf_lset->GetFESpace()->GetDofNrs(ei,dnums);
+      FlatVector<> elvec(dnums.Size(),lh);
+      gf_lset->GetVector().GetIndirect(dnums,elvec);
+      DOMAIN_TYPE dt_el = CheckIfStraightCut(elvec);
+      if (dt_el != IF)
+      {
+        cut_ratio = dt_el == NEG ? 1.0 : 0.0;
+        return dt_el;
+      }
+    }
+
+    ElementTransformation & eltrans = ma->GetTrafo (ei, lh);
+
+    double part_vol [] = {0.0, 0.0};
+    for (DOMAIN_TYPE np : {POS, NEG})
+    {
+      const IntegrationRule * ir_np;
+      Array<double> wei_arr;
+      tie (ir_np, wei_arr) = CreateCutIntegrationRule(np == NEG ? lsetdom_neg : lsetdom_pos, eltrans, lh);
+      // If(time_order > -1 && vb == BND) should have part_vol[NEG] == 0, which will lead to
+      // the BND element being marked as POS.
+      if (ir_np)
+        for (auto w : wei_arr) //for (auto ip : *ir_np)
+          part_vol[np] += w; // ... += ip.Weight();
+    }
+    cut_ratio = part_vol[NEG]/(part_vol[NEG]+part_vol[POS]);
+    if (part_vol[NEG] > 0.0)
+      if (part_vol[POS] > 0.0)
+        return IF;
+      else
+        return NEG;
+    else
+      return POS;
+  }
+
+  void CutInformation::Update(shared_ptr<CoefficientFunction> cf_lset, int subdivlvl, int time_order, LocalHeap & lh,
+                              bool incremental)
   {
     shared_ptr<GridFunction> gf_lset;
     tie(cf_lset,gf_lset) = CF2GFForStraightCutRule(cf_lset,subdivlvl);
 
+    // the incremental update is only possible if the level set is given as
+    // a (spatial) P1 function and the values of the last update are known
+    bool lset_comparable = gf_lset && (time_order < 0) && (ma->GetCommunicator().Size() == 1);
+    if (incremental && lset_comparable && initialized
+        && (last_lset_values.Size() == gf_lset->GetVector().Size()))
+    {
+      UpdateIncremental(cf_lset, gf_lset, lh);
+      last_lset_values = gf_lset->GetVector().FVDouble();
+      return;
+    }
+
+    // remember old classification to report changed elements
+    Array<DOMAIN_TYPE> old_dt[2];
+    if (initialized)
+      for (VorB vb : {VOL,BND})
+      {
+        int ne = ma->GetNE(vb);
+        old_dt[vb].SetSize(ne);
+        for (int elnr = 0; elnr < ne; elnr++)
+          old_dt[vb][elnr] = DomainTypeOfElement(ElementId(vb,elnr));
+      }
+
     for (auto cdt : all_cdts)
     {
       elems_of_domain_type[cdt]->Clear();
@@ -67,6 +163,9 @@ namespace ngcomp
     elems_of_domain_type[CDOM_ANY]->Set();
     selems_of_domain_type[CDOM_ANY]->Set();
 
+    auto lsetdom_neg = ClassificationDomain(cf_lset, gf_lset, NEG, subdivlvl, time_order);
+    auto lsetdom_pos = ClassificationDomain(cf_lset, gf_lset, POS, subdivlvl, time_order);
+
     for (VorB vb : {VOL,BND})
     {
       int ne = ma->GetNE(vb);
@@ -75,44 +174,12 @@ namespace ngcomp
         [&] (int elnr, LocalHeap & lh)
       {
         ElementId ei = ElementId(vb,elnr);
-        Ngs_Element ngel = ma->GetElement(ei);
-        ELEMENT_TYPE eltype = ngel.GetType();
-        ElementTransformation & eltrans = ma->GetTrafo (ei, lh);
-
-        double part_vol [] = {0.0, 0.0};
-        for (DOMAIN_TYPE np : {POS, NEG})
-        {
-            const IntegrationRule * ir_np;
-            Array<double> wei_arr;
-            tie (ir_np, wei_arr) = CreateCutIntegrationRule(cf_lset, gf_lset, eltrans, np, 0,time_order, lh, subdivlvl);
-          // If(time_order > -1 && vb == BND) should have part_vol[NEG] == 0, which will lead to
-          // the BND element being marked as POS.
-          if (ir_np)
-            for (auto w : wei_arr) //for (auto ip : *ir_np)
-              part_vol[np] += w; // ... += ip.Weight();
-        }
-        (*cut_ratio_of_element[vb])(elnr) = part_vol[NEG]/(part_vol[NEG]+part_vol[POS]);                 
+        DOMAIN_TYPE dt_el = ClassifyElement(ei, lsetdom_neg, lsetdom_pos,
+                                            (*cut_ratio_of_element[vb])(elnr), lh);
         if (vb == VOL)
-        {
-          if (part_vol[NEG] > 0.0)
-            if (part_vol[POS] > 0.0)
-              (*elems_of_domain_type[CDOM_IF]).SetBitAtomic(elnr);
-            else
-              (*elems_of_domain_type[CDOM_NEG]).SetBitAtomic(elnr);
-          else
-            (*elems_of_domain_type[CDOM_POS]).SetBitAtomic(elnr);
-        }
+          (*elems_of_domain_type[TO_CDT(dt_el)]).SetBitAtomic(elnr);
         else
-        {
-          if (part_vol[NEG] > 0.0)
-            if (part_vol[POS] > 0.0)
-              (*selems_of_domain_type[CDOM_IF]).SetBitAtomic(elnr);
-            else
-              (*selems_of_domain_type[CDOM_NEG]).SetBitAtomic(elnr);
-          else
-            (*selems_of_domain_type[CDOM_POS]).SetBitAtomic(elnr);
-        }
-
+          (*selems_of_domain_type[TO_CDT(dt_el)]).SetBitAtomic(elnr);
       });
       *elems_of_domain_type[CDOM_UNCUT] = *elems_of_domain_type[CDOM_NEG] | *elems_of_domain_type[CDOM_POS];
       *elems_of_domain_type[CDOM_HASNEG] = *elems_of_domain_type[CDOM_NEG] | *elems_of_domain_type[CDOM_IF];
@@ -122,6 +189,18 @@ namespace ngcomp
       *selems_of_domain_type[CDOM_HASPOS] = *selems_of_domain_type[CDOM_POS] | *selems_of_domain_type[CDOM_IF];
     }
 
+    for (VorB vb : {VOL,BND})
+    {
+      int ne = ma->GetNE(vb);
+      changed_elements[vb]->Clear();
+      if (!initialized)
+        changed_elements[vb]->Set();
+      else
+        for (int elnr = 0; elnr < ne; elnr++)
+          if (old_dt[vb][elnr] != DomainTypeOfElement(ElementId(vb,elnr)))
+            changed_elements[vb]->SetBit(elnr);
+    }
+
     int ne = ma -> GetNE();
     IterateRange
       (ne, lh,
@@ -199,7 +278,16 @@ namespace ngcomp
     else
       for (int i = 0; i < ma->GetNE(); i++)
         (*dom_of_node[NT_FACE])[i] = (*cut_ratio_of_element[VOL])(i) > 0.5 ? NEG : POS;
-        
+
+    if (lset_comparable)
+    {
+      last_lset_values.SetSize(gf_lset->GetVector().Size());
+      last_lset_values = gf_lset->GetVector().FVDouble();
+    }
+    else
+      last_lset_values.SetSize(0);
+    initialized = true;
+
     /* old        
     IterateRange
       (ne, lh,
@@ -235,14 +323,152 @@ namespace ngcomp
 
     });
     */
-        
+
+  }
+
+  void CutInformation::UpdateIncremental(shared_ptr<CoefficientFunction> cf_lset,
+                                         shared_ptr<GridFunction> gf_lset,
+                                         LocalHeap & lh)
+  {
+    static Timer t ("CutInformation::UpdateIncremental");
+    RegionTimer reg(t);
+
+    FlatVector<> lset_values = gf_lset->GetVector().FVDouble();
+    BitArray changed_dofs(lset_values.Size());
+    changed_dofs.Clear();
+    for (size_t i = 0; i < lset_values.Size(); i++)
+      if (lset_values[i] != last_lset_values[i])
+        changed_dofs.SetBit(i);
+
+    BitArray reclassified(ma->GetNE(VOL));
+    reclassified.Clear();
+
+    auto lsetdom_neg = ClassificationDomain(cf_lset, gf_lset, NEG, 0, -1);
+    auto lsetdom_pos = ClassificationDomain(cf_lset, gf_lset, POS, 0, -1);
+
+    for (VorB vb : {VOL,BND})
+    {
+      int ne = ma->GetNE(vb);
+      shared_ptr<BitArray> * ba = vb == VOL ? elems_of_domain_type : selems_of_domain_type;
+      Array<DOMAIN_TYPE> new_dt(ne);
+      changed_elements[vb]->Clear();
+
+      // only elements with changed level set values are classified again
+      IterateRange
+        (ne, lh,
+        [&] (int elnr, LocalHeap & lh)
+      {
+        ElementId ei = ElementId(vb,elnr);
+        Array<DofId> dnums(0,lh);
+        gf_lset->GetFESpace()->GetDofNrs(ei,dnums);
+        bool touched = false;
+        for (auto d : dnums)
+          if (IsRegularDof(d) && changed_dofs.Test(d))
+            touched = true;
+        if (!touched)
+          return;
+        if (vb == VOL)
+          reclassified.SetBitAtomic(elnr);
+        new_dt[elnr] = ClassifyElement(ei, lsetdom_neg, lsetdom_pos,
+                                       (*cut_ratio_of_element[vb])(elnr), lh);
+        if (new_dt[elnr] != DomainTypeOfElement(ei))
+          changed_elements[vb]->SetBitAtomic(elnr);
+      });
+
+      // patch the BitArrays of the elements that changed their domain type
+      for (int elnr = 0; elnr < ne; elnr++)
+      {
+        if (!changed_elements[vb]->Test(elnr))
+          continue;
+        for (auto cdt : {CDOM_NEG, CDOM_POS, CDOM_IF, CDOM_UNCUT, CDOM_HASNEG, CDOM_HASPOS})
+          ba[cdt]->Clear(elnr);
+        ba[TO_CDT(new_dt[elnr])]->SetBit(elnr);
+        if (new_dt[elnr] != IF)
+          ba[CDOM_UNCUT]->SetBit(elnr);
+        if (new_dt[elnr] != POS)
+          ba[CDOM_HASNEG]->SetBit(elnr);
+        if (new_dt[elnr] != NEG)
+          ba[CDOM_HASPOS]->SetBit(elnr);
+      }
+    }
+
+    // patch the node information in the neighborhood of changed elements
+    const bool is3d = ma->GetDimension() == 3;
+    BitArray vertex_todo(ma->GetNV());
+    BitArray edge_todo(ma->GetNEdges());
+    BitArray face_todo(is3d ? ma->GetNFaces() : 0);
+    vertex_todo.Clear();
+    edge_todo.Clear();
+    face_todo.Clear();
+
+    for (int elnr = 0; elnr < ma->GetNE(VOL); elnr++)
+    {
+      if (reclassified.Test(elnr))
+        (*dom_of_node[NT_ELEMENT])[elnr] = (*cut_ratio_of_element[VOL])(elnr) > 0.5 ? NEG : POS;
+      if (!changed_elements[VOL]->Test(elnr))
+        continue;
+      Ngs_Element el = ma->GetElement(ElementId(VOL,elnr));
+      const bool is_if = elems_of_domain_type[CDOM_IF]->Test(elnr);
+      for (auto v : el.Vertices())
+      {
+        vertex_todo.SetBit(v);
+        if (is_if) cut_neighboring_node[NT_VERTEX]->SetBit(v);
+      }
+      for (auto e : el.Edges())
+      {
+        edge_todo.SetBit(e);
+        if (is_if) cut_neighboring_node[NT_EDGE]->SetBit(e);
+      }
+      if (is3d)
+        for (auto f : el.Faces())
+        {
+          face_todo.SetBit(f);
+          if (is_if) cut_neighboring_node[NT_FACE]->SetBit(f);
+        }
+      if (is_if)
+        cut_neighboring_node[NT_ELEMENT]->SetBit(elnr);
+    }
+
+    // a node is NEG if one of its neighboring elements is NEG
+    auto has_neg_element = [&] (const Array<int> & elnums)
+    {
+      for (auto elnr : elnums)
+        if (elems_of_domain_type[CDOM_NEG]->Test(elnr))
+          return true;
+      return false;
+    };
+
+    Array<int> elnums;
+    for (int i = 0; i < vertex_todo.Size(); i++)
+      if (vertex_todo.Test(i))
+      {
+        ma->GetVertexElements(i, elnums);
+        (*dom_of_node[NT_VERTEX])[i] = has_neg_element(elnums) ? NEG : POS;
+      }
+    for (int i = 0; i < edge_todo.Size(); i++)
+      if (edge_todo.Test(i))
+      {
+        ma->GetEdgeElements(i, elnums);
+        (*dom_of_node[NT_EDGE])[i] = has_neg_element(elnums) ? NEG : POS;
+      }
+    for (int i = 0; i < face_todo.Size(); i++)
+      if (face_todo.Test(i))
+      {
+        ma->GetFaceElements(i, elnums);
+        (*dom_of_node[NT_FACE])[i] = has_neg_element(elnums) ? NEG : POS;
+      }
   }
 
   MultiLevelsetCutInformation::MultiLevelsetCutInformation (shared_ptr<MeshAccess> ama,
                                                             const Array<shared_ptr<GridFunction>> & lsets_in)
     : ma(ama), lsets(lsets_in)
   {
-    ;
+    if (lsets.Size() > MLSET_CODE_MAX_LEVELSETS)
+      throw Exception("MultiLevelsetCutInformation: at most "
+                      + ToString(MLSET_CODE_MAX_LEVELSETS) + " level sets are supported");
+    LocalHeap lh (1000000, "MultiLevelsetCutInformation-heap", true);
+    UpdateElementCodes(VOL, lh);
+    UpdateElementCodes(BND, lh);
   }
 
   void MultiLevelsetCutInformation::Update(const Array<shared_ptr<GridFunction>> & lsets_in, LocalHeap & lh)
@@ -250,129 +476,354 @@ namespace ngcomp
     for(int i=0; i < lsets_in.Size(); i++)
       this->lsets[i]->GetVectorPtr()->Set(1.0, lsets_in[i]->GetVector());
 
-    for (auto tup : collect_elements_with_contribution)
-      UpdateElementsWithContribution(get<0>(tup), get<1>(tup), get<2>(tup), lh);
-
-    for (auto tup : collect_elements_of_domain_type)
-      UpdateElementsOfDomainType(get<0>(tup), get<1>(tup), get<2>(tup), lh);
+    UpdateElementCodes(VOL, lh);
+    UpdateElementCodes(BND, lh);
 
+    UpdateCollectedMarkers(lh);
   }
 
-  void MultiLevelsetCutInformation::UpdateElementsWithContribution(const shared_ptr<BitArray> & elems_of_domain_type, 
-                                                                   const Array<Array<DOMAIN_TYPE>> & cdt, 
-                                                                   VorB vb, 
-                                                                   LocalHeap & lh) const
+  void MultiLevelsetCutInformation::UpdateElementCodes(VorB vb, LocalHeap & lh)
   {
+    static Timer t ("MultiLevelsetCutInformation::UpdateElementCodes");
+    RegionTimer reg(t);
 
-    LevelsetIntegrationDomain lsetintdom(lsets, cdt);
-    elems_of_domain_type->Clear();
-    
+    const int M = lsets.Size();
     int ne = ma->GetNE(vb);
+    el_codes[vb].SetSize(ne);
     IterateRange
       (ne, lh,
        [&] (int elnr, LocalHeap & lh)
        {
          ElementId ei = ElementId(vb,elnr);
-         ElementTransformation & eltrans = ma->GetTrafo (ei, lh);
-
-         const IntegrationRule * ir_np;
-         Array<double> wei_arr;
-         tie (ir_np, wei_arr) = CreateCutIntegrationRule(lsetintdom, eltrans, lh);
-         double part_vol = 0;
-         if (ir_np)
-           for (auto w : wei_arr) 
-             part_vol += w; 
-         if (part_vol > 0)
-           elems_of_domain_type->SetBitAtomic(elnr);
-         
+         Array<DofId> dnums(0,lh);
+         MLSET_CODE code = 0;
+         for (int i = 0; i < M; i++)
+         {
+           lsets[i]->GetFESpace()->GetDofNrs(ei, dnums);
+           FlatVector<> elvec(dnums.Size(), lh);
+           lsets[i]->GetVector().GetIndirect(dnums, elvec);
+           code |= MLSET_CODE(TO_CDT(CheckIfStraightCut(elvec))) << (3*i);
+         }
+         el_codes[vb][elnr] = code;
        });
   }
 
-  shared_ptr<BitArray> MultiLevelsetCutInformation::GetElementsWithContribution(const Array<Array<DOMAIN_TYPE>> & cdt,
-                                                                                VorB vb, 
-                                                                                LocalHeap & lh)
+  MultiLevelsetCutInformation::MarkerKey
+  MultiLevelsetCutInformation::GetMarkerKey(const Array<Array<DOMAIN_TYPE>> & cdt, VorB vb) const
   {
-    // Check whether BitArray with requested cdt has already been computed
-    // and return that BitArray if found
-    for (auto tup : collect_elements_with_contribution)
-      if (CombinedDomainTypesEqual(get<1>(tup), cdt))
-        return get<0>(tup);
-
-    // Compute the new BitArray
-    shared_ptr<BitArray> elems_of_domain_type = make_shared<BitArray>(ma->GetNE(vb));
-    UpdateElementsWithContribution(elems_of_domain_type, cdt, vb, lh);
+    vector<MLSET_CODE> codes;
+    for (const Array<DOMAIN_TYPE> & dtt : cdt)
+    {
+      if (dtt.Size() != lsets.Size())
+        throw Exception("Number of domains does not match number of levelsets");
+      codes.push_back(EncodeDomainTypes(dtt));
+    }
+    sort(codes.begin(), codes.end());
+    codes.erase(unique(codes.begin(), codes.end()), codes.end());
+    return make_tuple(vb, codes);
+  }
 
-    // Add BitArray to instance collection
-    collect_elements_with_contribution.push_back(make_tuple(elems_of_domain_type, cdt, vb));
+  void MultiLevelsetCutInformation::UpdateCollectedMarkers(LocalHeap & lh)
+  {
+    for (VorB vb : { VOL, BND })
+    {
+      Array<shared_ptr<BitArray>> bas;
+      Array<Array<Array<DOMAIN_TYPE>>> cdts;
+      for (auto & entry : collect_elements_with_contribution)
+        if (get<0>(entry.first) == vb)
+        {
+          bas.Append(get<0>(entry.second));
+          cdts.Append(get<1>(entry.second));
+        }
+      if (bas.Size() > 0)
+        UpdateElementsWithContributions(bas, cdts, vb, lh);
 
-    return elems_of_domain_type;
+      bas.SetSize(0);
+      cdts.SetSize(0);
+      for (auto & entry : collect_elements_of_domain_type)
+        if (get<0>(entry.first) == vb)
+        {
+          bas.Append(get<0>(entry.second));
+          cdts.Append(get<1>(entry.second));
+        }
+      if (bas.Size() > 0)
+        UpdateElementsOfDomainTypes(bas, cdts, vb, lh);
+    }
   }
-  
-  void MultiLevelsetCutInformation::UpdateElementsOfDomainType(const shared_ptr<BitArray> & elems_of_domain_type, 
-                                                               const Array<Array<DOMAIN_TYPE>> & cdt, 
-                                                               VorB vb, 
-                                                               LocalHeap & lh) const
+
+  void MultiLevelsetCutInformation::UpdateElementsWithContributions(FlatArray<shared_ptr<BitArray>> elems_of_domain_type,
+                                                                    FlatArray<Array<Array<DOMAIN_TYPE>>> cdts,
+                                                                    VorB vb,
+                                                                    LocalHeap & lh) const
   {
-    LevelsetIntegrationDomain lsetintdom(lsets, cdt);
-    elems_of_domain_type->Clear();
+    static Timer t ("MultiLevelsetCutInformation::UpdateElementsWithContributions");
+    RegionTimer reg(t);
+
+    const int M = lsets.Size();
+    const int nmarkers = cdts.Size();
+    Array<shared_ptr<LevelsetIntegrationDomain>> lsetintdoms(nmarkers);
+    for (int k = 0; k < nmarkers; k++)
+    {
+      lsetintdoms[k] = make_shared<LevelsetIntegrationDomain>(lsets, cdts[k]);
+      elems_of_domain_type[k]->Clear();
+    }
     
     int ne = ma->GetNE(vb);
     IterateRange
       (ne, lh,
        [&] (int elnr, LocalHeap & lh)
        {
-         ElementId ei = ElementId(vb,elnr);
-         Ngs_Element ngel = ma->GetElement(ei);
-         ELEMENT_TYPE eltype = ngel.GetType();
-         ElementTransformation & eltrans = ma->GetTrafo (ei, lh);
+         const MLSET_CODE el_code = el_codes[vb][elnr];
+         const bool cut_element = MlsetCodeIsCut(el_code, M);
+         ElementTransformation * eltrans = nullptr;
 
-         Array<DofId> dnums(0,lh);
-         int M =lsetintdom.GetLevelsetGFs().Size();
-         Array<DOMAIN_TYPE> dts_el(M,lh);
-         for (int j = 0; j < M; j++)
+         for (int k = 0; k < nmarkers; k++)
          {
-           auto gflset = lsetintdom.GetLevelsetGFs()[j];
-           gflset->GetFESpace()->GetDofNrs(eltrans.GetElementId(), dnums);
-           FlatVector<> elvec(dnums.Size(), lh);
-           gflset->GetVector().GetIndirect(dnums, elvec);
+           // only elements that are cut or lie in one of the domains can contribute
+           bool compatible = false;
+           for (MLSET_CODE dt_code : lsetintdoms[k]->GetDomainTypeCodes())
+             if (MlsetCodesCompatible(el_code, dt_code, M))
+               compatible = true;
+           if (!compatible)
+             continue;
+           if (!cut_element)
+           {
+             elems_of_domain_type[k]->SetBitAtomic(elnr);
+             continue;
+           }
+
+           if (eltrans == nullptr)
+             eltrans = &ma->GetTrafo (ElementId(vb,elnr), lh);
 
-           dts_el[j] = CheckIfStraightCut(elvec);
+           HeapReset hr(lh);
+           const IntegrationRule * ir_np;
+           Array<double> wei_arr;
+           tie (ir_np, wei_arr) = CreateCutIntegrationRule(*lsetintdoms[k], *eltrans, lh);
+           double part_vol = 0;
+           if (ir_np)
+             for (auto w : wei_arr) 
+               part_vol += w; 
+           if (part_vol > 0)
+             elems_of_domain_type[k]->SetBitAtomic(elnr);
          }
+       });
+  }
 
-         for (int i = 0; i < lsetintdom.GetDomainTypes().Size(); i++)
-         {
-           bool matching = true;
-           for (int j = 0; j < M; j++)
-             if (lsetintdom.GetDomainTypes()[i][j] != dts_el[j])
-               matching = false;
+  void MultiLevelsetCutInformation::UpdateElementsWithContribution(const shared_ptr<BitArray> & elems_of_domain_type, 
+                                                                   const Array<Array<DOMAIN_TYPE>> & cdt, 
+                                                                   VorB vb, 
+                                                                   LocalHeap & lh) const
+  {
+    Array<shared_ptr<BitArray>> bas { elems_of_domain_type };
+    Array<Array<Array<DOMAIN_TYPE>>> cdts(1);
+    cdts[0] = cdt;
+    UpdateElementsWithContributions(bas, cdts, vb, lh);
+  }
 
-           if (matching)
-             elems_of_domain_type->SetBitAtomic(elnr);
-         }
+  Array<shared_ptr<BitArray>> MultiLevelsetCutInformation::GetElementsWithContributions(const Array<Array<Array<DOMAIN_TYPE>>> & cdts,
+                                                                                        VorB vb,
+                                                                                        LocalHeap & lh)
+  {
+    Array<shared_ptr<BitArray>> ret(cdts.Size());
+    // BitArrays which have not been computed before
+    Array<shared_ptr<BitArray>> new_bas;
+    Array<Array<Array<DOMAIN_TYPE>>> new_cdts;
+    for (int k = 0; k < cdts.Size(); k++)
+    {
+      MarkerKey key = GetMarkerKey(cdts[k], vb);
+      auto it = collect_elements_with_contribution.find(key);
+      if (it != collect_elements_with_contribution.end())
+      {
+        ret[k] = get<0>(it->second);
+        continue;
+      }
+      ret[k] = make_shared<BitArray>(ma->GetNE(vb));
+      collect_elements_with_contribution[key] = make_tuple(ret[k], cdts[k]);
+      new_bas.Append(ret[k]);
+      new_cdts.Append(cdts[k]);
+    }
+    if (new_bas.Size() > 0)
+      UpdateElementsWithContributions(new_bas, new_cdts, vb, lh);
+    return ret;
+  }
+
+  shared_ptr<BitArray> MultiLevelsetCutInformation::GetElementsWithContribution(const Array<Array<DOMAIN_TYPE>> & cdt,
+                                                                                VorB vb, 
+                                                                                LocalHeap & lh)
+  {
+    Array<Array<Array<DOMAIN_TYPE>>> cdts(1);
+    cdts[0] = cdt;
+    return GetElementsWithContributions(cdts, vb, lh)[0];
+  }
+  
+  void MultiLevelsetCutInformation::UpdateElementsOfDomainTypes(FlatArray<shared_ptr<BitArray>> elems_of_domain_type,
+                                                                FlatArray<Array<Array<DOMAIN_TYPE>>> cdts,
+                                                                VorB vb,
+                                                                LocalHeap & lh) const
+  {
+    static Timer t ("MultiLevelsetCutInformation::UpdateElementsOfDomainTypes");
+    RegionTimer reg(t);
+
+    const int nmarkers = cdts.Size();
+    Array<vector<MLSET_CODE>> dt_codes(nmarkers);
+    for (int k = 0; k < nmarkers; k++)
+    {
+      dt_codes[k] = get<1>(GetMarkerKey(cdts[k], vb));
+      elems_of_domain_type[k]->Clear();
+    }
+    
+    int ne = ma->GetNE(vb);
+    IterateRange
+      (ne, lh,
+       [&] (int elnr, LocalHeap & lh)
+       {
+         const MLSET_CODE el_code = el_codes[vb][elnr];
+         for (int k = 0; k < nmarkers; k++)
+           if (binary_search(dt_codes[k].begin(), dt_codes[k].end(), el_code))
+             elems_of_domain_type[k]->SetBitAtomic(elnr);
        });
   }
 
+  void MultiLevelsetCutInformation::UpdateElementsOfDomainType(const shared_ptr<BitArray> & elems_of_domain_type, 
+                                                               const Array<Array<DOMAIN_TYPE>> & cdt, 
+                                                               VorB vb, 
+                                                               LocalHeap & lh) const
+  {
+    Array<shared_ptr<BitArray>> bas { elems_of_domain_type };
+    Array<Array<Array<DOMAIN_TYPE>>> cdts(1);
+    cdts[0] = cdt;
+    UpdateElementsOfDomainTypes(bas, cdts, vb, lh);
+  }
+
+  Array<shared_ptr<BitArray>> MultiLevelsetCutInformation::GetElementsOfDomainTypes(const Array<Array<Array<DOMAIN_TYPE>>> & cdts,
+                                                                                    VorB vb,
+                                                                                    LocalHeap & lh)
+  {
+    Array<shared_ptr<BitArray>> ret(cdts.Size());
+    // BitArrays which have not been computed before
+    Array<shared_ptr<BitArray>> new_bas;
+    Array<Array<Array<DOMAIN_TYPE>>> new_cdts;
+    for (int k = 0; k < cdts.Size(); k++)
+    {
+      MarkerKey key = GetMarkerKey(cdts[k], vb);
+      auto it = collect_elements_of_domain_type.find(key);
+      if (it != collect_elements_of_domain_type.end())
+      {
+        ret[k] = get<0>(it->second);
+        continue;
+      }
+      ret[k] = make_shared<BitArray>(ma->GetNE(vb));
+      collect_elements_of_domain_type[key] = make_tuple(ret[k], cdts[k]);
+      new_bas.Append(ret[k]);
+      new_cdts.Append(cdts[k]);
+    }
+    if (new_bas.Size() > 0)
+      UpdateElementsOfDomainTypes(new_bas, new_cdts, vb, lh);
+    return ret;
+  }
+
   shared_ptr<BitArray> MultiLevelsetCutInformation::GetElementsOfDomainType(const Array<Array<DOMAIN_TYPE>> & cdt, 
                                                                             VorB vb, 
                                                                             LocalHeap & lh)
   {
-    // Check whether BitArray with requested cdt has already been computed
-    // and return that BitArray if found
-    for (auto tup : collect_elements_of_domain_type)
-      if (CombinedDomainTypesEqual(get<1>(tup), cdt))
-        return get<0>(tup);
-
-    // Compute the new BitArray
-    shared_ptr<BitArray> elems_of_domain_type = make_shared<BitArray>(ma->GetNE(vb));
-    UpdateElementsOfDomainType(elems_of_domain_type, cdt, vb, lh);
-    
-    // Add BitArray to instance collection
-    collect_elements_of_domain_type.push_back(make_tuple(elems_of_domain_type, cdt, vb));
-
-    return elems_of_domain_type;
+    Array<Array<Array<DOMAIN_TYPE>>> cdts(1);
+    cdts[0] = cdt;
+    return GetElementsOfDomainTypes(cdts, vb, lh)[0];
   }
   
 
+  Array<bool> MultiLevelsetCutInformation::HasPositiveMeasure(const Array<Array<DOMAIN_TYPE>> & dtts,
+                                                              double threshold,
+                                                              LocalHeap & lh) const
+  {
+    static Timer t ("MultiLevelsetCutInformation::HasPositiveMeasure");
+    RegionTimer reg(t);
+
+    const int M = lsets.Size();
+    const int ndt = dtts.Size();
+    for (auto & dtt : dtts)
+      if (dtt.Size() != M)
+        throw Exception("Number of domains does not match number of levelsets");
+
+    Array<shared_ptr<LevelsetIntegrationDomain>> lsetintdoms(ndt);
+    Array<MLSET_CODE> dt_codes(ndt);
+    for (int k = 0; k < ndt; k++)
+    {
+      dt_codes[k] = EncodeDomainTypes(dtts[k]);
+      Array<Array<DOMAIN_TYPE>> dtt(1);
+      dtt[0] = dtts[k];
+      lsetintdoms[k] = make_shared<LevelsetIntegrationDomain>(lsets, dtt, 0);
+    }
+
+    Array<double> measures(ndt);
+    measures = 0.0;
+    // tuples with a measure above the threshold are not considered anymore
+    BitArray found(ndt);
+    found.Clear();
+
+    int ne = ma->GetNE(VOL);
+    IterateRange
+      (ne, lh,
+       [&] (int elnr, LocalHeap & lh)
+       {
+         ElementId ei = ElementId(VOL,elnr);
+
+         const MLSET_CODE el_code = el_codes[VOL][elnr];
+         const bool cut_element = MlsetCodeIsCut(el_code, M);
+
+         ElementTransformation * eltrans = nullptr;
+         double elvol = -1.0;
+         for (int k = 0; k < ndt; k++)
+         {
+           if (found.Test(k))
+             continue;
+
+           if (!MlsetCodesCompatible(el_code, dt_codes[k], M))
+             continue;
+
+           if (eltrans == nullptr)
+             eltrans = &ma->GetTrafo (ei, lh);
+
+           double meas = 0.0;
+           if (!cut_element) // element lies completely in the domain
+           {
+             if (elvol < 0)
+             {
+               const IntegrationRule & ir = SelectIntegrationRule (eltrans->GetElementType(), 0);
+               BaseMappedIntegrationRule & mir = (*eltrans)(ir, lh);
+               elvol = 0.0;
+               for (int i = 0; i < mir.Size(); i++)
+                 elvol += mir[i].GetWeight();
+             }
+             meas = elvol;
+           }
+           else
+           {
+             const IntegrationRule * ir;
+             Array<double> wei_arr;
+             tie (ir, wei_arr) = CreateCutIntegrationRule(*lsetintdoms[k], *eltrans, lh);
+             if (ir != nullptr)
+             {
+               BaseMappedIntegrationRule & mir = (*eltrans)(*ir, lh);
+               for (int i = 0; i < mir.Size(); i++)
+                 meas += mir[i].GetMeasure()*wei_arr[i];
+             }
+           }
+           if (meas != 0.0)
+           {
+             AtomicAdd(measures[k], meas);
+             if (abs(measures[k]) > threshold)
+               found.SetBitAtomic(k);
+           }
+         }
+       });
+
+    Array<bool> ret(ndt);
+    for (int k = 0; k < ndt; k++)
+      ret[k] = abs(ma->GetCommunicator().AllReduce(measures[k], MPI_SUM)) > threshold;
+    return ret;
+  }
+
   bool MultiLevelsetCutInformation::CombinedDomainTypesEqual(const Array<Array<DOMAIN_TYPE>> & cdta,
                                                              const Array<Array<DOMAIN_TYPE>> & cdtb) const
   {
@@ -518,6 +969,69 @@ namespace ngcomp
     return ret;
   }
 
+  shared_ptr<BitArray> GetElementsWithSharedVertex(shared_ptr<MeshAccess> ma,
+                                                   shared_ptr<BitArray> a,
+                                                   LocalHeap & lh)
+  {
+    int ne = ma->GetNE();
+    shared_ptr<BitArray> ret = make_shared<BitArray> (ne);
+    ret->Clear();
+
+    IterateRange
+      (ne, lh,
+      [&] (int elnr, LocalHeap & lh)
+    {
+      if (a->Test(elnr))
+      {
+        Array<int> elnums(0,lh);
+        for (auto vnr : ma->GetElement(ElementId(VOL,elnr)).Vertices())
+        {
+          ma->GetVertexElements (vnr, elnums);
+          for (auto elnr2 : elnums)
+            ret->SetBitAtomic(elnr2);
+        }
+      }
+    });
+    return ret;
+  }
+
+  shared_ptr<BitArray> GetElementsWithChangedDofs(shared_ptr<FESpace> fes,
+                                                  shared_ptr<BaseVector> a,
+                                                  shared_ptr<BaseVector> b,
+                                                  double tol,
+                                                  LocalHeap & lh)
+  {
+    int ne = fes->GetMeshAccess()->GetNE();
+    int dim = fes->GetDimension();
+    FlatVector<> fva = a->FVDouble();
+    FlatVector<> fvb = b->FVDouble();
+    if ((fva.Size() != dim * fes->GetNDof()) || (fvb.Size() != dim * fes->GetNDof()))
+      throw Exception("GetElementsWithChangedDofs:: vectors do not fit to the space");
+
+    shared_ptr<BitArray> ret = make_shared<BitArray> (ne);
+    ret->Clear();
+
+    IterateRange
+      (ne, lh,
+      [&] (int elnr, LocalHeap & lh)
+    {
+      Array<int> dnums(0,lh);
+      fes->GetDofNrs(ElementId(VOL,elnr),dnums);
+      for (auto dof : dnums)
+      {
+        if (!IsRegularDof(dof))
+          continue;
+        for (int k = 0; k < dim; k++)
+          if (abs(fva(dim*dof+k) - fvb(dim*dof+k)) > tol)
+          {
+            ret->SetBitAtomic(elnr);
+            return;
+          }
+      }
+    });
+    return ret;
+  }
+
   shared_ptr<BitArray> GetDofsOfElements(shared_ptr<FESpace> fes,
                                          shared_ptr<BitArray> a,
                                          LocalHeap & lh)
@@ -4,6 +4,7 @@
 #include <solve.hpp>
 #include <comp.hpp>
 #include <fem.hpp>
+#include <map>
 
 /// from ngxfem
 #include "../cutint/xintegration.hpp"
@@ -31,9 +32,28 @@ namespace ngcomp
                                                      nullptr, nullptr, nullptr};
     shared_ptr<Array<DOMAIN_TYPE>> dom_of_node [6] = {nullptr, nullptr, nullptr,
                                                       nullptr, nullptr, nullptr};
+    // elements that changed their domain type in the last Update
+    shared_ptr<BitArray> changed_elements [2] = {nullptr, nullptr};
+    // level set values of the last Update (only for P1 level sets)
+    Vector<> last_lset_values;
+    bool initialized = false;
+
+    /// classifies element ei by the volumes of its NEG and POS parts
+    /// (lsetdom_neg/lsetdom_pos describe the level set and the domain types)
+    DOMAIN_TYPE ClassifyElement(ElementId ei,
+                                const LevelsetIntegrationDomain & lsetdom_neg,
+                                const LevelsetIntegrationDomain & lsetdom_pos,
+                                double & cut_ratio, LocalHeap & lh) const;
+    void UpdateIncremental(shared_ptr<CoefficientFunction> cf_lset,
+                           shared_ptr<GridFunction> gf_lset,
+                           LocalHeap & lh);
   public:
     CutInformation (shared_ptr<MeshAccess> ama);
-    void Update(shared_ptr<CoefficientFunction> lset, int subdivlvl, int time_order, LocalHeap & lh);
+    /// Updates the cut information. With incremental == true only elements
+    /// with changed level set values are classified again (only possible for
+    /// P1 level sets in space, otherwise a full update is carried out).
+    void Update(shared_ptr<CoefficientFunction> lset, int subdivlvl, int time_order, LocalHeap & lh,
+                bool incremental = false);
     
     shared_ptr<MeshAccess> GetMesh () const { return ma; }
 
@@ -42,11 +62,16 @@ namespace ngcomp
       return cut_ratio_of_element[vb];
     }
 
-    INLINE DOMAIN_TYPE DomainTypeOfElement(ElementId elid)
+    shared_ptr<BitArray> GetChangedElements (VorB vb) const
+    {
+      return changed_elements[vb];
+    }
+
+    INLINE DOMAIN_TYPE DomainTypeOfElement(ElementId elid) const
     {
       int elnr = elid.Nr();
       VorB vb = elid.VB();
-      shared_ptr<BitArray> * ba = nullptr;
+      const shared_ptr<BitArray> * ba = nullptr;
       if (vb == VOL)
         ba = elems_of_domain_type;
       else
@@ -96,8 +121,18 @@ namespace ngcomp
   protected:
     shared_ptr<MeshAccess> ma;
     Array<shared_ptr<GridFunction>> lsets;
-    vector<tuple<shared_ptr<BitArray>, Array<Array<DOMAIN_TYPE>>, VorB >> collect_elements_with_contribution;
-    vector<tuple<shared_ptr<BitArray>, Array<Array<DOMAIN_TYPE>>, VorB >> collect_elements_of_domain_type;
+    // element markers that have been computed so far (and are updated on
+    // Update) for the key (VorB, sorted codes of the domain type tuples)
+    typedef tuple<VorB, vector<MLSET_CODE>> MarkerKey;
+    map<MarkerKey, tuple<shared_ptr<BitArray>, Array<Array<DOMAIN_TYPE>>>> collect_elements_with_contribution;
+    map<MarkerKey, tuple<shared_ptr<BitArray>, Array<Array<DOMAIN_TYPE>>>> collect_elements_of_domain_type;
+    // domain types of the (straight cut) level sets on each element as
+    // bitmasks (cf. EncodeDomainTypes)
+    Array<MLSET_CODE> el_codes [2];
+
+    void UpdateElementCodes(VorB vb, LocalHeap & lh);
+    MarkerKey GetMarkerKey(const Array<Array<DOMAIN_TYPE>> & cdt, VorB vb) const;
+    void UpdateCollectedMarkers(LocalHeap & lh);
   public:
     MultiLevelsetCutInformation (shared_ptr<MeshAccess> ama, 
                                  const Array<shared_ptr<GridFunction>> & lsets_in);
@@ -108,15 +143,33 @@ namespace ngcomp
     
     int GetLen() const {return lsets.Size();}
 
+    const Array<MLSET_CODE> & GetElementCodes (VorB vb) const
+    {
+      return el_codes[vb];
+    }
+
     void UpdateElementsOfDomainType(const shared_ptr<BitArray> & elems_of_domain_type, 
                                     const Array<Array<DOMAIN_TYPE>> & cdt, 
                                     VorB vb, 
                                     LocalHeap & lh) const;
 
+    /// marks the elements of the domain types of all lists cdts[k] in
+    /// elems_of_domain_type[k] in one sweep over the elements
+    void UpdateElementsOfDomainTypes(FlatArray<shared_ptr<BitArray>> elems_of_domain_type,
+                                     FlatArray<Array<Array<DOMAIN_TYPE>>> cdts,
+                                     VorB vb,
+                                     LocalHeap & lh) const;
+
     shared_ptr<BitArray> GetElementsOfDomainType(const Array<Array<DOMAIN_TYPE>> & cdt,
                                                  VorB vb, 
                                                  LocalHeap & lh);
 
+    /// markers for several lists of domain type tuples, only those which have
+    /// not been computed before are computed (in one sweep)
+    Array<shared_ptr<BitArray>> GetElementsOfDomainTypes(const Array<Array<Array<DOMAIN_TYPE>>> & cdts,
+                                                         VorB vb,
+                                                         LocalHeap & lh);
+
     shared_ptr<BitArray> GetElementsOfDomainType(const Array<DOMAIN_TYPE> & cdt_,
                                                  VorB vb, 
                                                  LocalHeap & lh)
@@ -131,10 +184,19 @@ namespace ngcomp
                                         VorB vb, 
                                         LocalHeap & lh) const;
 
+    void UpdateElementsWithContributions(FlatArray<shared_ptr<BitArray>> elems_of_domain_type,
+                                         FlatArray<Array<Array<DOMAIN_TYPE>>> cdts,
+                                         VorB vb,
+                                         LocalHeap & lh) const;
+
     shared_ptr<BitArray> GetElementsWithContribution(const Array<Array<DOMAIN_TYPE>> & cdt,
                                                      VorB vb, 
                                                      LocalHeap & lh);
 
+    Array<shared_ptr<BitArray>> GetElementsWithContributions(const Array<Array<Array<DOMAIN_TYPE>>> & cdts,
+                                                             VorB vb,
+                                                             LocalHeap & lh);
+
     shared_ptr<BitArray> GetElementsWithContribution(const Array<DOMAIN_TYPE> & cdt_,
                                                      VorB vb, 
                                                      LocalHeap & lh)
@@ -146,6 +208,14 @@ namespace ngcomp
 
     bool CombinedDomainTypesEqual(const Array<Array<DOMAIN_TYPE>> & cdta, 
                                   const Array<Array<DOMAIN_TYPE>> & cdtb) const;
+
+    /// Checks for every tuple of domain types if the corresponding domain has
+    /// a measure larger than threshold. All tuples are treated in one sweep
+    /// over the elements; cut rules are only computed on elements that are cut
+    /// by a level set that is relevant for the tuple.
+    Array<bool> HasPositiveMeasure(const Array<Array<DOMAIN_TYPE>> & dtts,
+                                   double threshold,
+                                   LocalHeap & lh) const;
   };
   
   shared_ptr<BitArray> GetFacetsWithNeighborTypes(shared_ptr<MeshAccess> ma,
@@ -160,6 +230,16 @@ namespace ngcomp
                                                      shared_ptr<BitArray> a,
                                                      LocalHeap & lh);
 
+  shared_ptr<BitArray> GetElementsWithSharedVertex(shared_ptr<MeshAccess> ma,
+                                                   shared_ptr<BitArray> a,
+                                                   LocalHeap & lh);
+
+  shared_ptr<BitArray> GetElementsWithChangedDofs(shared_ptr<FESpace> fes,
+                                                  shared_ptr<BaseVector> a,
+                                                  shared_ptr<BaseVector> b,
+                                                  double tol,
+                                                  LocalHeap & lh);
+
   shared_ptr<BitArray> GetDofsOfElements(shared_ptr<FESpace> fes,
                                          shared_ptr<BitArray> a,
                                          LocalHeap & lh);
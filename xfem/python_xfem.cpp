@@ -7,9 +7,65 @@
 #include "../xfem/ghostpenalty.hpp"
 
 #include <typeinfo>
+#include <pybind11/numpy.h>
 
 using namespace ngcomp;
 
+/// converts a tuple, a list of tuples or a DomainTypeArray into a list of
+/// domain type tuples (of length nlsets)
+static Array<Array<DOMAIN_TYPE>> PyObject2DomainTypeTuples(py::object dt_in, int nlsets)
+{
+  if (py::isinstance<py::tuple>(dt_in))
+  {
+    if (py::len(dt_in) != nlsets)
+      throw Exception("Number of domains does not match number of levelsets");
+    Array<Array<DOMAIN_TYPE>> dts(1);
+    dts[0] = makeCArray<DOMAIN_TYPE> (py::extract<py::tuple>(dt_in)());
+    return dts;
+  }
+
+  py::list dts_list;
+  if (py::hasattr(dt_in, "as_list") && py::isinstance<py::list>(dt_in.attr("as_list")))
+    dts_list = dt_in.attr("as_list");      
+  else if (py::isinstance<py::list>(dt_in))
+    dts_list = dt_in;
+  else
+    throw Exception("domain_type is neither a tuple nor a list nor a DomainTypeArray.");
+
+  Array<Array<DOMAIN_TYPE>> cdts_aa(py::len(dts_list));
+  int common_length = -1; //not a list
+  for (int i = 0; i < py::len(dts_list); i++)
+  {
+    auto dta(dts_list[i]);
+
+    // Check that input is valid
+    if (!py::isinstance<py::tuple>(dta))
+      throw Exception("domain_type arrays are incompatible. Maybe you used a list instead of a tuple?");
+    else
+    {
+      if ((i>0) && (common_length != py::len(dta)))
+        throw Exception("domain_type arrays have different length");
+      else
+        common_length = py::len(dta);
+    }
+
+    cdts_aa[i] = makeCArray<DOMAIN_TYPE> (dta);
+  }
+  if (common_length != nlsets)
+    throw Exception("Number of domains does not match number of levelsets");
+  return cdts_aa;
+}
+
+/// a list of domain descriptions (lists of tuples or DomainTypeArrays) is
+/// treated as a batch of domains
+static bool IsDomainTypeBatch(py::object dt_in)
+{
+  if (!py::isinstance<py::list>(dt_in) || py::len(dt_in) == 0)
+    return false;
+  py::object first = py::list(dt_in)[0];
+  return py::isinstance<py::list>(first) || py::hasattr(first, "as_list");
+}
+
 void ExportNgsx_xfem(py::module &m)
 {
 
@@ -95,15 +151,17 @@ time_order : int
                       PyCF lset,
                       int subdivlvl,
                       int time_order,
-                      int heapsize)
+                      int heapsize,
+                      bool incremental)
          {
            LocalHeap lh (heapsize, "CutInfo::Update-heap", true);
-           self.Update(lset,subdivlvl,time_order,lh);
+           self.Update(lset,subdivlvl,time_order,lh,incremental);
          },
          py::arg("levelset"),
          py::arg("subdivlvl") = 0,
          py::arg("time_order") = -1,
-         py::arg("heapsize") = 1000000,docu_string(R"raw_string(
+         py::arg("heapsize") = 1000000,
+         py::arg("incremental") = false,docu_string(R"raw_string(
 Updates a CutInfo based on a level set function.
 
 Parameters
@@ -118,6 +176,11 @@ time_order : int
   order in time that is used in the integration in time to check for cuts and the ratios. This is
   only relevant for space-time discretizations.
 
+incremental : boolean
+  only elements with changed level set values (compared to the last update) are classified again
+  and the node information is only patched locally. This requires a P1 level set function (in
+  space), otherwise a full update is carried out. The elements that changed their domain type are
+  available through GetChangedElements.
 
 )raw_string")
       )
@@ -171,6 +234,15 @@ corresponding combined domain type
          py::arg("VOL_or_BND") = VOL,docu_string(R"raw_string(
 Returns Vector of the ratios between the measure of the NEG domain on a (boundary) element and the
 full (boundary) element
+)raw_string"))
+    .def("GetChangedElements", [](CutInformation & self,
+                                  VorB vb)
+         {
+           return self.GetChangedElements(vb);
+         },
+         py::arg("VOL_or_BND") = VOL,docu_string(R"raw_string(
+Returns BitArray that is true for every (boundary) element that changed its domain type
+(NEG/POS/IF) in the last Update. After the first Update all elements are marked.
 )raw_string"))
     ;
 
@@ -260,6 +332,74 @@ mesh :
 a : ngsolve.BitArray
   BitArray for marked facets
 
+heapsize : int
+  heapsize of local computations.
+)raw_string")
+    );
+
+  m.def("GetElementsWithSharedVertex",
+        [] (shared_ptr<MeshAccess> ma,
+            shared_ptr<BitArray> a,
+            int heapsize)
+        {
+          LocalHeap lh (heapsize, "GetElementsWithSharedVertex-heap", true);
+          return GetElementsWithSharedVertex(ma,a,lh);
+        } ,
+        py::arg("mesh"),
+        py::arg("a"),
+        py::arg("heapsize") = 1000000,
+        docu_string(R"raw_string(
+Given a BitArray marking some elements extract
+a BitArray of elements that share a vertex
+with one of these elements (vertex patch).
+
+Parameters:
+
+mesh : 
+  mesh
+
+a : ngsolve.BitArray
+  BitArray for marked elements
+
+heapsize : int
+  heapsize of local computations.
+)raw_string")
+    );
+
+  m.def("GetElementsWithChangedDofs",
+        [] (PyFES fes,
+            shared_ptr<BaseVector> a,
+            shared_ptr<BaseVector> b,
+            double tol,
+            int heapsize)
+        {
+          LocalHeap lh (heapsize, "GetElementsWithChangedDofs-heap", true);
+          return GetElementsWithChangedDofs(fes,a,b,tol,lh);
+        } ,
+        py::arg("space"),
+        py::arg("a"),
+        py::arg("b"),
+        py::arg("tol") = 0.0,
+        py::arg("heapsize") = 1000000,
+        docu_string(R"raw_string(
+Given two vectors of a finite element space extract
+a BitArray of elements on which (at least) one of
+the unknowns differs by more than tol.
+
+Parameters:
+
+space : ngsolve.FESpace
+  finite element space of the vectors
+
+a : ngsolve.BaseVector
+  first vector
+
+b : ngsolve.BaseVector
+  second vector
+
+tol : float
+  tolerance for the difference of the unknowns
+
 heapsize : int
   heapsize of local computations.
 )raw_string")
@@ -397,7 +537,8 @@ Returns mesh of CutInfo.
          docu_string(R"raw_string(
 Updates the tuple of levelsets behind the MultiLevelsetCutInfo and 
 recomputes any element marker arrays which have been created with this
-instance.
+instance. The marker arrays are updated in place, all of them in one sweep
+over the mesh.
 
 Parameters
 
@@ -410,65 +551,40 @@ heapsize : int = 1000000
     .def("GetElementsOfType", [](MultiLevelsetCutInformation & self,
                                  py::object dt_in,
                                  VorB vb,
-                                 int heapsize)
+                                 int heapsize) -> py::object
          {
 
            LocalHeap lh (heapsize, "MultiLevelsetCutInfo-heap", true);
 
-           if (py::isinstance<py::tuple>(dt_in))
-           {
-             if (py::len(dt_in) != self.GetLen())
-               throw Exception("Number of domains does not match number of levelsets");
-             Array<DOMAIN_TYPE> dts_ = makeCArray<DOMAIN_TYPE> (py::extract<py::tuple>(dt_in)());
-             Array<Array<DOMAIN_TYPE>> dts(1);
-             dts[0] = dts_;
-             return self.GetElementsOfDomainType(dts, vb, lh);
-           }           
-
-           py::list dts_list;
-           if (py::hasattr(dt_in, "as_list") && py::isinstance<py::list>(dt_in.attr("as_list")))
-             dts_list = dt_in.attr("as_list");      
-           else if (py::isinstance<py::list>(dt_in))
-             dts_list = dt_in;
-           else
-             throw Exception("domain_type is neither a tuple nor a list nor a DomainTypeArray.");
-
-           Array<Array<DOMAIN_TYPE>> cdts_aa(py::len(dts_list));
-           int common_length = -1; //not a list
-           for (int i = 0; i < py::len(dts_list); i++)
+           if (IsDomainTypeBatch(dt_in))
            {
-             auto dta(dts_list[i]);
-
-             // Check that input is valid
-             if (!py::isinstance<py::tuple>(dta))
-               throw Exception("domain_type arrays are incompatible. Maybe you used a list instead of a tuple?");
-             else
-             {
-               if ((i>0) && (common_length != py::len(dta)))
-                 throw Exception("domain_type arrays have different length");
-               else
-                 common_length = py::len(dta);
-             }
-
-             // Valid input. Add domain to pass to self.GetElementsOfDomainType
-             cdts_aa[i] = makeCArray<DOMAIN_TYPE> (dta);
+             py::list dts_in(dt_in);
+             Array<Array<Array<DOMAIN_TYPE>>> cdts(py::len(dts_in));
+             for (int i = 0; i < py::len(dts_in); i++)
+               cdts[i] = PyObject2DomainTypeTuples(dts_in[i], self.GetLen());
+             py::list ret;
+             for (auto ba : self.GetElementsOfDomainTypes(cdts, vb, lh))
+               ret.append(py::cast(ba));
+             return ret;
            }
-           if (common_length != self.GetLen())
-             throw Exception("Number of domains does not match number of levelsets");
-           
-           return self.GetElementsOfDomainType(cdts_aa, vb, lh);
+
+           return py::cast(self.GetElementsOfDomainType(PyObject2DomainTypeTuples(dt_in, self.GetLen()), vb, lh));
          },
          py::arg("domain_type"),
          py::arg("VOL_or_BND") = VOL,
          py::arg("heapsize") = 1000000,docu_string(R"raw_string(
 Returns BitArray that is true for every element that has the 
 corresponding domain type. This BitArray remains attached to the mlci class
-instance and is updated on mlci.Update(lsets).
+instance and is updated on mlci.Update(lsets). Repeated calls with the same
+domain (and VOL_or_BND) return the same BitArray without recomputation.
+
+For a list of domains a list of BitArrays is returned. All BitArrays that
+have not been computed before are computed in one sweep over the mesh.
 
 Parameters
 
-domain_type : {tuple(ENUM), list(tuple(ENUM)), DomainTypeArray}
-  Description of the domain.
+domain_type : {tuple(ENUM), list(tuple(ENUM)), DomainTypeArray, list(DomainTypeArray)}
+  Description of the domain (or list of domains).
 
 heapsize : int = 1000000
   heapsize of local computations.
@@ -477,69 +593,114 @@ heapsize : int = 1000000
     .def("GetElementsWithContribution", [](MultiLevelsetCutInformation & self,
                                            py::object dt_in,
                                            VorB vb,
-                                           int heapsize)
+                                           int heapsize) -> py::object
          {
 
            LocalHeap lh (heapsize, "MultiLevelsetCutInfo-heap", true);
 
-           if (py::isinstance<py::tuple>(dt_in))
+           if (IsDomainTypeBatch(dt_in))
            {
-             if (py::len(dt_in) != self.GetLen())
-               throw Exception("Number of domains does not match number of levelsets");
-             Array<DOMAIN_TYPE> dts_ = makeCArray<DOMAIN_TYPE> (py::extract<py::tuple>(dt_in)());
-             Array<Array<DOMAIN_TYPE>> dts(1);
-             dts[0] = dts_;
-             return self.GetElementsWithContribution(dts, vb, lh);
+             py::list dts_in(dt_in);
+             Array<Array<Array<DOMAIN_TYPE>>> cdts(py::len(dts_in));
+             for (int i = 0; i < py::len(dts_in); i++)
+               cdts[i] = PyObject2DomainTypeTuples(dts_in[i], self.GetLen());
+             py::list ret;
+             for (auto ba : self.GetElementsWithContributions(cdts, vb, lh))
+               ret.append(py::cast(ba));
+             return ret;
            }
 
+           return py::cast(self.GetElementsWithContribution(PyObject2DomainTypeTuples(dt_in, self.GetLen()), vb, lh));
+         },
+         py::arg("domain_type"),
+         py::arg("VOL_or_BND") = VOL,
+         py::arg("heapsize") = 1000000,docu_string(R"raw_string(
+Returns BitArray that is true for every element that has the 
+a contribution to the corresponding level set domain. This BitArray 
+remains attached to the mlci class instance and is updated on 
+mlci.Update(lsets). Repeated calls with the same domain (and VOL_or_BND)
+return the same BitArray without recomputation.
+
+For a list of domains a list of BitArrays is returned. All BitArrays that
+have not been computed before are computed in one sweep over the mesh.
+
+Parameters
+
+domain_type : {tuple(ENUM), list(tuple(ENUM)), DomainTypeArray, list(DomainTypeArray)}
+  Description of the domain (or list of domains).
+
+heapsize : int = 1000000
+  heapsize of local computations.
+)raw_string"))
+    .def("HasPositiveMeasure", [](MultiLevelsetCutInformation & self,
+                                  py::object dt_in,
+                                  double threshold,
+                                  int heapsize)
+         {
+           LocalHeap lh (heapsize, "MultiLevelsetCutInfo-heap", true);
+
            py::list dts_list;
            if (py::hasattr(dt_in, "as_list") && py::isinstance<py::list>(dt_in.attr("as_list")))
-             dts_list = dt_in.attr("as_list");      
+             dts_list = dt_in.attr("as_list");
            else if (py::isinstance<py::list>(dt_in))
              dts_list = dt_in;
            else
-             throw Exception("domain_type is neither a tuple nor a list nor a DomainTypeArray.");
+             throw Exception("domain_type is neither a list nor a DomainTypeArray.");
 
            Array<Array<DOMAIN_TYPE>> cdts_aa(py::len(dts_list));
-           int common_length = -1; //not a list
            for (int i = 0; i < py::len(dts_list); i++)
            {
              auto dta(dts_list[i]);
-
-             // Check valid input
              if (!py::isinstance<py::tuple>(dta))
                throw Exception("domain_type arrays are incompatible. Maybe you used a list instead of a tuple?");
-             else
-             {
-               if ((i>0) && (common_length != py::len(dta)))
-                 throw Exception("domain_type arrays have different length");
-               else
-                 common_length = py::len(dta);
-             }
-
-             // Valid input: Add domain to pass to self.GetElementsWithContribution
              cdts_aa[i] = makeCArray<DOMAIN_TYPE> (dta);
            }
-           if (common_length != self.GetLen())
-             throw Exception("Number of domains does not match number of levelsets");
-           
-           return self.GetElementsWithContribution(cdts_aa, vb, lh);
+
+           Array<bool> has_measure = self.HasPositiveMeasure(cdts_aa, threshold, lh);
+           py::list ret;
+           for (bool b : has_measure)
+             ret.append(b);
+           return ret;
          },
          py::arg("domain_type"),
-         py::arg("VOL_or_BND") = VOL,
+         py::arg("threshold") = 1e-12,
          py::arg("heapsize") = 1000000,docu_string(R"raw_string(
-Returns BitArray that is true for every element that has the 
-a contribution to the corresponding level set domain. This BitArray 
-remains attached to the mlci class instance and is updated on 
-mlci.Update(lsets).
+Returns a list of booleans which are true for every tuple of domain types
+whose (volume or interface) domain has a measure larger than threshold.
+All tuples are checked in one sweep over the mesh. Cut integration rules
+are only computed on elements that are cut by a relevant level set.
 
 Parameters
 
-domain_type : {tuple(ENUM), list(tuple(ENUM)), DomainTypeArray}
-  Description of the domain.
+domain_type : {list(tuple(ENUM)), DomainTypeArray}
+  Description of the domains.
+
+threshold : float = 1e-12
+  domains with a measure below the threshold are considered as empty.
 
 heapsize : int = 1000000
   heapsize of local computations.
+)raw_string"))
+    .def("GetElementCodes", [](MultiLevelsetCutInformation & self,
+                               VorB vb)
+         {
+           const Array<MLSET_CODE> & codes = self.GetElementCodes(vb);
+           py::array_t<uint64_t> ret(codes.Size());
+           auto ret_data = ret.mutable_unchecked<1>();
+           for (int i = 0; i < codes.Size(); i++)
+             ret_data(i) = codes[i];
+           return ret;
+         },
+         py::arg("VOL_or_BND") = VOL,docu_string(R"raw_string(
+Returns a numpy array with one integer per element that encodes the domain types
+of all level sets on the element: bits 3*i, 3*i+1 and 3*i+2 are set if the element
+lies in the negative part, the positive part or is cut by the i-th level set
+(cf. COMBINED_DOMAIN_TYPE).
+
+Parameters
+
+VOL_or_BND : ngsolve.comp.VorB
+  input VOL, BND, ..
 )raw_string"));
 
 
@@ -672,14 +833,16 @@ elnr : int
   typedef shared_ptr<BilinearFormIntegrator> PyBFI;
   typedef shared_ptr<LinearFormIntegrator> PyLFI;
 
-  m.def("SymbolicCutBFI", [](py::dict lsetdom,
+  m.def("SymbolicCutBFI", [](py::object lsetdom,
                              PyCF cf,
                              VorB vb,
                              bool element_boundary,
                              bool skeleton,
                              py::object definedon,
                              py::object definedonelem,
-                             py::object deformation)
+                             py::object deformation,
+                             bool simd_evaluate,
+                             bool dispatch_uncut)
         -> PyBFI
         {
 
@@ -702,11 +865,16 @@ elnr : int
           if (element_boundary) element_vb = BND;
           else element_vb = VOL;
 
-          shared_ptr<LevelsetIntegrationDomain> lsetintdom = PyDict2LevelsetIntegrationDomain(lsetdom);
+          shared_ptr<LevelsetIntegrationDomain> lsetintdom = PyObject2LevelsetIntegrationDomain(lsetdom);
+          // cut rules are reused in subsequent assemblies as long as the level set does not change
+          lsetintdom->EnableCutRuleCache();
           shared_ptr<BilinearFormIntegrator> bfi;
           if (!has_other && !skeleton)
           {
-            bfi  = make_shared<SymbolicCutBilinearFormIntegrator> (*lsetintdom, cf, vb, element_vb);
+            auto bfime = make_shared<SymbolicCutBilinearFormIntegrator> (*lsetintdom, cf, vb, element_vb);
+            bfime->SetCutSimdEvaluate(simd_evaluate);
+            bfime->SetDispatchUncut(dispatch_uncut);
+            bfi = bfime;
           }
           else
           {
@@ -741,6 +909,8 @@ elnr : int
         py::arg("definedon")=DummyArgument(),
         py::arg("definedonelements")=DummyArgument(),
         py::arg("deformation")=DummyArgument(),
+        py::arg("simd_evaluate")=true,
+        py::arg("dispatch_uncut")=true,
         docu_string(R"raw_string(
 see documentation of SymbolicBFI (which is a wrapper))raw_string")
     );
@@ -819,15 +989,104 @@ time_order : int
 )raw_string")
     );
 
+  m.def("FacetPatchMapStatistics", [](PyBFI bfi, bool reset, bool clear_cache)
+        {
+          auto patchbfi = dynamic_pointer_cast<SymbolicFacetPatchBilinearFormIntegrator>(bfi);
+          if (!patchbfi)
+            throw Exception("FacetPatchMapStatistics: integrator is not a facet patch integrator (skeleton=False)");
+          py::dict stats;
+          stats["newton_maps"] = patchbfi->GetNNewtonMaps();
+          stats["newton_iterations"] = patchbfi->GetNNewtonIterations();
+          stats["affine_maps"] = patchbfi->GetNAffineMaps();
+          stats["cached_maps"] = patchbfi->GetNCachedMaps();
+          if (reset)
+            patchbfi->ResetPatchMapStatistics();
+          if (clear_cache)
+            patchbfi->ClearPatchMapCache();
+          return stats;
+        },
+        py::arg("bfi"),
+        py::arg("reset")=false,
+        py::arg("clear_cache")=false,
+        docu_string(R"raw_string(
+Statistics of the mapping of integration points between the two elements of a facet patch in a
+SymbolicFacetPatchBFI (skeleton=False). Returns a dictionary with the number of points mapped with
+a Newton iteration ("newton_maps"), the total number of Newton iterations ("newton_iterations"),
+the number of points mapped in closed form on affine elements ("affine_maps") and the number of
+points taken from the cache of mapped points ("cached_maps"). Mapped points of non-affine patches
+are cached per facet, in space-time mode for all time integration points.
+
+Parameters
+
+bfi : ngsolve.BFI
+  facet patch integrator
+
+reset : boolean
+  reset the counters after reading them
+
+clear_cache : boolean
+  remove all cached mapped points
+)raw_string")
+    );
+  m.def("CutRuleStatistics", [](bool reset, bool clear_cache)
+        {
+          size_t ncaches = 0, nrules = 0, nhits = 0, nmisses = 0, ninvalidations = 0;
+          for (auto cache : GetSharedCutRuleCaches())
+          {
+            ncaches++;
+            nrules += cache->Size();
+            nhits += cache->GetNHits();
+            nmisses += cache->GetNMisses();
+            ninvalidations += cache->GetNInvalidations();
+            if (reset)
+              cache->ResetStatistics();
+            if (clear_cache)
+              cache->Clear();
+          }
+          py::dict stats;
+          stats["caches"] = ncaches;
+          stats["rules"] = nrules;
+          stats["reused"] = nhits;
+          stats["constructed"] = nmisses;
+          stats["invalidations"] = ninvalidations;
+          return stats;
+        },
+        py::arg("reset")=false,
+        py::arg("clear_cache")=false,
+        docu_string(R"raw_string(
+Statistics of the cut integration rules that are shared between all SymbolicCutBFIs,
+SymbolicCutLFIs and level set integrals (Integrate) defined on the same level set function. For every
+cut element the untransformed cut rule (on the reference element) is constructed once and then reused
+by all integrators (and subsequent assemblies) that require the same rule (same domain type, integration order and quad_dir_policy) as
+long as the level set values on that element do not change. For level sets that are no P1
+GridFunctions only volume rules without subdivision (subdivlvl=0) are shared, the level set values
+in the vertices of the element decide if a rule is still valid (e.g. after changing a time
+parameter). Returns a dictionary with the number of level set functions with a
+cache ("caches"), the number of currently stored rules ("rules"), the number of reused rules
+("reused"), the number of constructed rules ("constructed") and the number of elements where the
+cached rules have been discarded due to a changed level set ("invalidations").
+
+Parameters
+
+reset : boolean
+  reset the counters after reading them
+
+clear_cache : boolean
+  remove all stored cut rules
+)raw_string")
+    );
+
   
-  m.def("SymbolicCutLFI", [](py::dict lsetdom,
+  m.def("SymbolicCutLFI", [](py::object lsetdom,
                              PyCF cf,
                              VorB vb,
                              bool element_boundary,
                              bool skeleton,
                              py::object definedon,
                              py::object definedonelem,
-                             py::object deformation)
+                             py::object deformation,
+                             bool simd_evaluate,
+                             bool dispatch_uncut)
         -> PyLFI
         {
 
@@ -841,8 +1100,11 @@ time_order : int
           if (element_boundary || skeleton)
             throw Exception("No Facet LFI with Symbolic cuts..");
 
-          shared_ptr<LevelsetIntegrationDomain> lsetintdom = PyDict2LevelsetIntegrationDomain(lsetdom);
+          shared_ptr<LevelsetIntegrationDomain> lsetintdom = PyObject2LevelsetIntegrationDomain(lsetdom);
+          lsetintdom->EnableCutRuleCache();
           auto lfi  = make_shared<SymbolicCutLinearFormIntegrator> (*lsetintdom, cf, vb);
+          lfi->SetCutSimdEvaluate(simd_evaluate);
+          lfi->SetDispatchUncut(dispatch_uncut);
 
           if (py::extract<py::list> (definedon).check())
             lfi -> SetDefinedOn (makeCArray<int> (definedon));
@@ -869,6 +1131,8 @@ time_order : int
         py::arg("definedon")=DummyArgument(),
         py::arg("definedonelements")=DummyArgument(),
         py::arg("deformation")=DummyArgument(),
+        py::arg("simd_evaluate")=true,
+        py::arg("dispatch_uncut")=true,
         docu_string(R"raw_string(
 see documentation of SymbolicLFI (which is a wrapper))raw_string")
     );
@@ -108,6 +108,43 @@ namespace ngfem
     LevelsetIntegrationDomain lsetintdom_local(*lsetintdom);    
     if (lsetintdom_local.GetIntegrationOrder() < 0) // integration order shall not be enforced by lsetintdom
       lsetintdom_local.SetIntegrationOrder(intorder);
+
+    if (dispatch_uncut)
+      {
+        switch (ClassifyElementForLevelsetDomain(lsetintdom_local, trafo, lh))
+          {
+          case ELEMENT_OUTSIDE_DOMAIN:
+            return;
+          case ELEMENT_INSIDE_DOMAIN:
+            // the standard integrator uses the same (uncut) integration rule
+            // unless the order is prescribed by the level set domain
+            if (lsetintdom->GetIntegrationOrder() < 0)
+              {
+                bool symmetric_so_far = false;
+                SymbolicBilinearFormIntegrator::CalcElementMatrixAdd (fel, trafo, elmat, symmetric_so_far, lh);
+                return;
+              }
+            break;
+          default:
+            break;
+          }
+      }
+
+    if (cut_simd_evaluate && is_same<SCAL_RES,double>::value && !trafo.IsComplex()
+        && lsetintdom_local.GetTimeIntegrationOrder() < 0)
+      {
+        try
+          {
+            CalcElementMatrixAddSIMD (fel_trial, fel_test, is_mixedfe, trafo, lsetintdom_local, elmat, lh);
+            return;
+          }
+        catch (ExceptionNOSIMD e)
+          {
+            cout << IM(6) << e.What() << endl
+                 << "switching to scalar evaluation in SymbolicCutBFI" << endl;
+            cut_simd_evaluate = false;
+          }
+      }
     
     const IntegrationRule * ir;
     Array<double> wei_arr;
@@ -291,6 +328,116 @@ namespace ngfem
       }
   }
 
+  void SymbolicCutBilinearFormIntegrator ::
+  CalcElementMatrixAddSIMD (const FiniteElement & fel_trial,
+                            const FiniteElement & fel_test,
+                            bool is_mixedfe,
+                            const ElementTransformation & trafo,
+                            const LevelsetIntegrationDomain & lsetintdom_local,
+                            FlatMatrix<double> elmat,
+                            LocalHeap & lh) const
+  {
+    static Timer t("SymbolicCutBFI::CalcElementMatrixAddSIMD", 2);
+    // ThreadRegionTimer reg(t, TaskManager::GetThreadId());
+    HeapReset hr(lh);
+
+    const SIMD_IntegrationRule * simd_ir = CreateSIMDCutIntegrationRule(lsetintdom_local, trafo, lh);
+    if (simd_ir == nullptr)
+      return;
+    SIMD_BaseMappedIntegrationRule & simd_mir = trafo(*simd_ir, lh);
+    const size_t nip = simd_ir->Size();
+
+    ProxyUserData ud;
+    const_cast<ElementTransformation&>(trafo).userdata = &ud;
+
+    // contributions are collected in a separate matrix first, so that elmat
+    // is untouched if the SIMD evaluation fails (ExceptionNOSIMD) for some
+    // trial/test pair and the scalar evaluation takes over
+    FlatMatrix<double> elmat_simd(elmat.Height(), elmat.Width(), lh);
+    elmat_simd = 0.0;
+
+    int k1 = 0;
+    for (auto proxy1 : trial_proxies)
+      {
+        int l1 = 0;
+        for (auto proxy2 : test_proxies)
+          {
+            const size_t dim_proxy1 = proxy1->Dimension();
+            const size_t dim_proxy2 = proxy2->Dimension();
+            bool is_nonzero = false;
+            for (size_t k = 0; k < dim_proxy1; k++)
+              for (size_t l = 0; l < dim_proxy2; l++)
+                if (nonzeros(l1+l, k1+k))
+                  is_nonzero = true;
+
+            if (is_nonzero)
+              {
+                HeapReset hr(lh);
+                bool samediffop = (*(proxy1->Evaluator()) == *(proxy2->Evaluator())) && !is_mixedfe;
+
+                // proxyvalues: row k*dim_proxy2+l corresponds to (trial comp. k, test comp. l)
+                FlatMatrix<SIMD<double>> proxyvalues(dim_proxy1*dim_proxy2, nip, lh);
+                for (size_t k = 0; k < dim_proxy1; k++)
+                  for (size_t l = 0; l < dim_proxy2; l++)
+                    if (nonzeros(l1+l, k1+k))
+                      {
+                        ud.trialfunction = proxy1;
+                        ud.trial_comp = k;
+                        ud.testfunction = proxy2;
+                        ud.test_comp = l;
+                        cf -> Evaluate (simd_mir, proxyvalues.Rows(k*dim_proxy2+l, k*dim_proxy2+l+1));
+                      }
+                    else
+                      proxyvalues.Row(k*dim_proxy2+l) = 0.0;
+
+                // padded points have zero weight
+                for (size_t i = 0; i < nip; i++)
+                  proxyvalues.Col(i) *= simd_mir[i].GetWeight();
+
+                IntRange r1 = proxy1->Evaluator()->UsedDofs(fel_trial);
+                IntRange r2 = proxy2->Evaluator()->UsedDofs(fel_test);
+
+                FlatMatrix<SIMD<double>> bbmat1(elmat.Width()*dim_proxy1, nip, lh);
+                FlatMatrix<SIMD<double>> bdbmat1(elmat.Width()*dim_proxy2, nip, lh);
+                FlatMatrix<SIMD<double>> bbmat2 = samediffop ?
+                  bbmat1 : FlatMatrix<SIMD<double>>(elmat.Height()*dim_proxy2, nip, lh);
+
+                proxy1->Evaluator()->CalcMatrix(fel_trial, simd_mir, bbmat1);
+                if (!samediffop)
+                  proxy2->Evaluator()->CalcMatrix(fel_test, simd_mir, bbmat2);
+
+                for (auto i : r1)
+                  for (size_t l = 0; l < dim_proxy2; l++)
+                    {
+                      auto bdbrow = bdbmat1.Row(i*dim_proxy2+l);
+                      bdbrow = 0.0;
+                      for (size_t k = 0; k < dim_proxy1; k++)
+                        if (nonzeros(l1+l, k1+k))
+                          {
+                            auto brow = bbmat1.Row(i*dim_proxy1+k);
+                            auto drow = proxyvalues.Row(k*dim_proxy2+l);
+                            for (size_t j = 0; j < nip; j++)
+                              bdbrow(j) += brow(j) * drow(j);
+                          }
+                    }
+
+                // the rows of one dof (all components and integration points) are
+                // contiguous, so that the SIMD matrices can be seen as double matrices
+                // with one row per dof
+                constexpr size_t SW = SIMD<double>::Size();
+                FlatMatrix<double> hbbmat2(elmat.Height(), dim_proxy2*nip*SW,
+                                           reinterpret_cast<double*>(&bbmat2(0,0)));
+                FlatMatrix<double> hbdbmat1(elmat.Width(), dim_proxy2*nip*SW,
+                                            reinterpret_cast<double*>(&bdbmat1(0,0)));
+                AddABt (hbbmat2.Rows(r2), hbdbmat1.Rows(r1), elmat_simd.Rows(r2).Cols(r1));
+              }
+            l1 += proxy2->Dimension();
+          }
+        k1 += proxy1->Dimension();
+      }
+    elmat += elmat_simd;
+  }
+
   template <typename SCAL, typename SCAL_SHAPES, typename SCAL_RES>
   void SymbolicCutBilinearFormIntegrator ::
     T_CalcElementMatrixEBAdd (const FiniteElement & fel,
@@ -1089,12 +1236,53 @@ namespace ngfem
     simd_evaluate=false;
   }
 
+  void SymbolicFacetPatchBilinearFormIntegrator :: ClearPatchMapCache ()
+  {
+    for (int i = 0; i < N_LOCKS; i++)
+    {
+      std::lock_guard<std::mutex> guard(patch_map_mutex[i]);
+      patch_map_cache[i].clear();
+    }
+  }
+
+  FlatArray<Vec<3>> SymbolicFacetPatchBilinearFormIntegrator ::
+  LookupPatchMap (size_t key, int el2, int n1, int n2, int nt, LocalHeap & lh) const
+  {
+    const int lock = key % N_LOCKS;
+    std::lock_guard<std::mutex> guard(patch_map_mutex[lock]);
+    auto it = patch_map_cache[lock].find(key);
+    if (it == patch_map_cache[lock].end() || it->second.el2 != el2
+        || it->second.n1 != n1 || it->second.n2 != n2 || it->second.nt != nt)
+      return FlatArray<Vec<3>>(0, lh);
+    FlatArray<Vec<3>> points(it->second.points.size(), lh);
+    for (size_t l = 0; l < points.Size(); l++)
+      points[l] = it->second.points[l];
+    return points;
+  }
+
+  void SymbolicFacetPatchBilinearFormIntegrator ::
+  StorePatchMap (size_t key, int el2, int n1, int n2, int nt, FlatArray<Vec<3>> points) const
+  {
+    PatchMapEntry entry;
+    entry.el2 = el2;
+    entry.n1 = n1;
+    entry.n2 = n2;
+    entry.nt = nt;
+    entry.points.resize(points.Size());
+    for (size_t l = 0; l < points.Size(); l++)
+      entry.points[l] = points[l];
+    const int lock = key % N_LOCKS;
+    std::lock_guard<std::mutex> guard(patch_map_mutex[lock]);
+    patch_map_cache[lock][key] = std::move(entry);
+  }
+
   // maps an integration point from inside one element to an integration point of the neighbor element
   // (integration point will be outside), so that the mapped points have the same coordinate
+  // returns the number of Newton iterations
   template<int D>
-  void MapPatchIntegrationPoint(IntegrationPoint & from_ip, const ElementTransformation & from_trafo,
-                                const ElementTransformation & to_trafo, IntegrationPoint & to_ip,
-                                LocalHeap & lh, bool spacetime_mode = false, double from_ip_weight =0.)
+  int MapPatchIntegrationPoint(IntegrationPoint & from_ip, const ElementTransformation & from_trafo,
+                               const ElementTransformation & to_trafo, IntegrationPoint & to_ip,
+                               LocalHeap & lh, bool spacetime_mode = false, double from_ip_weight =0.)
   {
     // cout << " ------------------------------------------- " << endl;
     const int max_its = 200;
@@ -1183,6 +1371,176 @@ namespace ngfem
       if(spacetime_mode) to_ip.SetWeight(mip.GetMeasure() * from_ip_weight /w);
       else to_ip.SetWeight(mip.GetWeight()/w);
     }
+    return its;
+  }
+
+  // element transformations of both elements of the patch are affine, s.t.
+  // the map between the reference elements is affine as well. A deformation
+  // of the mesh (which is not visible in the element transformations) is
+  // only detected by CheckMappedPatchIntegrationPoint.
+  bool IsAffinePatch(const ElementTransformation & trafo1, const ElementTransformation & trafo2,
+                     bool deformed)
+  {
+    if (deformed)
+      return false;
+    for (auto trafo : { &trafo1, &trafo2 })
+    {
+      auto et = trafo->GetElementType();
+      if (!(et == ET_SEGM || et == ET_TRIG || et == ET_TET) || trafo->IsCurvedElement())
+        return false;
+    }
+    return true;
+  }
+
+  // closed form of MapPatchIntegrationPoint for affine element transformations:
+  // x_to = J_to^{-1} (J_from x_from + a_from - a_to)
+  class AffinePatchMap
+  {
+    int dim;
+    Mat<3,3> M;
+    Vec<3> b;
+
+    template<int D>
+    void Init(const ElementTransformation & from_trafo, const ElementTransformation & to_trafo)
+    {
+      IntegrationPoint ip0(0,0,0,0);
+      MappedIntegrationPoint<D,D> mip_from(ip0, from_trafo);
+      MappedIntegrationPoint<D,D> mip_to(ip0, to_trafo);
+      Mat<D,D> jacinv_to = Inv(mip_to.GetJacobian());
+      Mat<D,D> MD = jacinv_to * mip_from.GetJacobian();
+      Vec<D> bD = jacinv_to * (mip_from.GetPoint() - mip_to.GetPoint());
+      for (int i = 0; i < D; i++)
+      {
+        b(i) = bD(i);
+        for (int j = 0; j < D; j++)
+          M(i,j) = MD(i,j);
+      }
+    }
+  public:
+    AffinePatchMap(const ElementTransformation & from_trafo, const ElementTransformation & to_trafo)
+      : dim(from_trafo.SpaceDim())
+    {
+      M = 0.0;
+      b = 0.0;
+      if (dim == 2) Init<2>(from_trafo, to_trafo);
+      else Init<3>(from_trafo, to_trafo);
+    }
+
+    // only the coordinates of to_ip are set (cf. CheckMappedPatchIntegrationPoint)
+    void Map(const IntegrationPoint & from_ip, IntegrationPoint & to_ip) const
+    {
+      Vec<3> x_from;
+      x_from = 0.0;
+      for (int d = 0; d < dim; d++)
+        x_from(d) = from_ip(d);
+      Vec<3> x_to = M * x_from + b;
+      to_ip = IntegrationPoint(0,0,0,0);
+      for (int d = 0; d < dim; d++)
+        to_ip.Point()[d] = x_to(d);
+    }
+  };
+
+  // checks if the coordinates of to_ip (e.g. from the closed form or the cache)
+  // belong to the same physical point as from_ip w.r.t. the current element
+  // transformations (which include a deformation of the mesh) and sets the
+  // weight of to_ip as in MapPatchIntegrationPoint. Returns false if the points
+  // do not coincide.
+  template<int D>
+  bool CheckMappedPatchIntegrationPoint(const IntegrationPoint & from_ip, const ElementTransformation & from_trafo,
+                                        const ElementTransformation & to_trafo, IntegrationPoint & to_ip,
+                                        bool spacetime_mode = false, double from_ip_weight = 0.)
+  {
+    if (spacetime_mode)
+    {
+      to_ip.SetWeight(from_ip.Weight());
+      MarkAsSpaceTimeIntegrationPoint(to_ip);
+    }
+    MappedIntegrationPoint<D,D> mip_from(from_ip, from_trafo);
+    MappedIntegrationPoint<D,D> mip_to(to_ip, to_trafo);
+    const double h = pow(mip_from.GetMeasure(), 1.0/D);
+    if (L2Norm(mip_from.GetPoint() - mip_to.GetPoint()) > 1e-12 * h)
+      return false;
+    if (spacetime_mode) to_ip.SetWeight(mip_from.GetMeasure() * from_ip_weight / mip_to.GetMeasure());
+    else to_ip.SetWeight(mip_from.GetWeight() / mip_to.GetMeasure());
+    return true;
+  }
+
+  template <int D>
+  void SymbolicFacetPatchBilinearFormIntegrator ::
+  MapPatchIntegrationRules (const IntegrationRule & ir_vol1, const IntegrationRule & ir_vol2,
+                            int LocalFacetNr1,
+                            const ElementTransformation & trafo1,
+                            const ElementTransformation & trafo2,
+                            IntegrationRule & ir_patch1, IntegrationRule & ir_patch2,
+                            LocalHeap & lh) const
+  {
+    const int n1 = ir_vol1.Size();
+    const int n2 = ir_vol2.Size();
+
+    for (int l = 0; l < n1; l++)
+      ir_patch1[l] = ir_vol1[l];
+    for (int l = 0; l < n2; l++)
+      ir_patch2[n1+l] = ir_vol2[l];
+
+    // the closed form is only a candidate: on a deformed mesh the element
+    // transformations are not affine even if the undeformed ones are
+    const bool affine_patch = IsAffinePatch(trafo1, trafo2, GetDeformation() != nullptr);
+    if (affine_patch)
+    {
+      AffinePatchMap map12(trafo1, trafo2);
+      AffinePatchMap map21(trafo2, trafo1);
+      bool all_affine = true;
+      for (int l = 0; l < n1+n2 && all_affine; l++)
+      {
+        const bool from1 = l < n1;
+        IntegrationPoint & from_ip = from1 ? ir_patch1[l] : ir_patch2[l];
+        IntegrationPoint & to_ip = from1 ? ir_patch2[l] : ir_patch1[l];
+        (from1 ? map12 : map21).Map(from_ip, to_ip);
+        all_affine = CheckMappedPatchIntegrationPoint<D>(from_ip, from1 ? trafo1 : trafo2,
+                                                         from1 ? trafo2 : trafo1, to_ip);
+      }
+      if (all_affine)
+      {
+        n_affine_maps += n1+n2;
+        return;
+      }
+    }
+
+    const int el2 = trafo2.GetElementId().Nr();
+    const size_t key = 8*size_t(trafo1.GetElementId().Nr()) + LocalFacetNr1;
+    FlatArray<Vec<3>> cached_points = LookupPatchMap(key, el2, n1, n2, 0, lh);
+
+    // maps point l (from ir_vol1 for l < n1 and from ir_vol2 otherwise), the
+    // cached point is used if it coincides with the from point
+    auto map_point = [&] (int l)
+    {
+      HeapReset hr(lh);
+      const bool from1 = l < n1;
+      IntegrationPoint & from_ip = from1 ? ir_patch1[l] : ir_patch2[l];
+      IntegrationPoint & to_ip = from1 ? ir_patch2[l] : ir_patch1[l];
+      const ElementTransformation & from_trafo = from1 ? trafo1 : trafo2;
+      const ElementTransformation & to_trafo = from1 ? trafo2 : trafo1;
+
+      if (cached_points.Size() > 0)
+      {
+        to_ip = IntegrationPoint(cached_points[l](0), cached_points[l](1), cached_points[l](2), 0.);
+        if (CheckMappedPatchIntegrationPoint<D>(from_ip, from_trafo, to_trafo, to_ip))
+        {
+          n_cached_maps++;
+          return;
+        }
+      }
+      n_newton_its += MapPatchIntegrationPoint<D>(from_ip, from_trafo, to_trafo, to_ip, lh);
+      n_newton_maps++;
+    };
+
+    for (int l = 0; l < n1+n2; l++)
+      map_point(l);
+
+    FlatArray<Vec<3>> points(n1+n2, lh);
+    for (int l = 0; l < n1+n2; l++)
+      points[l] = l < n1 ? ir_patch2[l].Point() : ir_patch1[l].Point();
+    StorePatchMap(key, el2, n1, n2, 0, points);
   }
 
 
@@ -1223,22 +1581,83 @@ namespace ngfem
     //In the non-space time case, the result of the mapping to the other element does not depend on the time
     //Therefore it is sufficient to do it once here.
     if(time_order == -1){
+        if (D==2) MapPatchIntegrationRules<2>(ir_vol1, ir_vol2, LocalFacetNr1, trafo1, trafo2, ir_patch1, ir_patch2, lh);
+        else MapPatchIntegrationRules<3>(ir_vol1, ir_vol2, LocalFacetNr1, trafo1, trafo2, ir_patch1, ir_patch2, lh);
         for (int l = 0; l < ir_patch1.Size(); l++) {
-            if (l<ir_vol1.Size()) {
-                ir_patch1[l] = ir_vol1[l];
-                if (D==2) MapPatchIntegrationPoint<2>(ir_patch1[l], trafo1, trafo2 ,ir_patch2[l], lh);
-                else MapPatchIntegrationPoint<3>(ir_patch1[l], trafo1, trafo2 ,ir_patch2[l], lh);
-            }
-            else {
-                ir_patch2[l] = ir_vol2[l - ir_vol1.Size()];
-                if (D==2) MapPatchIntegrationPoint<2>(ir_patch2[l], trafo2, trafo1 ,ir_patch1[l], lh);
-                else MapPatchIntegrationPoint<3>(ir_patch2[l], trafo2, trafo1 ,ir_patch1[l], lh);
-            }
             ir_patch1[l].SetNr(l);
             ir_patch2[l].SetNr(l);
         }
     }
 
+    // for affine element transformations the closed form of the mapping is
+    // computed only once (it is still checked for every time, as a deformation
+    // of the mesh may depend on time)
+    const bool affine_patch = time_order >= 0 && IsAffinePatch(trafo1, trafo2, GetDeformation() != nullptr);
+    unique_ptr<AffinePatchMap> map12, map21;
+    if (affine_patch)
+    {
+      map12 = make_unique<AffinePatchMap>(trafo1, trafo2);
+      map21 = make_unique<AffinePatchMap>(trafo2, trafo1);
+    }
+
+    // otherwise the mapped points of all time integration points are cached
+    // per facet (point idx = i*(n1+n2)+j for time point i and patch point j)
+    const int n1 = ir_vol1.Size();
+    const int n2 = ir_vol2.Size();
+    const size_t key = 8*size_t(trafo1.GetElementId().Nr()) + LocalFacetNr1;
+    const int el2 = trafo2.GetElementId().Nr();
+    const int nt = time_order >= 0 ? SelectIntegrationRule(ET_SEGM, time_order).Size() : 0;
+    const bool cache_spacetime = time_order >= 0 && !affine_patch;
+    FlatArray<Vec<3>> st_cached_points(0, lh);
+    FlatArray<Vec<3>> st_points(0, lh);
+    if (cache_spacetime)
+    {
+      st_cached_points.Assign(LookupPatchMap(key, el2, n1, n2, nt, lh));
+      st_points.Assign(FlatArray<Vec<3>>(nt*(n1+n2), lh));
+    }
+
+    // maps tmp (a space-time integration point at the time of interest) from
+    // from_trafo to to_trafo, in closed form or from the cache if possible
+    auto map_spacetime_point = [&] (IntegrationPoint & tmp, double physical_weight,
+                                     const AffinePatchMap * map,
+                                     const ElementTransformation & from_trafo,
+                                     const ElementTransformation & to_trafo,
+                                     IntegrationPoint & to_ip, int idx)
+    {
+      auto check = [&] ()
+      {
+        return D==2 ? CheckMappedPatchIntegrationPoint<2>(tmp, from_trafo, to_trafo, to_ip, true, physical_weight)
+          : CheckMappedPatchIntegrationPoint<3>(tmp, from_trafo, to_trafo, to_ip, true, physical_weight);
+      };
+      if (map)
+      {
+        map->Map(tmp, to_ip);
+        if (check())
+        {
+          n_affine_maps++;
+          return;
+        }
+      }
+      if (st_cached_points.Size() > 0)
+      {
+        const Vec<3> & p = st_cached_points[idx];
+        to_ip = IntegrationPoint(p(0), p(1), p(2), 0.);
+        if (check())
+        {
+          n_cached_maps++;
+          st_points[idx] = p;
+          return;
+        }
+      }
+      int its;
+      if (D==2) its = MapPatchIntegrationPoint<2>(tmp, from_trafo, to_trafo, to_ip, lh, true, physical_weight);
+      else its = MapPatchIntegrationPoint<3>(tmp, from_trafo, to_trafo, to_ip, lh, true, physical_weight);
+      n_newton_its += its;
+      n_newton_maps++;
+      if (st_points.Size() > 0)
+        st_points[idx] = to_ip.Point();
+    };
+
     // cout << " ir_patch1 = " << ir_patch1 << endl;
     // cout << " ir_patch2 = " << ir_patch2 << endl;
     
@@ -1271,8 +1690,7 @@ namespace ngfem
             double physical_weight = tmp.Weight();
             tmp.SetWeight(tval);
             MarkAsSpaceTimeIntegrationPoint(tmp);
-            if (D==2) MapPatchIntegrationPoint<2>(tmp, trafo2, trafo1 ,ir_patch1[j], lh, true, physical_weight);
-            else MapPatchIntegrationPoint<3>(tmp, trafo2, trafo1 ,ir_patch1[j], lh, true, physical_weight);
+            map_spacetime_point(tmp, physical_weight, map21.get(), trafo2, trafo1, ir_patch1[j], ij);
           }
 
           ir_st1_wei_arr[ij] = ir_time[i].Weight() * ir_patch1[j].Weight();
@@ -1300,8 +1718,7 @@ namespace ngfem
             double physical_weight = tmp.Weight();
             tmp.SetWeight(tval);
             MarkAsSpaceTimeIntegrationPoint(tmp);
-            if (D==2) MapPatchIntegrationPoint<2>(tmp, trafo1, trafo2 ,ir_patch2[j], lh, true, physical_weight);
-            else MapPatchIntegrationPoint<3>(tmp, trafo1, trafo2 ,ir_patch2[j], lh, true, physical_weight);
+            map_spacetime_point(tmp, physical_weight, map12.get(), trafo1, trafo2, ir_patch2[j], ij);
           }
           else ir_patch2[j] = ir_vol2[j - ir_vol1.Size()];
 
@@ -1313,6 +1730,8 @@ namespace ngfem
           MarkAsSpaceTimeIntegrationPoint((*ir_spacetime2)[ij]);
         }
       }
+      if (cache_spacetime)
+        StorePatchMap(key, el2, n1, n2, nt, st_points);
       ir1 = ir_spacetime1;
       ir2 = ir_spacetime2;
       // cout << " *ir_spacetime1 = " << *ir_spacetime1 << endl;
@@ -1421,7 +1840,10 @@ namespace ngfem
     // no simd
 
     if (element_vb != VOL)
-        throw Exception ("Apply for EB not yet implemented");
+      {
+        ApplyElementMatrixEB (fel, trafo, elx, ely, lh);
+        return;
+      }
     
     static bool warned = false;
     if (!warned)
@@ -1444,7 +1866,7 @@ namespace ngfem
     int intorder = fel_trial.Order()+fel_test.Order();
 
     auto et = trafo.GetElementType();
-    if (et == ET_TRIG || et == ET_TET)
+    if (et == ET_SEGM || et == ET_TRIG || et == ET_TET)
       intorder -= test_difforder+trial_difforder;
 
     if (! (et == ET_SEGM || et == ET_TRIG || et == ET_TET || et == ET_QUAD || et == ET_HEX) )
@@ -1455,6 +1877,25 @@ namespace ngfem
     LevelsetIntegrationDomain lsetintdom_local(*lsetintdom);    
     if (lsetintdom_local.GetIntegrationOrder() < 0) // integration order shall not be enforced by lsetintdom
       lsetintdom_local.SetIntegrationOrder(intorder);
+
+    if (dispatch_uncut)
+      {
+        switch (ClassifyElementForLevelsetDomain(lsetintdom_local, trafo, lh))
+          {
+          case ELEMENT_OUTSIDE_DOMAIN:
+            ely = 0;
+            return;
+          case ELEMENT_INSIDE_DOMAIN:
+            if (lsetintdom->GetIntegrationOrder() < 0)
+              {
+                SymbolicBilinearFormIntegrator::ApplyElementMatrix (fel, trafo, elx, ely, precomputed, lh);
+                return;
+              }
+            break;
+          default:
+            break;
+          }
+      }
     
     const IntegrationRule * ir;
     Array<double> wei_arr;
@@ -1491,8 +1932,10 @@ namespace ngfem
         proxyvalues.Col(k) = val.Col(0);
       }
         
+      // the weights of the cut rule are not stored in the integration
+      // points (in space-time mode these contain the time)
       for (int i = 0; i < mir.Size(); i++)
-        proxyvalues.Row(i) *= mir[i].GetWeight();
+        proxyvalues.Row(i) *= mir[i].GetMeasure()*wei_arr[i];
 
       proxy->Evaluator()->ApplyTrans(fel_test, mir, proxyvalues, ely1, lh);
       ely += ely1;
@@ -1500,6 +1943,68 @@ namespace ngfem
     
   }
 
+  void SymbolicCutBilinearFormIntegrator ::
+  ApplyElementMatrixEB (const FiniteElement & fel, 
+                        const ElementTransformation & trafo, 
+                        const FlatVector<double> elx, 
+                        FlatVector<double> ely,
+                        LocalHeap & lh) const
+  {
+    // the (small) element matrix is set up on the fly, only the global matrix
+    // is never stored
+    HeapReset hr(lh);
+    FlatMatrix<> elmat(ely.Size(), elx.Size(), lh);
+    elmat = 0.0;
+    T_CalcElementMatrixEBAdd<double,double,double> (fel, trafo, elmat, lh);
+    ely = elmat * elx;
+  }
+
+  // the facet matrices are set up on the fly (see ApplyElementMatrixEB)
+  void SymbolicCutFacetBilinearFormIntegrator ::
+  ApplyFacetMatrix (const FiniteElement & fel1, int LocalFacetNr1,
+                    const ElementTransformation & trafo1, FlatArray<int> & ElVertices1,
+                    const FiniteElement & fel2, int LocalFacetNr2,
+                    const ElementTransformation & trafo2, FlatArray<int> & ElVertices2,
+                    FlatVector<double> elx, FlatVector<double> ely,
+                    LocalHeap & lh) const
+  {
+    HeapReset hr(lh);
+    FlatMatrix<> elmat(ely.Size(), elx.Size(), lh);
+    CalcFacetMatrix (fel1, LocalFacetNr1, trafo1, ElVertices1,
+                     fel2, LocalFacetNr2, trafo2, ElVertices2, elmat, lh);
+    ely = elmat * elx;
+  }
+
+  void SymbolicFacetBilinearFormIntegrator2 ::
+  ApplyFacetMatrix (const FiniteElement & fel1, int LocalFacetNr1,
+                    const ElementTransformation & trafo1, FlatArray<int> & ElVertices1,
+                    const FiniteElement & fel2, int LocalFacetNr2,
+                    const ElementTransformation & trafo2, FlatArray<int> & ElVertices2,
+                    FlatVector<double> elx, FlatVector<double> ely,
+                    LocalHeap & lh) const
+  {
+    HeapReset hr(lh);
+    FlatMatrix<> elmat(ely.Size(), elx.Size(), lh);
+    CalcFacetMatrix (fel1, LocalFacetNr1, trafo1, ElVertices1,
+                     fel2, LocalFacetNr2, trafo2, ElVertices2, elmat, lh);
+    ely = elmat * elx;
+  }
+
+  void SymbolicFacetPatchBilinearFormIntegrator ::
+  ApplyFacetMatrix (const FiniteElement & fel1, int LocalFacetNr1,
+                    const ElementTransformation & trafo1, FlatArray<int> & ElVertices1,
+                    const FiniteElement & fel2, int LocalFacetNr2,
+                    const ElementTransformation & trafo2, FlatArray<int> & ElVertices2,
+                    FlatVector<double> elx, FlatVector<double> ely,
+                    LocalHeap & lh) const
+  {
+    HeapReset hr(lh);
+    FlatMatrix<> elmat(ely.Size(), elx.Size(), lh);
+    CalcFacetMatrix (fel1, LocalFacetNr1, trafo1, ElVertices1,
+                     fel2, LocalFacetNr2, trafo2, ElVertices2, elmat, lh);
+    ely = elmat * elx;
+  }
+
 
 
   void SymbolicCutBilinearFormIntegrator ::
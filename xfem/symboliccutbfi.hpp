@@ -4,6 +4,7 @@
 #include <ngstd.hpp> // for Array
 
 #include "../cutint/xintegration.hpp"
+#include <unordered_map>
 using namespace xintegration;
 
 // #include "xfiniteelement.hpp"
@@ -17,6 +18,13 @@ namespace ngfem
   class SymbolicCutBilinearFormIntegrator : public SymbolicBilinearFormIntegrator
   {
     shared_ptr<LevelsetIntegrationDomain> lsetintdom = nullptr;    
+    // use SIMD evaluation on cut elements (switched off automatically if
+    // some part of the integrand does not support SIMD evaluation)
+    mutable bool cut_simd_evaluate = true;
+    // elements that are not cut are treated with the standard
+    // SymbolicBilinearFormIntegrator (if the integration order is not
+    // prescribed by the level set domain)
+    bool dispatch_uncut = true;
   public:
 
     SymbolicCutBilinearFormIntegrator (LevelsetIntegrationDomain & lsetintdom_in,
@@ -56,6 +64,30 @@ namespace ngfem
                                  FlatMatrix<SCAL_RES> elmat,
                                  LocalHeap & lh) const;
 
+    void SetCutSimdEvaluate (bool b) { cut_simd_evaluate = b; }
+    bool GetCutSimdEvaluate () const { return cut_simd_evaluate; }
+    void SetDispatchUncut (bool b) { dispatch_uncut = b; }
+    bool GetDispatchUncut () const { return dispatch_uncut; }
+
+    void CalcElementMatrixAddSIMD (const FiniteElement & fel_trial,
+                                   const FiniteElement & fel_test,
+                                   bool is_mixedfe,
+                                   const ElementTransformation & trafo,
+                                   const LevelsetIntegrationDomain & lsetintdom_local,
+                                   FlatMatrix<double> elmat,
+                                   LocalHeap & lh) const;
+
+    void CalcElementMatrixAddSIMD (const FiniteElement & fel_trial,
+                                   const FiniteElement & fel_test,
+                                   bool is_mixedfe,
+                                   const ElementTransformation & trafo,
+                                   const LevelsetIntegrationDomain & lsetintdom_local,
+                                   FlatMatrix<Complex> elmat,
+                                   LocalHeap & lh) const
+    {
+      throw ExceptionNOSIMD("SymbolicCutBFI: no SIMD evaluation for complex element matrices");
+    }
+
     template <typename SCAL, typename SCAL_SHAPES, typename SCAL_RES>
     void T_CalcElementMatrixEBAdd (const FiniteElement & fel,
                                    const ElementTransformation & trafo, 
@@ -88,16 +120,11 @@ namespace ngfem
 			LocalHeap & lh) const;
 
       
-    template <int D, typename SCAL, typename SCAL_SHAPES>
-    void T_ApplyElementMatrixEB (const FiniteElement & fel, 
-                                 const ElementTransformation & trafo, 
-                                 const FlatVector<double> elx, 
-                                 FlatVector<double> ely,
-                                 void * precomputed,
-                                 LocalHeap & lh) const
-    {
-      throw Exception("SymbolicCutBilinearFormIntegrator::T_ApplyElementMatrixEB not yet implemented");
-    }
+    void ApplyElementMatrixEB (const FiniteElement & fel, 
+                               const ElementTransformation & trafo, 
+                               const FlatVector<double> elx, 
+                               FlatVector<double> ely,
+                               LocalHeap & lh) const;
 
   };
   
@@ -145,11 +172,7 @@ namespace ngfem
                       const FiniteElement & volumefel2, int LocalFacetNr2,
                       const ElementTransformation & eltrans2, FlatArray<int> & ElVertices2,
                       FlatVector<double> elx, FlatVector<double> ely,
-                      LocalHeap & lh) const
-    {
-      throw Exception("SymbolicCutFacetBilinearFormIntegrator::ApplyFacetMatrix not yet implemented");
-    }
-
+                      LocalHeap & lh) const;
 
     virtual void
     ApplyFacetMatrix (const FiniteElement & volumefel, int LocalFacetNr,
@@ -202,11 +225,7 @@ namespace ngfem
                       const FiniteElement & volumefel2, int LocalFacetNr2,
                       const ElementTransformation & eltrans2, FlatArray<int> & ElVertices2,
                       FlatVector<double> elx, FlatVector<double> ely,
-                      LocalHeap & lh) const
-    {
-      throw Exception("SymbolicFacetBilinearFormIntegrator2::ApplyFacetMatrix not yet implemented");
-    }
-
+                      LocalHeap & lh) const;
 
     virtual void
     ApplyFacetMatrix (const FiniteElement & volumefel, int LocalFacetNr,
@@ -226,11 +245,57 @@ namespace ngfem
   protected:
     int force_intorder = -1;
     int time_order = -1;
+
+    // mapped integration points (reference coordinates w.r.t. the neighbor
+    // element) of a facet patch, stored per facet (and orientation) for
+    // non-affine element transformations. In space-time mode the points of
+    // all nt time integration points are stored. Cached points (as well as
+    // points from the closed form for affine elements) are checked against
+    // the current element transformations before they are used, so that a
+    // (changed) mesh deformation does not do any harm.
+    struct PatchMapEntry
+    {
+      int el2;
+      int n1, n2;
+      int nt; // 0 for spatial integrals
+      std::vector<Vec<3>> points;
+    };
+    static constexpr int N_LOCKS = 64;
+    mutable std::unordered_map<size_t,PatchMapEntry> patch_map_cache[N_LOCKS];
+    mutable std::mutex patch_map_mutex[N_LOCKS];
+
+    mutable std::atomic<size_t> n_newton_maps{0};
+    mutable std::atomic<size_t> n_newton_its{0};
+    mutable std::atomic<size_t> n_affine_maps{0};
+    mutable std::atomic<size_t> n_cached_maps{0};
+
+    // copy of the cached points of the facet patch (empty if there are none)
+    FlatArray<Vec<3>> LookupPatchMap (size_t key, int el2, int n1, int n2, int nt, LocalHeap & lh) const;
+    void StorePatchMap (size_t key, int el2, int n1, int n2, int nt, FlatArray<Vec<3>> points) const;
+
+    template <int D>
+    void MapPatchIntegrationRules (const IntegrationRule & ir_vol1, const IntegrationRule & ir_vol2,
+                                   int LocalFacetNr1,
+                                   const ElementTransformation & trafo1,
+                                   const ElementTransformation & trafo2,
+                                   IntegrationRule & ir_patch1, IntegrationRule & ir_patch2,
+                                   LocalHeap & lh) const;
   public:
     SymbolicFacetPatchBilinearFormIntegrator (shared_ptr<CoefficientFunction> acf,
                                           int aforce_intorder);
     void SetTimeIntegrationOrder(int tiorder) { time_order = tiorder; }
 
+    /// number of points mapped with the Newton iteration and total number of Newton iterations
+    size_t GetNNewtonMaps () const { return n_newton_maps; }
+    size_t GetNNewtonIterations () const { return n_newton_its; }
+    /// number of points mapped in closed form (affine element transformations)
+    size_t GetNAffineMaps () const { return n_affine_maps; }
+    /// number of points taken from the cache
+    size_t GetNCachedMaps () const { return n_cached_maps; }
+    void ResetPatchMapStatistics () const
+    { n_newton_maps = 0; n_newton_its = 0; n_affine_maps = 0; n_cached_maps = 0; }
+    void ClearPatchMapCache ();
+
     virtual VorB VB () const { return vb; }
     virtual xbool IsSymmetric() const { return maybe; }  // correct would be: don't know
     
@@ -261,11 +326,7 @@ namespace ngfem
                       const FiniteElement & volumefel2, int LocalFacetNr2,
                       const ElementTransformation & eltrans2, FlatArray<int> & ElVertices2,
                       FlatVector<double> elx, FlatVector<double> ely,
-                      LocalHeap & lh) const
-    {
-      throw Exception("SymbolicFacetPatchBilinearFormIntegrator::ApplyFacetMatrix not yet implemented");
-    }
-
+                      LocalHeap & lh) const;
 
     virtual void
     ApplyFacetMatrix (const FiniteElement & volumefel, int LocalFacetNr,
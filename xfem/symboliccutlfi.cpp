@@ -45,6 +45,40 @@ namespace ngfem
     T_CalcElementVector (fel, trafo, elvec, lh);
   }
   
+  void
+  SymbolicCutLinearFormIntegrator ::
+  CalcElementVectorSIMD (const FiniteElement & fel,
+                         const ElementTransformation & trafo,
+                         const LevelsetIntegrationDomain & lsetintdom_local,
+                         FlatVector<double> elvec,
+                         LocalHeap & lh) const
+  {
+    HeapReset hr(lh);
+    const SIMD_IntegrationRule * simd_ir = CreateSIMDCutIntegrationRule(lsetintdom_local, trafo, lh);
+    if (simd_ir == nullptr)
+      return;
+    SIMD_BaseMappedIntegrationRule & simd_mir = trafo(*simd_ir, lh);
+
+    ProxyUserData ud;
+    const_cast<ElementTransformation&>(trafo).userdata = &ud;
+
+    for (auto proxy : proxies)
+      {
+        HeapReset hr(lh);
+        FlatMatrix<SIMD<double>> proxyvalues(proxy->Dimension(), simd_ir->Size(), lh);
+        for (int k = 0; k < proxy->Dimension(); k++)
+          {
+            ud.testfunction = proxy;
+            ud.test_comp = k;
+            cf -> Evaluate (simd_mir, proxyvalues.Rows(k,k+1));
+          }
+        // padded points have zero weight
+        for (size_t i = 0; i < simd_mir.Size(); i++)
+          proxyvalues.Col(i) *= simd_mir[i].GetWeight();
+        proxy->Evaluator()->AddTrans(fel, simd_mir, proxyvalues, elvec);
+      }
+  }
+
   template <typename SCAL>
   void
   SymbolicCutLinearFormIntegrator ::
@@ -86,12 +120,51 @@ namespace ngfem
     LevelsetIntegrationDomain lsetintdom_local(lsetintdom);    
     if (lsetintdom_local.GetIntegrationOrder() < 0) // integration order shall not be enforced by lsetintdom
       lsetintdom_local.SetIntegrationOrder(2*fel.Order());
+
+    if (dispatch_uncut)
+      {
+        switch (ClassifyElementForLevelsetDomain(lsetintdom_local, trafo, lh))
+          {
+          case ELEMENT_OUTSIDE_DOMAIN:
+            elvec = 0;
+            return;
+          case ELEMENT_INSIDE_DOMAIN:
+            // the standard integrator uses the same (uncut) integration rule
+            // unless the order is prescribed by the level set domain
+            if (lsetintdom.GetIntegrationOrder() < 0)
+              {
+                SymbolicLinearFormIntegrator::CalcElementVector (fel, trafo, elvec, lh);
+                return;
+              }
+            break;
+          default:
+            break;
+          }
+      }
         
     ProxyUserData ud;
     const_cast<ElementTransformation&>(trafo).userdata = &ud;
 
     elvec = 0;
 
+    if (cut_simd_evaluate && is_same<SCAL,double>::value && !trafo.IsComplex()
+        && lsetintdom_local.GetTimeIntegrationOrder() < 0)
+      {
+        try
+          {
+            CalcElementVectorSIMD (fel, trafo, lsetintdom_local, elvec, lh);
+            return;
+          }
+        catch (ExceptionNOSIMD e)
+          {
+            cout << IM(6) << e.What() << endl
+                 << "switching to scalar evaluation in SymbolicCutLFI" << endl;
+            cut_simd_evaluate = false;
+            const_cast<ElementTransformation&>(trafo).userdata = &ud;
+            elvec = 0;
+          }
+      }
+
     const IntegrationRule * ir;
     Array<double> wei_arr;
     tie (ir, wei_arr) = CreateCutIntegrationRule(lsetintdom_local, trafo, lh);
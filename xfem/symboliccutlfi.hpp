@@ -13,6 +13,13 @@ namespace ngfem
   class SymbolicCutLinearFormIntegrator : public SymbolicLinearFormIntegrator
   {
     LevelsetIntegrationDomain lsetintdom;    
+    // use SIMD evaluation on cut elements (switched off automatically if
+    // some part of the integrand does not support SIMD evaluation)
+    mutable bool cut_simd_evaluate = true;
+    // elements that are not cut are treated with the standard
+    // SymbolicLinearFormIntegrator (if the integration order is not
+    // prescribed by the level set domain)
+    bool dispatch_uncut = true;
   public:
     SymbolicCutLinearFormIntegrator (LevelsetIntegrationDomain & lsetintdom_in,
                                      shared_ptr<CoefficientFunction> acf,
@@ -33,6 +40,26 @@ namespace ngfem
 		       FlatVector<Complex> elvec,
 		       LocalHeap & lh) const;
 
+    void SetCutSimdEvaluate (bool b) { cut_simd_evaluate = b; }
+    bool GetCutSimdEvaluate () const { return cut_simd_evaluate; }
+    void SetDispatchUncut (bool b) { dispatch_uncut = b; }
+    bool GetDispatchUncut () const { return dispatch_uncut; }
+
+    void CalcElementVectorSIMD (const FiniteElement & fel,
+                                const ElementTransformation & trafo,
+                                const LevelsetIntegrationDomain & lsetintdom_local,
+                                FlatVector<double> elvec,
+                                LocalHeap & lh) const;
+
+    void CalcElementVectorSIMD (const FiniteElement & fel,
+                                const ElementTransformation & trafo,
+                                const LevelsetIntegrationDomain & lsetintdom_local,
+                                FlatVector<Complex> elvec,
+                                LocalHeap & lh) const
+    {
+      throw ExceptionNOSIMD("SymbolicCutLFI: no SIMD evaluation for complex element vectors");
+    }
+
     template <typename SCAL> 
     void T_CalcElementVector (const FiniteElement & fel,
                               const ElementTransformation & trafo, 